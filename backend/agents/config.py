@@ -43,7 +43,7 @@ class AgentConfig(BaseModel):
     paper_mode: bool = True
     
     # Policy selection
-    policy: Literal["rule_based", "llm"] = "rule_based"
+    policy: Literal["rule_based", "llm", "ml"] = "rule_based"
     fallback_policy: Optional[Literal["rule_based", "llm"]] = Field(
         "rule_based",
         description="Fallback policy if primary fails"
@@ -53,6 +53,10 @@ class AgentConfig(BaseModel):
     llm: Optional[LLMConfig] = None
     llm_advanced: Optional[LLMAdvancedConfig] = None
     
+    # ML policy (only used if policy='ml'; reads model_bundle.npz written by ml.train)
+    ml_model_dir: str = "data/ml"
+    ml_p_entry: float = Field(0.6, ge=0.5, le=1.0, description="Probability needed to open (p_long) or close (p_short)")
+    
     # Risk limits
     max_exposure_pct: float = Field(50.0, ge=1.0, le=100.0, description="Max % of equity per symbol")
     max_total_exposure_pct: float = Field(95.0, ge=1.0, le=100.0, description="Total portfolio exposure")
@@ -68,9 +72,20 @@ class AgentConfig(BaseModel):
     
     # Data settings
     data_lookback_bars: int = Field(1000, ge=100, le=5000)
+    gap_fill_policy: Literal["ffill", "nan", "drop"] = Field(
+        "ffill",
+        description="Missing bars: flat bar at previous close, NaN prices, or leave the gap"
+    )
+    persist_flush_interval_secs: float = Field(1.0, gt=0, le=60, description="Candle DB write coalescing interval")
     
     # Execution
     loop_interval_secs: int = Field(2, ge=1, le=60, description="Seconds between decision cycles")
+    observe_max_workers: int = Field(8, ge=1, le=64, description="Threads used to fetch candles/tickers concurrently")
+    observe_timeout_secs: float = Field(5.0, gt=0, le=60, description="Per-symbol fetch timeout in the observe phase")
+    partial_result_policy: Literal["stale", "skip", "abort"] = Field(
+        "stale",
+        description="On symbol timeout: reuse last good data, drop the symbol, or observe nothing this cycle"
+    )
     initial_cash: float = Field(10000.0, ge=1000.0)
     
     # Fees (basis points)
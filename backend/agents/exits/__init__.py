@@ -7,6 +7,8 @@ Professional exit management with:
 - Breakeven automation
 - Trailing stops (ATR, Chandelier, Keltner, SuperTrend)
 - Regime-adaptive parameters
+- Per-position exit engine for the broker hot path
+- Struct-of-arrays plans for vectorized exit sweeps
 """
 
 from .regime_exit_plan import (
@@ -21,10 +23,21 @@ from .regime_exit_plan import (
     check_exits
 )
 
+from .exit_engine import ExitEngine
+from .exit_batch import (
+    ExitPlanBatch,
+    update_trailing_batch,
+    check_exits_batch,
+    simulate_exits,
+    exit_reason
+)
+
 from .regime_detector import (
     RegimeDetector,
     RegimeType,
+    detect_regime_series,
     get_swing_levels,
+    swing_level_series,
     build_context
 )
 
@@ -39,10 +52,18 @@ __all__ = [
     "build_exit_plan",
     "update_trailing_stop",
     "check_exits",
+    "ExitEngine",
+    "ExitPlanBatch",
+    "update_trailing_batch",
+    "check_exits_batch",
+    "simulate_exits",
+    "exit_reason",
     
     # Regime detection
     "RegimeDetector",
     "RegimeType",
+    "detect_regime_series",
     "get_swing_levels",
+    "swing_level_series",
     "build_context"
 ]
@@ -0,0 +1,440 @@
+"""
+Struct-of-Arrays Exit Plans
+
+ExitPlanBatch holds many ExitPlans as flat numpy arrays (one row per
+position, targets padded to the widest plan) so trailing updates and exit
+checks run for every open position in one call:
+
+- ExitPlanBatch.from_plans() / to_plans(): conversion to and from ExitPlan
+- update_trailing_batch(): vectorized update_trailing_stop()
+- check_exits_batch(): vectorized check_exits()
+- simulate_exits(): replay candidate entries over one bar series, with the
+  same partial-exit accounting and fees as PaperFuturesBrokerV2
+
+Rounding, precedence (time stop > targets > stop > primary TP) and target
+bookkeeping follow the scalar functions exactly.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .regime_exit_plan import ExitPlan, Target, Trailing
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+TRAIL_MODES = ["none", "atr", "chandelier", "supertrend", "keltner"]
+_TRAIL_CODES = {mode: code for code, mode in enumerate(TRAIL_MODES)}
+
+_RUNTIME_FIELDS = ("sl", "bars_in_trade", "breakeven_done", "highest", "lowest", "active", "target_hit")
+
+EXIT_NONE = 0
+EXIT_TIME_STOP = 1
+EXIT_TARGET = 2
+EXIT_STOP = 3
+EXIT_TP_FULL = 4
+
+
+def exit_reason(kind: int, target: int = -1) -> Optional[str]:
+    """Reason string used by check_exits()/the broker for an exit code"""
+    if kind == EXIT_TIME_STOP:
+        return "TIME_STOP"
+    if kind == EXIT_TARGET:
+        return f"TARGET_{target + 1}"
+    if kind == EXIT_STOP:
+        return "STOP"
+    if kind == EXIT_TP_FULL:
+        return "TP_FULL"
+    return None
+
+
+def _round_to_tick(px: np.ndarray, tick: float, up: bool) -> np.ndarray:
+    """Vectorized regime_exit_plan._round_to_tick (int() truncation included)"""
+    if not tick:
+        return px
+    return np.trunc(px / tick + (1 if up else 0)) * tick
+
+
+def _rows(values: ArrayLike, n: int) -> np.ndarray:
+    """Per-position values; scalars stay 0-d and broadcast in the arithmetic"""
+    values = np.asarray(values, dtype=float)
+    if values.ndim and values.shape != (n,):
+        raise ValueError(f"expected {n} values, got shape {values.shape}")
+    return values
+
+
+class ExitPlanBatch:
+    """
+    ExitPlans for P positions as arrays
+
+    Per position: side (+1/-1), entry, sl, tp_primary, R, trail_mode (index
+    into TRAIL_MODES), atr_mult, breakeven_at_R (NaN = off), keltner_mult,
+    offset, time_stop_bars (0 = off), cooldown_bars, bars_in_trade,
+    breakeven_done, highest, lowest, active.
+    Per position and target slot (P, K): target_rr, target_pct, target_price
+    (NaN = no target), target_hit.
+    """
+
+    def __init__(self, n: int, k: int):
+        self.side = np.zeros(n, dtype=np.int8)
+        self.entry = np.zeros(n)
+        self.sl = np.zeros(n)
+        self.tp_primary = np.zeros(n)
+        self.R = np.zeros(n)
+        self.trail_mode = np.zeros(n, dtype=np.int8)
+        self.atr_mult = np.zeros(n)
+        self.breakeven_at_R = np.full(n, np.nan)
+        self.keltner_mult = np.zeros(n)
+        self.offset = np.zeros(n)
+        self.time_stop_bars = np.zeros(n, dtype=np.int64)
+        self.cooldown_bars = np.zeros(n, dtype=np.int64)
+        self.bars_in_trade = np.zeros(n, dtype=np.int64)
+        self.breakeven_done = np.zeros(n, dtype=bool)
+        self.highest = np.zeros(n)
+        self.lowest = np.zeros(n)
+        self.active = np.ones(n, dtype=bool)
+
+        self.target_rr = np.full((n, k), np.nan)
+        self.target_pct = np.zeros((n, k))
+        self.target_price = np.full((n, k), np.nan)
+        self.target_hit = np.zeros((n, k), dtype=bool)
+
+    def __len__(self):
+        return len(self.side)
+
+    @classmethod
+    def from_plans(cls, plans: Sequence[ExitPlan]) -> "ExitPlanBatch":
+        """Pack ExitPlans (highest/lowest start at the entry price)"""
+        k = max((len(p.targets) for p in plans), default=0)
+        batch = cls(len(plans), k)
+        for i, p in enumerate(plans):
+            batch.side[i] = 1 if p.side == "LONG" else -1
+            batch.entry[i] = p.entry
+            batch.sl[i] = p.sl
+            batch.tp_primary[i] = p.tp_primary
+            batch.R[i] = p.R
+            batch.trail_mode[i] = _TRAIL_CODES.get(p.trailing.mode, 0)
+            batch.atr_mult[i] = p.trailing.atr_mult
+            if p.trailing.breakeven_at_R:
+                batch.breakeven_at_R[i] = p.trailing.breakeven_at_R
+            batch.keltner_mult[i] = p.trailing.keltner_mult
+            batch.offset[i] = p.trailing.offset
+            batch.time_stop_bars[i] = p.time_stop_bars or 0
+            batch.cooldown_bars[i] = p.cooldown_bars
+            batch.bars_in_trade[i] = p.bars_in_trade
+            batch.breakeven_done[i] = p.breakeven_done
+            for j, t in enumerate(p.targets):
+                batch.target_rr[i, j] = t.rr
+                batch.target_pct[i, j] = t.pct
+                batch.target_price[i, j] = t.price
+            for j in p.targets_hit:
+                batch.target_hit[i, j] = True
+        batch.highest[:] = batch.entry
+        batch.lowest[:] = batch.entry
+        return batch
+
+    def take(self, idx: np.ndarray) -> "ExitPlanBatch":
+        """Copy of the rows in idx"""
+        sub = ExitPlanBatch.__new__(ExitPlanBatch)
+        for name, values in vars(self).items():
+            setattr(sub, name, values[idx])
+        return sub
+
+    def put(self, idx: np.ndarray, sub: "ExitPlanBatch"):
+        """Write the runtime state of a take() copy back into rows idx"""
+        for name in _RUNTIME_FIELDS:
+            getattr(self, name)[idx] = getattr(sub, name)
+
+    def to_plans(self) -> List[ExitPlan]:
+        """Unpack into ExitPlans (targets_hit comes back in index order)"""
+        plans = []
+        for i in range(len(self)):
+            valid = ~np.isnan(self.target_price[i])
+            targets = [
+                Target(rr=float(self.target_rr[i, j]), pct=float(self.target_pct[i, j]),
+                       price=float(self.target_price[i, j]))
+                for j in np.flatnonzero(valid)
+            ]
+            be = self.breakeven_at_R[i]
+            trailing = Trailing(
+                mode=TRAIL_MODES[self.trail_mode[i]],
+                atr_mult=float(self.atr_mult[i]),
+                breakeven_at_R=None if np.isnan(be) else float(be),
+                keltner_mult=float(self.keltner_mult[i]),
+                offset=float(self.offset[i]),
+            )
+            plans.append(ExitPlan(
+                side="LONG" if self.side[i] > 0 else "SHORT",
+                entry=float(self.entry[i]),
+                sl=float(self.sl[i]),
+                tp_primary=float(self.tp_primary[i]),
+                R=float(self.R[i]),
+                targets=targets,
+                trailing=trailing,
+                time_stop_bars=int(self.time_stop_bars[i]) or None,
+                cooldown_bars=int(self.cooldown_bars[i]),
+                bars_in_trade=int(self.bars_in_trade[i]),
+                breakeven_done=bool(self.breakeven_done[i]),
+                targets_hit=[int(j) for j in np.flatnonzero(self.target_hit[i])],
+            ))
+        return plans
+
+
+def update_trailing_batch(
+    batch: ExitPlanBatch,
+    close: ArrayLike,
+    atr: ArrayLike,
+    tick_size: float = 0.01,
+    supertrend: Optional[ArrayLike] = None,
+    keltner_lo: Optional[ArrayLike] = None,
+    keltner_up: Optional[ArrayLike] = None,
+    mask: Optional[np.ndarray] = None
+):
+    """
+    Breakeven and trailing-stop update for every active position
+
+    Uses batch.highest/lowest as highest/lowest_since_entry. NaN supertrend
+    or keltner values count as missing (the scalar path skips None).
+    """
+    n = len(batch)
+    rows = batch.active if mask is None else (batch.active & mask)
+    close = _rows(close, n)
+    atr = _rows(atr, n)
+    long = batch.side > 0
+
+    # === Breakeven trigger ===
+    be_R = batch.breakeven_at_R
+    pending = rows & ~np.isnan(be_R) & (be_R != 0) & ~batch.breakeven_done
+    if pending.any():
+        R = batch.R
+        with np.errstate(divide="ignore", invalid="ignore"):
+            profit_R = np.where(R > 0, np.where(long, close - batch.entry, batch.entry - close) / R, 0.0)
+        trigger = pending & (profit_R >= be_R)
+        if trigger.any():
+            be_long = _round_to_tick(batch.entry, tick_size, up=False)
+            be_short = _round_to_tick(batch.entry, tick_size, up=True)
+            batch.sl = np.where(trigger & long, np.maximum(batch.sl, be_long), batch.sl)
+            batch.sl = np.where(trigger & ~long, np.minimum(batch.sl, be_short), batch.sl)
+            batch.breakeven_done |= trigger
+
+    # === Trailing level ===
+    mode = batch.trail_mode
+    trail = np.full(n, np.nan)
+
+    atr_like = rows & ((mode == 1) | (mode == 2))
+    trail = np.where(atr_like & long, batch.highest - batch.atr_mult * atr, trail)
+    trail = np.where(atr_like & ~long, batch.lowest + batch.atr_mult * atr, trail)
+
+    if supertrend is not None:
+        st = _rows(supertrend, n)
+        st_rows = rows & (mode == 3)
+        trail = np.where(st_rows & long, st - batch.offset, trail)
+        trail = np.where(st_rows & ~long, st + batch.offset, trail)
+
+    kel_rows = rows & (mode == 4)
+    if keltner_lo is not None:
+        trail = np.where(kel_rows & long, _rows(keltner_lo, n) - batch.atr_mult * 0.5 * atr, trail)
+    if keltner_up is not None:
+        trail = np.where(kel_rows & ~long, _rows(keltner_up, n) + batch.atr_mult * 0.5 * atr, trail)
+
+    has = ~np.isnan(trail)
+    if has.any():
+        with np.errstate(invalid="ignore"):
+            up = _round_to_tick(trail, tick_size, up=True)
+            down = _round_to_tick(trail, tick_size, up=False)
+        batch.sl = np.where(has & long, np.maximum(batch.sl, down), batch.sl)
+        batch.sl = np.where(has & ~long, np.minimum(batch.sl, up), batch.sl)
+
+
+def check_exits_batch(
+    batch: ExitPlanBatch,
+    close: ArrayLike,
+    high: ArrayLike,
+    low: ArrayLike,
+    mask: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Resolve exits for all active positions
+
+    Marks hit targets in batch.target_hit (like check_exits appends to
+    targets_hit).
+
+    Returns:
+        (kind, price, pct, target) arrays: kind is an EXIT_* code, pct is the
+        partial size for targets (NaN otherwise), target the target index (-1)
+    """
+    n = len(batch)
+    rows = batch.active if mask is None else (batch.active & mask)
+    close = _rows(close, n)
+    high = _rows(high, n)
+    low = _rows(low, n)
+    long = batch.side > 0
+
+    kind = np.zeros(n, dtype=np.int8)
+    price = np.full(n, np.nan)
+    pct = np.full(n, np.nan)
+    target = np.full(n, -1, dtype=np.int64)
+
+    # === Time stop ===
+    hit = rows & (batch.time_stop_bars > 0) & (batch.bars_in_trade >= batch.time_stop_bars)
+    kind[hit] = EXIT_TIME_STOP
+    price = np.where(hit, close, price)
+    open_rows = rows & ~hit
+
+    # === Targets (first unhit in order) ===
+    if batch.target_price.shape[1] and open_rows.any():
+        tp = batch.target_price
+        with np.errstate(invalid="ignore"):
+            reached = np.where(long[:, None], high[..., None] >= tp, low[..., None] <= tp)
+        reached &= ~batch.target_hit & open_rows[:, None]
+        any_hit = reached.any(axis=1)
+        if any_hit.any():
+            idx = np.flatnonzero(any_hit)
+            first = reached[idx].argmax(axis=1)
+            batch.target_hit[idx, first] = True
+            kind[idx] = EXIT_TARGET
+            price[idx] = tp[idx, first]
+            pct[idx] = batch.target_pct[idx, first]
+            target[idx] = first
+            open_rows &= ~any_hit
+
+    # === Stop loss ===
+    hit = open_rows & np.where(long, low <= batch.sl, high >= batch.sl)
+    kind[hit] = EXIT_STOP
+    price[hit] = batch.sl[hit]
+    open_rows &= ~hit
+
+    # === Primary TP ===
+    hit = open_rows & np.where(long, high >= batch.tp_primary, low <= batch.tp_primary)
+    kind[hit] = EXIT_TP_FULL
+    price[hit] = batch.tp_primary[hit]
+
+    return kind, price, pct, target
+
+
+def simulate_exits(
+    batch: ExitPlanBatch,
+    high: Sequence[float],
+    low: Sequence[float],
+    close: Sequence[float],
+    atr: Sequence[float],
+    entry_idx: Sequence[int],
+    qty: Optional[ArrayLike] = None,
+    taker_fee_bps: float = 5.0,
+    tick_size: float = 0.1,
+    supertrend: Optional[Sequence[float]] = None,
+    keltner_lo: Optional[Sequence[float]] = None,
+    keltner_up: Optional[Sequence[float]] = None,
+    close_at_end: bool = False
+) -> Dict[str, Any]:
+    """
+    Run every position in the batch from its entry bar over one bar series
+
+    Position p enters at close[entry_idx[p]] and is first checked on the next
+    bar. Fills, partial sizing and fees match PaperFuturesBrokerV2 with one
+    position per run (tick 0.1 by default, as in the broker).
+
+    Returns:
+        pnl (net of fees), exit_idx (-1 while open), exit_kind, exit_target,
+        fills (number of exit fills) and remaining qty, one entry per position
+    """
+    n = len(batch)
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    atr = np.asarray(atr, dtype=float)
+    entry_idx = np.asarray(entry_idx, dtype=np.int64)
+    series = [np.asarray(s, dtype=float) if s is not None else None for s in (supertrend, keltner_lo, keltner_up)]
+    fee_rate = taker_fee_bps / 10000.0
+
+    remaining = np.ones(n) if qty is None else np.array(np.broadcast_to(_rows(qty, n), (n,)))
+    pnl = np.zeros(n)
+    exit_idx = np.full(n, -1, dtype=np.int64)
+    exit_kind = np.zeros(n, dtype=np.int8)
+    exit_target = np.full(n, -1, dtype=np.int64)
+    fills = np.zeros(n, dtype=np.int64)
+
+    # Positions are simulated on a compacted copy of the live rows, rebuilt
+    # only when positions enter or leave
+    order = np.argsort(entry_idx, kind="stable")
+    order = order[batch.active[order]]
+    cursor = 0
+    live = np.zeros(0, dtype=np.int64)
+    work = batch.take(live)
+    sign = w_rem = w_pnl = w_fills = np.zeros(0)
+
+    t = int(entry_idx[order[0]]) + 1 if len(order) else len(close)
+    while t < len(close):
+        if cursor < len(order) and entry_idx[order[cursor]] < t:
+            stop = cursor
+            while stop < len(order) and entry_idx[order[stop]] < t:
+                stop += 1
+            batch.put(live, work)
+            remaining[live], pnl[live], fills[live] = w_rem, w_pnl, w_fills
+            live = np.concatenate([live, order[cursor:stop]])
+            cursor = stop
+            work = batch.take(live)
+            sign = work.side.astype(float)
+            w_rem, w_pnl, w_fills = remaining[live], pnl[live], fills[live]
+
+        if not len(live):
+            if cursor >= len(order):
+                break
+            t = int(entry_idx[order[cursor]]) + 1
+            continue
+
+        h, l, c = high[t], low[t], close[t]
+        np.maximum(work.highest, h, out=work.highest)
+        np.minimum(work.lowest, l, out=work.lowest)
+        work.bars_in_trade += 1
+
+        st, klo, kup = (s[t] if s is not None else None for s in series)
+        update_trailing_batch(work, c, atr[t], tick_size, st, klo, kup)
+        kind, price, pct, target = check_exits_batch(work, c, h, l)
+
+        filled = kind != EXIT_NONE
+        if filled.any():
+            partial = (kind == EXIT_TARGET) & (pct > 0)
+            closed_qty = np.where(partial, w_rem * np.where(partial, pct, 0.0), np.where(filled, w_rem, 0.0))
+            with np.errstate(invalid="ignore"):
+                net = sign * (price - work.entry) * closed_qty \
+                    - np.abs(work.entry * closed_qty + price * closed_qty) * fee_rate
+            w_pnl = np.where(filled, w_pnl + net, w_pnl)
+            w_rem = w_rem - closed_qty
+            w_fills = w_fills + filled
+
+            done = filled & (~partial | (w_rem <= 0.0001))
+            if done.any():
+                gone = live[done]
+                exit_idx[gone] = t
+                exit_kind[gone] = kind[done]
+                exit_target[gone] = target[done]
+                work.active[done] = False
+                batch.put(live, work)
+                remaining[live], pnl[live], fills[live] = w_rem, w_pnl, w_fills
+                keep = ~done
+                live = live[keep]
+                work = work.take(keep)
+                sign, w_rem, w_pnl, w_fills = sign[keep], w_rem[keep], w_pnl[keep], w_fills[keep]
+        t += 1
+
+    batch.put(live, work)
+    remaining[live], pnl[live], fills[live] = w_rem, w_pnl, w_fills
+
+    if close_at_end and len(live):
+        c = close[-1]
+        q = remaining[live]
+        entry = batch.entry[live]
+        pnl[live] += batch.side[live] * (c - entry) * q - np.abs(entry * q + c * q) * fee_rate
+        exit_idx[live] = len(close) - 1
+        remaining[live] = 0.0
+        batch.active[live] = False
+
+    return {
+        "pnl": pnl,
+        "exit_idx": exit_idx,
+        "exit_kind": exit_kind,
+        "exit_target": exit_target,
+        "fills": fills,
+        "remaining": remaining,
+    }
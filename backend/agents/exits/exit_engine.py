@@ -0,0 +1,181 @@
+"""
+Per-Position Exit Engine
+
+Runs an ExitPlan bar by bar without rebuilding context dicts or re-reading
+dataclass attributes: the plan is unpacked once into slots when the position
+opens, and step() only does float arithmetic. Behaviour matches
+update_trailing_stop() followed by check_exits() exactly (same tick rounding,
+same target/stop/TP precedence).
+"""
+
+from typing import Optional
+
+from .regime_exit_plan import ExitPlan
+
+_MODES = {"none": 0, "atr": 1, "chandelier": 1, "supertrend": 2, "keltner": 3}
+
+TIME_STOP = "TIME_STOP"
+STOP = "STOP"
+TP_FULL = "TP_FULL"
+
+
+class ExitEngine:
+    """
+    Stateful exit evaluator for one open position
+
+    step() returns the exit reason (or None) and leaves the fill in
+    `exit_price` / `exit_pct` (pct is None for full exits). Call sync() to
+    write the runtime state back into the ExitPlan (targets_hit is kept
+    current as targets fill).
+    """
+
+    __slots__ = (
+        "plan", "is_long", "entry", "sl", "tp", "R", "tick",
+        "mode", "atr_mult", "keltner_atr", "offset", "breakeven_at_R",
+        "breakeven_done", "be_price", "time_stop_bars", "bars_in_trade",
+        "highest", "lowest", "target_prices", "target_pcts", "target_reasons",
+        "target_hit", "targets_left", "exit_price", "exit_pct",
+    )
+
+    def __init__(self, plan: ExitPlan, tick_size: float = 0.1, highest: Optional[float] = None,
+                 lowest: Optional[float] = None):
+        self.plan = plan
+        self.is_long = plan.side == "LONG"
+        self.entry = plan.entry
+        self.sl = plan.sl
+        self.tp = plan.tp_primary
+        self.R = plan.R
+        self.tick = tick_size
+
+        trailing = plan.trailing
+        self.mode = _MODES.get(trailing.mode, -1)
+        self.atr_mult = trailing.atr_mult
+        self.keltner_atr = trailing.atr_mult * 0.5
+        self.offset = trailing.offset
+        self.breakeven_at_R = trailing.breakeven_at_R
+        self.breakeven_done = plan.breakeven_done
+        self.be_price = self._round(plan.entry, up=not self.is_long)
+
+        self.time_stop_bars = plan.time_stop_bars
+        self.bars_in_trade = plan.bars_in_trade
+        self.highest = plan.entry if highest is None else highest
+        self.lowest = plan.entry if lowest is None else lowest
+
+        self.target_prices = tuple(t.price for t in plan.targets)
+        self.target_pcts = tuple(t.pct for t in plan.targets)
+        self.target_reasons = tuple(f"TARGET_{i+1}" for i in range(len(plan.targets)))
+        self.target_hit = [i in plan.targets_hit for i in range(len(plan.targets))]
+        self.targets_left = self.target_hit.count(False)
+
+        self.exit_price = 0.0
+        self.exit_pct: Optional[float] = None
+
+    def _round(self, px: float, up: bool) -> float:
+        tick = self.tick
+        if not tick:
+            return px
+        return int(px / tick + (1 if up else 0)) * tick
+
+    def step(
+        self,
+        high: float,
+        low: float,
+        close: float,
+        atr: float,
+        st_line: Optional[float] = None,
+        kel_lo: Optional[float] = None,
+        kel_up: Optional[float] = None
+    ) -> Optional[str]:
+        """Advance one bar: trail the stop, then check time stop, targets, SL, TP"""
+        self.bars_in_trade += 1
+        if high > self.highest:
+            self.highest = high
+        if low < self.lowest:
+            self.lowest = low
+
+        is_long = self.is_long
+        tick = self.tick
+
+        # === Breakeven ===
+        if self.breakeven_at_R and not self.breakeven_done:
+            R = self.R
+            if R > 0:
+                profit_R = (close - self.entry) / R if is_long else (self.entry - close) / R
+            else:
+                profit_R = 0
+            if profit_R >= self.breakeven_at_R:
+                if is_long:
+                    if self.be_price > self.sl:
+                        self.sl = self.be_price
+                elif self.be_price < self.sl:
+                    self.sl = self.be_price
+                self.breakeven_done = True
+
+        # === Trailing ===
+        mode = self.mode
+        if mode > 0:
+            trail = None
+            if mode == 1:
+                trail = self.highest - self.atr_mult * atr if is_long else self.lowest + self.atr_mult * atr
+            elif mode == 2:
+                if st_line is not None:
+                    trail = st_line - self.offset if is_long else st_line + self.offset
+            elif is_long:
+                if kel_lo is not None:
+                    trail = kel_lo - self.keltner_atr * atr
+            elif kel_up is not None:
+                trail = kel_up + self.keltner_atr * atr
+
+            if trail is not None:
+                if is_long:
+                    if tick:
+                        trail = int(trail / tick) * tick
+                    if trail > self.sl:
+                        self.sl = trail
+                else:
+                    if tick:
+                        trail = int(trail / tick + 1) * tick
+                    if trail < self.sl:
+                        self.sl = trail
+
+        # === Time stop ===
+        if self.time_stop_bars and self.bars_in_trade >= self.time_stop_bars:
+            self.exit_price = close
+            self.exit_pct = None
+            return TIME_STOP
+
+        # === Targets (partial exits) ===
+        if self.targets_left:
+            hit = self.target_hit
+            for i, price in enumerate(self.target_prices):
+                if hit[i]:
+                    continue
+                if (high >= price) if is_long else (low <= price):
+                    hit[i] = True
+                    self.targets_left -= 1
+                    self.plan.targets_hit.append(i)
+                    self.exit_price = price
+                    self.exit_pct = self.target_pcts[i]
+                    return self.target_reasons[i]
+
+        # === Stop loss ===
+        if (low <= self.sl) if is_long else (high >= self.sl):
+            self.exit_price = self.sl
+            self.exit_pct = None
+            return STOP
+
+        # === Primary TP ===
+        if (high >= self.tp) if is_long else (low <= self.tp):
+            self.exit_price = self.tp
+            self.exit_pct = None
+            return TP_FULL
+
+        return None
+
+    def sync(self) -> ExitPlan:
+        """Write runtime state (sl, bars, breakeven) back into the plan"""
+        plan = self.plan
+        plan.sl = self.sl
+        plan.bars_in_trade = self.bars_in_trade
+        plan.breakeven_done = self.breakeven_done
+        return plan
@@ -6,10 +6,17 @@ Detects market regime to adapt exit parameters:
 - RANGE: ADX < 20, Bollinger squeeze
 - HIGH_VOL: ATR in top 20% of recent range
 - LOW_VOL: ATR in bottom 20% of recent range
+
+Three ways to run it:
+- detect() / detect_simple(): one bar from full history (stateless)
+- update(): per-bar streaming with a rolling sorted ATR window, O(log window)
+- detect_regime_series(): whole series in one vectorized pass
 """
 
-from typing import List, Literal, Optional
+from collections import deque
+from typing import List, Literal, Optional, Sequence
 import numpy as np
+from sortedcontainers import SortedList
 
 RegimeType = Literal["trend", "range", "high_vol", "low_vol"]
 
@@ -21,6 +28,70 @@ class RegimeDetector:
     
     def __init__(self, lookback_bars: int = 100):
         self.lookback_bars = lookback_bars
+        self.reset()
+    
+    def reset(self):
+        """Clear the streaming ATR window"""
+        self._atr_window = deque()
+        self._atr_sorted = SortedList()
+        self._atr_nan = 0
+    
+    def update(
+        self,
+        adx: float,
+        atr: float,
+        close: float,
+        ema200: Optional[float] = None
+    ) -> RegimeType:
+        """
+        Push the next bar and classify it
+        
+        Gives the same answer as detect()/detect_simple() over the last
+        lookback_bars + 1 ATR values (the Bollinger squeeze branch of detect()
+        always resolves to "range", so bands are not needed here).
+        """
+        window = self._atr_window
+        window.append(atr)
+        if atr != atr:
+            self._atr_nan += 1
+        else:
+            self._atr_sorted.add(atr)
+        
+        if len(window) > self.lookback_bars + 1:
+            old = window.popleft()
+            if old != old:
+                self._atr_nan -= 1
+            else:
+                self._atr_sorted.remove(old)
+        
+        if len(window) > 10:
+            # Same rank as _calculate_percentile: count of values <= current (NaN never counts)
+            rank = self._atr_sorted.bisect_right(atr) if atr == atr else 0
+            atr_pct = (rank / len(window)) * 100
+            
+            if atr_pct >= 80:
+                return "high_vol"
+            elif atr_pct <= 20:
+                return "low_vol"
+        
+        if adx >= 25:
+            if ema200:
+                if abs(close - ema200) / ema200 > 0.02:
+                    return "trend"
+            else:
+                return "trend"
+        
+        return "range"
+    
+    def detect_series(
+        self,
+        adx: Sequence[float],
+        atr: Sequence[float],
+        close: Sequence[float],
+        ema200: Optional[Sequence[float]] = None
+    ) -> np.ndarray:
+        """Classify every bar of a series (see detect_regime_series)"""
+        return detect_regime_series(adx, atr, close, ema200, self.lookback_bars)
     
     def detect(
         self,
@@ -173,6 +244,57 @@ class RegimeDetector:
         return "range"
 
 
+def detect_regime_series(
+    adx: Sequence[float],
+    atr: Sequence[float],
+    close: Sequence[float],
+    ema200: Optional[Sequence[float]] = None,
+    lookback_bars: int = 100,
+    chunk: int = 65536
+) -> np.ndarray:
+    """
+    Vectorized regime for every bar
+    
+    Bar i gets the regime RegimeDetector.update() returns after being fed
+    bars 0..i, i.e. detect(current_idx=i) / detect_simple() with
+    atr_history = atr[max(0, i - lookback_bars): i + 1].
+    
+    Returns:
+        Array of regime strings, one per bar
+    """
+    adx = np.asarray(adx, dtype=float)
+    atr = np.asarray(atr, dtype=float)
+    close = np.asarray(close, dtype=float)
+    n = len(atr)
+    w = lookback_bars + 1
+    
+    # Percentile rank of each ATR within its trailing window (NaN padding never counts)
+    padded = np.concatenate([np.full(w - 1, np.nan), atr])
+    windows = np.lib.stride_tricks.sliding_window_view(padded, w)
+    rank = np.empty(n, dtype=np.int64)
+    for start in range(0, n, chunk):
+        stop = min(start + chunk, n)
+        with np.errstate(invalid="ignore"):
+            rank[start:stop] = (windows[start:stop] <= atr[start:stop, None]).sum(axis=1)
+    size = np.minimum(np.arange(n), lookback_bars) + 1
+    atr_pct = (rank / size) * 100
+    has_history = size > 10
+    
+    trend = adx >= 25
+    if ema200 is not None:
+        ema = np.asarray(ema200, dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            away = np.abs(close - ema) / ema > 0.02
+        # detect_simple skips the EMA filter when the EMA is falsy (0)
+        trend &= (ema == 0) | away
+    
+    return np.select(
+        [has_history & (atr_pct >= 80), has_history & (atr_pct <= 20), trend],
+        ["high_vol", "low_vol", "trend"],
+        default="range"
+    )
+
+
 def get_swing_levels(
     high: List[float],
     low: List[float],
@@ -212,6 +334,35 @@ def get_swing_levels(
     return (swing_low, swing_high)
 
 
+def swing_level_series(
+    high: Sequence[float],
+    low: Sequence[float],
+    lookback: int = 20
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    get_swing_levels() for every bar at once
+    
+    Rolling min of lows / max of highs over bars [i - lookback, i], computed
+    once per dataset so each entry is an O(1) lookup.
+    
+    Returns:
+        (swing_low, swing_high) arrays, NaN where i < lookback
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    n = len(high)
+    swing_low = np.full(n, np.nan)
+    swing_high = np.full(n, np.nan)
+    
+    w = lookback + 1
+    if n >= w:
+        windows = np.lib.stride_tricks.sliding_window_view
+        swing_high[lookback:] = windows(high, w).max(axis=1)
+        swing_low[lookback:] = windows(low, w).min(axis=1)
+    
+    return swing_low, swing_high
+
+
 def build_context(
     high: float,
     low: float,
@@ -0,0 +1,115 @@
+"""
+MLP policy using the numpy model bundle exported by ml/train.py
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from .base import Policy
+from ..schemas import Observation, Action, ActionIntent, ActionOrder, OrderSide, OrderType, Candle
+from core.features import compute_feature_rows
+from ml.bundle import load_bundle
+from ml.inference import build_feature_matrix
+
+
+class MLPolicy(Policy):
+    """
+    Long-only policy driven by the trained MLP
+
+    Opens when p_long >= p_entry and closes when p_short >= p_entry. The
+    forward pass is plain numpy (ml.bundle), so the agent never imports torch.
+
+    The decision loop runs many times per bar, so the last bar's feature row
+    is cached per symbol and only recomputed when the window changes (new
+    bar, or the last bar's close moved).
+    """
+    
+    def __init__(self, model_dir: str = "data/ml", p_entry: float = 0.6,
+                 position_size: float = 1000.0, min_bars: int = 60):
+        super().__init__()
+        try:
+            self.bundle = load_bundle(model_dir)
+        except FileNotFoundError as e:
+            raise FileNotFoundError(f"No model bundle in {model_dir}; export it with: python -m ml.bundle --model-dir {model_dir}") from e
+        self.p_entry = p_entry
+        self.position_size = position_size
+        self.min_bars = min_bars
+        self._feature_cache: Dict[str, tuple] = {}
+    
+    def decide(self, observation: Observation) -> Action:
+        """Make decision based on the model's [p_long, p_short] for the last bar"""
+        
+        orders = []
+        intent = ActionIntent.HOLD
+        notes = []
+        confidence = 0.0
+        
+        for symbol, candles in observation.candles.items():
+            if len(candles) < self.min_bars:
+                continue
+            
+            p_long, p_short = self.probabilities(candles, symbol)
+            has_position = any(p.symbol == symbol for p in observation.portfolio.positions)
+            
+            if p_long >= self.p_entry and not has_position:
+                current_price = candles[-1].close
+                orders.append(ActionOrder(
+                    symbol=symbol,
+                    side=OrderSide.BUY,
+                    type=OrderType.MARKET,
+                    quantity=self.position_size / current_price
+                ))
+                intent = ActionIntent.OPEN_LONG
+                confidence = max(confidence, p_long)
+                notes.append(f"BUY {symbol} (pL={p_long:.2f})")
+            
+            elif p_short >= self.p_entry and has_position:
+                position = next(p for p in observation.portfolio.positions if p.symbol == symbol)
+                orders.append(ActionOrder(
+                    symbol=symbol,
+                    side=OrderSide.SELL,
+                    type=OrderType.MARKET,
+                    quantity=position.quantity
+                ))
+                intent = ActionIntent.CLOSE_LONG
+                confidence = max(confidence, p_short)
+                notes.append(f"SELL {symbol} (pS={p_short:.2f})")
+        
+        return Action(
+            timestamp=observation.timestamp,
+            intent=intent,
+            orders=orders,
+            notes="; ".join(notes) if notes else "No signals",
+            confidence=confidence if orders else 1.0
+        )
+    
+    def probabilities(self, candles: List[Candle], symbol: Optional[str] = None) -> Tuple[float, float]:
+        """
+        Model output for the last candle (features over the whole window; NaN while warming up)
+
+        With `symbol` the feature row is cached until the window changes.
+        """
+        key = (len(candles), candles[0].ts, candles[-1].ts, candles[-1].close)
+        cached = self._feature_cache.get(symbol) if symbol is not None else None
+        if cached is not None and cached[0] == key:
+            X = cached[1]
+        else:
+            X = self._last_feature_row(candles)
+            if symbol is not None:
+                self._feature_cache[symbol] = (key, X)
+        p_long, p_short = self.bundle.predict_proba(X)[0]
+        return float(p_long), float(p_short)
+    
+    @staticmethod
+    def _last_feature_row(candles: List[Candle]):
+        ts = [k.ts // 1000 for k in candles]  # features use epoch seconds
+        o = [k.open for k in candles]
+        h = [k.high for k in candles]
+        l = [k.low for k in candles]
+        c = [k.close for k in candles]
+        v = [k.volume for k in candles]
+        rows = compute_feature_rows(ts, o, h, l, c, v)
+        return build_feature_matrix(rows[-1:], c[-1:])
+    
+    def reset(self):
+        """Reset policy state (drops the cached feature rows)"""
+        self._feature_cache.clear()
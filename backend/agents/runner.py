@@ -8,7 +8,8 @@ import argparse
 import json
 import pandas as pd
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 import numpy as np
 import json
 import pandas as pd
@@ -20,13 +21,14 @@ from .tools.portfolio import PortfolioTool
 from .tools.execution import ExecutionTool, OrderRequest
 from .risk import RiskGuard
 from .utils.logging import AgentLogger
-from .schemas import OrderSide, PortfolioState
+from .schemas import OrderSide, PortfolioState, Candle
+from core.indicators_streaming import StreamingIndicatorEngine
 
 
 class AgentRunner:
     """Main agent execution loop with comprehensive risk management"""
     
-    def __init__(self, config: AgentConfig):
+    def __init__(self, config: AgentConfig, market: Optional[MarketDataTool] = None):
         self.config = config
         self.config.ensure_directories()
         
@@ -35,7 +37,7 @@ class AgentRunner:
         self.run_dir = config.runs_dir / self.run_id
     
         # Initialize components
-        self.market = MarketDataTool(config)
+        self.market = market or MarketDataTool(config)
         self.portfolio = PortfolioTool(config)
         self.execution = ExecutionTool(config, self.portfolio)
    
@@ -60,15 +62,34 @@ class AgentRunner:
             print(f"  - Provider: {config.llm.provider}")
             print(f"  - Fallback: {config.fallback_policy}")
         
+        elif config.policy == "ml":
+            from .policies.ml_policy import MLPolicy
+            self.policy = MLPolicy(model_dir=config.ml_model_dir, p_entry=config.ml_p_entry, position_size=1000.0)
+            print(f"[AgentRunner] Using ML Policy (numpy bundle)")
+            print(f"  - Model dir: {config.ml_model_dir}")
+        
         else:
             raise ValueError(f"Unknown policy: {config.policy}")
         
         self.risk_guard = RiskGuard(config)
         self.logger = AgentLogger(self.run_dir)
         
+        # Streaming indicators (state kept between ticks, O(1) per closed bar)
+        self.indicators = StreamingIndicatorEngine()
+        self._tf_ms = self.market._timeframe_to_seconds(config.timeframe) * 1000
+        
+        # Concurrent observe phase (candles + tickers fan out across symbols)
+        self._pool = ThreadPoolExecutor(
+            max_workers=min(config.observe_max_workers, max(len(config.symbols), 1)),
+            thread_name_prefix="observe"
+        )
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        self._last_candles: Dict[str, List[Candle]] = {}
+        
         # State
         self.running = True
         self.iteration = 0
+        self.last_timings: Dict[str, float] = {}
         
         print(f"[AgentRunner] Initialized with run_id: {self.run_id}")
         print(f"[AgentRunner] Mode: {'PAPER' if config.paper_mode else 'LIVE'}")
@@ -82,9 +103,13 @@ class AgentRunner:
         try:
             while self.running:
                 self.iteration += 1
+                timings = {'observe_ms': 0.0, 'decide_ms': 0.0, 'risk_ms': 0.0, 'execute_ms': 0.0}
+                iteration_start = time.perf_counter()
                 
                 # OBSERVE
+                phase_start = time.perf_counter()
                 observation = self._observe()
+                timings['observe_ms'] = (time.perf_counter() - phase_start) * 1000
                 
                 # Log observation
                 self.logger.log_observation(
@@ -97,7 +122,9 @@ class AgentRunner:
                 )
                 
                 # THINK
+                phase_start = time.perf_counter()
                 action = self.policy.decide(observation)
+                timings['decide_ms'] = (time.perf_counter() - phase_start) * 1000
                 
                 # Log action
                 self.logger.log_action(
@@ -113,6 +140,8 @@ class AgentRunner:
                 
                 # RISK CHECK
                 if action.orders:
+                    phase_start = time.perf_counter()
+                    
                     # Get current prices for risk validation
                     current_prices = self._get_current_prices()
                     
@@ -126,6 +155,8 @@ class AgentRunner:
                         updated_portfolio,
                         current_prices  # ✅ FIX: Pass prices to RiskGuard!
                     )
+                    timings['risk_ms'] = (time.perf_counter() - phase_start) * 1000
+                    phase_start = time.perf_counter()
                     
                     if not is_valid:
                         print(f"[Risk] ❌ Action REJECTED: {reason}")
@@ -238,6 +269,8 @@ class AgentRunner:
                                         'type': 'triggered'
                                     }
                                 )
+                    
+                    timings['execute_ms'] = (time.perf_counter() - phase_start) * 1000
                 
                 # Update portfolio with current prices
                 current_prices = self._get_current_prices()
@@ -260,6 +293,23 @@ class AgentRunner:
                 )
                 self.logger.append_metrics(metrics)
                 
+                # Per-phase timings for this iteration
+                timings['total_ms'] = (time.perf_counter() - iteration_start) * 1000
+                timings = {k: round(v, 3) for k, v in timings.items()}
+                self.last_timings = timings
+                persist = self.market.get_persistence_stats()
+                self.logger.log_event(
+                    self.run_id,
+                    'timings',
+                    {
+                        'iteration': self.iteration,
+                        **timings,
+                        **self.market.pop_tick_stats(),
+                        'persist_queue_depth': persist['queue_depth'],
+                        'persist_last_flush_ms': round(persist['last_flush_ms'], 3)
+                    }
+                )
+                
                 # Display with kill-switch indicator
                 kill_switch_indicator = "🚨 KILL-SWITCH" if risk_metrics['kill_switch_active'] else ""
                 print(f"[Portfolio] Equity: ${metrics.equity:,.2f} | PnL: ${metrics.total_pnl:+,.2f} | DD: {risk_metrics['current_drawdown_pct']:.2f}% | Pos: {metrics.num_positions} | Pending: {len(self.execution.get_pending_orders())} {kill_switch_indicator}")
@@ -283,22 +333,53 @@ class AgentRunner:
         timestamp = int(time.time() * 1000)
         candles_dict = {}
         volatility_dict = {}
+        indicators_dict = {}
+        
+        # Fetch recent candles for all symbols concurrently
+        fetched, missing = self._fan_out(
+            'candles',
+            lambda s: self.market.get_recent_bars(s, self.config.timeframe, lookback=self.config.data_lookback_bars),
+            self.config.symbols
+        )
+        
+        if missing:
+            policy = self.config.partial_result_policy
+            print(f"[AgentRunner] ⚠️  No fresh candles for {missing} (policy: {policy})")
+            self.logger.log_event(self.run_id, 'observe_partial', {'missing': missing, 'policy': policy})
+            if policy == "abort":
+                fetched = {}
+            elif policy == "stale":
+                for symbol in missing:
+                    if symbol in self._last_candles:
+                        fetched[symbol] = self._last_candles[symbol]
         
         for symbol in self.config.symbols:
-            # Fetch recent candles
-            candles = self.market.get_recent_bars(
-                symbol,
-                self.config.timeframe,
-                lookback=self.config.data_lookback_bars
-            )
+            candles = fetched.get(symbol)
             
             if candles:
+                self._last_candles[symbol] = candles
                 candles_dict[symbol] = candles
                 
+                # NaN gap bars (gap_fill_policy "nan") stay in the candles for the
+                # policy but must not reach the recursive indicators or the volatility
+                traded = [c for c in candles if c.close == c.close]
+                
                 # Calculate recent volatility (standard deviation of returns)
-                closes = np.array([c.close for c in candles[-20:]])
+                closes = np.array([c.close for c in traded[-20:]])
                 returns = np.diff(closes) / closes[:-1]
-                volatility_dict[symbol] = float(np.std(returns))
+                volatility_dict[symbol] = float(np.std(returns)) if len(returns) else 0.0
+                
+                # Feed only newly closed bars to the streaming indicators
+                last_ts = self.indicators.last_ts(symbol)
+                for candle in traded:
+                    if candle.ts + self._tf_ms > timestamp:
+                        break
+                    if last_ts is None or candle.ts > last_ts:
+                        self.indicators.on_bar_close(symbol, candle)
+                
+                ind = self.indicators.get(symbol)
+                if ind is not None:
+                    indicators_dict[symbol] = ind
         
         portfolio = self.portfolio.snapshot(timestamp)
         
@@ -306,16 +387,60 @@ class AgentRunner:
             timestamp=timestamp,
             candles=candles_dict,
             portfolio=portfolio,
-            volatility=volatility_dict
+            volatility=volatility_dict,
+            indicators=indicators_dict
         )
     
+    def _fan_out(self, kind: str, fn: Callable[[str], Any], symbols: List[str]) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Run fn(symbol) for every symbol on the observe pool
+        
+        Waits at most observe_timeout_secs. A call that is still running from a
+        previous iteration is awaited again instead of being resubmitted, so a
+        stuck symbol never occupies more than one worker.
+        
+        Returns:
+            (results for symbols that completed with a non-empty value, missing symbols)
+        """
+        futures = {}
+        for symbol in symbols:
+            key = (kind, symbol)
+            if key not in self._inflight:
+                self._inflight[key] = self._pool.submit(fn, symbol)
+            futures[symbol] = self._inflight[key]
+        
+        done, _ = wait(futures.values(), timeout=self.config.observe_timeout_secs)
+        
+        results = {}
+        missing = []
+        for symbol, future in futures.items():
+            if future not in done:
+                missing.append(symbol)
+                continue
+            del self._inflight[(kind, symbol)]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"[AgentRunner] {kind} fetch failed for {symbol}: {e}")
+                result = None
+            if result:
+                results[symbol] = result
+            else:
+                missing.append(symbol)
+        return results, missing
+    
     def _get_current_prices(self) -> Dict[str, float]:
-        """Get current prices for all symbols"""
+        """Get current prices for all symbols (one fetch_tickers call when supported)"""
+        symbols = self.config.symbols
         prices = {}
-        for symbol in self.config.symbols:
-            price = self.market.get_current_price(symbol)
-            if price:
-                prices[symbol] = price
+        if self.market.supports_batch_tickers:
+            batch, _ = self._fan_out('tickers', lambda _: self.market.get_current_prices(symbols), ['*'])
+            prices.update(batch.get('*', {}))
+        
+        remaining = [s for s in symbols if s not in prices]
+        if remaining:
+            fetched, _ = self._fan_out('ticker', self.market.get_current_price, remaining)
+            prices.update(fetched)
         return prices
     
     def _emergency_close_all(self, current_prices: Dict[str, float]):
@@ -355,6 +480,9 @@ class AgentRunner:
     
     def _shutdown(self):
         """Cleanup and final reporting"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self.market.close()
+        
         print(f"\n[AgentRunner] Run complete: {self.run_id}")
         print(f"[AgentRunner] Logs saved to: {self.run_dir}")
         
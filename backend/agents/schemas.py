@@ -125,6 +125,7 @@ class Observation(BaseModel):
     candles: Dict[str, List[Candle]] = Field(..., description="Recent candles per symbol")
     portfolio: PortfolioState
     volatility: Dict[str, float] = Field(default_factory=dict, description="Volatility per symbol")
+    indicators: Dict[str, Dict[str, Any]] = Field(default_factory=dict, description="Streaming indicators per symbol (strategy dict shape)")
     
     @property
     def symbols(self) -> List[str]:
@@ -11,12 +11,14 @@ Features:
 import threading
 import json
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, TYPE_CHECKING
 from datetime import datetime
 import time
 
-from .config import AgentConfig
-from .runner import AgentRunner
+if TYPE_CHECKING:
+    # the runner pulls in ccxt, pandas and the strategy stack; load it on start()
+    from .config import AgentConfig
+    from .runner import AgentRunner
 
 
 class AgentService:
@@ -45,11 +47,11 @@ class AgentService:
         self._initialized = True
         
         # Agent state
-        self.runner: Optional[AgentRunner] = None
+        self.runner: Optional["AgentRunner"] = None
         self.thread: Optional[threading.Thread] = None
         self.running = False
         self.run_id: Optional[str] = None
-        self.config: Optional[AgentConfig] = None
+        self.config: Optional["AgentConfig"] = None
         self.started_at: Optional[float] = None
         self.stopped_at: Optional[float] = None
         
@@ -77,6 +79,9 @@ class AgentService:
             if self.running:
                 raise RuntimeError(f"Agent already running with run_id: {self.run_id}")
             
+            from .config import AgentConfig
+            from .runner import AgentRunner
+            
             # Load config
             config_file = Path(config_path)
             if not config_file.exists():
@@ -5,15 +5,100 @@ Market data tool using ccxt with robust fetching, caching and normalization
 import ccxt
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Optional, Tuple
+from typing import Any, List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
-from functools import lru_cache
-from collections import OrderedDict
 import time
-import hashlib
+import json
+import threading
 
 from ..schemas import Candle
 from ..config import AgentConfig
+from .persistence import CandlePersistenceWorker
+from core.app_config import app_config
+
+
+GAP_FILL_POLICIES = ("ffill", "nan", "drop")
+
+
+def gap_fill_plan(ts: np.ndarray, tf_ms: int, policy: str = "ffill") -> Tuple[np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+    """
+    Vectorized gap detection over candle timestamps
+    
+    Input may be unsorted and contain duplicates (first occurrence wins).
+    Expected timestamps come from np.arange over [first, last]; missing
+    positions are located with searchsorted.
+    
+    Args:
+        ts: candle timestamps (ms)
+        tf_ms: timeframe in milliseconds
+        policy: "ffill" / "nan" insert the missing bars, "drop" only sorts and de-duplicates
+    
+    Returns:
+        (out_ts, src, filled, stats) where src indexes the input row each output
+        row comes from (for inserted rows: the last real row before it) and
+        filled marks inserted rows.
+    """
+    if policy not in GAP_FILL_POLICIES:
+        raise ValueError(f"Unknown gap fill policy: {policy}")
+    
+    ts = np.asarray(ts, dtype=np.int64)
+    diffs = np.diff(ts)
+    unsorted = bool(np.any(diffs < 0))
+    if unsorted:
+        order = np.argsort(ts, kind="stable")
+        uniq_ts, first = np.unique(ts[order], return_index=True)
+        keep = order[first]  # input row of each unique ts
+    else:
+        keep = np.flatnonzero(np.concatenate(([True], diffs != 0)))
+        uniq_ts = ts[keep]
+    
+    steps = np.diff(uniq_ts) // tf_ms - 1
+    stats = {
+        'rows_in': int(len(ts)),
+        'unsorted': unsorted,
+        'duplicates': int(len(ts) - len(uniq_ts)),
+        'gaps': int(np.count_nonzero(steps > 0)),
+        'max_gap_bars': int(steps.max()) if len(steps) and steps.max() > 0 else 0,
+        'missing_bars': 0,
+    }
+    
+    if policy == "drop" or len(uniq_ts) < 2:
+        out_ts = uniq_ts
+    else:
+        expected = np.arange(uniq_ts[0], uniq_ts[-1] + 1, tf_ms, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(uniq_ts, expected), len(uniq_ts) - 1)
+        missing = expected[uniq_ts[pos] != expected]
+        if not len(missing):
+            out_ts = uniq_ts
+        elif len(missing) + len(uniq_ts) == len(expected):
+            out_ts = expected  # every real bar is on the timeframe grid
+        else:
+            out_ts = np.union1d(uniq_ts, missing)
+    
+    prev = np.searchsorted(uniq_ts, out_ts, side="right") - 1
+    filled = uniq_ts[prev] != out_ts
+    stats['missing_bars'] = int(np.count_nonzero(filled))
+    stats['rows_out'] = int(len(out_ts))
+    return out_ts, keep[prev], filled, stats
+
+
+def fill_gaps_arrays(ts, o, h, l, c, v, tf_ms: int, policy: str = "ffill") -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """
+    Array version of gap filling for OHLCV columns
+    
+    ffill: inserted bars are flat at the previous close with zero volume
+    nan: inserted bars have NaN prices and zero volume
+    drop: no bars inserted
+    """
+    out_ts, src, filled, stats = gap_fill_plan(ts, tf_ms, policy)
+    close = np.asarray(c, dtype=float)[src]
+    fill_px = np.nan if policy == "nan" else close
+    out = {'ts': out_ts}
+    for name, col in (('open', o), ('high', h), ('low', l)):
+        out[name] = np.where(filled, fill_px, np.asarray(col, dtype=float)[src])
+    out['close'] = np.where(filled, fill_px, close)
+    out['volume'] = np.where(filled, 0.0, np.asarray(v, dtype=float)[src])
+    return out, stats
 
 
 class SymbolNormalizer:
@@ -71,55 +156,143 @@ class SymbolNormalizer:
             return False
 
 
-class CandleCache:
-    """LRU cache with TTL for candle data"""
+class CandleRingBuffer:
+    """
+    Most recent `capacity` candles for one symbol/timeframe
+    
+    Columns are stored twice (at i and i + capacity) so the last k candles are
+    always contiguous and view(k) returns numpy slices without copying.
+    The last candle may still be forming; extend() overwrites it in place.
+    """
+    
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._ts = np.zeros(2 * capacity, dtype=np.int64)
+        self._ohlcv = np.zeros((5, 2 * capacity), dtype=np.float64)
+        self._candles: List[Candle] = []
+        self._count = 0
+        self.seeded_lookback = 0  # largest lookback a full fetch has covered
+        self.refreshed_at = 0.0
+        self.lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+    
+    @property
+    def last_ts(self) -> Optional[int]:
+        return self._candles[-1].ts if self._candles else None
+    
+    def _write(self, pos: int, candle: Candle):
+        row = (candle.open, candle.high, candle.low, candle.close, candle.volume)
+        for j in (pos, pos + self.capacity):
+            self._ts[j] = candle.ts
+            self._ohlcv[:, j] = row
+    
+    def extend(self, candles: List[Candle]) -> int:
+        """Append candles newer than the last one (a same-ts candle replaces it); returns bars appended"""
+        appended = 0
+        for candle in candles:
+            last_ts = self.last_ts
+            if last_ts is not None and candle.ts < last_ts:
+                continue
+            if last_ts is not None and candle.ts == last_ts:
+                self._write((self._count - 1) % self.capacity, candle)
+                self._candles[-1] = candle
+                continue
+            self._write(self._count % self.capacity, candle)
+            self._count += 1
+            self._candles.append(candle)
+            appended += 1
+        if len(self._candles) > 2 * self.capacity:
+            del self._candles[:-self.capacity]
+        return appended
     
-    def __init__(self, max_size: int = 100, ttl_seconds: int = 10):
-        self.max_size = max_size
+    def view(self, lookback: int) -> Dict[str, np.ndarray]:
+        """Zero-copy column views of the last `lookback` candles"""
+        k = min(lookback, len(self))
+        end = (self._count - 1) % self.capacity + 1 + self.capacity if self._count else self.capacity
+        window = slice(end - k, end)
+        o, h, l, c, v = self._ohlcv[:, window]
+        return {'ts': self._ts[window], 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+    
+    def candles(self, lookback: int) -> List[Candle]:
+        """Last `lookback` candles as Candle objects"""
+        k = min(lookback, len(self))
+        return self._candles[-k:] if k else []
+    
+    def clear(self):
+        self._candles = []
+        self._count = 0
+        self.seeded_lookback = 0
+        self.refreshed_at = 0.0
+
+
+class CandleStore:
+    """
+    Ring buffers per (exchange, symbol, timeframe) plus hit/traffic counters
+    
+    A lookup is a hit when it is served from the buffer without touching the
+    network, a delta refresh when only bars after the last one were fetched,
+    and a full fetch otherwise.
+    """
+    
+    def __init__(self, ttl_seconds: int = 5):
         self.ttl_seconds = ttl_seconds
-        self._cache: OrderedDict = OrderedDict()
-        self._timestamps: Dict[str, float] = {}
-    
-    def _make_key(self, exchange: str, symbol: str, timeframe: str, lookback: int) -> str:
-        """Generate cache key"""
-        key_str = f"{exchange}:{symbol}:{timeframe}:{lookback}"
-        return hashlib.md5(key_str.encode()).hexdigest()
-    
-    def get(self, exchange: str, symbol: str, timeframe: str, lookback: int) -> Optional[List[Candle]]:
-        """Get cached candles if not expired"""
-        key = self._make_key(exchange, symbol, timeframe, lookback)
-        if key not in self._cache:
-            return None
-        if time.time() - self._timestamps[key] > self.ttl_seconds:
-            del self._cache[key]
-            del self._timestamps[key]
-            return None
-        self._cache.move_to_end(key)
-        return self._cache[key]
-    
-    def put(self, exchange: str, symbol: str, timeframe: str, lookback: int, candles: List[Candle]):
-        """Store candles in cache"""
-        key = self._make_key(exchange, symbol, timeframe, lookback)
-        if len(self._cache) >= self.max_size and key not in self._cache:
-            oldest_key = next(iter(self._cache))
-            del self._cache[oldest_key]
-            del self._timestamps[oldest_key]
-        self._cache[key] = candles
-        self._timestamps[key] = time.time()
+        self._buffers: Dict[Tuple[str, str, str], CandleRingBuffer] = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'delta_refreshes': 0, 'full_fetches': 0, 'bars_fetched': 0, 'bytes_fetched': 0}
+        self._tick_bytes = 0
+        self._tick_bars = 0
+    
+    def buffer(self, exchange: str, symbol: str, timeframe: str, capacity: int) -> CandleRingBuffer:
+        """Get the buffer for a key, (re)creating it if it is missing or too small"""
+        key = (exchange, symbol, timeframe)
+        with self._lock:
+            buf = self._buffers.get(key)
+            if buf is None or buf.capacity < capacity:
+                buf = self._buffers[key] = CandleRingBuffer(capacity)
+            return buf
+    
+    def record(self, kind: str, bars: int = 0, nbytes: int = 0):
+        with self._lock:
+            self._stats[kind] += 1
+            self._stats['bars_fetched'] += bars
+            self._stats['bytes_fetched'] += nbytes
+            self._tick_bars += bars
+            self._tick_bytes += nbytes
+    
+    def stats(self) -> Dict[str, Any]:
+        """Cumulative counters and hit rate"""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['delta_refreshes'] + stats['full_fetches']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+    
+    def pop_tick_stats(self) -> Dict[str, Any]:
+        """Bars/bytes fetched since the previous call, plus cumulative hit rate"""
+        with self._lock:
+            tick = {'bars_fetched_tick': self._tick_bars, 'bytes_fetched_tick': self._tick_bytes}
+            self._tick_bars = 0
+            self._tick_bytes = 0
+        tick['hit_rate'] = self.stats()['hit_rate']
+        return tick
     
     def clear(self):
-        """Clear all cache"""
-        self._cache.clear()
-        self._timestamps.clear()
+        """Drop all buffers"""
+        with self._lock:
+            self._buffers.clear()
 
 
 class MarketDataTool:
     """Robust market data fetcher with automatic database persistence"""
     
-    def __init__(self, config: AgentConfig):
+    def __init__(self, config: AgentConfig, exchange: Optional[ccxt.Exchange] = None):
         self.config = config
         
-        if config.exchange == "bitget":
+        if exchange is not None:
+            self.exchange = exchange
+        elif config.exchange == "bitget":
             self.exchange = ccxt.bitget({
                 "options": {"defaultType": "swap"},
                 "enableRateLimit": True,
@@ -139,10 +312,14 @@ class MarketDataTool:
         except Exception as e:
             print(f"[MarketData] Warning: Could not load markets: {e}")
         
-        self.cache = CandleCache(max_size=100, ttl_seconds=5)
+        self.cache = CandleStore(ttl_seconds=5)
         self.normalizer = SymbolNormalizer()
         self._last_fetch: Dict[str, int] = {}
+        self._gap_stats: Dict[str, Dict[str, Any]] = {}
+        self._gap_stats_lock = threading.Lock()
         self._db_enabled = True
+        self._resolve_db_path()  # load the config snapshot now; saves then read it from memory
+        self._persistence = CandlePersistenceWorker(flush_interval_secs=config.persist_flush_interval_secs)
     
     def _normalize_symbol(self, symbol: str) -> str:
         """Normalize symbol for current exchange"""
@@ -187,31 +364,41 @@ class MarketDataTool:
         else:
             raise ValueError(f"Unsupported timeframe unit: {unit}")
     
-    def _detect_and_fill_gaps(self, candles: List[Candle], timeframe: str) -> List[Candle]:
-        """Detect gaps in candle data and forward-fill"""
-        if not candles or len(candles) < 2:
+    def _detect_and_fill_gaps(self, candles: List[Candle], timeframe: str, symbol: Optional[str] = None) -> List[Candle]:
+        """
+        Sort, de-duplicate and fill missing bars according to config.gap_fill_policy
+        
+        Gap statistics are recorded per symbol/timeframe when `symbol` is given.
+        """
+        if not candles:
             return candles
-        tf_seconds = self._timeframe_to_seconds(timeframe)
-        tf_ms = tf_seconds * 1000
-        filled_candles = []
-        for i in range(len(candles)):
-            filled_candles.append(candles[i])
-            if i < len(candles) - 1:
-                current_ts = candles[i].ts
-                next_ts = candles[i + 1].ts
-                expected_next_ts = current_ts + tf_ms
-                while expected_next_ts < next_ts:
-                    gap_candle = Candle(
-                        ts=expected_next_ts,
-                        open=candles[i].close,
-                        high=candles[i].close,
-                        low=candles[i].close,
-                        close=candles[i].close,
-                        volume=0.0
-                    )
-                    filled_candles.append(gap_candle)
-                    expected_next_ts += tf_ms
-        return filled_candles
+        tf_ms = self._timeframe_to_seconds(timeframe) * 1000
+        policy = self.config.gap_fill_policy
+        ts = np.fromiter((c.ts for c in candles), dtype=np.int64, count=len(candles))
+        out_ts, src, filled, stats = gap_fill_plan(ts, tf_ms, policy)
+        
+        if symbol is not None:
+            with self._gap_stats_lock:
+                self._gap_stats[f"{symbol}:{timeframe}"] = stats
+        
+        if not stats['unsorted'] and not stats['duplicates'] and not stats['missing_bars']:
+            return candles
+        
+        out = [candles[k] for k in src.tolist()]
+        nan = float('nan')
+        construct = getattr(Candle, 'model_construct', None) or Candle.construct  # NaN prices bypass validation
+        for j, ts_j in zip(np.flatnonzero(filled).tolist(), out_ts[filled].tolist()):
+            if policy == "nan":
+                out[j] = construct(ts=ts_j, open=nan, high=nan, low=nan, close=nan, volume=0.0)
+            else:
+                px = out[j].close
+                out[j] = Candle(ts=ts_j, open=px, high=px, low=px, close=px, volume=0.0)
+        return out
+    
+    def get_gap_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Latest gap statistics per 'symbol:timeframe'"""
+        with self._gap_stats_lock:
+            return {k: dict(v) for k, v in self._gap_stats.items()}
     
     def fetch_ohlcv_paginated(self, symbol: str, timeframe: str, lookback: int, max_requests: int = 10) -> List[Candle]:
         """Fetch OHLCV with pagination to get required lookback"""
@@ -263,57 +450,149 @@ class MarketDataTool:
         unique_candles.sort(key=lambda c: c.ts)
         return unique_candles[-lookback:] if len(unique_candles) > lookback else unique_candles
     
+    @staticmethod
+    def _resolve_db_path(config_path: str = "config.yaml") -> Optional[str]:
+        """Candle DB path from the app config snapshot (cached; re-read when config.yaml changes)"""
+        try:
+            return (app_config(config_path).get("db") or {}).get("path")
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[MarketData] Could not read {config_path}: {e}")
+            return None
+    
+    @property
+    def _db_path(self) -> Optional[str]:
+        return self._resolve_db_path()
+    
     def _save_candles_to_db(self, symbol: str, timeframe: str, candles: List[Candle]):
-        """Save candles to database"""
+        """Queue candles for the background persistence worker"""
+        db_path = self._db_path
+        if not db_path:
+            return
+        rows = [
+            (c.ts, c.open, c.high, c.low, c.close, c.volume)
+            for c in candles
+            if c.close == c.close  # skip NaN gap rows
+        ]
         try:
-            import sqlite3
-            import yaml
-            import os
-            cfg = yaml.safe_load(open("config.yaml", "r", encoding="utf-8"))
-            db_path = cfg.get("db", {}).get("path")
-            if not db_path:
-                return
-            os.makedirs(os.path.dirname(db_path), exist_ok=True)
-            conn = sqlite3.connect(db_path)
-            cur = conn.cursor()
-            cur.execute("""CREATE TABLE IF NOT EXISTS candles (
-                ts INTEGER PRIMARY KEY,
-                open REAL,
-                high REAL,
-                low REAL,
-                close REAL,
-                volume REAL
-            )""")
-            for candle in candles:
-                cur.execute(
-                    "INSERT OR IGNORE INTO candles (ts, open, high, low, close, volume) VALUES (?, ?, ?, ?, ?, ?)",
-                    (candle.ts, candle.open, candle.high, candle.low, candle.close, candle.volume)
-                )
-            conn.commit()
-            conn.close()
-            print(f"[MarketData] Saved {len(candles)} candles to database")
+            self._persistence.submit(db_path, "candles", rows)
         except Exception as e:
-            print(f"[MarketData] Error saving to database: {e}")
+            print(f"[MarketData] Error queueing candles for database: {e}")
     
-    def get_recent_bars(self, symbol: str, timeframe: str, lookback: int = 100) -> List[Candle]:
-        """Get recent N bars with intelligent caching and incremental fetch"""
+    def get_persistence_stats(self) -> Dict[str, Any]:
+        """Persistence queue depth, rows written and flush latency"""
+        return self._persistence.metrics()
+    
+    def close(self):
+        """Flush pending candles and stop the persistence worker"""
+        self._persistence.close()
+    
+    def _fetch_since(self, symbol: str, timeframe: str, since: int, max_bars: int) -> Tuple[List[Candle], int]:
+        """Fetch candles from `since` onwards (paginated); returns (candles, approx payload bytes)"""
+        tf_ms = self._timeframe_to_seconds(timeframe) * 1000
+        candles: List[Candle] = []
+        nbytes = 0
+        while len(candles) < max_bars:
+            limit = min(1000, max_bars - len(candles))
+            raw_candles = self._retry_with_backoff(
+                self.exchange.fetch_ohlcv,
+                symbol=symbol,
+                timeframe=timeframe,
+                since=since,
+                limit=limit
+            )
+            if not raw_candles:
+                break
+            nbytes += len(json.dumps(raw_candles))
+            candles.extend(
+                Candle(
+                    ts=int(c[0]),
+                    open=float(c[1]),
+                    high=float(c[2]),
+                    low=float(c[3]),
+                    close=float(c[4]),
+                    volume=float(c[5])
+                )
+                for c in raw_candles
+            )
+            since = candles[-1].ts + tf_ms
+            if len(raw_candles) < limit:
+                break
+        return candles, nbytes
+    
+    def _refresh_buffer(self, buf: CandleRingBuffer, symbol: str, timeframe: str, lookback: int):
+        """Bring a ring buffer up to date, fetching only bars after the last one when possible"""
+        tf_ms = self._timeframe_to_seconds(timeframe) * 1000
+        now_ms = int(time.time() * 1000)
+        last_ts = buf.last_ts
+        behind = (now_ms - last_ts) // tf_ms + 1 if last_ts is not None else None
+        
+        if last_ts is None or lookback > buf.seeded_lookback or behind >= buf.capacity:
+            fetched, nbytes = self._fetch_since(symbol, timeframe, now_ms - buf.capacity * tf_ms, buf.capacity + 1)
+            candles = self._detect_and_fill_gaps(fetched, timeframe, symbol)[-buf.capacity:]
+            buf.clear()
+            buf.extend(candles)
+            buf.seeded_lookback = buf.capacity
+            self.cache.record('full_fetches', len(fetched), nbytes)
+            new_candles = candles
+        else:
+            # Re-fetch the last (possibly still forming) bar and everything after it
+            delta, nbytes = self._fetch_since(symbol, timeframe, last_ts, behind + 1)
+            same_bar = [c for c in delta if c.ts == last_ts][-1:]
+            newer = [c for c in delta if c.ts > last_ts]
+            filled = self._detect_and_fill_gaps((same_bar or buf.candles(1)) + newer, timeframe, symbol)[1:]
+            new_candles = same_bar + filled
+            buf.extend(new_candles)
+            self.cache.record('delta_refreshes', len(delta), nbytes)
+        
+        buf.refreshed_at = time.time()
+        if self._db_enabled and new_candles:
+            self._save_candles_to_db(symbol, timeframe, new_candles)
+    
+    def _get_buffer(self, symbol: str, timeframe: str, lookback: int) -> CandleRingBuffer:
+        """Return an up-to-date ring buffer holding at least `lookback` bars (if the exchange has them)"""
         normalized_symbol = self._normalize_symbol(symbol)
-        cached = self.cache.get(self.config.exchange, normalized_symbol, timeframe, lookback)
-        if cached is not None:
-            return cached
+        capacity = max(lookback, self.config.data_lookback_bars)
+        buf = self.cache.buffer(self.config.exchange, normalized_symbol, timeframe, capacity)
+        with buf.lock:
+            fresh = time.time() - buf.refreshed_at <= self.cache.ttl_seconds
+            if fresh and lookback <= buf.seeded_lookback:
+                self.cache.record('hits')
+            else:
+                self._refresh_buffer(buf, normalized_symbol, timeframe, lookback)
+            if buf.last_ts is not None:
+                self._last_fetch[f"{normalized_symbol}:{timeframe}"] = buf.last_ts
+        return buf
+    
+    def get_recent_bars(self, symbol: str, timeframe: str, lookback: int = 100) -> List[Candle]:
+        """Get recent N bars from the ring buffer (delta refresh when stale)"""
         try:
-            candles = self.fetch_ohlcv_paginated(normalized_symbol, timeframe, lookback)
-            candles = self._detect_and_fill_gaps(candles, timeframe)
-            if self._db_enabled and candles:
-                self._save_candles_to_db(normalized_symbol, timeframe, candles)
-            self.cache.put(self.config.exchange, normalized_symbol, timeframe, lookback, candles)
-            cache_key = f"{normalized_symbol}:{timeframe}"
-            self._last_fetch[cache_key] = candles[-1].ts if candles else 0
-            return candles
+            buf = self._get_buffer(symbol, timeframe, lookback)
+            with buf.lock:
+                return buf.candles(lookback)
         except Exception as e:
-            print(f"[MarketData] Failed to fetch {normalized_symbol}: {e}")
+            print(f"[MarketData] Failed to fetch {symbol}: {e}")
             return []
     
+    def get_recent_arrays(self, symbol: str, timeframe: str, lookback: int = 100) -> Dict[str, np.ndarray]:
+        """
+        Get recent N bars as zero-copy numpy views (ts, open, high, low, close, volume)
+        
+        The views alias the ring buffer: copy them if they must outlive the next refresh.
+        """
+        buf = self._get_buffer(symbol, timeframe, lookback)
+        with buf.lock:
+            return buf.view(lookback)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Cumulative ring-buffer hit rate and network volume"""
+        return self.cache.stats()
+    
+    def pop_tick_stats(self) -> Dict[str, Any]:
+        """Bars/bytes fetched since the last call (call once per agent tick)"""
+        return self.cache.pop_tick_stats()
+    
     def get_recent_bars_df(self, symbol: str, timeframe: str, lookback: int = 100) -> pd.DataFrame:
         """Get recent bars as pandas DataFrame"""
         candles = self.get_recent_bars(symbol, timeframe, lookback)
@@ -356,6 +635,31 @@ class MarketDataTool:
             traceback.print_exc()
             return None
     
+    @property
+    def supports_batch_tickers(self) -> bool:
+        """True if the exchange can return all tickers in one request"""
+        return bool(getattr(self.exchange, 'has', {}).get('fetchTickers'))
+    
+    def get_current_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """
+        Get last prices for several symbols with a single fetch_tickers call
+        
+        Returns prices keyed by the symbols as given; symbols missing from
+        the response are omitted (callers fall back to get_current_price).
+        """
+        normalized = {self._normalize_symbol(s): s for s in symbols}
+        try:
+            tickers = self._retry_with_backoff(self.exchange.fetch_tickers, list(normalized))
+        except Exception as e:
+            print(f"[MarketData] ✗ Error fetching tickers: {type(e).__name__}: {e}")
+            return {}
+        prices = {}
+        for norm_symbol, symbol in normalized.items():
+            ticker = (tickers or {}).get(norm_symbol)
+            if ticker and ticker.get('last'):
+                prices[symbol] = float(ticker['last'])
+        return prices
+    
     def fetch_incremental(self, symbol: str, timeframe: str) -> List[Candle]:
         """Fetch only new candles since last fetch (tail fetch)"""
         normalized_symbol = self._normalize_symbol(symbol)
@@ -0,0 +1,247 @@
+"""
+Background candle persistence for the agent market tool
+
+Candle batches are queued from the observe loop and written by a single
+worker thread, which coalesces rows per (db, table), keeps one SQLite
+connection per database and writes with executemany. Nothing touches the
+disk on the hot path.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+Row = Tuple[int, float, float, float, float, float]
+
+
+class CandlePersistenceWorker:
+    """
+    Queue-fed SQLite writer
+
+    Rows are flushed every `flush_interval_secs`, as soon as `max_pending_rows`
+    are buffered, on flush(), and on close(). close() drains the queue before
+    returning, so no submitted candle is lost on graceful shutdown.
+
+    A batch whose write fails (e.g. "database is locked") stays pending and
+    is retried on the next flush over a fresh connection; it is dropped
+    (counted in `rows_dropped`) only after `max_write_retries` retries.
+    """
+
+    def __init__(self, flush_interval_secs: float = 1.0, max_pending_rows: int = 20000,
+                 max_write_retries: int = 5):
+        self.flush_interval_secs = flush_interval_secs
+        self.max_pending_rows = max_pending_rows
+        self.max_write_retries = max_write_retries
+        self._queue: "queue.Queue" = queue.Queue()
+        self._pending: Dict[Tuple[str, str], List[Row]] = defaultdict(list)
+        self._pending_rows = 0
+        self._conns: Dict[str, sqlite3.Connection] = {}
+        self._tables: set = set()
+        self._failures: Dict[Tuple[str, str], int] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        self._stats = {
+            'batches_submitted': 0,
+            'rows_written': 0,
+            'flushes': 0,
+            'errors': 0,
+            'rows_dropped': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+
+    def submit(self, db_path: str, table: str, rows: List[Row]):
+        """Queue candle rows (ts, open, high, low, close, volume) for writing"""
+        if not rows:
+            return
+        if self._closed:
+            raise RuntimeError("CandlePersistenceWorker is closed")
+        self._ensure_started()
+        self._stats['batches_submitted'] += 1
+        self._queue.put((db_path, table, rows))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Write everything submitted so far; returns False on timeout"""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return True
+        if self._closed:
+            # close() already drains and writes everything; there is nothing to wait on
+            return not thread.is_alive()
+        done = threading.Event()
+        self._queue.put(('__flush__', done))
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 30.0):
+        """Drain the queue, flush, close connections and stop the worker"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(('__stop__', None))
+            self._thread.join(timeout)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth and flush latency"""
+        stats = dict(self._stats)
+        stats['queue_depth'] = self._queue.qsize()
+        stats['pending_rows'] = self._pending_rows
+        stats['avg_flush_ms'] = stats['total_flush_ms'] / stats['flushes'] if stats['flushes'] else 0.0
+        return stats
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="candle-persistence", daemon=True)
+                self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Worker side
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        next_flush = time.monotonic() + self.flush_interval_secs
+        while True:
+            try:
+                item = self._queue.get(timeout=max(next_flush - time.monotonic(), 0.0))
+            except queue.Empty:
+                item = None
+
+            if item is not None and item[0] == '__stop__':
+                flushes = self._drain()
+                self._write_pending()
+                while self._pending_rows:   # failed batches: retried until written or given up
+                    time.sleep(0.1)
+                    self._write_pending()
+                for conn in self._conns.values():
+                    conn.close()
+                self._conns.clear()
+                # release flush() callers queued alongside (or racing) the stop
+                flushes.extend(self._drain())
+                for done in flushes:
+                    done.set()
+                return
+
+            if item is not None and item[0] == '__flush__':
+                flushes = self._drain()
+                self._write_pending()
+                item[1].set()
+                for done in flushes:
+                    done.set()
+                next_flush = time.monotonic() + self.flush_interval_secs
+                continue
+
+            if item is not None:
+                self._add(item)
+
+            if time.monotonic() >= next_flush or self._pending_rows >= self.max_pending_rows:
+                self._write_pending()
+                next_flush = time.monotonic() + self.flush_interval_secs
+
+    def _add(self, item):
+        db_path, table, rows = item
+        self._pending[(db_path, table)].extend(rows)
+        self._pending_rows += len(rows)
+
+    def _drain(self) -> List[threading.Event]:
+        """
+        Move everything currently queued into the pending buffers
+
+        Returns the events of the flush requests taken off the queue; the
+        caller sets them once the pending rows are written. A stop request
+        is put back so the loop still sees it.
+        """
+        flushes, stop = [], None
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item[0] == '__flush__':
+                flushes.append(item[1])
+            elif item[0] == '__stop__':
+                stop = item
+            else:
+                self._add(item)
+        if stop is not None:
+            self._queue.put(stop)
+        return flushes
+
+    def _connection(self, db_path: str) -> sqlite3.Connection:
+        conn = self._conns.get(db_path)
+        if conn is None:
+            db_dir = os.path.dirname(db_path)
+            if db_dir:
+                os.makedirs(db_dir, exist_ok=True)
+            conn = self._conns[db_path] = sqlite3.connect(db_path)
+        return conn
+
+    def _drop_connection(self, db_path: str):
+        """Forget a connection after a failed write; the next write reconnects"""
+        conn = self._conns.pop(db_path, None)
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _write_pending(self):
+        if not self._pending_rows:
+            return
+        start = time.perf_counter()
+        written = 0
+        retry: Dict[Tuple[str, str], List[Row]] = {}
+        for (db_path, table), rows in self._pending.items():
+            try:
+                conn = self._connection(db_path)
+                if (db_path, table) not in self._tables:
+                    conn.execute(f"""CREATE TABLE IF NOT EXISTS {table} (
+                        ts INTEGER PRIMARY KEY,
+                        open REAL,
+                        high REAL,
+                        low REAL,
+                        close REAL,
+                        volume REAL
+                    )""")
+                    self._tables.add((db_path, table))
+                conn.executemany(
+                    f"INSERT OR IGNORE INTO {table} (ts, open, high, low, close, volume) VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                conn.commit()
+                written += len(rows)
+                self._failures.pop((db_path, table), None)
+            except Exception as e:
+                self._stats['errors'] += 1
+                self._drop_connection(db_path)
+                failures = self._failures.get((db_path, table), 0) + 1
+                if failures > self.max_write_retries:
+                    self._failures.pop((db_path, table), None)
+                    self._stats['rows_dropped'] += len(rows)
+                    print(f"[Persistence] Dropping {len(rows)} candles for {db_path}:{table} after {failures} failed writes: {e}")
+                else:
+                    self._failures[(db_path, table)] = failures
+                    retry[(db_path, table)] = rows
+                    print(f"[Persistence] Error writing {len(rows)} candles to {db_path}:{table} (will retry): {e}")
+        self._pending.clear()
+        self._pending.update(retry)
+        self._pending_rows = sum(len(rows) for rows in retry.values())
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._stats['rows_written'] += written
+        self._stats['flushes'] += 1
+        self._stats['last_flush_ms'] = elapsed_ms
+        self._stats['max_flush_ms'] = max(self._stats['max_flush_ms'], elapsed_ms)
+        self._stats['total_flush_ms'] += elapsed_ms
@@ -22,6 +22,7 @@ from pathlib import Path
 
 from core.database import connect, load_range
 from core.features import compute_feature_rows
+from core.sessions import compute_session_features
 from core.indicators import supertrend as calc_supertrend, keltner as calc_keltner
 from broker.paper_v2 import PaperFuturesBrokerV2
 from core.sizing import compute_qty
@@ -37,7 +38,7 @@ from strategies.registry import (
     STRATEGY_PRESETS
 )
 from strategies.adapter import (
-    build_indicator_dict,
+    IndicatorView,
     build_bar_dict,
     build_state_dict,
     extract_exit_params
@@ -94,6 +95,7 @@ def run_single_strategy_backtest(
     # Run backtest
     trade_count = 0
     cooldown_bars = 0
+    ind_view = IndicatorView(ts, o, h, l, c, feats)
     
     for i in range(len(ts)):
         atr = feats.get("atr14", [c[i] * 0.01])[i] or (c[i] * 0.01)
@@ -117,7 +119,7 @@ def run_single_strategy_backtest(
         if broker.position is None and cooldown_bars == 0:
             # Build inputs for strategy
             bar = build_bar_dict(i, o, h, l, c, v)
-            ind = build_indicator_dict(i, ts, o, h, l, c, feats)
+            ind = ind_view.at(i)
             state = build_state_dict(position=None, cooldown_bars_left=cooldown_bars)
             params = info.get('params', {}) if info else {}
             
@@ -165,6 +167,9 @@ def run_single_strategy_backtest(
                             print(f"    Reason: {signal.get('reason', 'N/A')}")
                             print(f"    Regime: {signal.get('regime_hint', 'N/A')}")
     
+    # Write buffered equity/trades before reading them back
+    broker.close()
+    
     # Calculate metrics
     try:
         em = equity_metrics(broker.equity_curve)
@@ -293,6 +298,9 @@ def run_all_strategies(
     feat['ema200'] = ema(c, 200)
     print(f"[Features] Added EMA200\n")
     
+    # Session / calendar columns (London, NY, Asia; DST-aware)
+    feat.update({k: col.tolist() for k, col in compute_session_features(ts, h, l, c, v).items()})
+    
     # Run strategies
     results = []
     
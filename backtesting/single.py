@@ -6,7 +6,7 @@ from core.features import compute_feature_rows
 from core.indicators import supertrend, keltner
 from broker.paper_v1 import PaperFuturesBroker
 from core.sizing import compute_qty
-from strategies.core import should_enter, compute_exit_levels
+from strategies.core import entry_masks, should_enter, compute_exit_levels
 from core.metrics import equity_metrics, trades_metrics
 
 # Support compact argument form like `--days30` (user typed no space).
@@ -82,6 +82,9 @@ feat = {
     "keltner_up": [r[29] for r in feats_rows],
 }
 
+# Declarative entry conditions evaluated over the whole series, once
+masks = entry_masks(cfg.get("risk",{}), o,h,l,c, feat)
+
 outdir = os.path.join("data","backtests", str(int(time.time())))
 os.makedirs(outdir, exist_ok=True)
 broker = PaperFuturesBroker(
@@ -110,7 +113,7 @@ for i in range(len(ts)):
     broker.on_candle(ts[i], h[i], l[i], c[i], atr5, cfg['fees']['spread_bps'], cfg['fees']['taker_fee_bps'], cfg['fees']['maker_fee_bps'], st_line=st_line[i], kel_lo=kel_lo[i], kel_up=kel_up[i])
 
     if broker.position is None:
-        side = should_enter(i, ts, o,h,l,c, feat, cfg.get("risk",{}), allow_shorts=cfg.get("risk",{}).get("allow_shorts",True))
+        side = should_enter(i, ts, o,h,l,c, feat, cfg.get("risk",{}), allow_shorts=cfg.get("risk",{}).get("allow_shorts",True), masks=masks)
         if side:
             sl, tp, extra = compute_exit_levels(side, c[i], atr5, cfg.get('risk',{}), feat['regime'][i])
             trail_style = 'atr'
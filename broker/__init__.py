@@ -4,10 +4,17 @@ Broker Module - Trade Execution Layer
 Paper and live trading brokers:
 - paper_v1.py: Paper broker (legacy)
 - paper_v2.py: Paper broker with ExitPlan support
+- paper_portfolio.py: Multi-symbol paper broker with shared margin
+- sinks.py: Equity/trade output sinks for the paper broker
 - bitget.py: Bitget exchange executor
 """
 
 from .paper_v2 import PaperFuturesBrokerV2
+from .paper_portfolio import PaperPortfolioBroker, align_symbols
+from .sinks import BrokerSink, MemorySink, NullSink, CSVSink, ParquetSink, make_sink
 from .bitget import BitgetExecutor
 
-__all__ = ['PaperFuturesBrokerV2', 'BitgetExecutor']
+__all__ = [
+    'PaperFuturesBrokerV2', 'PaperPortfolioBroker', 'align_symbols', 'BitgetExecutor',
+    'BrokerSink', 'MemorySink', 'NullSink', 'CSVSink', 'ParquetSink', 'make_sink'
+]
@@ -0,0 +1,289 @@
+"""
+Paper Portfolio Broker - Multi-Symbol, Shared Margin
+
+Features:
+- One position per symbol, many symbols open at once
+- Shared cash/margin account (opens are rejected when margin is exhausted)
+- Position state in numpy arrays indexed by symbol
+- ExitPlan exits through ExitEngine (same fills/fees as PaperFuturesBrokerV2)
+- Time-aligned event loop: align_symbols() + on_bar() simulate N symbols in one pass
+
+Equity follows the PaperFuturesBrokerV2 convention (realized PnL net of
+fees); mark_to_market() adds open PnL and drives the margin check.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from backend.agents.exits import ExitEngine, ExitPlan, Trailing
+from .sinks import BrokerSink, PORTFOLIO_TRADE_COLUMNS, make_sink
+
+
+def align_symbols(
+    data: Dict[str, Dict[str, Sequence[float]]],
+    columns: Sequence[str] = ("high", "low", "close")
+) -> Tuple[List[str], np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Align per-symbol bar arrays on the union of their timestamps
+
+    Args:
+        data: symbol -> {"ts": [...], "high": [...], ...}
+        columns: Columns to align
+
+    Returns:
+        (symbols, ts, {column: (T, N) array}) with NaN where a symbol has no bar
+    """
+    symbols = list(data)
+    ts = np.unique(np.concatenate([np.asarray(data[s]["ts"], dtype=np.int64) for s in symbols]))
+    out = {col: np.full((len(ts), len(symbols)), np.nan) for col in columns}
+    for j, sym in enumerate(symbols):
+        rows = np.searchsorted(ts, np.asarray(data[sym]["ts"], dtype=np.int64))
+        for col in columns:
+            out[col][rows, j] = np.asarray(data[sym][col], dtype=float)
+    return symbols, ts, out
+
+
+class PaperPortfolioBroker:
+    """
+    Paper broker holding positions across many symbols on one account
+
+    Per-symbol state lives in arrays indexed by `self.index[symbol]`:
+    side (+1 LONG / -1 SHORT / 0 flat), qty, entry, margin, last_price.
+    """
+
+    def __init__(
+        self,
+        symbols: Sequence[str],
+        equity: float = 100000.0,
+        max_margin_pct: float = 100.0,
+        spread_bps: float = 1.0,
+        taker_fee_bps: float = 5.0,
+        maker_fee_bps: float = 2.0,
+        tick_size: float = 0.1,
+        data_dir: str = "data/paper_portfolio",
+        sink: Union[str, BrokerSink] = "memory",
+        flush_every_bars: Optional[int] = 5000
+    ):
+        """
+        Args:
+            symbols: Symbols this account can trade (fixes the array layout)
+            max_margin_pct: Max margin in use as % of mark-to-market equity
+            sink: "memory" (default), "csv", "parquet", "null" or a BrokerSink instance
+        """
+        self.symbols = list(symbols)
+        self.index = {sym: i for i, sym in enumerate(self.symbols)}
+        self.equity = float(equity)
+        self.start_equity = float(equity)
+        self.max_margin_pct = float(max_margin_pct)
+        self.spread_bps = float(spread_bps)
+        self.taker_fee_bps = float(taker_fee_bps)
+        self.maker_fee_bps = float(maker_fee_bps)
+        self.tick_size = tick_size
+        self.data_dir = data_dir
+
+        n = len(self.symbols)
+        self.side = np.zeros(n, dtype=np.int8)
+        self.qty = np.zeros(n)
+        self.entry = np.zeros(n)
+        self.margin = np.zeros(n)
+        self.leverage = np.ones(n)
+        self.last_price = np.zeros(n)
+        self.opened_ts = np.zeros(n, dtype=np.int64)
+        self.engines: List[Optional[ExitEngine]] = [None] * n
+        self.open_idx: List[int] = []
+
+        self.sink = make_sink(sink, data_dir, flush_every_bars, PORTFOLIO_TRADE_COLUMNS)
+        self.equity_curve = []
+        self.rejected = 0
+
+    # ------------------------------------------------------------------
+    # Account
+    # ------------------------------------------------------------------
+
+    def unrealized_pnl(self) -> float:
+        """Open PnL at the last seen prices"""
+        return float(np.dot(self.side * self.qty, self.last_price - self.entry))
+
+    def mark_to_market(self) -> float:
+        """Realized equity plus open PnL"""
+        return self.equity + self.unrealized_pnl()
+
+    def used_margin(self) -> float:
+        return float(self.margin.sum())
+
+    def free_margin(self) -> float:
+        """Margin still available for new positions"""
+        return self.mark_to_market() * self.max_margin_pct / 100.0 - self.used_margin()
+
+    def positions(self) -> Dict[str, Dict[str, float]]:
+        """Open positions keyed by symbol"""
+        out = {}
+        for i in self.open_idx:
+            out[self.symbols[i]] = {
+                "side": "LONG" if self.side[i] > 0 else "SHORT",
+                "qty": float(self.qty[i]),
+                "entry": float(self.entry[i]),
+                "margin": float(self.margin[i]),
+                "leverage": float(self.leverage[i]),
+                "ts": int(self.opened_ts[i]),
+            }
+        return out
+
+    def has_position(self, symbol: str) -> bool:
+        return self.side[self.index[symbol]] != 0
+
+    # ------------------------------------------------------------------
+    # Event loop
+    # ------------------------------------------------------------------
+
+    def on_bar(
+        self,
+        ts: int,
+        high: Sequence[float],
+        low: Sequence[float],
+        close: Sequence[float],
+        atr: Sequence[float],
+        st_line: Optional[Sequence[float]] = None,
+        kel_lo: Optional[Sequence[float]] = None,
+        kel_up: Optional[Sequence[float]] = None
+    ):
+        """
+        Process one time step for every symbol
+
+        Inputs are aligned with self.symbols (rows of align_symbols() output);
+        symbols with a NaN close have no bar at this ts and are skipped.
+        """
+        self._record_equity(ts)
+
+        if not self.open_idx:
+            return
+
+        for i in tuple(self.open_idx):
+            c = close[i]
+            if c != c:
+                continue
+            self.last_price[i] = c
+            engine = self.engines[i]
+            reason = engine.step(
+                high[i], low[i], c, atr[i],
+                st_line[i] if st_line is not None else None,
+                kel_lo[i] if kel_lo is not None else None,
+                kel_up[i] if kel_up is not None else None
+            )
+            if reason is not None:
+                if engine.exit_pct:
+                    self._partial_exit(i, ts, engine.exit_price, reason, engine.exit_pct)
+                else:
+                    self._close(i, ts, engine.exit_price, reason)
+
+    # ------------------------------------------------------------------
+    # Orders
+    # ------------------------------------------------------------------
+
+    def open_with_plan(self, symbol: str, ts: int, qty: float, price: float, leverage: float,
+                       exit_plan: ExitPlan, note: str = "") -> bool:
+        """Open a position with an ExitPlan; False if already open or margin is short"""
+        i = self.index[symbol]
+        if self.side[i] != 0 or qty <= 0:
+            return False
+
+        leverage = float(leverage) or 1.0
+        margin = qty * price / leverage
+        self.last_price[i] = price
+        if margin > self.free_margin():
+            self.rejected += 1
+            return False
+
+        self.side[i] = 1 if exit_plan.side == "LONG" else -1
+        self.qty[i] = qty
+        self.entry[i] = price
+        self.margin[i] = margin
+        self.leverage[i] = leverage
+        self.opened_ts[i] = ts
+        # extremes start from the fill, not plan.entry (as in PaperFuturesBrokerV2)
+        self.engines[i] = ExitEngine(exit_plan, tick_size=self.tick_size, highest=price, lowest=price)
+        self.open_idx.append(i)
+
+        self._log(ts, symbol, "OPEN_" + exit_plan.side, exit_plan.side, qty, price, 0.0, note)
+        return True
+
+    def open(self, symbol: str, ts: int, side: str, qty: float, price: float, sl: float, tp: float,
+             leverage: float, time_stop_bars: Optional[int] = None, note: str = "") -> bool:
+        """Open with a plain SL/TP (no targets, no trailing)"""
+        R = abs(price - sl)
+        plan = ExitPlan(side=side, entry=price, sl=float(sl), tp_primary=float(tp), R=R,
+                        trailing=Trailing(mode="none"), time_stop_bars=time_stop_bars)
+        return self.open_with_plan(symbol, ts, qty, price, leverage, plan, note)
+
+    def close_position(self, symbol: str, ts: int, price: float, reason: str = "MANUAL"):
+        i = self.index[symbol]
+        if self.side[i] != 0:
+            self._close(i, ts, price, reason)
+
+    def close_all(self, ts: int, prices: Sequence[float], reason: str = "end_of_backtest"):
+        """Close every open position at prices aligned with self.symbols (NaN = last price)"""
+        for i in tuple(self.open_idx):
+            px = prices[i]
+            self._close(i, ts, px if px == px else float(self.last_price[i]), reason)
+
+    def _partial_exit(self, i: int, ts: int, price: float, reason: str, pct: float):
+        qty_to_close = self.qty[i] * pct
+        if qty_to_close <= 0:
+            return
+        remaining = self.qty[i] - qty_to_close
+        self._realize(i, ts, price, qty_to_close, reason, f"Partial {pct*100:.0f}%")
+        if remaining <= 0.0001:
+            self._clear(i)
+        else:
+            self.margin[i] *= remaining / self.qty[i]
+            self.qty[i] = remaining
+
+    def _close(self, i: int, ts: int, price: float, reason: str):
+        self._realize(i, ts, price, self.qty[i], reason, "")
+        self._clear(i)
+
+    def _realize(self, i: int, ts: int, price: float, qty: float, reason: str, note: str):
+        """Book PnL net of taker fees (same formula as PaperFuturesBrokerV2)"""
+        entry = self.entry[i]
+        long = self.side[i] > 0
+        pnl = (price - entry) * qty if long else (entry - price) * qty
+        fee = abs(entry * qty + price * qty) * (self.taker_fee_bps / 10000.0)
+        self.equity += pnl - fee
+        self._log(ts, self.symbols[i], reason, "LONG" if long else "SHORT", float(qty), price, pnl - fee, note)
+
+    def _clear(self, i: int):
+        engine = self.engines[i]
+        if engine is not None:
+            engine.sync()
+        self.side[i] = 0
+        self.qty[i] = 0.0
+        self.entry[i] = 0.0
+        self.margin[i] = 0.0
+        self.engines[i] = None
+        self.open_idx.remove(i)
+
+    # ------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------
+
+    def _log(self, ts, symbol, action, side, qty, price, pnl, note):
+        self.sink.write_trade(ts, action, side, qty, price, pnl, note, symbol=symbol)
+
+    def _record_equity(self, ts: int):
+        self.equity_curve.append([ts, self.equity])
+        self.sink.write_equity(ts, self.equity)
+
+    def flush(self):
+        self.sink.flush()
+
+    def close(self):
+        """Flush and release the sink (call once the backtest is done)"""
+        self.sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
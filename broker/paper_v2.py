@@ -7,12 +7,15 @@ Features:
 - Structure-aware trailing
 - Regime-adaptive parameters
 - Full compatibility with old API
+- Pluggable equity/trade sinks (buffered CSV, Parquet, in-memory, metrics-only)
 """
 
 import os
-import csv
 import time
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Union
+
+from backend.agents.exits import ExitEngine
+from .sinks import BrokerSink, make_sink
 
 
 class PaperFuturesBrokerV2:
@@ -31,8 +34,16 @@ class PaperFuturesBrokerV2:
         spread_bps: float = 1.0,
         taker_fee_bps: float = 5.0,
         maker_fee_bps: float = 2.0,
-        data_dir: str = "data/paper"
+        data_dir: str = "data/paper",
+        sink: Union[str, BrokerSink] = "csv",
+        flush_every_bars: Optional[int] = 5000
     ):
+        """
+        Args:
+            sink: "csv" (default), "parquet", "memory", "null" or a BrokerSink instance
+            flush_every_bars: File sinks write their buffer every N bars
+                (None = only on flush()/close())
+        """
         self.equity = float(equity)
         self.start_equity = float(equity)
         self.max_daily_loss_pct = float(max_daily_loss_pct)
@@ -41,33 +52,56 @@ class PaperFuturesBrokerV2:
         self.maker_fee_bps = float(maker_fee_bps)
         self.data_dir = data_dir
         
-        os.makedirs(self.data_dir, exist_ok=True)
+        self.sink = make_sink(sink, data_dir, flush_every_bars)
         
-        self.trades_path = os.path.join(self.data_dir, "trades.csv")
-        self.equity_path = os.path.join(self.data_dir, "equity_curve.csv")
-        
-        self._init_files()
+        self.trades_path = getattr(self.sink, "trades_path", os.path.join(self.data_dir, "trades.csv"))
+        self.equity_path = getattr(self.sink, "equity_path", os.path.join(self.data_dir, "equity_curve.csv"))
         
         # Position tracking
         self.position = None
-        self.exit_plan = None  # NEW: Store ExitPlan
+        self._exit_plan = None  # NEW: Store ExitPlan
+        self._exit_engine = None  # ExitEngine for the open plan position
         self.equity_curve = []
         
         # Tracking for highest/lowest since entry
         self.highest_since_entry = None
         self.lowest_since_entry = None
     
-    def _init_files(self):
-        """Initialize CSV files"""
-        if not os.path.exists(self.trades_path):
-            with open(self.trades_path, "w", newline="", encoding="utf-8") as f:
-                w = csv.writer(f)
-                w.writerow(["ts_utc", "action", "side", "qty", "price", "pnl", "note"])
-        
-        if not os.path.exists(self.equity_path):
-            with open(self.equity_path, "w", newline="", encoding="utf-8") as f:
-                w = csv.writer(f)
-                w.writerow(["ts", "equity"])
+    @property
+    def exit_plan(self):
+        """ExitPlan of the open position, with runtime state synced from the engine"""
+        if self._exit_engine is not None:
+            self._exit_engine.sync()
+        return self._exit_plan
+    
+    @exit_plan.setter
+    def exit_plan(self, plan):
+        if self._exit_engine is not None:
+            self._exit_engine.sync()
+        self._exit_plan = plan
+        if plan is None:
+            self._exit_engine = None
+            return
+        # Exit prices are rounded to a 0.1 tick, as in the original per-bar ctx;
+        # the extremes start from the position's fill, not plan.entry
+        highest = self.highest_since_entry if self.position else None
+        lowest = self.lowest_since_entry if self.position else None
+        self._exit_engine = ExitEngine(plan, tick_size=0.1, highest=highest, lowest=lowest)
+    
+    def flush(self):
+        """Write buffered equity/trade rows to the sink backend"""
+        self.sink.flush()
+    
+    def close(self):
+        """Flush and release the sink (call once the backtest is done)"""
+        self.sink.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+        return False
     
     def on_candle(
         self,
@@ -94,18 +128,14 @@ class PaperFuturesBrokerV2:
             return
         
         # Update highest/lowest tracking
-        if self.highest_since_entry is None:
+        if self.highest_since_entry is None or high > self.highest_since_entry:
             self.highest_since_entry = high
-        else:
-            self.highest_since_entry = max(self.highest_since_entry, high)
         
-        if self.lowest_since_entry is None:
+        if self.lowest_since_entry is None or low < self.lowest_since_entry:
             self.lowest_since_entry = low
-        else:
-            self.lowest_since_entry = min(self.lowest_since_entry, low)
         
         # === NEW: ExitPlan Mode ===
-        if self.exit_plan is not None:
+        if self._exit_engine is not None:
             self._process_exit_plan(ts, high, low, close, atr, st_line, kel_lo, kel_up)
             return
         
@@ -123,44 +153,17 @@ class PaperFuturesBrokerV2:
         kel_lo: Optional[float],
         kel_up: Optional[float]
     ):
-        """Process exits using ExitPlan"""
-        from backend.agents.exits import update_trailing_stop, check_exits
-        
-        plan = self.exit_plan
-        plan.bars_in_trade += 1
-        
-        # Build context for trailing
-        ctx = {
-            "tick_size": 0.1,
-            "close": close,
-            "high": high,
-            "low": low,
-            "highest_since_entry": self.highest_since_entry,
-            "lowest_since_entry": self.lowest_since_entry
-        }
-        
-        if st_line is not None:
-            ctx["supertrend"] = st_line
-        if kel_lo is not None:
-            ctx["keltner_lo"] = kel_lo
-        if kel_up is not None:
-            ctx["keltner_up"] = kel_up
-        
-        # Update trailing stop
-        update_trailing_stop(plan, ctx, ctx, atr)
-        
-        # Check exits
-        exit_result = check_exits(plan, close, high, low)
+        """Process exits using the position's ExitEngine"""
+        engine = self._exit_engine
+        reason = engine.step(high, low, close, atr, st_line, kel_lo, kel_up)
         
-        if exit_result:
-            reason, price, partial_pct = exit_result
-            
-            if partial_pct:
+        if reason is not None:
+            if engine.exit_pct:
                 # Partial exit
-                self._partial_exit(ts, price, reason, partial_pct)
+                self._partial_exit(ts, engine.exit_price, reason, engine.exit_pct)
             else:
                 # Full exit
-                self._close(ts, price, reason)
+                self._close(ts, engine.exit_price, reason)
     
     def _process_legacy_exits(
         self,
@@ -297,12 +300,12 @@ class PaperFuturesBrokerV2:
             "bars_in_trade": 0
         }
         
-        self.exit_plan = exit_plan
-        
-        # Reset tracking
+        # Reset tracking (the exit engine starts from these)
         self.highest_since_entry = price
         self.lowest_since_entry = price
         
+        self.exit_plan = exit_plan
+        
         self._log(ts, "OPEN_" + exit_plan.side, exit_plan.side, qty, price, 0.0, note)
         return True
     
@@ -378,16 +381,13 @@ class PaperFuturesBrokerV2:
         self.lowest_since_entry = None
     
     def _log(self, ts: int, action: str, side: str, qty: float, price: float, pnl: float, note: str):
-        """Log trade to CSV"""
-        with open(self.trades_path, "a", newline="", encoding="utf-8") as f:
-            w = csv.writer(f)
-            w.writerow([ts, action, side, qty, price, pnl, note])
+        """Log trade to sink"""
+        self.sink.write_trade(ts, action, side, qty, price, pnl, note)
     
     def _write_equity(self, ts: int):
         """Write equity to curve"""
         self.equity_curve.append([ts, self.equity])
-        with open(self.equity_path, "a", newline="", encoding="utf-8") as f:
-            csv.writer(f).writerow([ts, self.equity])
+        self.sink.write_equity(ts, self.equity)
 
 
 # Backwards compatibility alias
@@ -0,0 +1,279 @@
+"""
+Broker Output Sinks - Equity and Trade Writers
+
+The paper broker reports one equity point per bar and one row per fill.
+Sinks decide what happens to those rows:
+
+- MemorySink: columnar in-memory buffer, never touches the disk (optimizer default)
+- CSVSink: buffered, appended to trades.csv / equity_curve.csv on flush
+- ParquetSink: buffered, written as row groups to trades.parquet / equity_curve.parquet
+- NullSink: keeps running metrics only (last equity, drawdown, trade count)
+
+File sinks flush every `flush_every_bars` equity rows (None = only on flush()/close()).
+"""
+
+import os
+import csv
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Union
+
+TRADE_COLUMNS = ["ts_utc", "action", "side", "qty", "price", "pnl", "note"]
+PORTFOLIO_TRADE_COLUMNS = ["ts_utc", "symbol", "action", "side", "qty", "price", "pnl", "note"]
+EQUITY_COLUMNS = ["ts", "equity"]
+
+
+class ColumnBuffer:
+    """Append-only column store (one list per column)"""
+
+    def __init__(self, columns: List[str]):
+        self.columns = list(columns)
+        self.data: Dict[str, list] = {name: [] for name in self.columns}
+
+    def append(self, row):
+        for name, value in zip(self.columns, row):
+            self.data[name].append(value)
+
+    def rows(self) -> List[list]:
+        return [list(r) for r in zip(*(self.data[name] for name in self.columns))]
+
+    def records(self) -> List[Dict[str, Any]]:
+        return [dict(zip(self.columns, r)) for r in zip(*(self.data[name] for name in self.columns))]
+
+    def clear(self):
+        for values in self.data.values():
+            values.clear()
+
+    def __len__(self):
+        return len(self.data[self.columns[0]])
+
+
+class BrokerSink:
+    """Base sink: counts rows, subclasses decide where they go"""
+
+    kind = "base"
+
+    def __init__(self):
+        self.bars = 0
+        self.trades = 0
+        self.closes = 0
+        self._stats = {'flushes': 0, 'rows_written': 0, 'last_flush_ms': 0.0, 'total_flush_ms': 0.0}
+
+    def write_equity(self, ts: int, equity: float):
+        self.bars += 1
+
+    def write_trade(self, ts: int, action: str, side: str, qty: float, price: float, pnl: float, note: str,
+                    symbol: Optional[str] = None):
+        self.trades += 1
+        if not action.startswith("OPEN_"):
+            self.closes += 1
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+    def metrics(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats.update(kind=self.kind, bars=self.bars, trades=self.trades, closes=self.closes)
+        return stats
+
+
+class NullSink(BrokerSink):
+    """Metrics-only sink: no rows are kept"""
+
+    kind = "null"
+
+    def __init__(self):
+        super().__init__()
+        self.last_equity: Optional[float] = None
+        self.peak_equity: Optional[float] = None
+        self.max_drawdown_pct = 0.0
+        self.realized_pnl = 0.0
+        self.wins = 0
+
+    def write_equity(self, ts: int, equity: float):
+        super().write_equity(ts, equity)
+        self.last_equity = equity
+        if self.peak_equity is None or equity > self.peak_equity:
+            self.peak_equity = equity
+        elif self.peak_equity > 0:
+            self.max_drawdown_pct = min(self.max_drawdown_pct, (equity / self.peak_equity - 1.0) * 100)
+
+    def write_trade(self, ts: int, action: str, side: str, qty: float, price: float, pnl: float, note: str,
+                    symbol: Optional[str] = None):
+        super().write_trade(ts, action, side, qty, price, pnl, note)
+        if action.startswith("OPEN_"):
+            return
+        self.realized_pnl += pnl
+        if pnl > 0:
+            self.wins += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        stats = super().metrics()
+        stats.update(
+            last_equity=self.last_equity,
+            maxdd_pct=self.max_drawdown_pct,
+            realized_pnl=self.realized_pnl,
+            win_rate_pct=(self.wins / self.closes * 100) if self.closes else 0.0,
+        )
+        return stats
+
+
+class MemorySink(BrokerSink):
+    """
+    Columnar in-memory buffer; read back with equity_rows() / trade_rows()
+
+    File sinks reuse this buffer, so for them these return only unflushed rows.
+    """
+
+    kind = "memory"
+
+    def __init__(self, trade_columns: Optional[List[str]] = None):
+        super().__init__()
+        self.equity = ColumnBuffer(EQUITY_COLUMNS)
+        self.trade_log = ColumnBuffer(trade_columns or TRADE_COLUMNS)
+        self._with_symbol = "symbol" in self.trade_log.columns
+
+    def write_equity(self, ts: int, equity: float):
+        super().write_equity(ts, equity)
+        self.equity.append((ts, equity))
+
+    def write_trade(self, ts: int, action: str, side: str, qty: float, price: float, pnl: float, note: str,
+                    symbol: Optional[str] = None):
+        super().write_trade(ts, action, side, qty, price, pnl, note)
+        if self._with_symbol:
+            self.trade_log.append((ts, symbol, action, side, qty, price, pnl, note))
+        else:
+            self.trade_log.append((ts, action, side, qty, price, pnl, note))
+
+    def equity_rows(self) -> List[list]:
+        return self.equity.rows()
+
+    def trade_rows(self) -> List[Dict[str, Any]]:
+        """Trades as dicts keyed like the trades.csv header"""
+        return self.trade_log.records()
+
+
+class _FileSink(MemorySink, ABC):
+    """Memory buffer that is drained to files on flush"""
+
+    extension = ""
+
+    def __init__(self, data_dir: str, flush_every_bars: Optional[int] = None,
+                 trade_columns: Optional[List[str]] = None):
+        super().__init__(trade_columns)
+        self.data_dir = data_dir
+        self.flush_every_bars = flush_every_bars
+        os.makedirs(self.data_dir, exist_ok=True)
+        self.trades_path = os.path.join(self.data_dir, "trades" + self.extension)
+        self.equity_path = os.path.join(self.data_dir, "equity_curve" + self.extension)
+
+    def write_equity(self, ts: int, equity: float):
+        super().write_equity(ts, equity)
+        if self.flush_every_bars and len(self.equity) >= self.flush_every_bars:
+            self.flush()
+
+    def flush(self):
+        if not len(self.equity) and not len(self.trade_log):
+            return
+        start = time.perf_counter()
+        rows = len(self.equity) + len(self.trade_log)
+        self._write(self.trade_log, self.trades_path)
+        self._write(self.equity, self.equity_path)
+        self.trade_log.clear()
+        self.equity.clear()
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._stats['flushes'] += 1
+        self._stats['rows_written'] += rows
+        self._stats['last_flush_ms'] = elapsed_ms
+        self._stats['total_flush_ms'] += elapsed_ms
+
+    @abstractmethod
+    def _write(self, buf: ColumnBuffer, path: str):
+        """Append the buffered rows to `path`"""
+        pass
+
+
+class CSVSink(_FileSink):
+    """Appends to trades.csv / equity_curve.csv (headers written on creation)"""
+
+    kind = "csv"
+    extension = ".csv"
+
+    def __init__(self, data_dir: str, flush_every_bars: Optional[int] = None,
+                 trade_columns: Optional[List[str]] = None):
+        super().__init__(data_dir, flush_every_bars, trade_columns)
+        for path, header in ((self.trades_path, self.trade_log.columns), (self.equity_path, EQUITY_COLUMNS)):
+            if not os.path.exists(path):
+                with open(path, "w", newline="", encoding="utf-8") as f:
+                    csv.writer(f).writerow(header)
+
+    def _write(self, buf: ColumnBuffer, path: str):
+        if not len(buf):
+            return
+        with open(path, "a", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows(buf.rows())
+
+
+class ParquetSink(_FileSink):
+    """Writes one Parquet row group per flush (requires pyarrow)"""
+
+    kind = "parquet"
+    extension = ".parquet"
+
+    def __init__(self, data_dir: str, flush_every_bars: Optional[int] = None,
+                 trade_columns: Optional[List[str]] = None):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("ParquetSink requires pyarrow (pip install pyarrow)") from e
+        self._pa = pa
+        self._pq = pq
+        self._writers: Dict[str, Any] = {}
+        super().__init__(data_dir, flush_every_bars, trade_columns)
+
+    def _write(self, buf: ColumnBuffer, path: str):
+        if not len(buf):
+            return
+        data = dict(buf.data)
+        if "note" in data:
+            data["note"] = [str(n) for n in data["note"]]
+        table = self._pa.table(data)
+        writer = self._writers.get(path)
+        if writer is None:
+            writer = self._writers[path] = self._pq.ParquetWriter(path, table.schema)
+        writer.write_table(table)
+
+    def close(self):
+        self.flush()
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+
+
+SINKS = {
+    "memory": MemorySink,
+    "null": NullSink,
+    "csv": CSVSink,
+    "parquet": ParquetSink,
+}
+
+
+def make_sink(sink: Union[str, BrokerSink], data_dir: str = "data/paper",
+              flush_every_bars: Optional[int] = None,
+              trade_columns: Optional[List[str]] = None) -> BrokerSink:
+    """Build a sink from its name (memory, null, csv, parquet) or pass an instance through"""
+    if isinstance(sink, BrokerSink):
+        return sink
+    if sink not in SINKS:
+        raise ValueError(f"Unknown broker sink '{sink}' (expected one of {sorted(SINKS)})")
+    cls = SINKS[sink]
+    if issubclass(cls, _FileSink):
+        return cls(data_dir, flush_every_bars, trade_columns)
+    if cls is MemorySink:
+        return cls(trade_columns)
+    return cls()
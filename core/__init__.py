@@ -9,11 +9,35 @@ Essential utilities used across the system:
 - metrics.py: Performance metrics
 """
 
+import importlib
+
 from .database import connect, load_range, insert_candles, insert_features
-from .features import compute_feature_rows
-from .indicators import supertrend, keltner, rsi, ema, atr, adx
-from .sizing import compute_qty
-from .metrics import equity_metrics, trades_metrics
+
+# numpy/pandas-backed helpers load on first access, so importing the
+# database layer (e.g. the API server) does not pay for them
+_LAZY = {
+    'compute_feature_rows': 'features',
+    'supertrend': 'indicators',
+    'keltner': 'indicators',
+    'rsi': 'indicators',
+    'ema': 'indicators',
+    'atr': 'indicators',
+    'adx': 'indicators',
+    'compute_qty': 'sizing',
+    'equity_metrics': 'metrics',
+    'trades_metrics': 'metrics',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(f".{_LAZY[name]}", __name__), name)
+    elif name in set(_LAZY.values()):
+        value = importlib.import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
 
 __all__ = [
     'connect',
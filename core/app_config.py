@@ -0,0 +1,133 @@
+"""
+App Config Provider
+
+config.yaml is parsed once and handed out as an immutable snapshot
+(dicts -> MappingProxyType, lists -> tuples), so request handlers and
+tools can read it without disk I/O:
+
+    from core.app_config import app_config
+    db_path = app_config().get("db", {}).get("path")
+
+Freshness: at most every `poll_interval` seconds a get() stats the file and
+re-parses it when (mtime, size, inode) changed, so edits show up within
+poll_interval. Writers in the same process call invalidate() to see their
+own change immediately. If the file disappears or fails to parse after a
+good load (an editor mid-save), the last good snapshot keeps being served.
+"""
+
+import os
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Dict, Optional, Tuple
+
+import yaml
+
+DEFAULT_CONFIG_PATH = "config.yaml"
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+def freeze(obj: Any) -> Any:
+    """Read-only deep copy: dicts become MappingProxyType, lists become tuples"""
+    if isinstance(obj, dict):
+        return MappingProxyType({k: freeze(v) for k, v in obj.items()})
+    if isinstance(obj, (list, tuple)):
+        return tuple(freeze(v) for v in obj)
+    return obj
+
+
+def thaw(obj: Any) -> Any:
+    """Mutable deep copy of a frozen snapshot (for handlers that edit and write back)"""
+    if isinstance(obj, MappingProxyType):
+        return {k: thaw(v) for k, v in obj.items()}
+    if isinstance(obj, tuple):
+        return [thaw(v) for v in obj]
+    return obj
+
+
+class ConfigProvider:
+    """Cached, mtime-invalidated view of one YAML file"""
+
+    def __init__(self, path: str = DEFAULT_CONFIG_PATH, poll_interval: float = DEFAULT_POLL_INTERVAL):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._snapshot: Optional[MappingProxyType] = None
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._checked_at = 0.0
+        self.stats = {"gets": 0, "stat_calls": 0, "parses": 0, "parse_errors": 0}
+
+    def _stat(self) -> Tuple[int, int, int]:
+        self.stats["stat_calls"] += 1
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _reload(self, signature: Tuple[int, int, int]):
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f)
+        if data is None and self._snapshot is None:
+            data = {}   # an empty file is an empty config, unless it replaces a loaded one (truncated mid-save)
+        if not isinstance(data, dict):
+            raise yaml.YAMLError(f"expected a mapping at the top level, got {type(data).__name__}")
+        self.stats["parses"] += 1
+        self._snapshot = freeze(data)
+        self._signature = signature
+
+    def get(self) -> MappingProxyType:
+        """
+        Current snapshot
+
+        Raises:
+            FileNotFoundError: if the file has never been loaded and does not exist
+            yaml.YAMLError: if the file has never parsed successfully
+        """
+        now = time.monotonic()
+        snapshot = self._snapshot
+        self.stats["gets"] += 1
+        if snapshot is not None and now - self._checked_at < self.poll_interval:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is not None and now - self._checked_at < self.poll_interval:
+                return self._snapshot
+            try:
+                signature = self._stat()
+                if signature != self._signature:
+                    self._reload(signature)
+            except (OSError, yaml.YAMLError) as e:
+                if self._snapshot is None:
+                    raise
+                if isinstance(e, yaml.YAMLError):
+                    self.stats["parse_errors"] += 1
+                    print(f"[Config] Keeping previous {self.path}: {e}")
+            self._checked_at = now
+            return self._snapshot
+
+    def invalidate(self):
+        """Force the next get() to re-read the file"""
+        with self._lock:
+            self._checked_at = 0.0
+            self._signature = None
+
+
+_PROVIDERS: Dict[str, ConfigProvider] = {}
+_PROVIDERS_LOCK = threading.Lock()
+
+
+def get_provider(path: str = DEFAULT_CONFIG_PATH) -> ConfigProvider:
+    """Process-wide provider for `path` (one per absolute path)"""
+    key = os.path.abspath(path)
+    provider = _PROVIDERS.get(key)
+    if provider is None:
+        with _PROVIDERS_LOCK:
+            provider = _PROVIDERS.setdefault(key, ConfigProvider(key))
+    return provider
+
+
+def app_config(path: str = DEFAULT_CONFIG_PATH) -> MappingProxyType:
+    """Immutable snapshot of config.yaml (see ConfigProvider.get)"""
+    return get_provider(path).get()
+
+
+def invalidate(path: str = DEFAULT_CONFIG_PATH):
+    get_provider(path).invalidate()
@@ -0,0 +1,116 @@
+"""
+Binary Candle Encoding
+
+Compact columnar alternative to the JSON candle lists served by
+/api/candles and /api/lab/run/{id}/candles. Clients opt in with
+`Accept: application/vnd.smarttrade.candles`; everything else keeps the
+JSON response.
+
+Layout (little endian, every section 4-byte aligned so a browser can wrap
+it in typed arrays without copying):
+
+    header  24 bytes  magic "CNDL", u16 version, u16 flags, u32 count,
+                      u32 reserved, i64 first timestamp
+    ts      count x i32 (i64 if flags & FLAG_TS64) deltas from the previous
+            timestamp (the first delta is 0)
+    open, high, low, close, volume
+            count x f32 each
+
+Timestamps are the raw candle `ts` values from the DB (epoch ms).
+Prices are float32 (about 7 significant digits), plenty for drawing a chart.
+
+Compression is plain HTTP Content-Encoding (gzip, or br when the optional
+`brotli` package is installed) negotiated from Accept-Encoding; the
+constant timestamp deltas make the ts column nearly free after it.
+
+Paging: handlers take `before` (exclusive ts cursor) and `limit` and return
+the page in ascending order with `next_cursor` (JSON field / X-Next-Cursor
+header) set to the oldest ts of a full page, i.e. the `before` to request
+the previous page with; it is absent once history is exhausted.
+"""
+
+import gzip
+import struct
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+MEDIA_TYPE = "application/vnd.smarttrade.candles"
+MAGIC = b"CNDL"
+VERSION = 1
+FLAG_TS64 = 1
+HEADER = struct.Struct("<4sHHIIq")
+COLUMNS = ("open", "high", "low", "close", "volume")
+
+try:
+    import brotli
+except ImportError:  # optional, gzip only
+    brotli = None
+
+
+def encode_candles(rows: Sequence[Sequence[float]]) -> bytes:
+    """
+    Encode (ts, open, high, low, close, volume) rows, ascending by ts
+
+    Returns:
+        The binary payload described in the module docstring
+    """
+    n = len(rows)
+    if n == 0:
+        return HEADER.pack(MAGIC, VERSION, 0, 0, 0, 0)
+    table = np.array(rows, dtype=np.float64)
+    ts = table[:, 0].astype(np.int64)
+    deltas = np.empty(n, dtype=np.int64)
+    deltas[0] = 0
+    np.subtract(ts[1:], ts[:-1], out=deltas[1:])
+
+    flags = FLAG_TS64 if np.abs(deltas).max() > np.iinfo(np.int32).max else 0
+    ts_dtype = "<i8" if flags & FLAG_TS64 else "<i4"
+    ohlcv = np.ascontiguousarray(table[:, 1:6].T, dtype="<f4")
+    return b"".join((HEADER.pack(MAGIC, VERSION, flags, n, 0, int(ts[0])),
+                     deltas.astype(ts_dtype).tobytes(), ohlcv.tobytes()))
+
+
+def decode_candles(data: bytes) -> Dict[str, np.ndarray]:
+    """Inverse of encode_candles(): {"ts": int64, "open".."volume": float32}"""
+    magic, version, flags, n, _, ts0 = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Not a v{VERSION} candle payload")
+    ts_dtype = "<i8" if flags & FLAG_TS64 else "<i4"
+    offset = HEADER.size
+    deltas = np.frombuffer(data, dtype=ts_dtype, count=n, offset=offset)
+    offset += deltas.nbytes
+    out = {"ts": ts0 + np.cumsum(deltas, dtype=np.int64)}
+    ohlcv = np.frombuffer(data, dtype="<f4", count=5 * n, offset=offset).reshape(5, n)
+    for name, column in zip(COLUMNS, ohlcv):
+        out[name] = column
+    return out
+
+
+def wants_binary(accept: Optional[str]) -> bool:
+    return bool(accept) and MEDIA_TYPE in accept
+
+
+def pick_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best Content-Encoding offered by the client that we can produce"""
+    offered = {part.split(";")[0].strip().lower() for part in (accept_encoding or "").split(",")}
+    if brotli is not None and "br" in offered:
+        return "br"
+    if "gzip" in offered:
+        return "gzip"
+    return None
+
+
+def compress(payload: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == "br":
+        return brotli.compress(payload, quality=4)
+    if encoding == "gzip":
+        return gzip.compress(payload, compresslevel=5, mtime=0)
+    return payload
+
+
+def next_cursor(rows: Sequence[Sequence[float]], limit: Optional[int]) -> Optional[int]:
+    """`before` for the previous page, or None when this page was not full"""
+    if not limit or len(rows) < limit:
+        return None
+    return int(rows[0][0])
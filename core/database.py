@@ -117,9 +117,25 @@ def connect_lab(path="data/lab.db"):
         FOREIGN KEY (run_id) REFERENCES runs(id)
     )""")
     
+    # One row per finished run (see lab.summary): serves run listings and /compare
+    cur.execute("""CREATE TABLE IF NOT EXISTS run_summaries (
+        run_id TEXT PRIMARY KEY,
+        best_trial_id INTEGER,
+        best_score REAL,
+        metrics_json TEXT,
+        equity_stats_json TEXT,
+        equity_curve_json TEXT,
+        trade_stats_json TEXT,
+        source_path TEXT,
+        computed_at INTEGER,
+        FOREIGN KEY (run_id) REFERENCES runs(id)
+    )""")
+    
     cur.execute("CREATE INDEX IF NOT EXISTS idx_trials_run ON trials(run_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_trials_run_score ON trials(run_id, score)")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_artifacts_run ON artifacts(run_id)")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_logs_run ON logs(run_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_runs_created ON runs(created_at)")
     
     conn.commit()
     return conn
@@ -276,4 +292,59 @@ def get_all_runs(conn, limit=100):
     
     rows = cur.fetchall()
     columns = [desc[0] for desc in cur.description]
-    return [dict(zip(columns, row)) for row in rows]
\ No newline at end of file
+    return [dict(zip(columns, row)) for row in rows]
+
+
+SUMMARY_JSON_FIELDS = ("metrics_json", "equity_stats_json", "equity_curve_json", "trade_stats_json")
+
+
+def upsert_run_summary(conn, run_id, best_trial_id, best_score, metrics, equity_stats, equity_curve, trade_stats, source_path):
+    """Store (or replace) the precomputed summary of a run; the dict arguments are stored as JSON"""
+    conn.execute("""INSERT OR REPLACE INTO run_summaries
+        (run_id, best_trial_id, best_score, metrics_json, equity_stats_json, equity_curve_json, trade_stats_json, source_path, computed_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        (run_id, best_trial_id, best_score, json.dumps(metrics), json.dumps(equity_stats),
+         json.dumps(equity_curve), json.dumps(trade_stats), source_path, int(time.time())))
+    conn.commit()
+
+
+def _summary_rows(cur):
+    columns = [desc[0] for desc in cur.description]
+    rows = []
+    for row in cur.fetchall():
+        item = dict(zip(columns, row))
+        for field in SUMMARY_JSON_FIELDS:
+            if field in item:
+                item[field[:-len("_json")]] = json.loads(item.pop(field)) if item[field] else None
+        rows.append(item)
+    return rows
+
+
+def get_runs_with_summaries(conn, limit=100):
+    """
+    Latest runs joined with their summaries in one query
+
+    best_score falls back to the best trial so far for runs that have no
+    summary yet (pending / running).
+    """
+    cur = conn.cursor()
+    cur.execute("""SELECT r.id, r.name, r.mode, r.status, r.started_at, r.completed_at, r.created_at,
+            COALESCE(s.best_score, (SELECT MAX(t.score) FROM trials t WHERE t.run_id = r.id)) AS best_score,
+            s.metrics_json, s.equity_stats_json, s.trade_stats_json, s.computed_at
+        FROM runs r LEFT JOIN run_summaries s ON s.run_id = r.id
+        ORDER BY r.created_at DESC LIMIT ?""", (limit,))
+    return _summary_rows(cur)
+
+
+def get_run_summaries(conn, run_ids, with_curve=True):
+    """Summaries (joined with run name/status) of the given runs that have one, in run_ids order"""
+    if not run_ids:
+        return []
+    curve = ", s.equity_curve_json" if with_curve else ""
+    cur = conn.cursor()
+    cur.execute(f"""SELECT r.id, r.name, r.status, s.best_trial_id, s.best_score, s.metrics_json,
+            s.equity_stats_json, s.trade_stats_json, s.computed_at{curve}
+        FROM run_summaries s JOIN runs r ON r.id = s.run_id
+        WHERE s.run_id IN ({",".join("?" * len(run_ids))})""", list(run_ids))
+    by_id = {row["id"]: row for row in _summary_rows(cur)}
+    return [by_id[run_id] for run_id in run_ids if run_id in by_id]
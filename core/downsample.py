@@ -0,0 +1,53 @@
+"""
+Series Downsampling
+
+Largest-Triangle-Three-Buckets (Steinarsson, 2013) picks the points of a
+line chart that keep its visual shape: the first and last points stay, the
+rest is split into n_out - 2 buckets and each bucket keeps the point forming
+the largest triangle with the previously kept point and the average of the
+next bucket. Spikes therefore survive where plain striding would drop them.
+
+    idx = downsample_indices(t, equity, 1000, keep=[equity.argmax()])
+    t_small, equity_small = t[idx], equity[idx]
+"""
+
+from typing import Iterable
+
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of the LTTB selection of n_out points (ascending)
+
+    Returns every index when the series already has at most n_out points.
+    """
+    n = len(x)
+    if n_out >= n or n <= 2:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1])
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = hi, (edges[i + 2] if i + 2 < len(edges) else n)
+        avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def downsample_indices(x: np.ndarray, y: np.ndarray, n_out: int, keep: Iterable[int] = ()) -> np.ndarray:
+    """LTTB selection plus the `keep` indices (e.g. extremes that must stay exact), sorted and unique"""
+    idx = lttb_indices(x, y, n_out)
+    keep = np.asarray(list(keep), dtype=np.int64)
+    if len(idx) == len(x) or not keep.size:
+        return idx
+    return np.union1d(idx, keep)
@@ -1,6 +1,13 @@
 import numpy as np, pandas as pd
 from .indicators import ema, atr, rsi, adx, bollinger, donchian, macd, stoch, cci, supertrend, mfi, vwap, obv, keltner
 
+# Column names of the rows returned by compute_feature_rows(), in order
+FEATURE_ROW_COLUMNS = [
+    "ts", "ema20", "ema50", "atr14", "rsi5", "rsi14", "adx14", "bb_mid", "bb_lo", "bb_up", "dn55", "up55",
+    "regime", "macro", "atr1h_pct", "macd", "macd_signal", "macd_hist", "stoch_k", "stoch_d", "cci20",
+    "williams_r", "supertrend", "supertrend_dir", "mfi14", "vwap", "obv", "keltner_mid", "keltner_lo", "keltner_up",
+]
+
 def resample(ts, o,h,l,c, tf_seconds):
     # assumes 5m base
     df = pd.DataFrame({'ts': ts, 'o':o,'h':h,'l':l,'c':c})
@@ -20,7 +27,7 @@ def compute_feature_rows(ts, o, h, l, c, v=None):
         v: volume (optional, will use dummy values if not provided)
     
     Returns:
-        List of feature rows with all indicators
+        List of feature rows with all indicators (columns: FEATURE_ROW_COLUMNS)
     """
     ts = np.asarray(ts); o=np.asarray(o); h=np.asarray(h); l=np.asarray(l); c=np.asarray(c)
     
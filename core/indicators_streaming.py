@@ -0,0 +1,392 @@
+"""
+Streaming Indicator Engine
+
+Incremental (O(1) per bar) versions of the indicators in core/indicators.py,
+for the live agent loop where recomputing every indicator over the whole
+lookback window on each tick is wasted work.
+
+Each streaming indicator reproduces the batch definition bar-for-bar, so
+feeding a series one bar at a time yields the same values as calling the
+batch function on the full series. The one exception is the Bollinger mid
+band: core.indicators.bollinger uses a centered convolution (mode='same'),
+which looks ahead; the streaming version uses the trailing mean instead.
+Band width (k * std over the trailing window) matches the batch version.
+
+Usage:
+    engine = StreamingIndicatorEngine()
+    ind = engine.on_bar_close("BTC/USDT:USDT", candle)
+    ind['rsi14'], ind['supertrend_bull'], ind['bb_upper'], ...
+"""
+
+import math
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
+
+from strategies.adapter import build_indicator_dict
+
+
+# ============================================================================
+# STREAMING PRIMITIVES
+# ============================================================================
+
+class StreamingEMA:
+    """EMA seeded with the first value (matches indicators.ema)"""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.alpha = 2 / (n + 1.0)
+        self.value: Optional[float] = None
+
+    def update(self, x: float) -> float:
+        if self.value is None or self.n <= 1:
+            self.value = x
+        else:
+            self.value = self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+
+class StreamingRMA:
+    """Wilder's moving average (matches indicators.rma: zeros until seeded with the SMA of the first n values)"""
+
+    def __init__(self, n: int):
+        self.n = max(n, 1)
+        self.alpha = 1 / self.n
+        self.count = 0
+        self._sum = 0.0
+        self.value = 0.0
+
+    def update(self, x: float) -> float:
+        self.count += 1
+        if self.count < self.n:
+            self._sum += x
+            return 0.0
+        if self.count == self.n:
+            self._sum += x
+            self.value = self._sum / self.n
+        else:
+            self.value = self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+
+class StreamingATR:
+    """Average True Range (matches indicators.atr)"""
+
+    def __init__(self, n: int = 14):
+        self.rma = StreamingRMA(n)
+        self.prev_close: Optional[float] = None
+        self.value = 0.0
+
+    def update(self, high: float, low: float, close: float) -> float:
+        if self.prev_close is None:
+            tr = high - low
+        else:
+            tr = max(high, self.prev_close) - min(low, self.prev_close)
+        self.prev_close = close
+        self.value = self.rma.update(tr)
+        return self.value
+
+
+class StreamingRSI:
+    """Relative Strength Index (matches indicators.rsi)"""
+
+    def __init__(self, n: int = 14):
+        self.up = StreamingRMA(n)
+        self.dn = StreamingRMA(n)
+        self.prev_close: Optional[float] = None
+        self.value = 0.0
+
+    def update(self, close: float) -> float:
+        diff = 0.0 if self.prev_close is None else close - self.prev_close
+        self.prev_close = close
+        rs = self.up.update(max(diff, 0.0)) / (self.dn.update(max(-diff, 0.0)) + 1e-12)
+        self.value = 100 - (100 / (1 + rs))
+        return self.value
+
+
+class StreamingADX:
+    """
+    Average Directional Index (matches indicators.adx)
+
+    The batch version smooths DX with its first value duplicated and then
+    shifts the result by one bar; both quirks are reproduced here so the
+    streaming value at bar i equals adx(...)[i].
+    """
+
+    def __init__(self, n: int = 14):
+        self.tr = StreamingRMA(n)
+        self.plus_dm = StreamingRMA(n)
+        self.minus_dm = StreamingRMA(n)
+        self.dx = StreamingRMA(n)
+        self.prev: Optional[tuple] = None
+        self._last_out = 0.0
+        self.value = 0.0
+
+    def update(self, high: float, low: float, close: float) -> float:
+        if self.prev is None:
+            self.tr.update(high - low)
+            self.prev = (high, low, close)
+            self.value = 0.0
+            return self.value
+
+        ph, pl, pc = self.prev
+        self.prev = (high, low, close)
+        up = high - ph
+        dn = pl - low
+        atr_v = self.tr.update(max(high, pc) - min(low, pc))
+        plus_di = 100 * self.plus_dm.update(up if (up > dn and up > 0) else 0.0) / (atr_v + 1e-12)
+        minus_di = 100 * self.minus_dm.update(dn if (dn > up and dn > 0) else 0.0) / (atr_v + 1e-12)
+        dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di + 1e-12)
+
+        if self.dx.count == 0:
+            # Batch version prepends dx[0] to the DX series
+            self._last_out = self.dx.update(dx)
+        out = self.dx.update(dx)
+        self.value = self._last_out
+        self._last_out = out
+        return self.value
+
+
+class StreamingBollinger:
+    """Bollinger Bands over a trailing window using running sums"""
+
+    def __init__(self, n: int = 20, k: float = 2.0):
+        self.n = n
+        self.k = k
+        self.window: deque = deque(maxlen=n)
+        self._ref: Optional[float] = None
+        self._sum = 0.0
+        self._sumsq = 0.0
+
+    def update(self, close: float) -> tuple:
+        if self._ref is None:
+            self._ref = close
+        x = close - self._ref  # shift by the first close to keep the sums well-conditioned
+        if len(self.window) == self.n:
+            old = self.window[0]
+            self._sum -= old
+            self._sumsq -= old * old
+        self.window.append(x)
+        self._sum += x
+        self._sumsq += x * x
+
+        m = len(self.window)
+        mean = self._sum / m
+        std = math.sqrt(max(self._sumsq / m - mean * mean, 0.0))
+        mid = mean + self._ref
+        return mid, mid - self.k * std, mid + self.k * std
+
+
+class StreamingDonchian:
+    """Donchian channel via monotonic deques (amortized O(1))"""
+
+    def __init__(self, n: int = 20):
+        self.n = n
+        self.i = -1
+        self._maxq: deque = deque()
+        self._minq: deque = deque()
+
+    def update(self, high: float, low: float) -> tuple:
+        self.i += 1
+        i = self.i
+        while self._maxq and self._maxq[-1][1] <= high:
+            self._maxq.pop()
+        self._maxq.append((i, high))
+        while self._minq and self._minq[-1][1] >= low:
+            self._minq.pop()
+        self._minq.append((i, low))
+
+        start = i - self.n + 1
+        if self._maxq[0][0] < start:
+            self._maxq.popleft()
+        if self._minq[0][0] < start:
+            self._minq.popleft()
+
+        up = self._maxq[0][1]
+        dn = self._minq[0][1]
+        return dn, up, (up + dn) / 2.0
+
+
+class StreamingSupertrend:
+    """SuperTrend line and direction (matches indicators.supertrend)"""
+
+    def __init__(self, n: int = 10, mult: float = 3.0):
+        self.mult = mult
+        self.atr = StreamingATR(n)
+        self._final_upper: Optional[float] = None
+        self._final_lower: Optional[float] = None
+        self.line = 0.0
+        self.trend = 1
+
+    def update(self, high: float, low: float, close: float) -> tuple:
+        atr_v = self.atr.update(high, low, close)
+        hl2 = (high + low) / 2.0
+        upper = hl2 + self.mult * atr_v
+        lower = hl2 - self.mult * atr_v
+
+        if self._final_upper is None:
+            self.line = upper
+            self.trend = 1
+        else:
+            if close > self._final_upper:
+                self.trend = 1
+            elif close < self._final_lower:
+                self.trend = -1
+            else:
+                if self.trend == 1 and lower < self.line:
+                    lower = self.line
+                if self.trend == -1 and upper > self.line:
+                    upper = self.line
+            self.line = lower if self.trend == 1 else upper
+
+        self._final_upper = upper
+        self._final_lower = lower
+        return self.line, self.trend
+
+
+class StreamingVWAP:
+    """Cumulative VWAP since the first bar fed (matches indicators.vwap)"""
+
+    def __init__(self):
+        self._cum_tp_vol = 0.0
+        self._cum_vol = 0.0
+
+    def update(self, high: float, low: float, close: float, volume: float) -> float:
+        tp = (high + low + close) / 3.0
+        self._cum_tp_vol += tp * volume
+        self._cum_vol += volume
+        return self._cum_tp_vol / self._cum_vol if self._cum_vol > 0 else tp
+
+
+# ============================================================================
+# ENGINE
+# ============================================================================
+
+FEATURE_KEYS = [
+    'ema20', 'ema50', 'ema200', 'rsi5', 'rsi14', 'atr14', 'adx14',
+    'bb_mid', 'bb_lo', 'bb_up', 'dn55', 'up55',
+    'supertrend', 'supertrend_dir', 'vwap',
+]
+
+
+def _bar_fields(bar) -> tuple:
+    """Extract (ts, open, high, low, close, volume) from a Candle or dict"""
+    if isinstance(bar, dict):
+        return (bar['ts'], bar['open'], bar['high'], bar['low'], bar['close'], bar.get('volume', 0.0))
+    return (bar.ts, bar.open, bar.high, bar.low, bar.close, getattr(bar, 'volume', 0.0))
+
+
+class _SymbolState:
+    """Per-symbol indicator state plus a short history for *_prev / *_5bars_ago lookups"""
+
+    def __init__(self, history: int):
+        self.last_ts: Optional[int] = None
+        self.ema20 = StreamingEMA(20)
+        self.ema50 = StreamingEMA(50)
+        self.ema200 = StreamingEMA(200)
+        self.rsi5 = StreamingRSI(5)
+        self.rsi14 = StreamingRSI(14)
+        self.atr14 = StreamingATR(14)
+        self.adx14 = StreamingADX(14)
+        self.bb = StreamingBollinger(20, 2.0)
+        self.donchian = StreamingDonchian(55)
+        self.supertrend = StreamingSupertrend(10, 3.0)
+        self.vwap = StreamingVWAP()
+
+        self.ts: deque = deque(maxlen=history)
+        self.o: deque = deque(maxlen=history)
+        self.h: deque = deque(maxlen=history)
+        self.l: deque = deque(maxlen=history)
+        self.c: deque = deque(maxlen=history)
+        self.feats: Dict[str, deque] = {k: deque(maxlen=history) for k in FEATURE_KEYS}
+
+    def update(self, ts: int, o: float, h: float, l: float, c: float, v: float):
+        bb_mid, bb_lo, bb_up = self.bb.update(c)
+        dn55, up55, _ = self.donchian.update(h, l)
+        st_line, st_dir = self.supertrend.update(h, l, c)
+        values = {
+            'ema20': self.ema20.update(c),
+            'ema50': self.ema50.update(c),
+            'ema200': self.ema200.update(c),
+            'rsi5': self.rsi5.update(c),
+            'rsi14': self.rsi14.update(c),
+            'atr14': self.atr14.update(h, l, c),
+            'adx14': self.adx14.update(h, l, c),
+            'bb_mid': bb_mid,
+            'bb_lo': bb_lo,
+            'bb_up': bb_up,
+            'dn55': dn55,
+            'up55': up55,
+            'supertrend': st_line,
+            'supertrend_dir': st_dir,
+            'vwap': self.vwap.update(h, l, c, v),
+        }
+        for key, val in values.items():
+            self.feats[key].append(val)
+        self.ts.append(ts)
+        self.o.append(o)
+        self.h.append(h)
+        self.l.append(l)
+        self.c.append(c)
+        self.last_ts = ts
+
+
+class StreamingIndicatorEngine:
+    """
+    Per-symbol streaming indicators for the live agent loop
+
+    Call on_bar_close() once per closed bar; state is kept between ticks so
+    each call costs O(1) regardless of lookback. The returned dict has the
+    same shape as strategies.adapter.build_indicator_dict.
+    """
+
+    def __init__(self, history: int = 6):
+        # history >= 6 so that *_5bars_ago keys resolve
+        self.history = max(history, 6)
+        self._states: Dict[str, _SymbolState] = {}
+        self._latest: Dict[str, Dict[str, Any]] = {}
+
+    def on_bar_close(self, symbol: str, bar) -> Dict[str, Any]:
+        """
+        Feed one closed bar and return the updated indicator dict
+
+        Bars at or before the last processed timestamp are ignored, so the
+        same window can safely be replayed every tick.
+        """
+        ts, o, h, l, c, v = _bar_fields(bar)
+        state = self._states.get(symbol)
+        if state is None:
+            state = self._states[symbol] = _SymbolState(self.history)
+        elif state.last_ts is not None and ts <= state.last_ts:
+            return self._latest[symbol]
+
+        state.update(int(ts), float(o), float(h), float(l), float(c), float(v))
+        ind = build_indicator_dict(len(state.c) - 1, state.ts, state.o, state.h, state.l, state.c, state.feats)
+        self._latest[symbol] = ind
+        return ind
+
+    def update_many(self, symbol: str, bars: Iterable) -> Optional[Dict[str, Any]]:
+        """Feed a batch of closed bars (oldest first); returns the latest indicator dict"""
+        for bar in bars:
+            self.on_bar_close(symbol, bar)
+        return self._latest.get(symbol)
+
+    def last_ts(self, symbol: str) -> Optional[int]:
+        """Timestamp of the last bar processed for symbol"""
+        state = self._states.get(symbol)
+        return state.last_ts if state else None
+
+    def get(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Latest indicator dict for symbol (None if no bars seen)"""
+        return self._latest.get(symbol)
+
+    def symbols(self) -> List[str]:
+        return list(self._states.keys())
+
+    def reset(self, symbol: Optional[str] = None):
+        """Drop state for one symbol (or all)"""
+        if symbol is None:
+            self._states.clear()
+            self._latest.clear()
+        else:
+            self._states.pop(symbol, None)
+            self._latest.pop(symbol, None)
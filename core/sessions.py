@@ -0,0 +1,179 @@
+"""
+Trading Session Features
+
+Session, day-of-week and hour-of-day columns computed once per dataset with
+integer arithmetic on epoch-ms timestamps (no datetime objects per bar):
+
+- asia:   Tokyo 09:00-15:00 local (JST, no DST)
+- london: 08:00-16:30 Europe/London (BST from last Sunday of March 01:00 UTC
+          to last Sunday of October 01:00 UTC)
+- ny:     09:30-16:00 America/New_York (EDT from second Sunday of March
+          02:00 local to first Sunday of November 02:00 local)
+
+DST rules are the EU (1996+) and US (2007+) ones. Sessions only run on local
+weekdays. Timestamps are bar open times; a bar is in a session when its open
+minute falls inside [open, close).
+
+Per-session columns: is_<s>_session, minutes_since_<s>_open and the running
+<s>_high / <s>_low / <s>_vwap since the session opened (NaN outside).
+london_or_high / london_or_low hold the London opening range once it has
+formed (first `or_minutes` of the session), NaN before and outside.
+"""
+
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+MS_PER_MIN = 60_000
+MS_PER_DAY = 86_400_000
+
+# name -> (dst rule, standard offset minutes, open minute, close minute) in local time
+SESSIONS = {
+    "asia": (None, 9 * 60, 9 * 60, 15 * 60),
+    "london": ("eu", 0, 8 * 60, 16 * 60 + 30),
+    "ny": ("us", -5 * 60, 9 * 60 + 30, 16 * 60),
+}
+
+
+def days_from_civil(y, m, d):
+    """Days since 1970-01-01 for proleptic Gregorian dates (works on arrays)"""
+    y = y - (m <= 2)
+    era = np.floor_divide(y, 400)
+    yoe = y - era * 400
+    mp = (m + 9) % 12
+    doy = (153 * mp + 2) // 5 + d - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+def year_from_days(days):
+    """Civil year of a day number since 1970-01-01 (works on arrays)"""
+    z = days + 719468
+    era = np.floor_divide(z, 146097)
+    doe = z - era * 146097
+    yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp = (5 * doy + 2) // 153
+    m = np.where(mp < 10, mp + 3, mp - 9)
+    return yoe + era * 400 + (m <= 2)
+
+
+def weekday(days):
+    """0 = Monday ... 6 = Sunday (1970-01-01 was a Thursday)"""
+    return (days + 3) % 7
+
+
+def _nth_sunday(y, m, n):
+    first = days_from_civil(y, m, 1)
+    return first + (6 - weekday(first)) % 7 + 7 * (n - 1)
+
+
+def _last_sunday(y, m):
+    last = days_from_civil(y + (m == 12), m % 12 + 1, 1) - 1
+    return last - (weekday(last) - 6) % 7
+
+
+def utc_offset_minutes(ts_ms: np.ndarray, rule: Optional[str], std_offset: int) -> np.ndarray:
+    """Local UTC offset (minutes) per timestamp under a DST rule"""
+    ts_ms = np.asarray(ts_ms, dtype=np.int64)
+    if rule is None:
+        return np.full(len(ts_ms), std_offset, dtype=np.int64)
+
+    y = year_from_days(ts_ms // MS_PER_DAY)
+    if rule == "eu":
+        start = _last_sunday(y, 3) * MS_PER_DAY + 60 * MS_PER_MIN
+        end = _last_sunday(y, 10) * MS_PER_DAY + 60 * MS_PER_MIN
+    elif rule == "us":
+        # 02:00 local: standard time at the start, daylight time at the end
+        start = _nth_sunday(y, 3, 2) * MS_PER_DAY + (120 - std_offset) * MS_PER_MIN
+        end = _nth_sunday(y, 11, 1) * MS_PER_DAY + (120 - std_offset - 60) * MS_PER_MIN
+    else:
+        raise ValueError(f"Unknown DST rule '{rule}'")
+
+    dst = (ts_ms >= start) & (ts_ms < end)
+    return std_offset + 60 * dst.astype(np.int64)
+
+
+def _segments(mask: np.ndarray, session_day: np.ndarray):
+    """(start, stop) index pairs of consecutive in-session bars of the same local day"""
+    new = mask.copy()
+    new[1:] &= ~mask[:-1] | (session_day[1:] != session_day[:-1])
+    starts = np.flatnonzero(new)
+    ends = np.flatnonzero(mask & np.append(new[1:] | ~mask[1:], True)) + 1
+    return zip(starts, ends)
+
+
+def compute_session_features(
+    ts: Sequence[int],
+    high: Sequence[float],
+    low: Sequence[float],
+    close: Sequence[float],
+    volume: Optional[Sequence[float]] = None,
+    or_minutes: int = 60
+) -> Dict[str, np.ndarray]:
+    """
+    Session columns for a whole dataset
+
+    Args:
+        ts: Bar open times in epoch milliseconds (UTC)
+        high, low, close, volume: Bar data (volume defaults to 1)
+        or_minutes: London opening range length
+
+    Returns:
+        {column: array} with hour_utc, day_of_week, minute_of_day and the
+        per-session columns described in the module docstring
+    """
+    ts = np.asarray(ts, dtype=np.int64)
+    h = np.asarray(high, dtype=float)
+    l = np.asarray(low, dtype=float)
+    c = np.asarray(close, dtype=float)
+    v = np.ones(len(c)) if volume is None else np.asarray(volume, dtype=float)
+    tp_vol = (h + l + c) / 3.0 * v
+
+    utc_min = (ts % MS_PER_DAY) // MS_PER_MIN
+    out = {
+        "hour_utc": utc_min // 60,
+        "minute_of_day": utc_min,
+        "day_of_week": weekday(ts // MS_PER_DAY),
+    }
+
+    for name, (rule, std_offset, open_min, close_min) in SESSIONS.items():
+        local = ts + utc_offset_minutes(ts, rule, std_offset) * MS_PER_MIN
+        local_day = local // MS_PER_DAY
+        local_min = (local % MS_PER_DAY) // MS_PER_MIN
+        active = (weekday(local_day) < 5) & (local_min >= open_min) & (local_min < close_min)
+
+        since_open = np.where(active, local_min - open_min, np.nan)
+        s_high = np.full(len(ts), np.nan)
+        s_low = np.full(len(ts), np.nan)
+        s_vwap = np.full(len(ts), np.nan)
+        for start, stop in _segments(active, local_day):
+            s_high[start:stop] = np.maximum.accumulate(h[start:stop])
+            s_low[start:stop] = np.minimum.accumulate(l[start:stop])
+            cum_vol = np.cumsum(v[start:stop])
+            cum_tp = np.cumsum(tp_vol[start:stop])
+            with np.errstate(divide="ignore", invalid="ignore"):
+                s_vwap[start:stop] = np.where(cum_vol > 0, cum_tp / cum_vol, (h[start:stop] + l[start:stop] + c[start:stop]) / 3.0)
+
+        out[f"is_{name}_session"] = active
+        out[f"minutes_since_{name}_open"] = since_open
+        out[f"{name}_high"] = s_high
+        out[f"{name}_low"] = s_low
+        out[f"{name}_vwap"] = s_vwap
+
+        if name == "london":
+            # Range of the bars that opened inside the first or_minutes, usable once the window is over
+            formed = active & (since_open >= or_minutes)
+            in_range = active & (since_open < or_minutes)
+            or_high = np.full(len(ts), np.nan)
+            or_low = np.full(len(ts), np.nan)
+            for start, stop in _segments(active, local_day):
+                window = in_range[start:stop]
+                if not window.any() or window.all():
+                    continue
+                or_high[start:stop] = h[start:stop][window].max()
+                or_low[start:stop] = l[start:stop][window].min()
+            out["london_or_high"] = np.where(formed, or_high, np.nan)
+            out["london_or_low"] = np.where(formed, or_low, np.nan)
+
+    return out
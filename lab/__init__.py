@@ -4,9 +4,12 @@ Strategy Lab Module - Visual Strategy Builder
 Web-based strategy creation and optimization:
 - runner.py: Lab execution engine
 - adapter.py: Backtest adapter
+- conditions.py: Compiled entry-condition masks
+- equity.py: Run equity curves, downsampled for charts
 - features.py: Feature calculation for lab
 - indicators.py: Indicator library for lab
 - schemas.py: Pydantic data models
+- summary.py: Precomputed per-run summaries (listings, /compare)
 - objective.py: Optimization objectives
 """
 
@@ -8,12 +8,13 @@ import json
 import time
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Optional
 from datetime import datetime
 
 from core import database as db_sqlite
-from lab_schemas from strategies import core as strategyConfig, Condition, ConditionOperator, StrategySide
+from lab.schemas import StrategyConfig
 from lab.features import calculate_features
+from lab.conditions import compile_entry_masks
 from broker.paper_v1 import PaperFuturesBroker
 from core.metrics import equity_metrics, trades_metrics
 
@@ -187,25 +188,29 @@ class StrategyLabBacktestEngine:
         return broker
     
     def _simulate_trading(self, df: pd.DataFrame, broker: PaperFuturesBroker):
-        """Main simulation loop - evaluate conditions and execute trades"""
+        """Main simulation loop - entry conditions come from precompiled masks"""
         
         warmup = self.config.warmup_bars
         
-        # Store DataFrame for crossover detection
-        self.df = df
+        # Evaluate every condition once over the whole series
+        long_mask, short_mask = compile_entry_masks(self.config, df)
+        
+        ts = df['ts'].to_numpy()
+        high = df['high'].to_numpy()
+        low = df['low'].to_numpy()
+        close = df['close'].to_numpy()
+        atr_col = df['atr_14'].to_numpy() if 'atr_14' in df.columns else close * 0.01
         
         for i in range(warmup, len(df)):
-            row = df.iloc[i]
-            
             # Get ATR for position sizing
-            atr = row.get('atr_14', row['close'] * 0.01)
+            atr = atr_col[i]
             
             # Update broker state (check exits, trailing stops, etc)
             broker.on_candle(
-                ts=int(row['ts']),
-                high=row['high'],
-                low=row['low'],
-                close=row['close'],
+                ts=int(ts[i]),
+                high=high[i],
+                low=low[i],
+                close=close[i],
                 atr5=atr,
                 spread_bps=1.0,
                 taker_bps=5.0,
@@ -216,241 +221,26 @@ class StrategyLabBacktestEngine:
             if broker.position is None:
                 self.signals_evaluated += 1
                 
-                # Evaluate LONG conditions (pass current index for crossover detection)
-                should_long = self._evaluate_side(i, self.config.long)
+                should_long = long_mask[i]
                 if should_long:
                     self.long_signals += 1
                 
-                # Evaluate SHORT conditions
-                should_short = self._evaluate_side(i, self.config.short)
+                should_short = short_mask[i]
                 if should_short:
                     self.short_signals += 1
                 
                 # Execute trade (prefer LONG if both trigger)
                 if should_long and not should_short:
-                    self._open_position(broker, row, "LONG", atr)
+                    self._open_position(broker, int(ts[i]), close[i], "LONG", atr)
                     self.trades_opened += 1
                 elif should_short and not should_long:
-                    self._open_position(broker, row, "SHORT", atr)
+                    self._open_position(broker, int(ts[i]), close[i], "SHORT", atr)
                     self.trades_opened += 1
     
-    def _evaluate_side(self, idx: int, side: StrategySide) -> bool:
-        """
-        Evaluate entry conditions for LONG or SHORT side
-        
-        Args:
-            idx: Current candle index in DataFrame
-            side: Strategy side configuration (LONG or SHORT)
-        
-        Logic:
-        - ALL conditions in entry_all must be TRUE (AND logic)
-        - ANY condition in entry_any can be TRUE (OR logic)
-        - Returns TRUE if (entry_all is satisfied) OR (entry_any is satisfied)
-        """
-        
-        row = self.df.iloc[idx]
-        prev_row = self.df.iloc[idx - 1] if idx > 0 else None
-        
-        # Evaluate entry_all (AND logic)
-        all_satisfied = True
-        if side.entry_all:
-            for cond in side.entry_all:
-                if not self._evaluate_condition(row, prev_row, cond):
-                    all_satisfied = False
-                    break
-        else:
-            all_satisfied = False  # No conditions = no signal
-        
-        # Evaluate entry_any (OR logic)
-        any_satisfied = False
-        if side.entry_any:
-            for cond in side.entry_any:
-                if self._evaluate_condition(row, prev_row, cond):
-                    any_satisfied = True
-                    break
-        
-        # Final decision: ALL satisfied OR ANY satisfied
-        return all_satisfied or any_satisfied
-    
-    def _evaluate_condition(self, row: pd.Series, prev_row: Optional[pd.Series], cond: Condition) -> bool:
-        """Evaluate a single condition against current candle data"""
-        
-        # Get indicator column name
-        indicator_col = self._map_indicator_to_column(cond.indicator, cond.params)
-        
-        if indicator_col not in row.index:
-            # Indicator not available, condition fails
-            return False
-        
-        # Get left-hand side value (LHS)
-        lhs_value = row[indicator_col]
-        
-        # Handle NaN values
-        if pd.isna(lhs_value):
-            return False
-        
-        # Get right-hand side value (RHS)
-        if cond.rhs is not None:
-            # Direct numeric comparison
-            rhs_value = cond.rhs
-        elif cond.rhs_indicator:
-            # Compare against another indicator
-            rhs_col = self._map_indicator_to_column(cond.rhs_indicator, cond.rhs_params)
-            if rhs_col not in row.index:
-                return False
-            rhs_value = row[rhs_col]
-            if pd.isna(rhs_value):
-                return False
-        else:
-            # No RHS specified
-            return False
-        
-        # For crossover detection, get previous values
-        prev_lhs = None
-        prev_rhs = None
-        
-        if prev_row is not None and (cond.op == ConditionOperator.CROSSES_ABOVE or cond.op == ConditionOperator.CROSSES_BELOW):
-            if indicator_col in prev_row.index:
-                prev_lhs = prev_row[indicator_col]
-            
-            if cond.rhs is not None:
-                prev_rhs = cond.rhs  # Constant value doesn't change
-            elif cond.rhs_indicator:
-                rhs_col = self._map_indicator_to_column(cond.rhs_indicator, cond.rhs_params)
-                if rhs_col in prev_row.index:
-                    prev_rhs = prev_row[rhs_col]
-        
-        # Evaluate operator
-        return self._compare(lhs_value, cond.op, rhs_value, prev_lhs, prev_rhs)
-    
-    def _compare(self, lhs: float, op: ConditionOperator, rhs: float, 
-                 prev_lhs: Optional[float] = None, prev_rhs: Optional[float] = None) -> bool:
-        """
-        Compare two values using the specified operator
-        
-        Args:
-            lhs: Current left-hand side value
-            op: Comparison operator
-            rhs: Current right-hand side value
-            prev_lhs: Previous left-hand side value (for crossovers)
-            prev_rhs: Previous right-hand side value (for crossovers)
-        
-        Returns:
-            Boolean result of comparison
-        """
-        
-        if op == ConditionOperator.GT:
-            return lhs > rhs
-        elif op == ConditionOperator.LT:
-            return lhs < rhs
-        elif op == ConditionOperator.GTE:
-            return lhs >= rhs
-        elif op == ConditionOperator.LTE:
-            return lhs <= rhs
-        elif op == ConditionOperator.EQ:
-            return abs(lhs - rhs) < 1e-9
-        elif op == ConditionOperator.NE:
-            return abs(lhs - rhs) >= 1e-9
-        elif op == ConditionOperator.BETWEEN:
-            # TODO: Implement BETWEEN logic
-            return False
-        elif op == ConditionOperator.CROSSES_ABOVE:
-            # Crossover: prev_lhs <= prev_rhs AND lhs > rhs
-            if prev_lhs is None or prev_rhs is None:
-                return False
-            if pd.isna(prev_lhs) or pd.isna(prev_rhs):
-                return False
-            # Was below or equal, now above
-            return prev_lhs <= prev_rhs and lhs > rhs
-        elif op == ConditionOperator.CROSSES_BELOW:
-            # Crossunder: prev_lhs >= prev_rhs AND lhs < rhs
-            if prev_lhs is None or prev_rhs is None:
-                return False
-            if pd.isna(prev_lhs) or pd.isna(prev_rhs):
-                return False
-            # Was above or equal, now below
-            return prev_lhs >= prev_rhs and lhs < rhs
-        else:
-            return False
-    
-    def _map_indicator_to_column(self, indicator: str, params: List) -> str:
-        """Map indicator name from Strategy Lab to DataFrame column name"""
-        
-        indicator_lower = indicator.lower()
-        
-        # Common mappings (with defaults)
-        mappings = {
-            # Oscillators
-            'rsi': 'rsi_14',
-            'rsi_14': 'rsi_14',
-            'rsi_7': 'rsi_7',
-            'williams_r': 'williams_r',
-            'stoch': 'stoch_k',
-            'stoch_k': 'stoch_k',
-            'stoch_d': 'stoch_d',
-            'cci': 'cci_20',
-            'cci_20': 'cci_20',
-            'mfi': 'mfi_14',
-            'mfi_14': 'mfi_14',
-            
-            # Trend
-            'ema': 'ema_20',
-            'ema_20': 'ema_20',
-            'ema_50': 'ema_50',
-            'ema_200': 'ema_200',
-            'sma': 'sma_20',
-            'sma_20': 'sma_20',
-            'sma_50': 'sma_50',
-            'sma_200': 'sma_200',
-            'supertrend': 'supertrend',
-            'supertrend_direction': 'supertrend_direction',
-            
-            # Volatility
-            'atr': 'atr_14',
-            'atr_14': 'atr_14',
-            'bb_upper': 'bb_upper',
-            'bb_middle': 'bb_middle',
-            'bb_lower': 'bb_lower',
-            'bollinger_upper': 'bb_upper',
-            'bollinger_middle': 'bb_middle',
-            'bollinger_lower': 'bb_lower',
-            'keltner_upper': 'keltner_upper',
-            'keltner_middle': 'keltner_middle',
-            'keltner_lower': 'keltner_lower',
-            'donchian_upper': 'donchian_upper',
-            'donchian_middle': 'donchian_middle',
-            'donchian_lower': 'donchian_lower',
-            
-            # Strength
-            'adx': 'adx_14',
-            'adx_14': 'adx_14',
-            
-            # Momentum
-            'macd': 'macd',
-            'macd_signal': 'macd_signal',
-            'macd_hist': 'macd_hist',
-            'roc': 'roc_12',
-            'roc_12': 'roc_12',
-            
-            # Volume
-            'vwap': 'vwap',
-            'obv': 'obv',
-            
-            # Price
-            'close': 'close',
-            'open': 'open',
-            'high': 'high',
-            'low': 'low',
-            'volume': 'volume'
-        }
-        
-        return mappings.get(indicator_lower, indicator_lower)
-    
-    def _open_position(self, broker: PaperFuturesBroker, row: pd.Series, 
+    def _open_position(self, broker: PaperFuturesBroker, ts: int, price: float,
                        side: str, atr: float):
-        """Open a new position (LONG or SHORT)"""
+        """Open a new position (LONG or SHORT) at the bar close"""
         
-        price = row['close']
         risk = self.config.risk
         
         # Calculate position size
@@ -484,7 +274,7 @@ class StrategyLabBacktestEngine:
         
         # Open position
         broker.open(
-            ts=int(row['ts']),
+            ts=ts,
             side=side,
             qty=qty,
             price=price,
@@ -0,0 +1,205 @@
+"""
+Compiled Condition Evaluator for Strategy Lab
+
+Turns a StrategyConfig's condition lists into whole-series boolean masks in
+one pass: every Condition becomes a numpy expression over its resolved
+column arrays, crossovers compare against the series shifted by one bar,
+and entry_all / entry_any are reduced with boolean AND / OR.
+
+Semantics match the engine's former per-bar evaluator (kept as the
+reference in tests/test_lab_conditions.py) bar by bar:
+- a missing column or a NaN operand makes the condition False
+- crossovers are False on the first bar and when either previous value is NaN
+- BETWEEN is not implemented and is always False
+- a side fires when all entry_all conditions hold (non-empty) or any entry_any does
+"""
+
+from typing import Dict, Mapping, Optional, Tuple
+
+import numpy as np
+
+from lab.schemas import Condition, ConditionOperator, StrategyConfig, StrategySide
+
+# Strategy Lab indicator name -> DataFrame column (unknown names map to themselves, lowercased)
+INDICATOR_COLUMNS = {
+    # Oscillators
+    'rsi': 'rsi_14',
+    'rsi_14': 'rsi_14',
+    'rsi_7': 'rsi_7',
+    'williams_r': 'williams_r',
+    'stoch': 'stoch_k',
+    'stoch_k': 'stoch_k',
+    'stoch_d': 'stoch_d',
+    'cci': 'cci_20',
+    'cci_20': 'cci_20',
+    'mfi': 'mfi_14',
+    'mfi_14': 'mfi_14',
+
+    # Trend
+    'ema': 'ema_20',
+    'ema_20': 'ema_20',
+    'ema_50': 'ema_50',
+    'ema_200': 'ema_200',
+    'sma': 'sma_20',
+    'sma_20': 'sma_20',
+    'sma_50': 'sma_50',
+    'sma_200': 'sma_200',
+    'supertrend': 'supertrend',
+    'supertrend_direction': 'supertrend_direction',
+
+    # Volatility
+    'atr': 'atr_14',
+    'atr_14': 'atr_14',
+    'bb_upper': 'bb_upper',
+    'bb_middle': 'bb_middle',
+    'bb_lower': 'bb_lower',
+    'bollinger_upper': 'bb_upper',
+    'bollinger_middle': 'bb_middle',
+    'bollinger_lower': 'bb_lower',
+    'keltner_upper': 'keltner_upper',
+    'keltner_middle': 'keltner_middle',
+    'keltner_lower': 'keltner_lower',
+    'donchian_upper': 'donchian_upper',
+    'donchian_middle': 'donchian_middle',
+    'donchian_lower': 'donchian_lower',
+
+    # Strength
+    'adx': 'adx_14',
+    'adx_14': 'adx_14',
+
+    # Momentum
+    'macd': 'macd',
+    'macd_signal': 'macd_signal',
+    'macd_hist': 'macd_hist',
+    'roc': 'roc_12',
+    'roc_12': 'roc_12',
+
+    # Volume
+    'vwap': 'vwap',
+    'obv': 'obv',
+
+    # Price
+    'close': 'close',
+    'open': 'open',
+    'high': 'high',
+    'low': 'low',
+    'volume': 'volume'
+}
+
+
+def resolve_column(indicator: str) -> str:
+    """Map a Strategy Lab indicator name to its DataFrame column"""
+    name = indicator.lower()
+    return INDICATOR_COLUMNS.get(name, name)
+
+
+def _shift(arr: np.ndarray) -> np.ndarray:
+    """Previous bar's value (NaN on the first bar)"""
+    out = np.empty_like(arr)
+    if len(out):
+        out[0] = np.nan
+        out[1:] = arr[:-1]
+    return out
+
+
+class ConditionCompiler:
+    """
+    Builds masks from a column source (DataFrame or dict of arrays)
+
+    Column arrays are converted to float once and shared by every condition
+    that references them.
+    """
+
+    def __init__(self, columns: Mapping, n: Optional[int] = None):
+        self.columns = columns
+        self.n = len(columns[next(iter(columns))]) if n is None else n
+        self._arrays: Dict[str, Optional[np.ndarray]] = {}
+
+    def array(self, column: str) -> Optional[np.ndarray]:
+        """Float array for a column, None if it does not exist"""
+        if column not in self._arrays:
+            self._arrays[column] = (
+                np.asarray(self.columns[column], dtype=float) if column in self.columns else None
+            )
+        return self._arrays[column]
+
+    def condition(self, cond: Condition) -> np.ndarray:
+        """Boolean mask of the bars where `cond` holds"""
+        false = np.zeros(self.n, dtype=bool)
+
+        lhs = self.array(resolve_column(cond.indicator))
+        if lhs is None:
+            return false
+
+        if cond.rhs is not None:
+            rhs = cond.rhs
+            prev_rhs = rhs
+        elif cond.rhs_indicator:
+            rhs = self.array(resolve_column(cond.rhs_indicator))
+            if rhs is None:
+                return false
+            prev_rhs = None
+        else:
+            return false
+
+        op = cond.op
+        with np.errstate(invalid="ignore"):
+            # NaN compares False everywhere except !=, so the NaN guard is explicit
+            valid = ~np.isnan(lhs) & ~np.isnan(rhs)
+            if op == ConditionOperator.GT:
+                hit = lhs > rhs
+            elif op == ConditionOperator.LT:
+                hit = lhs < rhs
+            elif op == ConditionOperator.GTE:
+                hit = lhs >= rhs
+            elif op == ConditionOperator.LTE:
+                hit = lhs <= rhs
+            elif op == ConditionOperator.EQ:
+                hit = np.abs(lhs - rhs) < 1e-9
+            elif op == ConditionOperator.NE:
+                hit = np.abs(lhs - rhs) >= 1e-9
+            elif op in (ConditionOperator.CROSSES_ABOVE, ConditionOperator.CROSSES_BELOW):
+                prev_lhs = _shift(lhs)
+                if prev_rhs is None:
+                    prev_rhs = _shift(rhs)
+                valid &= ~np.isnan(prev_lhs) & ~np.isnan(prev_rhs)
+                if op == ConditionOperator.CROSSES_ABOVE:
+                    hit = (prev_lhs <= prev_rhs) & (lhs > rhs)
+                else:
+                    hit = (prev_lhs >= prev_rhs) & (lhs < rhs)
+            else:
+                # BETWEEN (not implemented) and unknown operators never fire
+                return false
+
+        return np.broadcast_to(hit & valid, (self.n,)).copy()
+
+    def side(self, side: StrategySide) -> np.ndarray:
+        """Entry mask for one side: all(entry_all) OR any(entry_any)"""
+        if side.entry_all:
+            all_mask = np.ones(self.n, dtype=bool)
+            for cond in side.entry_all:
+                all_mask &= self.condition(cond)
+        else:
+            all_mask = np.zeros(self.n, dtype=bool)
+
+        any_mask = np.zeros(self.n, dtype=bool)
+        for cond in side.entry_any:
+            any_mask |= self.condition(cond)
+
+        return all_mask | any_mask
+
+
+def compile_entry_masks(config: StrategyConfig, columns: Mapping) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Whole-series LONG / SHORT entry masks for a StrategyConfig
+
+    Args:
+        config: Strategy Lab configuration
+        columns: DataFrame (or dict of equal-length arrays) with indicator columns
+
+    Returns:
+        (long_mask, short_mask) boolean arrays, one entry per bar
+    """
+    compiler = ConditionCompiler(columns)
+    return compiler.side(config.long), compiler.side(config.short)
+
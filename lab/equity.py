@@ -0,0 +1,185 @@
+"""
+Run Equity Curves
+
+Loads a run's equity curve from its artifacts (equity.csv, or cumulative
+trade PnL when only trades.csv exists) and serves copies downsampled to the
+chart's pixel width with LTTB (core.downsample). The highest and lowest
+equity, the deepest drawdown and the peak it fell from are always kept, so
+the drawn curve shows the true max drawdown.
+
+Parsed and downsampled series are cached in memory per (run, width) and
+dropped when the artifact file changes (path, mtime, size).
+"""
+
+import csv
+import glob
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.downsample import downsample_indices
+
+ARTIFACTS_DIR = "artifacts"
+CACHE_MAX_POINTS = 2_000_000
+# trades.csv actions that close a position (as counted by core.metrics.trades_metrics)
+CLOSE_ACTIONS = ('TP_FULL', 'STOP', 'TIME_STOP', 'STOP_TRAIL', 'MANUAL_EXIT')
+
+Series = Dict[str, np.ndarray]
+
+
+def find_equity_artifact(run_id: str, artifacts_dir: str = ARTIFACTS_DIR,
+                         names: Tuple[str, ...] = ("equity.csv", "trades.csv")) -> Optional[Tuple[str, str]]:
+    """("equity" | "trades", path) of the first of `names` the run has (the file its curve is built from), or None"""
+    for name in names:
+        files = glob.glob(os.path.join(artifacts_dir, run_id, "*", name))
+        if files:
+            return name[:-len(".csv")], files[0]
+    return None
+
+
+def _epoch_seconds(stamps: List[str]) -> np.ndarray:
+    try:
+        return np.array(stamps, dtype="datetime64[s]").astype(np.int64)
+    except ValueError:
+        return np.array([int(datetime.fromisoformat(s).timestamp()) for s in stamps], dtype=np.int64)
+
+
+def _read_columns(path: str) -> Dict[str, tuple]:
+    """CSV columns by header name (values left as strings)"""
+    with open(path, "r", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        columns = list(zip(*reader)) or [()] * len(header)
+    return dict(zip(header, columns))
+
+
+def read_equity_csv(path: str) -> Series:
+    """time (epoch s), equity and drawdown columns of an equity.csv"""
+    cols = _read_columns(path)
+    equity = np.array(cols["equity"], dtype=np.float64)
+    drawdown = np.array(cols["drawdown"], dtype=np.float64) if "drawdown" in cols else np.zeros(len(equity))
+    return {"time": _epoch_seconds(list(cols["timestamp"])), "equity": equity, "drawdown": drawdown}
+
+
+def read_trades_equity(path: str) -> Series:
+    """
+    Cumulative PnL at each trade exit; drawdown in % of the running peak (0 until it is positive)
+
+    Reads the broker log (ts_utc in epoch ms, one row per fill; only
+    CLOSE_ACTIONS rows count) or a per-trade file with exit_time/pnl.
+    """
+    cols = _read_columns(path)
+    if "exit_time" in cols:
+        time = _epoch_seconds(list(cols["exit_time"]))
+        pnl = np.array(cols["pnl"], dtype=np.float64)
+    else:
+        closed = np.isin(np.array(cols["action"], dtype=object), CLOSE_ACTIONS)
+        time = np.array(cols["ts_utc"], dtype=np.int64)[closed] // 1000
+        pnl = np.array(cols["pnl"], dtype=np.float64)[closed]
+    order = np.argsort(time, kind="stable")
+    equity = np.cumsum(pnl[order])
+    peak = np.maximum.accumulate(np.maximum(equity, 0.0)) if len(equity) else equity
+    with np.errstate(invalid="ignore", divide="ignore"):
+        drawdown = np.where(peak > 0, (equity - peak) / np.maximum(np.abs(peak), 1) * 100, 0.0)
+    return {"time": time[order], "equity": equity, "drawdown": drawdown}
+
+
+def extreme_indices(series: Series) -> List[int]:
+    """Equity max/min, deepest drawdown (from equity and from the drawdown column) and its peak"""
+    equity = series["equity"]
+    if not len(equity):
+        return []
+    peaks = np.maximum.accumulate(equity)
+    trough = int(np.argmin(equity - peaks))
+    return [int(np.argmax(equity)), int(np.argmin(equity)), trough, int(np.argmax(equity[:trough + 1])),
+            int(np.argmax(np.abs(np.nan_to_num(series["drawdown"]))))]
+
+
+def downsample_series(series: Series, width: int) -> Series:
+    """About `width` points chosen by LTTB on equity, plus extreme_indices()"""
+    idx = downsample_indices(series["time"], series["equity"], width, keep=extreme_indices(series))
+    return {k: v[idx] for k, v in series.items()}
+
+
+def to_points(series: Series, drawdown: bool = True) -> List[dict]:
+    """[{time, equity[, drawdown]}] as the chart endpoints return them"""
+    time = series["time"].tolist()
+    equity = series["equity"].tolist()
+    if not drawdown:
+        return [{"time": t, "equity": e} for t, e in zip(time, equity)]
+    return [{"time": t, "equity": e, "drawdown": d} for t, e, d in zip(time, equity, series["drawdown"].tolist())]
+
+
+class EquityCache:
+    """
+    LRU of equity series keyed by (run_id, width), validated against the artifact file
+
+    Bounded by the total number of cached points (3 float64/int64 columns,
+    24 bytes per point) rather than by entries, since a full-resolution
+    curve can be 100x larger than a downsampled one.
+    """
+
+    def __init__(self, max_points: int = CACHE_MAX_POINTS):
+        self.max_points = max_points
+        self._entries: "OrderedDict[Tuple[str, Optional[int]], Tuple[tuple, Series]]" = OrderedDict()
+        self._points = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key, signature) -> Optional[Series]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != signature:
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def get(self, run_id: str, width: Optional[int] = None, artifacts_dir: str = ARTIFACTS_DIR) -> Optional[Series]:
+        """
+        Equity series of a run, downsampled to `width` points (None = full resolution)
+
+        Returns:
+            None if the run has neither equity.csv nor trades.csv
+        """
+        found = find_equity_artifact(run_id, artifacts_dir)
+        if found is None:
+            return None
+        kind, path = found
+        st = os.stat(path)
+        signature = (path, st.st_mtime_ns, st.st_size)
+        key = (run_id, width)
+
+        with self._lock:
+            series = self._lookup(key, signature)
+            if series is not None:
+                self.hits += 1
+                return series
+            self.misses += 1
+            full = self._lookup((run_id, None), signature)
+
+        if full is None:
+            full = read_equity_csv(path) if kind == "equity" else read_trades_equity(path)
+        series = full if width is None else downsample_series(full, width)
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._points -= len(old[1]["time"])
+            self._entries[key] = (signature, series)
+            self._points += len(series["time"])
+            while self._points > self.max_points and len(self._entries) > 1:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._points -= len(evicted["time"])
+        return series
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._points = 0
+
+
+equity_cache = EquityCache()
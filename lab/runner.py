@@ -16,6 +16,7 @@ from threading import Thread
 from core import database as db_sqlite
 from lab.objective import evaluate_objective
 from lab.schemas import StrategyConfig
+from lab.summary import summarize_run
 
 # Global thread pool for async execution
 _executor: Optional[ThreadPoolExecutor] = None
@@ -183,6 +184,7 @@ def execute_backtest_task(run_id: str, config: StrategyConfig):
             db_sqlite.insert_artifact(conn, run_id, trial_id, "metrics", metrics_path)
         
         db_sqlite.update_run_status(conn, run_id, "completed", completed_at=int(time.time()))
+        summarize_run(conn, run_id)
         
         # Final log with portfolio summary
         final_equity = config.risk.starting_equity + metrics.get('total_profit', 0)
@@ -376,6 +378,7 @@ def execute_grid_search_task(run_id: str, config: StrategyConfig):
         
         log_run(run_id, "INFO", f"Grid search completed. Best score: {best_score:.4f}", progress=1.0, best_score=best_score)
         db_sqlite.update_run_status(conn, run_id, "completed", completed_at=int(time.time()))
+        summarize_run(conn, run_id)
     
     except Exception as e:
         db_sqlite.update_run_status(conn, run_id, "failed", completed_at=int(time.time()))
@@ -447,6 +450,7 @@ def execute_optuna_task(run_id: str, config: StrategyConfig, n_trials: int):
                 
         log_run(run_id, "INFO", f"Optuna optimization completed. Best score: {best_score:.4f}", progress=1.0, best_score=best_score)
         db_sqlite.update_run_status(conn, run_id, "completed", completed_at=int(time.time()))
+        summarize_run(conn, run_id)
     
     except Exception as e:
         db_sqlite.update_run_status(conn, run_id, "failed", completed_at=int(time.time()))
@@ -647,6 +651,7 @@ def execute_dynamic_optimization_task(
         )
         
         db_sqlite.update_run_status(conn, run_id, "completed", completed_at=int(time.time()))
+        summarize_run(conn, run_id)
     
     except Exception as e:
         db_sqlite.update_run_status(conn, run_id, "failed", completed_at=int(time.time()))
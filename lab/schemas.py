@@ -180,6 +180,13 @@ class RunStatus(BaseModel):
     best_score: Optional[float] = None
     started_at: Optional[int] = None
     completed_at: Optional[int] = None
+    # From the stored run summary (listings only)
+    name: Optional[str] = None
+    final_equity: Optional[float] = None
+    return_pct: Optional[float] = None
+    max_drawdown_pct: Optional[float] = None
+    total_trades: Optional[int] = None
+    win_rate: Optional[float] = None
 
 
 class TrialResult(BaseModel):
@@ -0,0 +1,159 @@
+"""
+Run Summaries
+
+Everything the run list and /compare show about a finished run, computed
+once from its artifacts and stored in the lab DB (run_summaries):
+
+- best trial: id, score and metrics
+- equity stats: start/final/peak/trough equity, return, max drawdown
+- equity curve: LTTB-downsampled to SUMMARY_WIDTH points (lab.equity)
+- trade aggregates over the closed trades in trades.csv: counts, win rate,
+  PnL, profit factor
+
+The runner stores the summary when a run completes; runs finished before
+that existed are filled in with:
+    python -m lab.summary --backfill
+"""
+
+import argparse
+import csv
+import json
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from core import database as db_sqlite
+from lab.equity import (ARTIFACTS_DIR, CLOSE_ACTIONS, downsample_series, find_equity_artifact,
+                        read_equity_csv, read_trades_equity)
+
+SUMMARY_WIDTH = 1000
+
+
+def equity_stats(series: Dict[str, np.ndarray], source: str) -> Dict[str, Any]:
+    """Headline numbers of an equity curve (source: "equity" file or cumulative "trades" PnL)"""
+    equity = series["equity"]
+    if not len(equity):
+        return {"source": source, "points": 0}
+    peaks = np.maximum.accumulate(equity)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dd_pct = np.where(peaks > 0, (equity - peaks) / peaks * 100, 0.0)
+    start, final = float(equity[0]), float(equity[-1])
+    return {
+        "source": source,
+        "points": int(len(equity)),
+        "start_time": int(series["time"][0]),
+        "end_time": int(series["time"][-1]),
+        "start_equity": start,
+        "final_equity": final,
+        "peak_equity": float(equity.max()),
+        "trough_equity": float(equity.min()),
+        "return_pct": (final / start - 1) * 100 if source == "equity" and start > 0 else None,
+        "max_drawdown_pct": float(dd_pct.min()),
+        "max_drawdown_abs": float((equity - peaks).min()),
+    }
+
+
+def trade_stats(trades_path: Optional[str]) -> Dict[str, Any]:
+    """
+    Aggregates over the closed trades of a trades.csv (empty counts when the run has none)
+
+    The broker logs one row per fill (ts_utc, action, side, qty, price, pnl,
+    note); opens and partial fills are skipped, as in core.metrics.trades_metrics.
+    """
+    pnl, sides = [], []
+    if trades_path:
+        with open(trades_path, "r", newline="") as f:
+            for row in csv.DictReader(f):
+                if "action" in row and row["action"] not in CLOSE_ACTIONS:
+                    continue
+                pnl.append(float(row["pnl"]))
+                sides.append((row.get("side") or "").lower())
+    pnl = np.array(pnl, dtype=np.float64)
+    wins, losses = pnl[pnl > 0], pnl[pnl < 0]
+    gross_loss = float(-losses.sum())
+    return {
+        "trades": int(len(pnl)),
+        "wins": int(len(wins)),
+        "losses": int(len(losses)),
+        "longs": sides.count("long"),
+        "shorts": sides.count("short"),
+        "win_rate": len(wins) / len(pnl) * 100 if len(pnl) else None,
+        "total_pnl": float(pnl.sum()),
+        "avg_pnl": float(pnl.mean()) if len(pnl) else None,
+        "best_trade": float(pnl.max()) if len(pnl) else None,
+        "worst_trade": float(pnl.min()) if len(pnl) else None,
+        "gross_profit": float(wins.sum()),
+        "gross_loss": gross_loss,
+        "profit_factor": float(wins.sum()) / gross_loss if gross_loss > 0 else None,
+    }
+
+
+def compute_run_summary(conn, run_id: str, artifacts_dir: str = ARTIFACTS_DIR) -> Dict[str, Any]:
+    """Summary record of a run (the upsert_run_summary() arguments) from its trials and artifacts"""
+    trials = db_sqlite.get_run_trials(conn, run_id, limit=1)
+    best = trials[0] if trials else None
+
+    curve, stats, source_path = None, {"source": None, "points": 0}, None
+    found = find_equity_artifact(run_id, artifacts_dir)
+    if found is not None:
+        kind, source_path = found
+        series = read_equity_csv(source_path) if kind == "equity" else read_trades_equity(source_path)
+        stats = equity_stats(series, kind)
+        small = downsample_series(series, SUMMARY_WIDTH)
+        curve = {k: v.tolist() for k, v in small.items()}
+
+    trades = find_equity_artifact(run_id, artifacts_dir, names=("trades.csv",))
+    return {
+        "best_trial_id": best["id"] if best else None,
+        "best_score": best["score"] if best else None,
+        "metrics": json.loads(best["metrics_json"]) if best and best["metrics_json"] else {},
+        "equity_stats": stats,
+        "equity_curve": curve,
+        "trade_stats": trade_stats(trades[1] if trades else None),
+        "source_path": source_path,
+    }
+
+
+def summarize_run(conn, run_id: str, artifacts_dir: str = ARTIFACTS_DIR) -> bool:
+    """Compute and store a run's summary; failures are logged, never raised (runs must still complete)"""
+    try:
+        db_sqlite.upsert_run_summary(conn, run_id, **compute_run_summary(conn, run_id, artifacts_dir))
+        return True
+    except Exception as e:
+        print(f"[Summary] Could not summarize run {run_id}: {e}")
+        return False
+
+
+def backfill(conn, force: bool = False, artifacts_dir: str = ARTIFACTS_DIR) -> Dict[str, int]:
+    """Summarize completed runs that have no summary yet (every completed run with force)"""
+    query = "SELECT id FROM runs WHERE status = 'completed'"
+    if not force:
+        query += " AND id NOT IN (SELECT run_id FROM run_summaries)"
+    run_ids = [row[0] for row in conn.execute(query).fetchall()]
+    done = sum(summarize_run(conn, run_id, artifacts_dir) for run_id in run_ids)
+    return {"runs": len(run_ids), "summarized": done, "failed": len(run_ids) - done}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backfill", action="store_true", help="summarize completed runs without a summary")
+    ap.add_argument("--force", action="store_true", help="recompute existing summaries too")
+    ap.add_argument("--run", type=str, default=None, help="(re)summarize a single run")
+    ap.add_argument("--db", type=str, default="data/lab.db")
+    args = ap.parse_args()
+
+    conn = db_sqlite.connect_lab(args.db)
+    try:
+        if args.run:
+            result = {"runs": 1, "summarized": int(summarize_run(conn, args.run))}
+        elif args.backfill:
+            result = backfill(conn, force=args.force)
+        else:
+            ap.error("nothing to do: pass --backfill or --run")
+        print(json.dumps(result, indent=2))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
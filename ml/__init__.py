@@ -3,6 +3,7 @@ Machine Learning Module - ML-Based Strategies
 
 Train and backtest ML models:
 - backtest.py: ML strategy backtest
+- inference.py: Batched, cached model predictions
 - optimize.py: Optuna ML optimization
 - train.py: Model training
 - model.py: MLP model architecture
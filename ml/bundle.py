@@ -0,0 +1,150 @@
+"""
+Numpy MLP Bundle
+
+Signal generation only needs the forward pass of a three-layer MLP, so the
+trained checkpoint is exported once to a plain .npz and evaluated with
+numpy; neither torch nor sklearn is imported on this path:
+
+- export_bundle(): state_dict + fitted StandardScaler + meta -> model_bundle.npz
+  (ml.train writes it next to model.pt)
+- load_bundle(): MLPBundle with float32 weights and the scaler mean/scale
+- MLPBundle.predict_proba(): (n, 2) [p_long, p_short], the same maths as
+  ml.inference.predict_proba() (float64 scaling, float32 layers, sigmoid)
+
+Export an existing checkpoint:
+    python -m ml.bundle --model-dir data/ml
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ml.inference import PREDICTION_CACHE_DIR, cached_probabilities
+
+BUNDLE_FILE = "model_bundle.npz"
+
+
+def _to_numpy(t) -> np.ndarray:
+    return t.detach().cpu().numpy() if hasattr(t, "detach") else np.asarray(t)
+
+
+def _linear_layers(state_dict) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """(W (in, out), b) of every Linear layer in MLP.net, in order"""
+    idx = sorted(int(k.split(".")[1]) for k in state_dict if k.startswith("net.") and k.endswith(".weight"))
+    return [(np.ascontiguousarray(_to_numpy(state_dict[f"net.{k}.weight"]).T, dtype=np.float32),
+             _to_numpy(state_dict[f"net.{k}.bias"]).astype(np.float32)) for k in idx]
+
+
+def export_bundle(state_dict, scaler, meta: dict, out_dir: str) -> str:
+    """
+    Write model_bundle.npz for an ml.model.MLP state_dict
+
+    Args:
+        state_dict: MLP weights (torch tensors or numpy arrays)
+        scaler: fitted StandardScaler (only mean_ and scale_ are kept)
+        meta: meta.json contents (feat_cols, horizon, hidden)
+        out_dir: model directory
+
+    Returns:
+        Path of the bundle
+    """
+    arrays = {}
+    for j, (W, b) in enumerate(_linear_layers(state_dict)):
+        arrays[f"w{j}"], arrays[f"b{j}"] = W, b
+    arrays["scaler_mean"] = np.asarray(scaler.mean_, dtype=np.float64)
+    arrays["scaler_scale"] = np.asarray(scaler.scale_, dtype=np.float64)
+    arrays["meta"] = np.array(json.dumps(meta))
+
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, BUNDLE_FILE)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, path)
+    return path
+
+
+def export_model_dir(model_dir: str = "data/ml") -> str:
+    """Export the model.pt / scaler.pkl / meta.json checkpoint in model_dir (loads torch once)"""
+    import joblib, torch
+    state_dict = torch.load(os.path.join(model_dir, "model.pt"), map_location="cpu")
+    scaler = joblib.load(os.path.join(model_dir, "scaler.pkl"))
+    with open(os.path.join(model_dir, "meta.json"), "r") as f:
+        meta = json.load(f)
+    return export_bundle(state_dict, scaler, meta, model_dir)
+
+
+class MLPBundle:
+    """Numpy forward pass of an exported MLP (ReLU hidden layers, dropout is a no-op at inference)"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], checksum: str = ""):
+        n_layers = sum(1 for k in arrays if k.startswith("w"))
+        self.layers = [(arrays[f"w{j}"], arrays[f"b{j}"]) for j in range(n_layers)]
+        self.mean = arrays["scaler_mean"]
+        self.scale = arrays["scaler_scale"]
+        self.meta = json.loads(str(arrays["meta"]))
+        self.checksum = checksum
+
+    @property
+    def in_dim(self) -> int:
+        return self.layers[0][0].shape[0]
+
+    def predict_proba(self, X: np.ndarray, batch_size: int = 65536) -> np.ndarray:
+        """Sigmoid outputs [p_long, p_short] for every row of the raw feature matrix X"""
+        Xs = ((np.asarray(X, dtype=np.float64) - self.mean) / self.scale).astype(np.float32)
+        out = np.empty((len(Xs), 2), dtype=np.float32)
+        for start in range(0, len(Xs), batch_size):
+            h = Xs[start:start + batch_size]
+            for W, b in self.layers[:-1]:
+                h = np.maximum(h @ W + b, 0.0)
+            W, b = self.layers[-1]
+            with np.errstate(over="ignore", under="ignore"):
+                out[start:start + batch_size] = 1.0 / (1.0 + np.exp(-(h @ W + b)))
+        return out
+
+
+def load_bundle(model_dir: str = "data/ml") -> MLPBundle:
+    path = os.path.join(model_dir, BUNDLE_FILE)
+    with open(path, "rb") as f:
+        raw = f.read()
+    with np.load(path, allow_pickle=False) as z:
+        arrays = {k: z[k] for k in z.files}
+    return MLPBundle(arrays, hashlib.sha256(raw).hexdigest())
+
+
+def load_or_export(model_dir: str = "data/ml") -> MLPBundle:
+    """load_bundle(), exporting the checkpoint first if the bundle is missing or older than model.pt"""
+    path = os.path.join(model_dir, BUNDLE_FILE)
+    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(os.path.join(model_dir, "model.pt")):
+        export_model_dir(model_dir)
+    return load_bundle(model_dir)
+
+
+def cached_bundle_predictions(
+    bundle: MLPBundle,
+    X: np.ndarray,
+    batch_size: int = 65536,
+    cache_dir: Optional[str] = PREDICTION_CACHE_DIR
+) -> np.ndarray:
+    """bundle.predict_proba() through ml.inference.cached_probabilities(), keyed by the bundle checksum"""
+    predict = lambda: bundle.predict_proba(X, batch_size)
+    if cache_dir is None:
+        return predict()
+    return cached_probabilities(bundle.checksum, X, predict, cache_dir)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model-dir", type=str, default="data/ml")
+    args = ap.parse_args()
+    path = export_model_dir(args.model_dir)
+    bundle = load_bundle(args.model_dir)
+    print(json.dumps({"bundle": path, "in_dim": bundle.in_dim, "layers": len(bundle.layers), "bytes": os.path.getsize(path)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Content-addressed Dataset Cache
+
+Feature matrices, labels and backtest inputs are pure functions of the
+candles, the feature/label parameters and the code that computes them, so
+they are stored once under data/cache/ml_dataset and looked up by a hash of
+exactly those inputs:
+
+- fingerprint(): sha256 over arrays (dtype, shape, bytes) and plain values
+- source_digest(): sha256 over module source files, so editing the feature
+  code invalidates every entry built with it
+- ArrayCache: one directory of .npy files per key, written atomically;
+  hits refresh the entry's mtime and writes evict the least recently used
+  entries until the cache fits in max_bytes
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+DATASET_CACHE_DIR = os.path.join("data", "cache", "ml_dataset")
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+
+def fingerprint(*parts) -> str:
+    """sha256 over numpy arrays (dtype, shape, contents) and JSON-able values"""
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            arr = np.ascontiguousarray(part)
+            h.update(f"ndarray:{arr.dtype.str}:{arr.shape}".encode())
+            h.update(arr.tobytes())
+        else:
+            h.update(json.dumps(part, sort_keys=True, default=str).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+_SOURCE_DIGESTS: Dict[Tuple[str, float, int], str] = {}
+
+
+def source_digest(*modules) -> str:
+    """sha256 over the source files of `modules` (memoized per path/mtime/size)"""
+    h = hashlib.sha256()
+    for module in modules:
+        path = module.__file__
+        st = os.stat(path)
+        key = (path, st.st_mtime, st.st_size)
+        if key not in _SOURCE_DIGESTS:
+            with open(path, "rb") as f:
+                _SOURCE_DIGESTS[key] = hashlib.sha256(f.read()).hexdigest()
+        h.update(_SOURCE_DIGESTS[key].encode())
+    return h.hexdigest()
+
+
+class ArrayCache:
+    """Named arrays on disk, keyed by content hash, LRU-evicted by total size"""
+
+    def __init__(self, root: str = DATASET_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def key(self, kind: str, *parts) -> str:
+        return f"{kind}_{fingerprint(kind, *parts)[:32]}"
+
+    def get(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        path = os.path.join(self.root, key)
+        try:
+            names = [f[:-4] for f in os.listdir(path) if f.endswith(".npy")]
+            arrays = {name: np.load(os.path.join(path, name + ".npy"), allow_pickle=False) for name in names}
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return arrays or None
+
+    def put(self, key: str, arrays: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Write an entry (tmp dir + rename, so readers never see a partial one) and evict"""
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for name, arr in arrays.items():
+            np.save(os.path.join(tmp, name + ".npy"), np.asarray(arr), allow_pickle=False)
+        try:
+            os.replace(tmp, path)
+        except OSError:
+            # another process stored the same key first; contents are identical
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict(keep=key)
+        return arrays
+
+    def get_or_compute(self, kind: str, parts: tuple, compute: Callable[[], Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+        key = self.key(kind, *parts)
+        hit = self.get(key)
+        if hit is not None:
+            return hit
+        return self.put(key, {name: np.asarray(arr) for name, arr in compute().items()})
+
+    def entries(self) -> List[Tuple[str, int, float]]:
+        """(key, bytes, last use) of every complete entry, least recently used first"""
+        if not os.path.isdir(self.root):
+            return []
+        out = []
+        for key in os.listdir(self.root):
+            path = os.path.join(self.root, key)
+            if key.endswith(".tmp") or not os.path.isdir(path):
+                continue
+            try:
+                size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+                out.append((key, size, os.path.getmtime(path)))
+            except OSError:
+                continue
+        return sorted(out, key=lambda e: e[2])
+
+    def size_bytes(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, keep: Optional[str] = None) -> List[str]:
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = []
+        for key, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+            total -= size
+            removed.append(key)
+        return removed
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def open_cache(cache_dir: Optional[str], max_bytes: int = DEFAULT_MAX_BYTES) -> Optional[ArrayCache]:
+    """ArrayCache for `cache_dir`, or None when caching is disabled (cache_dir=None)"""
+    return None if cache_dir is None else ArrayCache(cache_dir, max_bytes)
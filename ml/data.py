@@ -1,32 +1,70 @@
-﻿import time, numpy as np, pandas as pd
+﻿import sys, time, numpy as np, pandas as pd
+import core.features, core.indicators
 from core.database import connect, load_range
-from core.features import compute_feature_rows
+from core.features import FEATURE_ROW_COLUMNS, compute_feature_rows
+from ml.cache import DATASET_CACHE_DIR, fingerprint, open_cache, source_digest
 
-def build_dataset(db_path, days=1460, horizon=12, fee_bps=5.0):
+FEATURE_COLUMNS = ["ema20_dist","ema50_dist","rsi5","rsi14","adx14","bb_pos","atr_pct_5m","atr1h_pct","reg_u","reg_d","reg_r","macro_bin"]
+
+def load_candles(db_path, days):
     now = int(time.time()); start = now - days*24*60*60
     conn = connect(db_path); rows = load_range(conn, start, now)
     ts = [r[0] for r in rows]; o=[r[1] for r in rows]; h=[r[2] for r in rows]; l=[r[3] for r in rows]; c=[r[4] for r in rows]
+    return ts, o, h, l, c
+
+def feature_frame(ts, o, h, l, c):
+    """Feature rows + derived model inputs (label-independent, so shareable across horizons)"""
     feats = compute_feature_rows(ts,o,h,l,c)
-    import pandas as pd
-    df = pd.DataFrame(feats, columns=["ts","ema20","ema50","atr14","rsi5","rsi14","adx14","bb_mid","bb_lo","bb_up","dn55","up55","regime_1h","macro_4h","atr1h_pct"])
+    df = pd.DataFrame(feats, columns=FEATURE_ROW_COLUMNS)
     df["c"] = c
     df["ema20_dist"] = (df["c"]-df["ema20"])/df["c"]
     df["ema50_dist"] = (df["c"]-df["ema50"])/df["c"]
     df["bb_pos"] = (df["c"]-df["bb_lo"])/((df["bb_up"]-df["bb_lo"]).abs()+1e-9)
     df["atr_pct_5m"] = df["atr14"]/df["c"]*100
-    df["c_fwd"] = df["c"].shift(-horizon)
-    df["ret_fwd"] = (df["c_fwd"]-df["c"])/df["c"]
-    thr = (fee_bps/10000.0)*2.0
-    df["y_long"] = (df["ret_fwd"] > thr).astype(int)
-    df["y_short"] = (df["ret_fwd"] < -thr).astype(int)
-    regs = df["regime_1h"].map({"UPTREND":[1,0,0],"DOWNTREND":[0,1,0],"RANGE":[0,0,1]}).tolist()
+    regs = df["regime"].map({"UPTREND":[1,0,0],"DOWNTREND":[0,1,0],"RANGE":[0,0,1]}).tolist()
     regs = np.array(regs)
     df["reg_u"], df["reg_d"], df["reg_r"] = regs[:,0], regs[:,1], regs[:,2]
-    df["macro_bin"] = df["macro_4h"].map({"ABOVE":1,"BELOW":0}).fillna(-1)
-    feat_cols = ["ema20_dist","ema50_dist","rsi5","rsi14","adx14","bb_pos","atr_pct_5m","atr1h_pct","reg_u","reg_d","reg_r","macro_bin"]
-    X = df[feat_cols].fillna(0.0).values.astype("float32")
-    yL = df["y_long"].fillna(0).values.astype("float32")
-    yS = df["y_short"].fillna(0).values.astype("float32")
-    n = len(df); n_tr = int(n*0.7)
+    df["macro_bin"] = df["macro"].map({"ABOVE":1,"BELOW":0}).fillna(-1)
+    return df
+
+def make_labels(close, horizon=12, fee_bps=5.0):
+    """y_long / y_short: forward return over `horizon` bars beyond the round-trip fee"""
+    c = pd.Series(np.asarray(close, dtype=float))
+    ret_fwd = (c.shift(-horizon)-c)/c
+    thr = (fee_bps/10000.0)*2.0
+    yL = (ret_fwd > thr).astype(int).values.astype("float32")
+    yS = (ret_fwd < -thr).astype(int).values.astype("float32")
+    return yL, yS
+
+def split_dataset(X, yL, yS, ts, feat_cols=FEATURE_COLUMNS, train_frac=0.7):
+    n = len(X); n_tr = int(n*train_frac)
     return {"feat_cols": feat_cols, "X_train": X[:n_tr], "yL_train": yL[:n_tr], "yS_train": yS[:n_tr],
-            "X_oos": X[n_tr:], "yL_oos": yL[n_tr:], "yS_oos": yS[n_tr:], "ts_oos": df["ts"].values[n_tr:]}
\ No newline at end of file
+            "X_oos": X[n_tr:], "yL_oos": yL[n_tr:], "yS_oos": yS[n_tr:], "ts_oos": np.asarray(ts)[n_tr:]}
+
+def candle_fingerprint(ts, o, h, l, c):
+    return fingerprint(np.asarray(ts, dtype="int64"), *(np.asarray(x, dtype=float) for x in (o, h, l, c)))
+
+def dataset_features(ts, o, h, l, c, cache=None):
+    """X (NaN -> 0.0), close and ts for a candle series; looked up in `cache` (ml.cache.ArrayCache) when given"""
+    def compute():
+        df = feature_frame(ts, o, h, l, c)
+        return {"X": df[FEATURE_COLUMNS].fillna(0.0).values.astype("float32"), "close": df["c"].values.astype(float), "ts": df["ts"].values}
+    if cache is None: return compute()
+    code = source_digest(core.features, core.indicators, sys.modules[__name__])
+    return cache.get_or_compute("features", (candle_fingerprint(ts, o, h, l, c), FEATURE_COLUMNS, FEATURE_ROW_COLUMNS, code), compute)
+
+def dataset_labels(close, horizon=12, fee_bps=5.0, cache=None):
+    """make_labels() through `cache` when given"""
+    def compute():
+        yL, yS = make_labels(close, horizon, fee_bps)
+        return {"yL": yL, "yS": yS}
+    out = compute() if cache is None else cache.get_or_compute(
+        "labels", (fingerprint(np.asarray(close, dtype=float)), int(horizon), float(fee_bps), source_digest(sys.modules[__name__])), compute)
+    return out["yL"], out["yS"]
+
+def build_dataset(db_path, days=1460, horizon=12, fee_bps=5.0, cache_dir=DATASET_CACHE_DIR):
+    cache = open_cache(cache_dir)
+    ts, o, h, l, c = load_candles(db_path, days)
+    f = dataset_features(ts, o, h, l, c, cache)
+    yL, yS = dataset_labels(f["close"], horizon, fee_bps, cache)
+    return split_dataset(f["X"], yL, yS, f["ts"])
@@ -0,0 +1,176 @@
+"""
+Batched ML Inference
+
+Feature matrix, scaling and MLP forward pass for a whole series at once,
+instead of one scaler.transform([x]) + torch call per bar:
+
+- build_feature_matrix(): the 12 model inputs for every bar (same formulas
+  as the per-bar loop, NaN warm-up values included)
+- predict_proba(): scale once, forward in large batches under
+  torch.inference_mode(), sigmoid -> (n, 2) [p_long, p_short]
+- cached_predictions(): predict_proba() backed by an .npy cache under
+  data/cache/ml_predictions keyed by model checksum + dataset fingerprint
+
+torch is imported inside the functions that need it, so the numpy bundle
+path (ml.bundle) can use build_feature_matrix() without loading it.
+"""
+
+import hashlib
+import json
+import os
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+
+from core.features import FEATURE_ROW_COLUMNS
+
+MODEL_FILES = ("model.pt", "scaler.pkl", "meta.json")
+PREDICTION_CACHE_DIR = os.path.join("data", "cache", "ml_predictions")
+
+_EMA20, _EMA50, _ATR14, _RSI5, _RSI14, _ADX14, _BB_LO, _BB_UP, _REGIME, _MACRO, _ATR1H_PCT = (
+    FEATURE_ROW_COLUMNS.index(name) for name in
+    ("ema20", "ema50", "atr14", "rsi5", "rsi14", "adx14", "bb_lo", "bb_up", "regime", "macro", "atr1h_pct")
+)
+
+
+def load_model(model_dir="data/ml"):
+    import joblib, torch
+    from ml.model import MLP
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    scaler = joblib.load(os.path.join(model_dir, "scaler.pkl"))
+    with open(os.path.join(model_dir, "meta.json"), "r") as f:
+        meta = json.load(f)
+    # models saved before "hidden" was recorded used the default width
+    model = MLP(in_dim=len(meta["feat_cols"]), hidden=meta.get("hidden", 128), dropout=0.1).to(device)
+    model.load_state_dict(torch.load(os.path.join(model_dir, "model.pt"), map_location=device))
+    model.eval()
+    return model, scaler, meta, device
+
+
+def _column(rows, k):
+    return np.fromiter((r[k] for r in rows), dtype=float, count=len(rows))
+
+
+def build_feature_matrix(feat_rows: Sequence[Sequence], close: Sequence[float]) -> np.ndarray:
+    """
+    Model inputs for every bar (float64, one row per feature row)
+
+    Columns: ema20_dist, ema50_dist, rsi5, rsi14, adx14, bb_pos, atr_pct_5m,
+    atr1h_pct, reg_u, reg_d, reg_r, macro_bin
+    """
+    n = len(feat_rows)
+    c = np.asarray(close, dtype=float)[:n]
+    has_close = c != 0
+    safe_c = np.where(has_close, c, 1.0)
+    bb_lo, bb_up = _column(feat_rows, _BB_LO), _column(feat_rows, _BB_UP)
+    regime = [r[_REGIME] for r in feat_rows]
+    macro = [r[_MACRO] for r in feat_rows]
+
+    X = np.empty((n, 12), dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        X[:, 0] = np.where(has_close, (c - _column(feat_rows, _EMA20)) / safe_c, 0.0)
+        X[:, 1] = np.where(has_close, (c - _column(feat_rows, _EMA50)) / safe_c, 0.0)
+        X[:, 2] = _column(feat_rows, _RSI5)   # `x or 0.0` only changes 0.0 (NaN is truthy)
+        X[:, 3] = _column(feat_rows, _RSI14)
+        X[:, 4] = _column(feat_rows, _ADX14)
+        X[:, 5] = np.where(has_close, (c - bb_lo) / ((bb_up - bb_lo) + 1e-9), 0.0)
+        X[:, 6] = np.where(has_close, _column(feat_rows, _ATR14) / safe_c * 100, 0.0)
+    X[:, 7] = _column(feat_rows, _ATR1H_PCT)
+    X[:, 8] = [1.0 if r == 'UPTREND' else 0.0 for r in regime]
+    X[:, 9] = [1.0 if r == 'DOWNTREND' else 0.0 for r in regime]
+    X[:, 10] = [1.0 if r == 'RANGE' else 0.0 for r in regime]
+    X[:, 11] = [1.0 if m == 'ABOVE' else (0.0 if m == 'BELOW' else -1.0) for m in macro]
+    return X
+
+
+def predict_proba(model, scaler, X: np.ndarray, device="cpu", batch_size: int = 65536) -> np.ndarray:
+    """
+    Sigmoid outputs for every row of X
+
+    Args:
+        model: MLP in eval mode
+        scaler: fitted StandardScaler
+        X: raw feature matrix (n, in_dim)
+        device: torch device the model lives on
+        batch_size: rows per forward pass
+
+    Returns:
+        (n, 2) float32 array of [p_long, p_short]
+    """
+    import torch
+    Xs = scaler.transform(np.asarray(X)).astype("float32")
+    out = np.empty((len(Xs), 2), dtype="float32")
+    with torch.inference_mode():
+        for start in range(0, len(Xs), batch_size):
+            xb = torch.from_numpy(Xs[start:start + batch_size]).to(device)
+            out[start:start + batch_size] = torch.sigmoid(model(xb)).cpu().numpy()
+    return out
+
+
+def model_checksum(model_dir: str) -> str:
+    """sha256 over the saved weights, scaler and meta"""
+    h = hashlib.sha256()
+    for name in MODEL_FILES:
+        with open(os.path.join(model_dir, name), "rb") as f:
+            h.update(name.encode())
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def dataset_fingerprint(X: np.ndarray) -> str:
+    """sha256 over the feature matrix contents and shape"""
+    X = np.ascontiguousarray(X, dtype=float)
+    h = hashlib.sha256(str(X.shape).encode())
+    h.update(X.tobytes())
+    return h.hexdigest()
+
+
+def cached_probabilities(
+    checksum: str,
+    X: np.ndarray,
+    predict: Callable[[], np.ndarray],
+    cache_dir: Optional[str] = PREDICTION_CACHE_DIR
+) -> np.ndarray:
+    """
+    predict() with an on-disk cache
+
+    The cache file is <checksum[:16]>_<dataset fingerprint[:16]>.npy;
+    retraining the model or changing the data range gives a new key.
+    cache_dir=None disables the cache.
+    """
+    if cache_dir is None:
+        return predict()
+
+    key = f"{checksum[:16]}_{dataset_fingerprint(X)[:16]}"
+    path = os.path.join(cache_dir, key + ".npy")
+    if os.path.exists(path):
+        try:
+            probs = np.load(path)
+            if probs.shape == (len(X), 2):
+                return probs
+        except (OSError, ValueError):
+            pass
+
+    probs = predict()
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, probs)
+    os.replace(tmp, path)
+    return probs
+
+
+def cached_predictions(
+    model,
+    scaler,
+    X: np.ndarray,
+    model_dir: str,
+    device="cpu",
+    batch_size: int = 65536,
+    cache_dir: Optional[str] = PREDICTION_CACHE_DIR
+) -> np.ndarray:
+    """predict_proba() through cached_probabilities(), keyed by the checkpoint files in model_dir"""
+    predict = lambda: predict_proba(model, scaler, X, device, batch_size)
+    if cache_dir is None:
+        return predict()
+    return cached_probabilities(model_checksum(model_dir), X, predict, cache_dir)
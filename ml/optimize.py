@@ -1,85 +1,193 @@
-import argparse, os, json, optuna, torch, time
-import yaml, subprocess, sys
-
-ap = argparse.ArgumentParser()
-ap.add_argument("--days", type=int, default=1460)
-ap.add_argument("--trials", type=int, default=40)
-ap.add_argument("--study", type=str, default="ml_search")
-ap.add_argument("--outdir", type=str, default=None)
-ap.add_argument("--progress-file", type=str, default=None)
-args = ap.parse_args()
-
-with open("config.yaml","r") as f: cfg = yaml.safe_load(f)
-db_path = cfg.get("db",{}).get("path","data/bot.db")
-
-start = time.time()
-def objective(trial):
-    import random
-    import random
-    device = f"cuda:{trial.number % torch.cuda.device_count()}" if torch.cuda.is_available() else "cpu"
-    horizon = trial.suggest_int("horizon", 6, 36)
-    hidden = trial.suggest_categorical("hidden", [64,128,256])
-    dropout = trial.suggest_float("dropout", 0.0, 0.3)
-    lr = trial.suggest_float("lr", 1e-4, 3e-3, log=True)
-    epochs = trial.suggest_int("epochs", 6, 18)
-    batch = trial.suggest_categorical("batch", [256,512,1024])
-    p_entry = trial.suggest_float('p_entry', 0.55, 0.75)
-    sl_style = trial.suggest_categorical('sl_style', ['atr_fixed','atr_trailing','chandelier','supertrend','keltner','breakeven_then_trail'])
-    sl_atr = trial.suggest_float('sl_atr', 1.0, 3.5)
-    tp_rr = trial.suggest_float('tp_rr', 1.2, 3.5)
-    breakeven_R = trial.suggest_float('breakeven_R', 0.5, 1.5)
-    trail_atr = trial.suggest_float('trail_atr', 1.0, 3.0)
-    time_stop = trial.suggest_int('time_stop', 48, 192)
-    allow_shorts = trial.suggest_categorical('allow_shorts', [0,1])
-    size_mode = trial.suggest_categorical('size_mode', ['usd','portfolio_pct'])
-    usd_amt = trial.suggest_float('usd_amt', 500, 5000)
-    port_pct = trial.suggest_float('portfolio_pct', 0.2, 3.0)
-    leverage = trial.suggest_int('leverage', 1, 10)
-    # train
-    subprocess.check_call([sys.executable, "ml_train.py", "--days", str(args.days), "--horizon", str(horizon), "--hidden", str(hidden), "--dropout", str(dropout), "--lr", str(lr), "--epochs", str(epochs), "--batch", str(batch), "--device", device])
-    # backtest OOS (~1/3)
-    out = subprocess.check_output([sys.executable, 'ml_bt.py', '--days', str(args.days//3), '--p-entry', str(p_entry), '--allow-shorts', str(allow_shorts), '--sl-style', str(sl_style), '--sl-atr', str(sl_atr), '--tp-rr', str(tp_rr), '--breakeven-R', str(breakeven_R), '--trail-atr', str(trail_atr), '--time-stop', str(time_stop), '--size-mode', str(size_mode), '--usd', str(usd_amt), '--portfolio-pct', str(port_pct), '--leverage', str(leverage)], text=True)
-    import json as js
-    lines = [l for l in out.splitlines() if l.strip().startswith('{')]
-    metrics = js.loads(lines[-1]) if lines else {}
-    trial.set_user_attr("metrics", metrics)
-    return float(metrics.get("sharpe_ann",0.0))
-
-def cb(study, trial):
-    if args.progress_file:
-        done = len(study.trials); elapsed = time.time()-start
-        eta = (args.trials-done)/((done)/(elapsed or 1e-9)) if done>0 else None
-        os.makedirs(os.path.dirname(args.progress_file), exist_ok=True)
-        open(args.progress_file,"w").write(json.dumps({"total": args.trials, "done": done, "elapsed_sec": elapsed, "eta_sec": eta, "best": study.best_value if study.best_trial else None}))
-
-storage = f"sqlite:///data/{args.study}.db"
-os.makedirs("data", exist_ok=True)
-study = optuna.create_study(direction="maximize", study_name=args.study, storage=storage, load_if_exists=True)
-study.optimize(objective, n_trials=args.trials, n_jobs=min(args.trials, 4), callbacks=[cb])
-print("Best value (Sharpe):", study.best_value)
-print("Best params:", json.dumps(study.best_params, indent=2))
-
-# Save trials and HTML report
-import pandas as pd, time, json as js
-stamp = int(time.time()); outdir = args.outdir or os.path.join('data','ml_optuna', str(stamp))
-os.makedirs(outdir, exist_ok=True)
-recs = []
-for t in study.trials:
-    m = t.user_attrs.get('metrics', {})
-    row = {'number': t.number, 'value': t.value, **(m or {}), **t.params}
-    recs.append(row)
-df = pd.DataFrame(recs)
-df.to_csv(os.path.join(outdir,'trials.csv'), index=False)
-
-# HTML
-html = []
-html.append("<!doctype html><html><head><meta charset='utf-8'><title>ML Optuna Report</title><script src='https://cdn.plot.ly/plotly-2.35.2.min.js'></script></head><body style='font-family:ui-sans-serif;padding:16px;background:#0b0f1a;color:#e5e7eb'>")
-html.append("<h1>ML Optuna Report</h1>")
-if len(df)>0:
-    y = df['value'].fillna(0).tolist(); x = list(range(len(y)))
-    html.append("<div id='best' style='height:320px'></div>")
-    html.append(f"<script>var y={y};var x={x};var best=[];var b=-1e9;for(var i=0;i<y.length;i++){b=Math.max(b,y[i]);best.push(b)};Plotly.newPlot('best',[{x:x,y:y,mode:'markers',name:'trial value'},{x:x,y:best,mode:'lines',name:'best so far'}],{title:'Objective (Sharpe) por trial',margin:{t:30}});</script>")
-    html.append("<h2>Top 20</h2>")
-    html.append(df.sort_values(by='value', ascending=False).head(20).to_html(index=False))
-open(os.path.join(outdir,'report.html'),'w',encoding='utf-8').write("\n".join(html))
-print(json.dumps({'outdir': outdir, 'trials': len(df)}, indent=2))
+import argparse, os, json, optuna, torch, time, tempfile, shutil
+import multiprocessing as mp
+import numpy as np, yaml
+
+from ml.cache import DATASET_CACHE_DIR, open_cache
+from ml.data import load_candles, dataset_features, make_labels, split_dataset
+from ml.train import train_mlp
+from ml.inference import predict_proba
+from ml.backtest import backtest_inputs, simulate, summarize, risk_overrides, sizing_overrides
+
+# Arrays written once by prepare_shared() and memory-mapped read-only by every worker
+TRAIN_ARRAYS = ("X", "close", "ts")
+BACKTEST_ARRAYS = ("ts", "h", "l", "c", "atr14", "st_line", "kel_lo", "kel_up", "X")
+
+def suggest_params(trial):
+    p = {}
+    p["horizon"] = trial.suggest_int("horizon", 6, 36)
+    p["hidden"] = trial.suggest_categorical("hidden", [64,128,256])
+    p["dropout"] = trial.suggest_float("dropout", 0.0, 0.3)
+    p["lr"] = trial.suggest_float("lr", 1e-4, 3e-3, log=True)
+    p["epochs"] = trial.suggest_int("epochs", 6, 18)
+    p["batch"] = trial.suggest_categorical("batch", [256,512,1024])
+    p["p_entry"] = trial.suggest_float('p_entry', 0.55, 0.75)
+    p["sl_style"] = trial.suggest_categorical('sl_style', ['atr_fixed','atr_trailing','chandelier','supertrend','keltner','breakeven_then_trail'])
+    p["sl_atr"] = trial.suggest_float('sl_atr', 1.0, 3.5)
+    p["tp_rr"] = trial.suggest_float('tp_rr', 1.2, 3.5)
+    p["breakeven_R"] = trial.suggest_float('breakeven_R', 0.5, 1.5)
+    p["trail_atr"] = trial.suggest_float('trail_atr', 1.0, 3.0)
+    p["time_stop"] = trial.suggest_int('time_stop', 48, 192)
+    p["allow_shorts"] = trial.suggest_categorical('allow_shorts', [0,1])
+    p["size_mode"] = trial.suggest_categorical('size_mode', ['usd','portfolio_pct'])
+    p["usd_amt"] = trial.suggest_float('usd_amt', 500, 5000)
+    p["port_pct"] = trial.suggest_float('portfolio_pct', 0.2, 3.0)
+    p["leverage"] = trial.suggest_int('leverage', 1, 10)
+    return p
+
+def prepare_shared(db_path, days, out_dir, cache_dir=DATASET_CACHE_DIR):
+    """
+    Build the training features (`days` of history) and the backtest inputs
+    (last days//3, as the per-trial backtest used to load) once, as .npy files
+    (both looked up in the dataset cache unless cache_dir is None)
+    """
+    cache = open_cache(cache_dir)
+    ts, o, h, l, c = load_candles(db_path, days)
+    arrays = {f"train_{name}": arr for name, arr in dataset_features(ts, o, h, l, c, cache).items()}
+    cut = int(time.time()) - (days//3)*24*60*60
+    k = int(np.searchsorted(np.asarray(ts), cut))
+    bt = backtest_inputs(ts[k:], o[k:], h[k:], l[k:], c[k:], cache)
+    for name in BACKTEST_ARRAYS:
+        arrays[f"bt_{name}"] = np.asarray(bt[name])
+    os.makedirs(out_dir, exist_ok=True)
+    for name, arr in arrays.items():
+        np.save(os.path.join(out_dir, name + ".npy"), arr)
+    return out_dir
+
+def load_shared(shared_dir):
+    """Memory-map the arrays written by prepare_shared() (read-only, shared through the page cache)"""
+    out = {}
+    for prefix, names in (("train", TRAIN_ARRAYS), ("bt", BACKTEST_ARRAYS)):
+        for name in names:
+            out[f"{prefix}_{name}"] = np.load(os.path.join(shared_dir, f"{prefix}_{name}.npy"), mmap_mode="r")
+    return out
+
+def make_objective(shared, cfg, workdir=None):
+    """In-process trial: labels for the trial's horizon, train with per-epoch pruning, backtest OOS"""
+    bt = {name: shared[f"bt_{name}"].tolist() for name in BACKTEST_ARRAYS if name != "X"}
+    X_bt = shared["bt_X"]
+    leverage_default = cfg.get('sizing',{}).get('leverage',3)
+
+    def objective(trial):
+        p = suggest_params(trial)
+        device = f"cuda:{trial.number % torch.cuda.device_count()}" if torch.cuda.is_available() else "cpu"
+        yL, yS = make_labels(shared["train_close"], p["horizon"])
+        data = split_dataset(shared["train_X"], yL, yS, shared["train_ts"])
+
+        def on_epoch(ep, val_loss):
+            # the study maximizes, so report the negated loss
+            trial.report(-val_loss, ep)
+            if trial.should_prune():
+                raise optuna.TrialPruned()
+
+        model, scaler = train_mlp(data, p["hidden"], p["dropout"], p["lr"], p["epochs"], p["batch"], device, on_epoch=on_epoch)
+        probs = predict_proba(model, scaler, X_bt, device)
+        risk = risk_overrides(cfg.get('risk', {}), p["sl_style"], p["sl_atr"], p["tp_rr"], p["breakeven_R"], p["trail_atr"], p["time_stop"])
+        sizing = sizing_overrides(cfg.get('sizing', {}), p["size_mode"], p["usd_amt"], p["port_pct"], p["leverage"])
+        with tempfile.TemporaryDirectory(dir=workdir) as d:
+            broker = simulate(bt, probs, risk, sizing, p["p_entry"], p["allow_shorts"], p["sl_atr"], p["tp_rr"],
+                              leverage=leverage_default, data_dir=d)
+            metrics = json.loads(json.dumps(summarize(broker), default=float))
+        trial.set_user_attr("metrics", metrics)
+        return float(metrics.get("sharpe_ann",0.0))
+    return objective
+
+def progress_callback(progress_file, total, start):
+    def cb(study, trial):
+        if progress_file:
+            done = len(study.trials); elapsed = time.time()-start
+            eta = (total-done)/((done)/(elapsed or 1e-9)) if done>0 else None
+            os.makedirs(os.path.dirname(progress_file), exist_ok=True)
+            open(progress_file,"w").write(json.dumps({"total": total, "done": done, "elapsed_sec": elapsed, "eta_sec": eta, "best": study.best_value if study.best_trial else None}))
+    return cb
+
+def _storage(url):
+    # several worker processes share the sqlite file
+    return optuna.storages.RDBStorage(url, engine_kwargs={"connect_args": {"timeout": 60}})
+
+def _worker(storage_url, study_name, n_trials, shared_dir, cfg, torch_threads, pruner, progress_file, total, start):
+    torch.set_num_threads(torch_threads)
+    study = optuna.load_study(study_name=study_name, storage=_storage(storage_url), pruner=pruner)
+    study.optimize(make_objective(load_shared(shared_dir), cfg), n_trials=n_trials,
+                   callbacks=[progress_callback(progress_file, total, start)])
+
+def run_study(study_name, storage_url, db_path, days, trials, cfg, workers=4, pruner=None, progress_file=None,
+              cache_dir=DATASET_CACHE_DIR):
+    """
+    Run `trials` trials split over `workers` processes
+
+    The dataset is built once in this process and memory-mapped by the
+    workers; each worker limits torch to cpu_count // workers threads.
+    """
+    start = time.time()
+    pruner = pruner if pruner is not None else optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=2)
+    study = optuna.create_study(direction="maximize", study_name=study_name, storage=_storage(storage_url), load_if_exists=True, pruner=pruner)
+    workers = max(1, min(workers, trials))
+    torch_threads = max(1, (os.cpu_count() or 1) // workers)
+    shared_dir = prepare_shared(db_path, days, tempfile.mkdtemp(prefix="ml_optuna_"), cache_dir)
+    try:
+        if workers == 1:
+            _worker(storage_url, study_name, trials, shared_dir, cfg, torch_threads, pruner, progress_file, trials, start)
+        else:
+            ctx = mp.get_context("spawn")
+            counts = [trials//workers + (k < trials % workers) for k in range(workers)]
+            procs = [ctx.Process(target=_worker, args=(storage_url, study_name, n, shared_dir, cfg, torch_threads, pruner, progress_file, trials, start))
+                     for n in counts]
+            for pr in procs: pr.start()
+            for pr in procs: pr.join()
+            failed = [pr.exitcode for pr in procs if pr.exitcode != 0]
+            if failed:
+                raise RuntimeError(f"{len(failed)} optimization worker(s) failed (exit codes {failed})")
+    finally:
+        shutil.rmtree(shared_dir, ignore_errors=True)
+    return optuna.load_study(study_name=study_name, storage=_storage(storage_url))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--days", type=int, default=1460)
+    ap.add_argument("--trials", type=int, default=40)
+    ap.add_argument("--study", type=str, default="ml_search")
+    ap.add_argument("--outdir", type=str, default=None)
+    ap.add_argument("--progress-file", type=str, default=None)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--no-prune", action="store_true")
+    ap.add_argument("--no-data-cache", action="store_true")
+    args = ap.parse_args()
+
+    with open("config.yaml","r") as f: cfg = yaml.safe_load(f)
+    db_path = cfg.get("db",{}).get("path","data/bot.db")
+
+    storage = f"sqlite:///data/{args.study}.db"
+    os.makedirs("data", exist_ok=True)
+    study = run_study(args.study, storage, db_path, args.days, args.trials, cfg, workers=args.workers,
+                      pruner=optuna.pruners.NopPruner() if args.no_prune else None, progress_file=args.progress_file,
+                      cache_dir=None if args.no_data_cache else DATASET_CACHE_DIR)
+    print("Best value (Sharpe):", study.best_value)
+    print("Best params:", json.dumps(study.best_params, indent=2))
+
+    # Save trials and HTML report
+    import pandas as pd
+    stamp = int(time.time()); outdir = args.outdir or os.path.join('data','ml_optuna', str(stamp))
+    os.makedirs(outdir, exist_ok=True)
+    recs = []
+    for t in study.trials:
+        m = t.user_attrs.get('metrics', {})
+        row = {'number': t.number, 'value': t.value, **(m or {}), **t.params}
+        recs.append(row)
+    df = pd.DataFrame(recs)
+    df.to_csv(os.path.join(outdir,'trials.csv'), index=False)
+
+    # HTML
+    html = []
+    html.append("<!doctype html><html><head><meta charset='utf-8'><title>ML Optuna Report</title><script src='https://cdn.plot.ly/plotly-2.35.2.min.js'></script></head><body style='font-family:ui-sans-serif;padding:16px;background:#0b0f1a;color:#e5e7eb'>")
+    html.append("<h1>ML Optuna Report</h1>")
+    if len(df)>0:
+        y = df['value'].fillna(0).tolist(); x = list(range(len(y)))
+        html.append("<div id='best' style='height:320px'></div>")
+        html.append(f"<script>var y={y};var x={x};var best=[];var b=-1e9;for(var i=0;i<y.length;i++){{b=Math.max(b,y[i]);best.push(b)}};Plotly.newPlot('best',[{{x:x,y:y,mode:'markers',name:'trial value'}},{{x:x,y:best,mode:'lines',name:'best so far'}}],{{title:'Objective (Sharpe) por trial',margin:{{t:30}}}});</script>")
+        html.append("<h2>Top 20</h2>")
+        html.append(df.sort_values(by='value', ascending=False).head(20).to_html(index=False))
+    open(os.path.join(outdir,'report.html'),'w',encoding='utf-8').write("\n".join(html))
+    print(json.dumps({'outdir': outdir, 'trials': len(df)}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Memory-mapped Training Store
+
+Features and labels for many symbols are written to disk once and streamed
+back in chunks, so training memory no longer grows with history length or
+symbol count.
+
+Layout of a store directory:
+    manifest.json            columns, labels, horizon, chunk size, per-symbol rows / train split
+    <symbol>/features.npy    float32 (rows, len(columns)), NaN -> 0.0 like build_dataset()
+    <symbol>/labels.npy      float32 (rows, 2): y_long, y_short
+
+Columns are addressed by name (store.column("rsi14", symbol)). Arrays are
+opened with np.load(mmap_mode="r"), so only the pages a chunk touches are
+resident. ChunkShuffleDataset feeds a DataLoader: chunk order is shuffled
+every epoch and rows are shuffled inside a small buffer of chunks.
+
+Build from the command line:
+    python -m ml.store --out data/ml_store --db BTC/USDT:USDT=data/db/BTC_USDT_5m.db --days 730
+"""
+
+import argparse
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+from numpy.lib.format import open_memmap
+from sklearn.preprocessing import StandardScaler
+
+from ml.data import FEATURE_COLUMNS, feature_frame, load_candles, make_labels
+
+LABEL_COLUMNS = ["y_long", "y_short"]
+DEFAULT_CHUNK_ROWS = 16384
+MANIFEST = "manifest.json"
+
+
+def _symbol_dir(symbol: str) -> str:
+    return symbol.replace("/", "_").replace(":", "_")
+
+
+def _read_manifest(root: str) -> Optional[dict]:
+    path = os.path.join(root, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def write_symbol(
+    root: str,
+    symbol: str,
+    ts: Sequence[int],
+    o: Sequence[float],
+    h: Sequence[float],
+    l: Sequence[float],
+    c: Sequence[float],
+    horizon: int = 12,
+    fee_bps: float = 5.0,
+    columns: Sequence[str] = FEATURE_COLUMNS,
+    train_frac: float = 0.7,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> dict:
+    """
+    Compute features + labels for one symbol and append it to the store
+
+    The arrays are written chunk by chunk into .npy memmaps; the manifest
+    is rewritten last so a half-written symbol is never listed.
+
+    Raises:
+        ValueError: if the store already holds a different column set,
+            horizon or fee threshold
+    """
+    columns = list(columns)
+    manifest = _read_manifest(root) or {
+        "columns": columns, "labels": LABEL_COLUMNS, "horizon": horizon, "fee_bps": fee_bps,
+        "chunk_rows": chunk_rows, "symbols": {},
+    }
+    spec = (manifest["columns"], manifest["horizon"], manifest["fee_bps"])
+    if spec != (columns, horizon, fee_bps):
+        raise ValueError(f"Store {root} was built with columns/horizon/fee_bps {spec}")
+
+    df = feature_frame(ts, o, h, l, c)
+    yL, yS = make_labels(df["c"], horizon, fee_bps)
+    n = len(df)
+
+    sym_dir = os.path.join(root, _symbol_dir(symbol))
+    os.makedirs(sym_dir, exist_ok=True)
+    feats = open_memmap(os.path.join(sym_dir, "features.npy"), mode="w+", dtype=np.float32, shape=(n, len(columns)))
+    labels = open_memmap(os.path.join(sym_dir, "labels.npy"), mode="w+", dtype=np.float32, shape=(n, 2))
+    block = df[columns]
+    step = manifest["chunk_rows"]
+    for start in range(0, n, step):
+        stop = min(n, start + step)
+        feats[start:stop] = block.iloc[start:stop].fillna(0.0).values
+        labels[start:stop, 0] = yL[start:stop]
+        labels[start:stop, 1] = yS[start:stop]
+    feats.flush()
+    labels.flush()
+    del feats, labels, block, df
+
+    entry = {"dir": _symbol_dir(symbol), "rows": n, "n_train": int(n * train_frac)}
+    manifest["symbols"][symbol] = entry
+    tmp = os.path.join(root, MANIFEST + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(root, MANIFEST))
+    return entry
+
+
+def build_store(root: str, db_paths: Dict[str, str], days: int = 730, horizon: int = 12, fee_bps: float = 5.0,
+                chunk_rows: int = DEFAULT_CHUNK_ROWS) -> "TrainingStore":
+    """Write every symbol (one at a time) from its candle DB and open the store"""
+    os.makedirs(root, exist_ok=True)
+    for symbol, db_path in db_paths.items():
+        ts, o, h, l, c = load_candles(db_path, days)
+        write_symbol(root, symbol, ts, o, h, l, c, horizon, fee_bps, chunk_rows=chunk_rows)
+    return TrainingStore(root)
+
+
+class TrainingStore:
+    """Read side of a store directory (all arrays memory-mapped read-only)"""
+
+    def __init__(self, root: str):
+        manifest = _read_manifest(root)
+        if manifest is None:
+            raise FileNotFoundError(f"No {MANIFEST} in {root}")
+        self.root = root
+        self.columns: List[str] = manifest["columns"]
+        self.labels: List[str] = manifest["labels"]
+        self.horizon: int = manifest["horizon"]
+        self.chunk_rows: int = manifest["chunk_rows"]
+        self.symbols: Dict[str, dict] = manifest["symbols"]
+        self._arrays: Dict[Tuple[str, str], np.ndarray] = {}
+
+    def _array(self, symbol: str, name: str) -> np.ndarray:
+        key = (symbol, name)
+        if key not in self._arrays:
+            path = os.path.join(self.root, self.symbols[symbol]["dir"], name + ".npy")
+            self._arrays[key] = np.load(path, mmap_mode="r")
+        return self._arrays[key]
+
+    def features(self, symbol: str) -> np.ndarray:
+        return self._array(symbol, "features")
+
+    def label_array(self, symbol: str) -> np.ndarray:
+        return self._array(symbol, "labels")
+
+    def column(self, name: str, symbol: str) -> np.ndarray:
+        """One feature or label column by name (a memmap view)"""
+        if name in self.labels:
+            return self.label_array(symbol)[:, self.labels.index(name)]
+        if name not in self.columns:
+            raise KeyError(f"Unknown column '{name}' (have {self.columns + self.labels})")
+        return self.features(symbol)[:, self.columns.index(name)]
+
+    def rows(self, split: str = "train") -> int:
+        return sum(hi - lo for _, lo, hi in self.chunks(split))
+
+    def chunks(self, split: str = "train") -> List[Tuple[str, int, int]]:
+        """(symbol, start, stop) row ranges of `split` ("train" or "oos"), chunk_rows long at most"""
+        out = []
+        for symbol, info in self.symbols.items():
+            lo, hi = (0, info["n_train"]) if split == "train" else (info["n_train"], info["rows"])
+            out.extend((symbol, s, min(hi, s + self.chunk_rows)) for s in range(lo, hi, self.chunk_rows))
+        return out
+
+    def read(self, symbol: str, start: int, stop: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Copy of a row range: (features, labels)"""
+        return (np.array(self.features(symbol)[start:stop]), np.array(self.label_array(symbol)[start:stop]))
+
+    def fit_scaler(self) -> StandardScaler:
+        """StandardScaler over the training rows, one chunk at a time"""
+        scaler = StandardScaler()
+        for symbol, start, stop in self.chunks("train"):
+            scaler.partial_fit(self.features(symbol)[start:stop])
+        return scaler
+
+
+class ChunkShuffleDataset(torch.utils.data.IterableDataset):
+    """
+    Scaled mini-batches streamed from a TrainingStore
+
+    Yields (x, y_long, y_short) tensors of up to batch_size rows (labels as
+    (n, 1) columns, like the in-memory TensorDataset). With shuffle, the
+    chunk order is permuted per epoch (set_epoch) and rows are mixed across
+    `buffer_chunks` chunks at a time. Use with DataLoader(batch_size=None).
+    """
+
+    def __init__(self, store: TrainingStore, batch_size: int, scaler: StandardScaler, split: str = "train",
+                 shuffle: bool = True, buffer_chunks: int = 4, seed: int = 0):
+        self.store = store
+        self.batch_size = batch_size
+        self.mean = scaler.mean_.astype(np.float32)
+        self.scale = scaler.scale_.astype(np.float32)
+        self.split = split
+        self.shuffle = shuffle
+        self.buffer_chunks = max(1, buffer_chunks)
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch: int):
+        """Pick the shuffle for `epoch` (call before iterating; DataLoader workers get a copy)"""
+        self.epoch = epoch
+
+    def __iter__(self) -> Iterator[Tuple[torch.Tensor, torch.Tensor, torch.Tensor]]:
+        rng = np.random.default_rng((self.seed, self.epoch))
+        chunks = self.store.chunks(self.split)
+        if self.shuffle:
+            chunks = [chunks[k] for k in rng.permutation(len(chunks))]
+        info = torch.utils.data.get_worker_info()
+        if info is not None:
+            chunks = chunks[info.id::info.num_workers]
+
+        for b in range(0, len(chunks), self.buffer_chunks):
+            parts = [self.store.read(*ch) for ch in chunks[b:b + self.buffer_chunks]]
+            X = np.concatenate([p[0] for p in parts])
+            y = np.concatenate([p[1] for p in parts])
+            if self.shuffle:
+                order = rng.permutation(len(X))
+                X, y = X[order], y[order]
+            X = (X - self.mean) / self.scale
+            for s in range(0, len(X), self.batch_size):
+                yield (torch.from_numpy(X[s:s + self.batch_size]),
+                       torch.from_numpy(y[s:s + self.batch_size, 0:1]),
+                       torch.from_numpy(y[s:s + self.batch_size, 1:2]))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--out", type=str, default="data/ml_store")
+    ap.add_argument("--db", action="append", required=True, help="SYMBOL=path/to/candles.db (repeatable)")
+    ap.add_argument("--days", type=int, default=730)
+    ap.add_argument("--horizon", type=int, default=12)
+    ap.add_argument("--fee-bps", type=float, default=5.0)
+    ap.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = ap.parse_args()
+
+    db_paths = dict(item.split("=", 1) for item in args.db)
+    store = build_store(args.out, db_paths, args.days, args.horizon, args.fee_bps, args.chunk_rows)
+    print(json.dumps({"out": args.out, "symbols": len(store.symbols), "train_rows": store.rows("train"),
+                      "oos_rows": store.rows("oos")}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
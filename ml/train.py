@@ -1,46 +1,124 @@
-﻿import argparse, os, json, numpy as np, torch, torch.nn as nn, torch.optim as optim
+﻿import argparse, os, json, time, numpy as np, torch, torch.nn as nn, torch.optim as optim
 from sklearn.preprocessing import StandardScaler
+from ml.bundle import export_bundle
+from ml.cache import DATASET_CACHE_DIR
 from ml.data import build_dataset
 from ml.model import MLP
 
-ap = argparse.ArgumentParser()
-ap.add_argument("--days", type=int, default=1460)
-ap.add_argument("--horizon", type=int, default=12)
-ap.add_argument("--hidden", type=int, default=128)
-ap.add_argument("--dropout", type=float, default=0.1)
-ap.add_argument("--lr", type=float, default=1e-3)
-ap.add_argument("--epochs", type=int, default=12)
-ap.add_argument("--batch", type=int, default=512)
-ap.add_argument("--device", type=str, default="auto")
-ap.add_argument("--db", type=str, default="data/bot.db")
-ap.add_argument("--progress-file", type=str, default=None)
-args = ap.parse_args()
-
-device = "cuda" if (args.device=="auto" and torch.cuda.is_available()) else (args.device if args.device!="auto" else "cpu")
-data = build_dataset(args.db, days=args.days, horizon=args.horizon)
-scaler = StandardScaler(); Xtr = scaler.fit_transform(data["X_train"]).astype("float32")
-model = MLP(in_dim=Xtr.shape[1], hidden=args.hidden, dropout=args.dropout).to(device)
-opt = optim.Adam(model.parameters(), lr=args.lr); loss_fn = nn.BCEWithLogitsLoss()
-
-ds = torch.utils.data.TensorDataset(torch.tensor(Xtr, device=device),
-                                    torch.tensor(data["yL_train"][:,None], device=device),
-                                    torch.tensor(data["yS_train"][:,None], device=device))
-dl = torch.utils.data.DataLoader(ds, batch_size=args.batch, shuffle=True)
-
-import time; start=time.time()
-for ep in range(args.epochs):
-    if args.progress_file:
-        import os, json, time as t
-        elapsed = t.time()-start; eta = (args.epochs-(ep))/((ep+1)/(elapsed or 1e-9)) if ep>=0 else None
-        os.makedirs(os.path.dirname(args.progress_file), exist_ok=True)
-        open(args.progress_file,"w").write(json.dumps({"total": args.epochs, "done": ep, "elapsed_sec": elapsed, "eta_sec": eta}))
-    model.train(); tot=0.0
-    for xb, yL, yS in dl:
-        opt.zero_grad(); logits = model(xb)
-        loss = loss_fn(logits[:,0:1], yL)+loss_fn(logits[:,1:2], yS); loss.backward(); opt.step(); tot += float(loss.item())
-
-os.makedirs("data/ml", exist_ok=True)
-torch.save(model.state_dict(), "data/ml/model.pt")
-import joblib; joblib.dump(scaler, "data/ml/scaler.pkl")
-with open("data/ml/meta.json","w") as f: json.dump({"feat_cols": data["feat_cols"], "horizon": args.horizon}, f, indent=2)
-print("Saved model to data/ml/")
\ No newline at end of file
+def _write_progress(progress_file, total, done, start):
+    elapsed = time.time()-start; eta = (total-done)/((done+1)/(elapsed or 1e-9))
+    os.makedirs(os.path.dirname(progress_file), exist_ok=True)
+    open(progress_file,"w").write(json.dumps({"total": total, "done": done, "elapsed_sec": elapsed, "eta_sec": eta}))
+
+def _batch_loss(model, xb, yL, yS, loss_fn):
+    logits = model(xb)
+    return loss_fn(logits[:,0:1], yL)+loss_fn(logits[:,1:2], yS)
+
+def validation_loss(model, Xs, yL, yS, device="cpu", batch=65536):
+    """Mean BCE (long + short heads) on already-scaled inputs"""
+    batches = ((torch.as_tensor(Xs[s:s+batch]), torch.as_tensor(yL[s:s+batch])[:,None], torch.as_tensor(yS[s:s+batch])[:,None])
+               for s in range(0, len(Xs), batch))
+    return _stream_loss(model, batches, device)
+
+def _stream_loss(model, batches, device):
+    loss_fn = nn.BCEWithLogitsLoss(reduction="sum"); tot = 0.0; n = 0
+    model.eval()
+    with torch.inference_mode():
+        for xb, yL, yS in batches:
+            tot += float(_batch_loss(model, xb.to(device), yL.to(device), yS.to(device), loss_fn)); n += len(xb)
+    return tot/max(1, n)
+
+def _fit(model, loader, epochs, lr, device, progress_file=None, on_epoch=None, val_loss=None):
+    """Shared epoch loop: Adam + BCE on both heads; on_epoch(epoch, val_loss()) after each epoch"""
+    opt = optim.Adam(model.parameters(), lr=lr); loss_fn = nn.BCEWithLogitsLoss()
+    start = time.time()
+    for ep in range(epochs):
+        if progress_file: _write_progress(progress_file, epochs, ep, start)
+        if hasattr(loader.dataset, "set_epoch"): loader.dataset.set_epoch(ep)
+        model.train(); tot=0.0
+        for xb, yL, yS in loader:
+            xb, yL, yS = xb.to(device), yL.to(device), yS.to(device)
+            opt.zero_grad(); loss = _batch_loss(model, xb, yL, yS, loss_fn); loss.backward(); opt.step(); tot += float(loss.item())
+        if on_epoch is not None:
+            on_epoch(ep, val_loss())
+    model.eval()
+    return model
+
+def train_mlp(data, hidden=128, dropout=0.1, lr=1e-3, epochs=12, batch=512, device="cpu", progress_file=None, on_epoch=None):
+    """
+    Fit scaler + MLP on data["X_train"] / yL / yS
+
+    on_epoch(epoch, val_loss) is called after every epoch with the loss on
+    data["X_oos"] (only computed when a callback is given); it may raise to
+    stop training early (e.g. optuna.TrialPruned).
+    """
+    scaler = StandardScaler(); Xtr = scaler.fit_transform(data["X_train"]).astype("float32")
+    model = MLP(in_dim=Xtr.shape[1], hidden=hidden, dropout=dropout).to(device)
+
+    ds = torch.utils.data.TensorDataset(torch.tensor(Xtr, device=device),
+                                        torch.tensor(data["yL_train"][:,None], device=device),
+                                        torch.tensor(data["yS_train"][:,None], device=device))
+    dl = torch.utils.data.DataLoader(ds, batch_size=batch, shuffle=True)
+    Xval = scaler.transform(data["X_oos"]).astype("float32") if on_epoch is not None else None
+    val_loss = lambda: validation_loss(model, Xval, data["yL_oos"], data["yS_oos"], device)
+    return _fit(model, dl, epochs, lr, device, progress_file, on_epoch, val_loss), scaler
+
+def train_mlp_store(store, hidden=128, dropout=0.1, lr=1e-3, epochs=12, batch=512, device="cpu", progress_file=None,
+                    on_epoch=None, num_workers=0, seed=0):
+    """
+    train_mlp() streaming from an ml.store.TrainingStore
+
+    The scaler is fitted chunk by chunk and batches come from the memory-mapped
+    arrays, so resident memory stays around a few chunks regardless of
+    store size. on_epoch gets the loss over the store's OOS rows.
+    """
+    from ml.store import ChunkShuffleDataset
+    scaler = store.fit_scaler()
+    model = MLP(in_dim=len(store.columns), hidden=hidden, dropout=dropout).to(device)
+    ds = ChunkShuffleDataset(store, batch, scaler, "train", shuffle=True, seed=seed)
+    dl = torch.utils.data.DataLoader(ds, batch_size=None, num_workers=num_workers)
+    val_ds = ChunkShuffleDataset(store, 65536, scaler, "oos", shuffle=False)
+    val_loss = lambda: _stream_loss(model, val_ds, device)
+    return _fit(model, dl, epochs, lr, device, progress_file, on_epoch, val_loss), scaler
+
+def save_model(model, scaler, feat_cols, horizon, hidden=128, out_dir="data/ml"):
+    import joblib
+    os.makedirs(out_dir, exist_ok=True)
+    torch.save(model.state_dict(), os.path.join(out_dir, "model.pt"))
+    joblib.dump(scaler, os.path.join(out_dir, "scaler.pkl"))
+    meta = {"feat_cols": feat_cols, "horizon": horizon, "hidden": hidden}
+    with open(os.path.join(out_dir, "meta.json"),"w") as f: json.dump(meta, f, indent=2)
+    # numpy copy of the weights for torch-free inference (ml.bundle)
+    export_bundle(model.state_dict(), scaler, meta, out_dir)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--days", type=int, default=1460)
+    ap.add_argument("--horizon", type=int, default=12)
+    ap.add_argument("--hidden", type=int, default=128)
+    ap.add_argument("--dropout", type=float, default=0.1)
+    ap.add_argument("--lr", type=float, default=1e-3)
+    ap.add_argument("--epochs", type=int, default=12)
+    ap.add_argument("--batch", type=int, default=512)
+    ap.add_argument("--device", type=str, default="auto")
+    ap.add_argument("--db", type=str, default="data/bot.db")
+    ap.add_argument("--progress-file", type=str, default=None)
+    ap.add_argument("--store", type=str, default=None, help="train from an ml.store directory instead of --db (horizon comes from the store)")
+    ap.add_argument("--workers", type=int, default=0, help="DataLoader workers when training from --store")
+    ap.add_argument("--no-data-cache", action="store_true", help="recompute features/labels instead of using data/cache/ml_dataset")
+    args = ap.parse_args()
+
+    device = "cuda" if (args.device=="auto" and torch.cuda.is_available()) else (args.device if args.device!="auto" else "cpu")
+    if args.store:
+        from ml.store import TrainingStore
+        store = TrainingStore(args.store)
+        model, scaler = train_mlp_store(store, args.hidden, args.dropout, args.lr, args.epochs, args.batch, device, args.progress_file, num_workers=args.workers)
+        save_model(model, scaler, store.columns, store.horizon, args.hidden)
+    else:
+        data = build_dataset(args.db, days=args.days, horizon=args.horizon, cache_dir=None if args.no_data_cache else DATASET_CACHE_DIR)
+        model, scaler = train_mlp(data, args.hidden, args.dropout, args.lr, args.epochs, args.batch, device, args.progress_file)
+        save_model(model, scaler, data["feat_cols"], args.horizon, args.hidden)
+    print("Saved model to data/ml/")
+
+if __name__ == "__main__":
+    main()
@@ -18,11 +18,12 @@ sys.path.insert(0, str(PROJECT_ROOT))
 
 from core.database import connect, load_range
 from core.features import compute_feature_rows
+from core.sessions import compute_session_features
 from broker.paper_v2 import PaperFuturesBrokerV2
 from core.sizing import compute_qty
 from strategies.registry import get_strategy
 from strategies.regime import build_regime_exit_plan
-from strategies.adapter import build_bar_dict, build_indicator_dict, build_state_dict
+from strategies.adapter import IndicatorView, build_bar_dict, build_state_dict
 import pandas as pd
 import yaml
 
@@ -154,6 +155,7 @@ def run_optimization_backtest(config_path: str, days: int = 365):
             "keltner_lo": [r[28] for r in feature_rows],
             "keltner_up": [r[29] for r in feature_rows],
         }
+        feats.update({k: col.tolist() for k, col in compute_session_features(ts, h, l, c, v).items()})
         
     except Exception as e:
         return {
@@ -174,7 +176,8 @@ def run_optimization_backtest(config_path: str, days: int = 365):
             spread_bps=cfg.get('fees', {}).get('spread_bps', 1.0),
             taker_fee_bps=cfg.get('fees', {}).get('taker_fee_bps', 5.0),
             maker_fee_bps=cfg.get('fees', {}).get('maker_fee_bps', 2.0),
-            data_dir=str(PROJECT_ROOT / 'data' / 'optimization' / 'temp')
+            data_dir=str(PROJECT_ROOT / 'data' / 'optimization' / 'temp'),
+            sink=cfg.get('optimization', {}).get('broker_sink', 'memory')
         )
     except Exception as e:
         return {
@@ -191,6 +194,7 @@ def run_optimization_backtest(config_path: str, days: int = 365):
         # Calculate trailing indicators for exits
         st_line, st_dir = calc_supertrend(h, l, c, n=10, mult=3.0)
         kel_mid, kel_lo, kel_up = calc_keltner(h, l, c, n=20, mult=1.5)
+        ind_view = IndicatorView(ts, o, h, l, c, feats)
         
         for i in range(len(ts)):
             atr = feats["atr14"][i] or (c[i] * 0.01)
@@ -212,7 +216,7 @@ def run_optimization_backtest(config_path: str, days: int = 365):
             
             # Build inputs for strategy function
             bar = build_bar_dict(i, o, h, l, c, v)
-            ind = build_indicator_dict(i, ts, o, h, l, c, feats)
+            ind = ind_view.at(i)
             state = build_state_dict(position=None, cooldown_bars_left=0)
             params = cfg.get('risk', {})
             
@@ -261,18 +265,8 @@ def run_optimization_backtest(config_path: str, days: int = 365):
         em = equity_metrics(broker.equity_curve)
         
         # Count closed trades
-        closed_trades = []
-        try:
-            trades_file = PROJECT_ROOT / 'data' / 'optimization' / 'temp' / 'trades.csv'
-            if trades_file.exists():
-                with open(trades_file, 'r') as f:
-                    import csv
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        if row['action'] not in ['OPEN_LONG', 'OPEN_SHORT']:
-                            closed_trades.append(row)
-        except:
-            pass
+        broker.close()
+        closed_trades = broker.sink.closes
         
         # Ensure all required fields
         result = {
@@ -280,7 +274,7 @@ def run_optimization_backtest(config_path: str, days: int = 365):
             'maxdd_pct': em.get('maxdd_pct', 0.0),
             'sharpe_ann': em.get('sharpe_ann', 0.0),
             'sortino_ann': em.get('sharpe_ann', 0.0) * 1.2,  # Approximate
-            'trades': len(closed_trades),
+            'trades': closed_trades,
             'win_rate_pct': 0.0,  # Would need to calculate from trades
             'profit_factor': 0.0,
             'final_balance': broker.equity
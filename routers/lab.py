@@ -1,6 +1,6 @@
 """Router for Strategy Lab"""
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Request
+from typing import List, Optional
 import os
 import json
 import time
@@ -13,7 +13,6 @@ from lab.schemas import (
 )
 from lab.indicators import get_indicator_catalog, get_indicator, validate_indicator_params
 from lab.objective import objective_evaluator
-from lab.features import calculate_features, features_to_rows
 
 router = APIRouter(prefix="/api/lab", tags=["lab"])
 
@@ -163,7 +162,7 @@ async def backfill_data(request: BackfillRequest):
     from ccxt.base.errors import RateLimitExceeded, NetworkError
     import pandas as pd
     import math
-    from lab_features import calculate_features, features_to_rows
+    from lab.features import calculate_features, features_to_rows
     
     try:
         # Initialize exchange with rate limiting
@@ -436,9 +435,18 @@ async def get_run_results_endpoint(run_id: str, limit: int = 100, offset: int =
 
 
 @router.get("/run/{run_id}/candles")
-async def get_run_candles(run_id: str):
-    """Get OHLCV candles for the backtest period"""
+async def get_run_candles(run_id: str, before: Optional[int] = None, limit: Optional[int] = None, request: Request = None):
+    """
+    Get OHLCV candles for the backtest period
+
+    JSON by default; `Accept: application/vnd.smarttrade.candles` returns the
+    binary columnar encoding (see core.candle_codec). With `before` and/or
+    `limit` the newest `limit` candles older than `before` are returned
+    together with the cursor for the page before them.
+    """
     import sqlite3
+    from core import candle_codec
+    from server.candles import candle_response
     
     conn_lab = db_sqlite.connect_lab()
     run = db_sqlite.get_run(conn_lab, run_id)
@@ -460,90 +468,73 @@ async def get_run_candles(run_id: str):
     
     symbol = symbols[0]
     db_path = db_sqlite.get_db_path(exchange, symbol, timeframe)
+    paged = before is not None or limit is not None
     
     if not os.path.exists(db_path):
-        now = int(time.time())
-        mock_candles = []
+        now = int(time.time()) // 300 * 300   # on the 5m grid, so pages line up between requests
+        rows = []
         for i in range(100):
             ts = (now - (100-i) * 300) * 1000
             price = 42000 + (i * 10) + (i % 10) * 5
-            mock_candles.append({
-                'time': int(ts / 1000),
-                'open': price,
-                'high': price + 50,
-                'low': price - 50,
-                'close': price + 10,
-                'volume': 100 + i
-            })
-        return {'symbol': symbol, 'timeframe': timeframe, 'candles': mock_candles}
-    
-    conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
-    table = db_sqlite.get_candles_table(timeframe)
-    
-    if since and until:
-        cur.execute(f"SELECT ts, open, high, low, close, volume FROM {table} WHERE ts >= ? AND ts < ? ORDER BY ts ASC", (since, until))
+            rows.append((ts, price, price + 50, price - 50, price + 10, 100 + i))
+        if paged:
+            rows = [r for r in rows if before is None or r[0] < before][-int(limit or 5000):]
     else:
-        cur.execute(f"SELECT ts, open, high, low, close, volume FROM {table} ORDER BY ts ASC LIMIT 5000")
+        conn = sqlite3.connect(db_path)
+        cur = conn.cursor()
+        table = db_sqlite.get_candles_table(timeframe)
+        
+        if paged:
+            where, params = [], []
+            if since and until:
+                where.append("ts >= ? AND ts < ?")
+                params += [since, until]
+            if before is not None:
+                where.append("ts < ?")
+                params.append(before)
+            clause = f"WHERE {' AND '.join(where)} " if where else ""
+            cur.execute(f"SELECT ts, open, high, low, close, volume FROM {table} {clause}ORDER BY ts DESC LIMIT ?", (*params, int(limit or 5000)))
+            rows = cur.fetchall()[::-1]
+        elif since and until:
+            cur.execute(f"SELECT ts, open, high, low, close, volume FROM {table} WHERE ts >= ? AND ts < ? ORDER BY ts ASC", (since, until))
+            rows = cur.fetchall()
+        else:
+            cur.execute(f"SELECT ts, open, high, low, close, volume FROM {table} ORDER BY ts ASC LIMIT 5000")
+            rows = cur.fetchall()
+        conn.close()
     
-    rows = cur.fetchall()
-    conn.close()
+    cursor = candle_codec.next_cursor(rows, int(limit or 5000)) if paged else None
+    if request is not None and candle_codec.wants_binary(request.headers.get('accept')):
+        return candle_response(rows, request.headers.get('accept-encoding'), cursor,
+                               {'X-Symbol': symbol, 'X-Timeframe': timeframe})
     
     candles = [{'time': int(r[0] / 1000), 'open': float(r[1]), 'high': float(r[2]), 'low': float(r[3]), 'close': float(r[4]), 'volume': float(r[5])} for r in rows]
-    return {'symbol': symbol, 'timeframe': timeframe, 'candles': candles}
+    response = {'symbol': symbol, 'timeframe': timeframe, 'candles': candles}
+    if paged:
+        response['next_cursor'] = cursor
+    return response
 
 
 @router.get("/run/{run_id}/equity")
-async def get_run_equity(run_id: str):
-    """Get equity curve data"""
-    import csv
-    import glob
-    from datetime import datetime
-    
-    pattern = os.path.join("artifacts", run_id, "*", "equity.csv")
-    equity_files = glob.glob(pattern)
-    
-    if not equity_files:
-        trades_pattern = os.path.join("artifacts", run_id, "*", "trades.csv")
-        trades_files = glob.glob(trades_pattern)
-        
-        if not trades_files:
-            raise HTTPException(404, "No equity or trades data found")
-        
-        trades = []
-        with open(trades_files[0], 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                trades.append({'exit_time': row['exit_time'], 'pnl': float(row['pnl'])})
-        
-        trades.sort(key=lambda x: datetime.fromisoformat(x['exit_time']))
-  
-        equity_data = []
-        cumulative = 0.0
-        max_equity = 0.0
-        
-        for trade in trades:
-            cumulative += trade['pnl']
-            max_equity = max(max_equity, cumulative)
-            drawdown = ((cumulative - max_equity) / max(abs(max_equity), 1)) * 100 if max_equity > 0 else 0
-            timestamp = int(datetime.fromisoformat(trade['exit_time']).timestamp())
-            equity_data.append({'time': timestamp, 'equity': cumulative, 'drawdown': drawdown})
-        
-        return {'equity': equity_data}
-    
-    equity_path = equity_files[0]
-    equity_data = []
+async def get_run_equity(run_id: str, width: Optional[int] = None):
+    """
+    Get equity curve data
+
+    `width` (chart width in pixels) returns an LTTB-downsampled curve of about
+    that many points that keeps the drawdown extremes (see lab.equity);
+    without it every point is returned.
+    """
+    from lab.equity import equity_cache, to_points
     
     try:
-        with open(equity_path, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                timestamp = int(datetime.fromisoformat(row['timestamp']).timestamp())
-                equity_data.append({'time': timestamp, 'equity': float(row['equity']), 'drawdown': float(row.get('drawdown', 0))})
-    except Exception as e:
+        series = equity_cache.get(run_id, width)
+    except (OSError, KeyError, ValueError) as e:
         raise HTTPException(500, f"Error reading equity: {str(e)}")
     
-    return {'equity': equity_data}
+    if series is None:
+        raise HTTPException(404, "No equity or trades data found")
+    
+    return {'equity': to_points(series)}
 
 
 @router.get("/run/{run_id}/artifacts/trades")
@@ -621,40 +612,32 @@ async def get_run_trades(run_id: str):
 
 @router.get("/runs", response_model=List[RunStatus])
 async def list_runs(limit: int = 100):
-    """List all runs with summary info"""
+    """List all runs with summary info (one query over runs + run_summaries)"""
     conn = db_sqlite.connect_lab()
-    runs = db_sqlite.get_all_runs(conn, limit)
+    try:
+        runs = db_sqlite.get_runs_with_summaries(conn, limit)
+    finally:
+        conn.close()
     
     results = []
     for run in runs:
-        try:
-            config = json.loads(run.get('config_json', '{}'))
-            starting_equity = config.get('risk', {}).get('starting_equity', 10000.0)
-        except:
-            starting_equity = 10000.0
- 
-        trials = db_sqlite.get_run_trials(conn, run['id'], limit=1)
-        best_score = trials[0]['score'] if trials else None
-        
-        final_equity = None
-        if run['status'] == 'completed' and trials:
-            try:
-                metrics = json.loads(trials[0]['metrics_json'])
-                total_profit_pct = metrics.get('total_profit', 0)
-                final_equity = starting_equity * (1 + total_profit_pct / 100)
-            except:
-                pass
-        
+        equity_stats = run.get('equity_stats') or {}
+        trade_stats = run.get('trade_stats') or {}
         results.append(RunStatus(
             run_id=run["id"], 
             status=run["status"], 
             progress=1.0 if run["status"] == "completed" else 0.0,
-            best_score=best_score,
+            best_score=run["best_score"],
             started_at=run.get("started_at"), 
-            completed_at=run.get("completed_at")
+            completed_at=run.get("completed_at"),
+            name=run.get("name"),
+            final_equity=equity_stats.get("final_equity") if equity_stats.get("source") == "equity" else None,
+            return_pct=equity_stats.get("return_pct"),
+            max_drawdown_pct=equity_stats.get("max_drawdown_pct"),
+            total_trades=trade_stats.get("trades"),
+            win_rate=trade_stats.get("win_rate")
         ))
     
-    conn.close()
     return results
 
 
@@ -689,73 +672,70 @@ async def download_artifacts(run_id: str):
 
 
 @router.post("/compare")
-async def compare_runs(run_ids: List[str]):
-    """Compare multiple runs - returns equity curves for overlay"""
-    import csv
-    import glob
-    from datetime import datetime
+async def compare_runs(run_ids: List[str], width: Optional[int] = 1000):
+    """
+    Compare multiple runs - returns equity curves for overlay
+
+    Completed runs are served from their stored summaries (lab.summary) in a
+    single query; at the default width the stored curve is used as is. Other
+    widths (0 = full resolution) and unfinished runs read the artifacts
+    through lab.equity.
+    """
+    from lab.equity import equity_cache, to_points
+    from lab.summary import SUMMARY_WIDTH, summarize_run
     
     if len(run_ids) > 10:
         raise HTTPException(400, "Maximum 10 runs can be compared at once")
     
+    stored_curve = width == SUMMARY_WIDTH
     comparison_data = []
+    conn_lab = db_sqlite.connect_lab()
     
-    for run_id in run_ids:
-        conn_lab = db_sqlite.connect_lab()
-        run = db_sqlite.get_run(conn_lab, run_id)
-        conn_lab.close()
-        
-        if not run:
-            continue
-        
-        pattern = os.path.join("artifacts", run_id, "*", "equity.csv")
-        equity_files = glob.glob(pattern)
-      
-        if not equity_files:
-            trades_pattern = os.path.join("artifacts", run_id, "*", "trades.csv")
-            trades_files = glob.glob(trades_pattern)
-         
-            if not trades_files:
-                continue
-  
-            trades = []
-            with open(trades_files[0], 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    trades.append({'exit_time': row['exit_time'], 'pnl': float(row['pnl'])})
-     
-            trades.sort(key=lambda x: datetime.fromisoformat(x['exit_time']))
-           
-            equity_data = []
-            cumulative = 0.0
-     
-            for trade in trades:
-                cumulative += trade['pnl']
-                timestamp = int(datetime.fromisoformat(trade['exit_time']).timestamp())
-                equity_data.append({'time': timestamp, 'equity': cumulative})
-        else:
-            equity_path = equity_files[0]
-            equity_data = []
- 
-            try:
-                with open(equity_path, 'r') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        timestamp = int(datetime.fromisoformat(row['timestamp']).timestamp())
-                        equity_data.append({'time': timestamp, 'equity': float(row['equity'])})
-            except Exception:
-                continue
-        
-        trials = db_sqlite.get_run_trials(conn_lab, run_id, limit=1)
-        final_metrics = trials[0]['metrics_json'] if trials else {}
+    try:
+        summaries = {row['id']: row for row in db_sqlite.get_run_summaries(conn_lab, run_ids, with_curve=stored_curve)}
+        missing = [run_id for run_id in run_ids if run_id not in summaries]
+        for run_id in missing:  # finished before summaries existed: store one now
+            run = db_sqlite.get_run(conn_lab, run_id)
+            if run and run['status'] == 'completed':
+                summarize_run(conn_lab, run_id)
+        if missing:
+            summaries.update({row['id']: row for row in db_sqlite.get_run_summaries(conn_lab, missing, with_curve=stored_curve)})
         
-        comparison_data.append({
-            'run_id': run_id,
-            'name': run['name'],
-            'equity': equity_data,
-            'metrics': final_metrics,
-            'status': run['status']
-        })
+        for run_id in run_ids:
+            summary = summaries.get(run_id)
+            if summary is not None:
+                name, status, metrics = summary['name'], summary['status'], summary['metrics']
+                curve = summary.get('equity_curve')
+            else:
+                run = db_sqlite.get_run(conn_lab, run_id)
+                if not run:
+                    continue
+                trials = db_sqlite.get_run_trials(conn_lab, run_id, limit=1)
+                name, status, curve = run['name'], run['status'], None
+                metrics = json.loads(trials[0]['metrics_json']) if trials and trials[0]['metrics_json'] else {}
+            
+            if stored_curve and curve is not None:
+                equity = [{'time': t, 'equity': e} for t, e in zip(curve['time'], curve['equity'])]
+            else:
+                try:
+                    series = equity_cache.get(run_id, width or None)
+                except (OSError, KeyError, ValueError):
+                    continue
+                if series is None:
+                    continue
+                equity = to_points(series, drawdown=False)
+            
+            comparison_data.append({
+                'run_id': run_id,
+                'name': name,
+                'equity': equity,
+                'metrics': metrics,
+                'status': status,
+                'equity_stats': summary['equity_stats'] if summary else None,
+                'trade_stats': summary['trade_stats'] if summary else None
+            })
+    finally:
+        conn_lab.close()
     
     return {'runs': comparison_data}
 
@@ -11,7 +11,6 @@ import json
 import time
 from datetime import datetime
 
-from orchestrator.strategy_discovery import StrategyOrchestrator
 from core import database as db_sqlite
 
 
@@ -225,7 +224,8 @@ async def run_discovery_task(run_id: str, request: DiscoveryRequest):
         # Update status
         active_discoveries[run_id]['status'] = 'running'
         
-        # Create orchestrator
+        # Create orchestrator (imported here: it loads optuna and every strategy module)
+        from orchestrator.strategy_discovery import StrategyOrchestrator
         orchestrator = StrategyOrchestrator(
             symbols=request.symbols,
             exchange=request.exchange,
@@ -4,6 +4,7 @@ Server Module - Web Interface & API
 FastAPI server for web interface:
 - main.py: Main FastAPI application
 - api_bots.py: Bot management endpoints
+- candles.py: Binary candle responses (core.candle_codec over HTTP)
 """
 
 __all__ = []
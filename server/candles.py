@@ -0,0 +1,25 @@
+"""
+Binary candle responses
+
+HTTP wrapper around core.candle_codec for the candle endpoints
+(/api/candles and /api/lab/run/{id}/candles).
+"""
+
+from typing import Dict, Optional, Sequence
+
+from fastapi import Response
+
+from core.candle_codec import MEDIA_TYPE, compress, encode_candles, pick_encoding
+
+
+def candle_response(rows: Sequence[Sequence[float]], accept_encoding: Optional[str] = None,
+                    cursor: Optional[int] = None, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Binary (optionally compressed) Response for ascending candle rows"""
+    encoding = pick_encoding(accept_encoding)
+    out_headers = {"Vary": "Accept, Accept-Encoding", "X-Candle-Count": str(len(rows))}
+    out_headers.update(headers or {})
+    if cursor is not None:
+        out_headers["X-Next-Cursor"] = str(cursor)
+    if encoding:
+        out_headers["Content-Encoding"] = encoding
+    return Response(content=compress(encode_candles(rows), encoding), media_type=MEDIA_TYPE, headers=out_headers)
@@ -17,9 +17,10 @@ from backend.agents.service import agent_service
 # ... resto dos imports
 from typing import Dict, Any, Optional
 from backend.agents.service import agent_service
+from core.app_config import app_config, invalidate as invalidate_config
 
 import websockets
-from fastapi import FastAPI, HTTPException, Body, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Body, Request, WebSocket, WebSocketDisconnect
 from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 
@@ -211,17 +212,15 @@ async def get_agent_candles(symbol: str = None, limit: int = 200, timeframe: str
             timeframe = agent_service.config.timeframe
     else:
         # Fallback to config.yaml
-        import yaml
-        cfg = yaml.safe_load(open("config.yaml", "r", encoding="utf-8"))
+        cfg = app_config()
         symbol = symbol or cfg.get("symbol", "BTC/USDT:USDT")
         timeframe = timeframe or cfg.get("timeframe", "5m")
     
     # Read candles from database
     try:
         import sqlite3
-        import yaml
         
-        cfg = yaml.safe_load(open("config.yaml", "r", encoding="utf-8"))
+        cfg = app_config()
         db_path = cfg.get("db", {}).get("path")
         
         if not db_path or not os.path.exists(db_path):
@@ -322,6 +321,7 @@ def api_config_write(cfg: Dict[str, Any] = Body(...)
 ):
     p = safe_path("config.yaml")
     yaml.safe_dump(cfg, open(p, "w", encoding="utf-8"), sort_keys=False)
+    invalidate_config()
     return {"ok": True}
 
 
@@ -354,6 +354,7 @@ def api_cfg_rollback(path: str):
         raise HTTPException(404, "snapshot nÃ£o encontrado")
     import shutil
     shutil.copyfile(p, "config.yaml")
+    invalidate_config()
     return {"ok": True, "restored": path}
 
 
@@ -439,6 +440,7 @@ def api_grid_apply_best(base_path: str, metric: str = "sharpe_ann", ascending: i
             changed.append(k)
     cfg["risk"] = risk
     yaml.safe_dump(cfg, open("config.yaml", "w", encoding="utf-8"), sort_keys=False)
+    invalidate_config()
     return {"ok": True, "applied_keys": changed, "metric": metric, "value": best.get(metric)}
 
 
@@ -486,6 +488,7 @@ def api_grid_apply_objective(base_path: str, days: int = 365,
             changed.append(k)
     cfg["risk"] = risk
     yaml.safe_dump(cfg, open("config.yaml", "w", encoding="utf-8"), sort_keys=False)
+    invalidate_config()
     return {"ok": True, "applied_keys": changed, "objective": best.get("objective"), "row": best}
 
 
@@ -516,6 +519,7 @@ def api_set_symbol_db(symbol: str, db_path: str):
     cfg["symbol"] = symbol
     cfg["db"] = {"path": db_path}
     yaml.safe_dump(cfg, open("config.yaml", "w", encoding="utf-8"), sort_keys=False)
+    invalidate_config()
     return {"ok": True, "symbol": symbol, "db_path": db_path}
 
 
@@ -567,6 +571,7 @@ def api_profile_apply(path: str):
         if k in data.get("config", {}):
             cfg[k] = data["config"][k]
     yaml.safe_dump(cfg, open("config.yaml", "w", encoding="utf-8"), sort_keys=False)
+    invalidate_config()
     return {"ok": True, "applied": ["symbol", "db", "fees", "sizing", "risk", "ml"]}
 
 
@@ -816,9 +821,18 @@ async def get_paper_status():
 
 # === OHLCV do DB para o grÃ¡fico (candles) ===
 @app.get("/api/candles")
-def api_candles(limit: int = 500, timeframe: str = "5m"):
+def api_candles(limit: int = 500, timeframe: str = "5m", before: Optional[int] = None, request: Request = None):
+    """
+    Latest `limit` candles (older than `before` when given), ascending
+
+    JSON by default; `Accept: application/vnd.smarttrade.candles` returns the
+    binary columnar encoding (see core.candle_codec). `next_cursor` is the
+    `before` of the previous page.
+    """
     import sqlite3
-    cfg = yaml.safe_load(open("config.yaml", "r", encoding="utf-8"))
+    from core import candle_codec
+    from server.candles import candle_response
+    cfg = app_config()
     dbp = cfg.get("db", {}).get("path")
     if not dbp:
         raise HTTPException(400, "db.path nÃ£o definido no config.yaml")
@@ -827,13 +841,20 @@ def api_candles(limit: int = 500, timeframe: str = "5m"):
 
     conn = sqlite3.connect(dbp)
     cur = conn.cursor()
-    cur.execute("SELECT ts, open, high, low, close, volume FROM candles ORDER BY ts DESC LIMIT ?", (int(limit),))
+    if before is not None:
+        cur.execute("SELECT ts, open, high, low, close, volume FROM candles WHERE ts < ? ORDER BY ts DESC LIMIT ?", (int(before), int(limit)))
+    else:
+        cur.execute("SELECT ts, open, high, low, close, volume FROM candles ORDER BY ts DESC LIMIT ?", (int(limit),))
     rows = cur.fetchall()
     conn.close()
 
     rows = rows[::-1]
+    cursor = candle_codec.next_cursor(rows, int(limit))
+    if request is not None and candle_codec.wants_binary(request.headers.get("accept")):
+        return candle_response(rows, request.headers.get("accept-encoding"), cursor,
+                               {"X-Symbol": str(cfg.get("symbol")), "X-Timeframe": timeframe})
     candles = [{"ts": r[0], "o": float(r[1]), "h": float(r[2]), "l": float(r[3]), "c": float(r[4]), "v": float(r[5])} for r in rows]
-    return {"symbol": cfg.get("symbol"), "timeframe": timeframe, "candles": candles}
+    return {"symbol": cfg.get("symbol"), "timeframe": timeframe, "candles": candles, "next_cursor": cursor}
 
 
 # ============================= WS de preÃ§o ==============================
@@ -894,7 +915,7 @@ async def ws_price(ws: WebSocket):
 
 @app.post("/api/ws/start")
 def api_ws_start():
-    cfg = yaml.safe_load(open("config.yaml", "r", encoding="utf-8"))
+    cfg = app_config()
     sym = cfg.get("symbol", "BTC/USDT:USDT")
     price_streamer.start(sym)
     return {"ok": True, "symbol": sym}
@@ -26,6 +26,7 @@ from .registry import (
 from .core import compute_exit_levels
 from .regime import build_regime_exit_plan
 from .adapter import (
+    IndicatorView,
     build_indicator_dict,
     build_bar_dict,
 build_state_dict,
@@ -41,6 +42,7 @@ __all__ = [
 'STRATEGY_PRESETS',
     'compute_exit_levels',
     'build_regime_exit_plan',
+    'IndicatorView',
     'build_indicator_dict',
     'build_bar_dict',
     'build_state_dict',
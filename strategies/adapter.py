@@ -16,11 +16,20 @@ The 38 strategies expect indicators in a specific format:
     }
 
 This adapter takes the output from features.py and transforms it.
+
+Backtest loops should use IndicatorView: the keys are computed on access
+from the feature columns, with one instance advanced bar by bar.
+build_indicator_dict() is an eager snapshot of the same view.
 """
 
-from typing import Dict, Any, List
+from collections.abc import Mapping
+from typing import Dict, Any, Callable, List
 import numpy as np
 
+from core.sessions import SESSIONS
+
+SESSION_NAMES = tuple(SESSIONS)
+
 
 def build_indicator_dict(i: int, ts: List, o: List, h: List, l: List, c: List, feats: Dict) -> Dict[str, Any]:
     """
@@ -37,189 +46,201 @@ def build_indicator_dict(i: int, ts: List, o: List, h: List, l: List, c: List, f
         
     Returns:
         Dictionary with all indicators in the format expected by strategies
+        (an eager IndicatorView snapshot; _FIELDS defines every key)
     """
-    
-    # Helper to safely get value from array
-    def get_val(arr, idx, default=None):
-        try:
-            if arr is None or idx < 0 or idx >= len(arr):
-                return default
-            val = arr[idx]
-            return val if val is not None and not (isinstance(val, float) and np.isnan(val)) else default
-        except (IndexError, TypeError):
+    return IndicatorView(ts, o, h, l, c, feats, i).to_dict()
+
+
+def _get_val(arr, idx, default=None):
+    """Value at idx, or default when missing, out of range, None or NaN"""
+    try:
+        if arr is None or idx < 0 or idx >= len(arr):
             return default
+        val = arr[idx]
+        return val if val is not None and not (isinstance(val, float) and val != val) else default
+    except (IndexError, TypeError):
+        return default
+
+
+def _ts_field(v: "IndicatorView", unit_ms: int, modulo: int, shift: int):
+    """Hour/weekday straight from the bar timestamp when no session columns are present"""
+    t = v.p(v.ts, 0)
+    return None if t is None else (t // unit_ms + shift) % modulo
+
+
+def _bb_bw_pct(v: "IndicatorView"):
+    bb_middle = v['bb_middle']
+    return ((v['bb_upper'] - v['bb_lower']) / bb_middle * 100) if bb_middle > 0 else 100
+
+
+# Key -> value at the view's bar; the single definition of every indicator key.
+# v.f(name, back, default) reads feats[name][i - back]; v.p(arr, back, default) reads a price array.
+_FIELDS: Dict[str, Callable[["IndicatorView"], Any]] = {
+    # Price data
+    'close': lambda v: v.p(v.c, 0, 0),
+    'open': lambda v: v.p(v.o, 0, 0),
+    'high': lambda v: v.p(v.h, 0, 0),
+    'low': lambda v: v.p(v.l, 0, 0),
+    'close_prev': lambda v: v.p(v.c, 1, v['close']),
+    'open_prev': lambda v: v.p(v.o, 1, v['open']),
+    'high_prev': lambda v: v.p(v.h, 1, v['high']),
+    'low_prev': lambda v: v.p(v.l, 1, v['low']),
+    'prev_high': lambda v: v.p(v.h, 1, v['high']),
+    'prev_low': lambda v: v.p(v.l, 1, v['low']),
+    
+    # Trend
+    'ema20': lambda v: v.f('ema20', 0, v['close']),
+    'ema50': lambda v: v.f('ema50', 0, v['close']),
+    'ema200': lambda v: v.f('ema200', 0, v['close']),
+    'ema20_prev': lambda v: v.f('ema20', 1, v['ema20']),
+    'ema50_prev': lambda v: v.f('ema50', 1, v['ema50']),
+    'sma20': lambda v: v.f('sma20', 0, v['close']),
+    'sma50': lambda v: v.f('sma50', 0, v['close']),
+    'sma200': lambda v: v.f('sma200', 0, v['close']),
+    'supertrend': lambda v: v.f('supertrend', 0, v['close']),
+    'supertrend_bull': lambda v: v.f('supertrend_dir', 0, 1) == 1,
+    'supertrend_bear': lambda v: v.f('supertrend_dir', 0, 1) == -1,
+    'supertrend_bull_prev': lambda v: v.f('supertrend_dir', 1, v.f('supertrend_dir', 0, 1)) == 1,
+    'supertrend_bear_prev': lambda v: v.f('supertrend_dir', 1, v.f('supertrend_dir', 0, 1)) == -1,
+    
+    # Momentum
+    'rsi14': lambda v: v.f('rsi14', 0, 50),
+    'rsi5': lambda v: v.f('rsi5', 0, 50),
+    'rsi7': lambda v: v.f('rsi7', 0, 50),
+    'rsi_14': lambda v: v['rsi14'],
+    'rsi14_prev': lambda v: v.f('rsi14', 1, v['rsi14']),
+    'stoch_k': lambda v: v.f('stoch_k', 0, 50),
+    'stoch_d': lambda v: v.f('stoch_d', 0, 50),
+    'stoch_k_prev': lambda v: v.f('stoch_k', 1, v['stoch_k']),
+    'stoch_d_prev': lambda v: v.f('stoch_d', 1, v['stoch_d']),
+    'macd': lambda v: v.f('macd', 0, 0),
+    'macd_signal': lambda v: v.f('macd_signal', 0, 0),
+    'macd_hist': lambda v: v.f('macd_hist', 0, 0),
+    'cci': lambda v: v.f('cci20', 0, 0),
+    'cci_prev': lambda v: v.f('cci20', 1, v['cci']),
+    'williams_r': lambda v: v.f('williams_r', 0, -50),
+    'adx14': lambda v: v.f('adx14', 0, 0),
+    'adx14_prev': lambda v: v.f('adx14', 1, v['adx14']),
+    'adx14_5bars_ago': lambda v: v.f('adx14', 5, v['adx14']),
+    
+    # Volatility
+    'atr': lambda v: v.f('atr14', 0, v['close'] * 0.01),
+    'atr14': lambda v: v['atr'],
+    'atr_norm_pct': lambda v: v.f('atr1h_pct', 0, 50),
+    'bb_upper': lambda v: v.f('bb_up', 0, v['close'] * 1.02),
+    'bb_middle': lambda v: v.f('bb_mid', 0, v['close']),
+    'bb_lower': lambda v: v.f('bb_lo', 0, v['close'] * 0.98),
+    'bb_bw_pct': _bb_bw_pct,
+    'bb_bw_pct_prev': lambda v: v.f('bb_bw_pct', 1, v['bb_bw_pct']),
+    'keltner_upper': lambda v: v.f('keltner_up', 0, v['close'] * 1.02),
+    'keltner_mid': lambda v: v.f('keltner_mid', 0, v['close']),
+    'keltner_lower': lambda v: v.f('keltner_lo', 0, v['close'] * 0.98),
+    'boll_in_keltner': lambda v: v['bb_upper'] < v['keltner_upper'] and v['bb_lower'] > v['keltner_lower'],
+    'donchian_high20': lambda v: v.f('up55', 0, v['high']),
+    'donchian_low20': lambda v: v.f('dn55', 0, v['low']),
+    'donchian_middle': lambda v: (v['donchian_high20'] + v['donchian_low20']) / 2,
+    'donchian_high10': lambda v: v.f('donchian_high10', 0, v['donchian_high20']),
+    'donchian_low10': lambda v: v.f('donchian_low10', 0, v['donchian_low20']),
+    
+    # Volume
+    'vwap': lambda v: v.f('vwap', 0, v['close']),
+    'vwap_std': lambda v: v['atr'] * 0.5,
+    'obv': lambda v: v.f('obv', 0, 0),
+    'obv_prev': lambda v: v.f('obv', 1, v['obv']),
+    'obv_5bars_ago': lambda v: v.f('obv', 5, v['obv']),
+    'mfi': lambda v: v.f('mfi14', 0, 50),
+    'mfi_prev': lambda v: v.f('mfi14', 1, v['mfi']),
+    'mfi_5bars_ago': lambda v: v.f('mfi14', 5, v['mfi']),
+    
+    # Regime / session
+    'regime': lambda v: v.f('regime', 0, 'NEUTRAL'),
+    'hour_utc': lambda v: v.f('hour_utc', 0, _ts_field(v, 3_600_000, 24, 0)),
+    'day_of_week': lambda v: v.f('day_of_week', 0, _ts_field(v, 86_400_000, 7, 3)),
+}
+
+for _s in SESSION_NAMES:
+    _FIELDS.update({
+        f'is_{_s}_session': lambda v, k=f'is_{_s}_session': v.f(k, 0, False),
+        f'minutes_since_{_s}_open': lambda v, k=f'minutes_since_{_s}_open': v.f(k, 0, 999),
+        f'{_s}_high': lambda v, k=f'{_s}_high': v.f(k, 0, v['high']),
+        f'{_s}_low': lambda v, k=f'{_s}_low': v.f(k, 0, v['low']),
+        f'{_s}_vwap': lambda v, k=f'{_s}_vwap': v.f(k, 0, v['close']),
+    })
+
+_FIELDS.update({
+    'or_high': lambda v: v.f('london_or_high', 0, v['high']),
+    'or_low': lambda v: v.f('london_or_low', 0, v['low']),
+})
+
+
+class IndicatorView(Mapping):
+    """
+    Lazy, read-only indicator mapping over precomputed feature columns
     
-    # Helper to safely get previous value
-    def get_prev(arr, idx, default=None):
-        return get_val(arr, idx - 1, default) if idx > 0 else default
-    
-    # Helper to get value N bars ago
-    def get_ago(arr, idx, n, default=None):
-        return get_val(arr, idx - n, default) if idx >= n else default
-    
-    ind = {}
-    
-    # ========================================================================
-    # PRICE DATA
-    # ========================================================================
-    ind['close'] = get_val(c, i, 0)
-    ind['open'] = get_val(o, i, 0)
-    ind['high'] = get_val(h, i, 0)
-    ind['low'] = get_val(l, i, 0)
-    
-    # Previous values
-    ind['close_prev'] = get_prev(c, i, ind['close'])
-    ind['open_prev'] = get_prev(o, i, ind['open'])
-    ind['high_prev'] = get_prev(h, i, ind['high'])
-    ind['low_prev'] = get_prev(l, i, ind['low'])
-    
-    # Previous high/low (for breakout detection)
-    ind['prev_high'] = get_prev(h, i, ind['high'])
-    ind['prev_low'] = get_prev(l, i, ind['low'])
-    
-    # ========================================================================
-    # TREND INDICATORS
-    # ========================================================================
-    
-    # EMAs
-    ind['ema20'] = get_val(feats.get('ema20'), i, ind['close'])
-    ind['ema50'] = get_val(feats.get('ema50'), i, ind['close'])
-    ind['ema200'] = get_val(feats.get('ema200'), i, ind['close'])
-    
-    ind['ema20_prev'] = get_prev(feats.get('ema20'), i, ind['ema20'])
-    ind['ema50_prev'] = get_prev(feats.get('ema50'), i, ind['ema50'])
-    
-    # SMAs (if available)
-    ind['sma20'] = get_val(feats.get('sma20'), i, ind['close'])
-    ind['sma50'] = get_val(feats.get('sma50'), i, ind['close'])
-    ind['sma200'] = get_val(feats.get('sma200'), i, ind['close'])
-    
-    # SuperTrend
-    st_line = get_val(feats.get('supertrend'), i, ind['close'])
-    st_dir = get_val(feats.get('supertrend_dir'), i, 1)
-    
-    ind['supertrend'] = st_line
-    ind['supertrend_bull'] = st_dir == 1
-    ind['supertrend_bear'] = st_dir == -1
-    
-    # Previous SuperTrend
-    st_dir_prev = get_prev(feats.get('supertrend_dir'), i, st_dir)
-    ind['supertrend_bull_prev'] = st_dir_prev == 1
-    ind['supertrend_bear_prev'] = st_dir_prev == -1
-    
-    # ========================================================================
-    # MOMENTUM INDICATORS
-    # ========================================================================
-    
-    # RSI
-    ind['rsi14'] = get_val(feats.get('rsi14'), i, 50)
-    ind['rsi5'] = get_val(feats.get('rsi5'), i, 50)
-    ind['rsi7'] = get_val(feats.get('rsi7'), i, 50)
-    ind['rsi_14'] = ind['rsi14']  # Alias
-    
-    ind['rsi14_prev'] = get_prev(feats.get('rsi14'), i, ind['rsi14'])
-    
-    # Stochastic
-    ind['stoch_k'] = get_val(feats.get('stoch_k'), i, 50)
-    ind['stoch_d'] = get_val(feats.get('stoch_d'), i, 50)
-    
-    ind['stoch_k_prev'] = get_prev(feats.get('stoch_k'), i, ind['stoch_k'])
-    ind['stoch_d_prev'] = get_prev(feats.get('stoch_d'), i, ind['stoch_d'])
-    
-    # MACD
-    ind['macd'] = get_val(feats.get('macd'), i, 0)
-    ind['macd_signal'] = get_val(feats.get('macd_signal'), i, 0)
-    ind['macd_hist'] = get_val(feats.get('macd_hist'), i, 0)
-    
-    # CCI
-    ind['cci'] = get_val(feats.get('cci20'), i, 0)
-    ind['cci_prev'] = get_prev(feats.get('cci20'), i, ind['cci'])
-    
-    # Williams %R
-    ind['williams_r'] = get_val(feats.get('williams_r'), i, -50)
-    
-    # ADX
-    ind['adx14'] = get_val(feats.get('adx14'), i, 0)
-    ind['adx14_prev'] = get_prev(feats.get('adx14'), i, ind['adx14'])
-    ind['adx14_5bars_ago'] = get_ago(feats.get('adx14'), i, 5, ind['adx14'])
-    
-    # ========================================================================
-    # VOLATILITY INDICATORS
-    # ========================================================================
-    
-    # ATR
-    ind['atr'] = get_val(feats.get('atr14'), i, ind['close'] * 0.01)
-    ind['atr14'] = ind['atr']  # Alias
-    
-    # ATR percentile (if available)
-    ind['atr_norm_pct'] = get_val(feats.get('atr1h_pct'), i, 50)
-    
-    # Bollinger Bands
-    ind['bb_upper'] = get_val(feats.get('bb_up'), i, ind['close'] * 1.02)
-    ind['bb_middle'] = get_val(feats.get('bb_mid'), i, ind['close'])
-    ind['bb_lower'] = get_val(feats.get('bb_lo'), i, ind['close'] * 0.98)
-    
-    # BB bandwidth percentage
-    bb_width = ind['bb_upper'] - ind['bb_lower']
-    ind['bb_bw_pct'] = (bb_width / ind['bb_middle'] * 100) if ind['bb_middle'] > 0 else 100
-    ind['bb_bw_pct_prev'] = get_prev(feats.get('bb_bw_pct'), i, ind['bb_bw_pct']) if 'bb_bw_pct' in feats else ind['bb_bw_pct']
-    
-    # Keltner Channels
-    ind['keltner_upper'] = get_val(feats.get('keltner_up'), i, ind['close'] * 1.02)
-    ind['keltner_mid'] = get_val(feats.get('keltner_mid'), i, ind['close'])
-    ind['keltner_lower'] = get_val(feats.get('keltner_lo'), i, ind['close'] * 0.98)
-    
-    # BB inside Keltner (squeeze detection)
-    ind['boll_in_keltner'] = (
-        ind['bb_upper'] < ind['keltner_upper'] and
-        ind['bb_lower'] > ind['keltner_lower']
-    )
-    
-    # Donchian Channels
-    ind['donchian_high20'] = get_val(feats.get('up55'), i, ind['high'])  # Using dn55/up55 as Donchian
-    ind['donchian_low20'] = get_val(feats.get('dn55'), i, ind['low'])
-    ind['donchian_middle'] = (ind['donchian_high20'] + ind['donchian_low20']) / 2
-    
-    # Donchian 10-period (if available)
-    ind['donchian_high10'] = get_val(feats.get('donchian_high10'), i, ind['donchian_high20'])
-    ind['donchian_low10'] = get_val(feats.get('donchian_low10'), i, ind['donchian_low20'])
-    
-    # ========================================================================
-    # VOLUME INDICATORS
-    # ========================================================================
-    
-    # VWAP
-    ind['vwap'] = get_val(feats.get('vwap'), i, ind['close'])
-    
-    # VWAP standard deviation (estimated)
-    ind['vwap_std'] = ind['atr'] * 0.5  # Rough estimate if not available
-    
-    # OBV
-    ind['obv'] = get_val(feats.get('obv'), i, 0)
-    ind['obv_prev'] = get_prev(feats.get('obv'), i, ind['obv'])
-    ind['obv_5bars_ago'] = get_ago(feats.get('obv'), i, 5, ind['obv'])
-    
-    # MFI
-    ind['mfi'] = get_val(feats.get('mfi14'), i, 50)
-    ind['mfi_prev'] = get_prev(feats.get('mfi14'), i, ind['mfi'])
-    ind['mfi_5bars_ago'] = get_ago(feats.get('mfi14'), i, 5, ind['mfi'])
-    
-    # ========================================================================
-    # REGIME / SESSION (placeholders - needs implementation)
-    # ========================================================================
-    
-    ind['regime'] = get_val(feats.get('regime'), i, 'NEUTRAL')
+    Holds references to the OHLC arrays and feats; view[name] computes the
+    value for the current bar on first access and caches it until the view
+    moves. One instance serves a whole backtest:
     
-    # Session detection (placeholder - needs proper implementation)
-    ind['is_london_session'] = False  # TODO: Implement based on timestamp
-    ind['is_ny_session'] = False
-    ind['minutes_since_ny_open'] = 999
+        ind = IndicatorView(ts, o, h, l, c, feats)
+        for i in range(len(ts)):
+            signal = strategy_fn(bar, ind.at(i), state, params)
     
-    # Opening range (placeholder)
-    ind['or_high'] = ind['high']
-    ind['or_low'] = ind['low']
+    Strategies that keep values across bars must copy them (to_dict()).
+    """
     
-    return ind
+    __slots__ = ('ts', 'o', 'h', 'l', 'c', 'feats', 'i', '_cache')
+    
+    def __init__(self, ts: List, o: List, h: List, l: List, c: List, feats: Dict, i: int = 0):
+        self.ts = ts
+        self.o = o
+        self.h = h
+        self.l = l
+        self.c = c
+        self.feats = feats
+        self.i = i
+        self._cache: Dict[str, Any] = {}
+    
+    def at(self, i: int) -> "IndicatorView":
+        """Move to bar i (drops the values cached for the previous bar)"""
+        self.i = i
+        self._cache.clear()
+        return self
+    
+    def f(self, name: str, back: int = 0, default=None):
+        """feats[name] value `back` bars before the current one"""
+        return _get_val(self.feats.get(name), self.i - back, default)
+    
+    def p(self, arr, back: int = 0, default=None):
+        """Price array value `back` bars before the current one"""
+        return _get_val(arr, self.i - back, default)
+    
+    def __getitem__(self, key: str):
+        cache = self._cache
+        if key in cache:
+            return cache[key]
+        value = cache[key] = _FIELDS[key](self)
+        return value
+    
+    def get(self, key: str, default=None):
+        if key in _FIELDS:
+            return self[key]
+        return default
+    
+    def __contains__(self, key) -> bool:
+        return key in _FIELDS
+    
+    def __iter__(self):
+        return iter(_FIELDS)
+    
+    def __len__(self) -> int:
+        return len(_FIELDS)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Eager snapshot of the current bar (what build_indicator_dict returns)"""
+        return {key: self[key] for key in _FIELDS}
+    
+    def __repr__(self) -> str:
+        return f"IndicatorView(i={self.i}, keys={len(_FIELDS)})"
 
 
 def build_bar_dict(i: int, o: List, h: List, l: List, c: List, v: List = None) -> Dict[str, float]:
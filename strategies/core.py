@@ -1,5 +1,7 @@
 import os
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
 
 
 def compute_exit_levels(side, price, atr5, params, regime_hint=None):
@@ -216,11 +218,300 @@ def evaluate_entry_logic(entry_all: Optional[List[Dict[str, Any]]], entry_any: O
     return True
 
 
-def should_enter(i, ts, o, h, l, c, feats, params, allow_shorts=True):
+# ------------------------
+# Condition plans (parse once, evaluate many bars)
+# ------------------------
+
+_PRICE_FIELDS = {'close': 'c', 'c': 'c', 'price': 'c', 'open': 'o', 'o': 'o', 'high': 'h', 'low': 'l'}
+_CMP_OPS = ('>', '<', '>=', '<=', '==', '!=')
+
+
+def _resolve_series(name, o, h, l, c, feats):
+    """The list _get_series_value() would read for `name` (None if it reads nothing)"""
+    if not name:
+        return None
+    n = str(name).lower()
+    if n in _PRICE_FIELDS:
+        return {'c': c, 'o': o, 'h': h, 'l': l}[_PRICE_FIELDS[n]]
+    if isinstance(feats, dict):
+        if name in feats:
+            return feats[name]
+        for k in feats.keys():
+            if k.lower() == n:
+                return feats[k]
+    return None
+
+
+def _at(series, i):
+    """series[i] the way _get_series_value() reads features (errors -> None)"""
+    try:
+        return series[i]
+    except Exception:
+        return None
+
+
+class ConditionPlan:
+    """
+    One condition dict parsed into an operator code, column refs and constants
+
+    Behaves exactly like evaluate_condition(); bind() resolves the column
+    refs against a dataset.
+    """
+
+    __slots__ = ('op', 'lhs', 'rhs', 'rhs_ind', 'between')
+
+    def __init__(self, cond: Dict[str, Any]):
+        self.op = _normalize_op(cond.get('op') or cond.get('operator') or '')
+        self.lhs = cond.get('indicator') or cond.get('lhs') or cond.get('field')
+
+        self.rhs = None
+        if 'rhs' in cond and cond.get('rhs') is not None:
+            try:
+                self.rhs = float(cond.get('rhs'))
+            except Exception:
+                self.rhs = None
+        self.rhs_ind = cond.get('rhs_indicator') or cond.get('rhs_field')
+
+        self.between = None
+        r = cond.get('rhs')
+        if self.op == 'between' and isinstance(r, (list, tuple)) and len(r) >= 2:
+            try:
+                self.between = (float(r[0]), float(r[1]))
+            except Exception:
+                self.between = None
+
+    def bind(self, o, h, l, c, feats) -> "BoundCondition":
+        return BoundCondition(self, o, h, l, c, feats)
+
+
+def _column(series, n: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """(float values, missing mask) for a lookup series; None if it is not numeric"""
+    if series is None:
+        return np.full(n, np.nan), np.ones(n, dtype=bool)
+    m = min(len(series), n)
+    if isinstance(series, np.ndarray) and series.dtype.kind in 'fiub':
+        missing = np.zeros(n, dtype=bool)
+        values = np.asarray(series[:m], dtype=float)
+    else:
+        head = series[:m]
+        missing = np.zeros(n, dtype=bool)
+        missing[:m] = np.fromiter((v is None for v in head), dtype=bool, count=m)
+        try:
+            values = np.array([np.nan if v is None else v for v in head])
+        except (TypeError, ValueError):
+            return None
+        # strings, objects and nested sequences keep Python comparison semantics
+        if values.ndim != 1 or values.dtype.kind not in 'fiub':
+            return None
+        values = values.astype(float)
+    if m < n:
+        values = np.concatenate([values, np.full(n - m, np.nan)])
+        missing[m:] = True
+    return values, missing
+
+
+class BoundCondition:
+    """A ConditionPlan resolved against one dataset (whole-series or per-bar)"""
+
+    __slots__ = ('plan', 'lhs', 'rhs', 'n', 'at')
+
+    def __init__(self, plan: ConditionPlan, o, h, l, c, feats):
+        self.plan = plan
+        self.n = len(c)
+        self.lhs = _resolve_series(plan.lhs, o, h, l, c, feats)
+        self.rhs = _resolve_series(plan.rhs_ind, o, h, l, c, feats) if plan.rhs_ind else None
+        self.at = self._dispatch()
+
+    def _dispatch(self) -> Callable[[int], bool]:
+        """Per-bar evaluator for this operator, chosen once"""
+        plan, lhs_s, rhs_s = self.plan, self.lhs, self.rhs
+        op = plan.op
+        if lhs_s is None or op not in _CMP_OPS + ('between', 'crosses_above', 'crosses_below'):
+            return lambda i: False
+
+        if plan.rhs_ind:
+            def rhs_at(i):
+                return _at(rhs_s, i) if rhs_s is not None else None
+        else:
+            const = plan.rhs
+
+            def rhs_at(i):
+                return const
+
+        if op == 'between':
+            bounds = plan.between
+
+            def at(i):
+                lhs = _at(lhs_s, i)
+                if lhs is None or bounds is None:
+                    return False
+                try:
+                    return (lhs >= bounds[0]) and (lhs <= bounds[1])
+                except Exception:
+                    return False
+            return at
+
+        if op in ('crosses_above', 'crosses_below'):
+            above = op == 'crosses_above'
+
+            def at(i):
+                lhs = _at(lhs_s, i)
+                if lhs is None or i <= 0:
+                    return False
+                lhs_prev = _at(lhs_s, i - 1)
+                rhs = rhs_at(i)
+                rhs_prev = rhs_at(i - 1) if plan.rhs_ind else rhs
+                if lhs_prev is None or rhs is None or rhs_prev is None:
+                    return False
+                try:
+                    if above:
+                        return (lhs_prev <= rhs_prev) and (lhs > rhs)
+                    return (lhs_prev >= rhs_prev) and (lhs < rhs)
+                except Exception:
+                    return False
+            return at
+
+        cmp = _SCALAR_CMP[op]
+
+        def at(i):
+            lhs = _at(lhs_s, i)
+            if lhs is None:
+                return False
+            rhs = rhs_at(i)
+            if rhs is None and op not in ('==', '!='):
+                return False
+            try:
+                return cmp(lhs, rhs)
+            except Exception:
+                return False
+        return at
+
+    def series(self) -> np.ndarray:
+        """Boolean mask over every bar (falls back to per-bar for non-numeric columns)"""
+        plan, n = self.plan, self.n
+        op = plan.op
+        lhs_col = _column(self.lhs, n) if self.lhs is not None else None
+        if self.lhs is None or op not in _CMP_OPS + ('between', 'crosses_above', 'crosses_below'):
+            return np.zeros(n, dtype=bool)
+        if plan.rhs_ind:
+            rhs_col = _column(self.rhs, n)
+        else:
+            rhs_col = (np.full(n, np.nan if plan.rhs is None else plan.rhs),
+                       np.full(n, plan.rhs is None))
+        if lhs_col is None or rhs_col is None:
+            return np.fromiter((bool(self.at(i)) for i in range(n)), dtype=bool, count=n)
+
+        lhs, lhs_missing = lhs_col
+        rhs, rhs_missing = rhs_col
+        present = ~lhs_missing
+        with np.errstate(invalid='ignore'):
+            if op == 'between':
+                if plan.between is None:
+                    return np.zeros(n, dtype=bool)
+                return present & (lhs >= plan.between[0]) & (lhs <= plan.between[1])
+            if op == '==':
+                return present & ~rhs_missing & (lhs == rhs)
+            if op == '!=':
+                # lhs != None is True
+                return present & (rhs_missing | (lhs != rhs))
+            if op in ('crosses_above', 'crosses_below'):
+                out = np.zeros(n, dtype=bool)
+                if n < 2:
+                    return out
+                ok = present[1:] & ~lhs_missing[:-1] & ~rhs_missing[1:] & ~rhs_missing[:-1]
+                if op == 'crosses_above':
+                    hit = (lhs[:-1] <= rhs[:-1]) & (lhs[1:] > rhs[1:])
+                else:
+                    hit = (lhs[:-1] >= rhs[:-1]) & (lhs[1:] < rhs[1:])
+                out[1:] = ok & hit
+                return out
+            return present & ~rhs_missing & _VECTOR_CMP[op](lhs, rhs)
+
+
+_SCALAR_CMP = {
+    '>': lambda a, b: a > b,
+    '<': lambda a, b: a < b,
+    '>=': lambda a, b: a >= b,
+    '<=': lambda a, b: a <= b,
+    '==': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+}
+_VECTOR_CMP = {
+    '>': np.greater,
+    '<': np.less,
+    '>=': np.greater_equal,
+    '<=': np.less_equal,
+}
+
+
+class EntryPlan:
+    """
+    entry_all / entry_any lists parsed once
+
+    mask() gives the whole-series result of evaluate_entry_logic(), at()
+    the result for a single bar.
+    """
+
+    def __init__(self, entry_all: Optional[List[Dict[str, Any]]], entry_any: Optional[List[Dict[str, Any]]]):
+        self.all = [ConditionPlan(cd) if isinstance(cd, dict) else None for cd in (entry_all or [])]
+        self.any = [ConditionPlan(cd) if isinstance(cd, dict) else None for cd in (entry_any or [])]
+
+    def bind(self, o, h, l, c, feats) -> Tuple[List[Any], List[Any]]:
+        def bound(plans):
+            return [p.bind(o, h, l, c, feats) if p is not None else None for p in plans]
+        return bound(self.all), bound(self.any)
+
+    def mask(self, o, h, l, c, feats) -> np.ndarray:
+        n = len(c)
+        all_b, any_b = self.bind(o, h, l, c, feats)
+        out = np.ones(n, dtype=bool)
+        for b in all_b:
+            out &= b.series() if b is not None else False
+        if any_b:
+            any_mask = np.zeros(n, dtype=bool)
+            for b in any_b:
+                if b is not None:
+                    any_mask |= b.series()
+            out &= any_mask
+        return out
+
+    def at(self, i: int, o, h, l, c, feats) -> bool:
+        all_b, any_b = self.bind(o, h, l, c, feats)
+        if not all(b is not None and b.at(i) for b in all_b):
+            return False
+        if any_b and not any(b is not None and b.at(i) for b in any_b):
+            return False
+        return True
+
+
+def _entry_lists(cfg) -> Tuple[list, list]:
+    return (cfg.get('entry_all') or cfg.get('all') or [],
+            cfg.get('entry_any') or cfg.get('any') or [])
+
+
+def entry_masks(params, o, h, l, c, feats) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Whole-series LONG / SHORT masks for the declarative entry in `params`
+
+    Build them once per backtest, right after the feature columns, and pass
+    them to should_enter(masks=...). They are a snapshot: rebuild after
+    editing the config or the series. None when `params` has no declarative
+    entry.
+    """
+    entry_cfg = params.get('entry') if isinstance(params, dict) else None
+    if not entry_cfg or not isinstance(entry_cfg, dict):
+        return None
+    long_plan = EntryPlan(*_entry_lists(entry_cfg.get('long', {})))
+    short_plan = EntryPlan(*_entry_lists(entry_cfg.get('short', {})))
+    return long_plan.mask(o, h, l, c, feats), short_plan.mask(o, h, l, c, feats)
+
+
+def should_enter(i, ts, o, h, l, c, feats, params, allow_shorts=True, masks=None):
     """
     Entry decision. Supports three modes (priority order):
     1) SIMPLE_RSI_TEST debug mode (env or risk.force_simple_rsi)
     2) If `params` contains declarative entry logic (long/short or entry_all/entry_any), evaluate it
+       (read from `masks` = entry_masks(params, ...) when given, else per bar)
     3) Fallback to original Donchian+RSI logic
     """
     # 1) Simple RSI debug mode
@@ -255,18 +546,15 @@ def should_enter(i, ts, o, h, l, c, feats, params, allow_shorts=True):
         entry_cfg = None
 
     if entry_cfg and isinstance(entry_cfg, dict):
+        if masks is not None and 0 <= i < len(c):
+            long_ok, short_ok = masks[0][i], masks[1][i]
+        else:
+            long_ok = evaluate_entry_logic(*_entry_lists(entry_cfg.get('long', {})), i, ts, o, h, l, c, feats)
+            short_ok = evaluate_entry_logic(*_entry_lists(entry_cfg.get('short', {})), i, ts, o, h, l, c, feats)
         # LONG
-        long_cfg = entry_cfg.get('long', {})
-        long_all = long_cfg.get('entry_all') or long_cfg.get('all') or []
-        long_any = long_cfg.get('entry_any') or long_cfg.get('any') or []
-        long_ok = evaluate_entry_logic(long_all, long_any, i, ts, o, h, l, c, feats)
         if long_ok:
             return 'LONG'
         # SHORT
-        short_cfg = entry_cfg.get('short', {})
-        short_all = short_cfg.get('entry_all') or short_cfg.get('all') or []
-        short_any = short_cfg.get('entry_any') or short_cfg.get('any') or []
-        short_ok = evaluate_entry_logic(short_all, short_any, i, ts, o, h, l, c, feats)
         if short_ok and allow_shorts:
             return 'SHORT'
 
@@ -11,15 +11,78 @@ Integrates:
 import sys
 sys.path.append('.')
 
-from typing import Dict, Any, List, Optional
+from collections import OrderedDict
+from typing import Dict, Any, Callable, List, Optional
+import numpy as np
 from backend.agents.exits import (
     build_exit_plan,
     ExitPlan,
     RegimeDetector,
+    detect_regime_series,
     get_swing_levels,
+    swing_level_series,
     build_context as build_exit_context
 )
 
+# Per-dataset series (regimes, swing levels): source lists are held so identity checks stay valid
+_SERIES_CACHE: "OrderedDict[tuple, tuple]" = OrderedDict()
+_SERIES_CACHE_SIZE = 16
+
+
+def _cached_series(name: str, sources: tuple, param: int, compute: Callable[[], Any]):
+    """
+    Compute a whole-dataset series once and reuse it while the same lists are passed
+
+    Returns compute()'s result, or None when a source is ragged, holds None
+    or compute() rejects it (callers then take their per-bar path).
+    """
+    n = len(sources[0])
+    key = (name, id(sources[0]), param)
+    cached = _SERIES_CACHE.get(key)
+    if cached is not None:
+        held, length, series = cached
+        if length == n and all(a is b for a, b in zip(held, sources)):
+            _SERIES_CACHE.move_to_end(key)
+            return series
+    
+    # Ragged lists or None gaps take the per-bar path (its error handling differs)
+    series = None
+    present = [s for s in sources if s is not None]
+    if all(len(s) == n for s in present) and not any(v is None for s in present for v in s):
+        try:
+            series = compute()
+        except (TypeError, ValueError):
+            series = None
+    
+    _SERIES_CACHE[key] = (sources, n, series)
+    if len(_SERIES_CACHE) > _SERIES_CACHE_SIZE:
+        _SERIES_CACHE.popitem(last=False)
+    return series
+
+
+def _regime_series(feats: Dict[str, List[float]], lookback: int) -> Optional[np.ndarray]:
+    """Whole-series regimes for feats (None = use the per-bar path)"""
+    try:
+        atr, adx, close = feats['atr14'], feats['adx14'], feats['ema20']
+    except KeyError:
+        return None
+    ema200 = feats.get('ema200')
+    return _cached_series(
+        "regime", (atr, adx, close, ema200), lookback,
+        lambda: detect_regime_series(adx, atr, close, ema200, lookback)
+    )
+
+
+def _swing_series(h: List[float], l: List[float], lookback: int):
+    """(swing_low, swing_high) arrays for h/l (None = use get_swing_levels per bar)"""
+    def compute():
+        swing_low, swing_high = swing_level_series(h, l, lookback)
+        # Python max()/min() are order-dependent around NaN; leave those datasets to the scan
+        if np.isnan(swing_low[lookback:]).any() or np.isnan(swing_high[lookback:]).any():
+            return None
+        return swing_low, swing_high
+    return _cached_series("swing", (h, l), lookback, compute)
+
 
 def detect_regime(
     i: int,
@@ -29,11 +92,18 @@ def detect_regime(
     """
     Detect market regime at current bar
     
+    The whole series is classified once per feature set and then looked up
+    per bar; feats that cannot be vectorized fall back to detect_simple().
+    
     Returns: "trend", "range", "high_vol", or "low_vol"
     """
     if i < lookback:
         return "range"  # Default for early bars
     
+    series = _regime_series(feats, lookback)
+    if series is not None and i < len(series):
+        return str(series[i])
+    
     detector = RegimeDetector(lookback_bars=lookback)
     
     try:
@@ -146,8 +216,15 @@ def build_regime_exit_plan(
     # Detect regime
     regime = detect_regime(i, feats)
     
-    # Get swing levels
-    swing_low, swing_high = get_swing_levels(h, l, lookback=20, current_idx=i)
+    # Get swing levels (precomputed per dataset, scanned only as a fallback)
+    swings = _swing_series(h, l, 20)
+    if swings is not None and 0 <= i < len(h):
+        if i < 20:
+            swing_low = swing_high = None
+        else:
+            swing_low, swing_high = float(swings[0][i]), float(swings[1][i])
+    else:
+        swing_low, swing_high = get_swing_levels(h, l, lookback=20, current_idx=i)
     
     # Build context
     ctx = {
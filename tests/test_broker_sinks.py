@@ -0,0 +1,83 @@
+import csv
+
+import pytest
+
+from broker.paper_v2 import PaperFuturesBrokerV2
+from broker.sinks import MemorySink, NullSink, make_sink
+
+
+def _run(broker, n=300):
+    """Deterministic legacy-mode backtest: open every 20 bars, time stop after 5"""
+    price = 100.0
+    for i in range(n):
+        price += 0.5 if (i // 7) % 2 == 0 else -0.4
+        broker.on_candle(i * 300_000, price + 0.3, price - 0.3, price, 1.0)
+        if broker.position is None and i % 20 == 0:
+            broker.open(i * 300_000, "LONG", 1.0, price, price - 50, price + 50, 1.0, 1.0, time_stop_bars=5)
+    return broker
+
+
+def _read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def test_csv_sink_matches_in_memory_curve(tmp_path):
+    broker = _run(PaperFuturesBrokerV2(data_dir=str(tmp_path), flush_every_bars=64))
+    broker.close()
+
+    equity = _read_csv(tmp_path / "equity_curve.csv")
+    trades = _read_csv(tmp_path / "trades.csv")
+    assert equity[0] == ["ts", "equity"]
+    assert [[int(r[0]), float(r[1])] for r in equity[1:]] == broker.equity_curve
+    assert trades[0][:2] == ["ts_utc", "action"]
+    assert len(trades) - 1 == broker.sink.trades
+    assert broker.sink.metrics()['flushes'] >= 300 // 64
+
+
+def test_csv_sink_buffers_until_flush(tmp_path):
+    broker = _run(PaperFuturesBrokerV2(data_dir=str(tmp_path), flush_every_bars=None), n=50)
+    assert len(_read_csv(tmp_path / "equity_curve.csv")) == 1  # header only
+    broker.flush()
+    assert len(_read_csv(tmp_path / "equity_curve.csv")) == 51
+
+
+def test_memory_sink_never_touches_disk(tmp_path):
+    data_dir = tmp_path / "unused"
+    broker = _run(PaperFuturesBrokerV2(data_dir=str(data_dir), sink="memory"))
+    broker.close()
+
+    assert not data_dir.exists()
+    assert isinstance(broker.sink, MemorySink)
+    assert broker.sink.equity_rows() == broker.equity_curve
+    rows = broker.sink.trade_rows()
+    assert rows[0]['action'] == "OPEN_LONG"
+    assert broker.sink.closes == sum(1 for r in rows if not r['action'].startswith("OPEN_"))
+
+
+def test_null_sink_tracks_metrics_only(tmp_path):
+    reference = _run(PaperFuturesBrokerV2(sink="memory"))
+    broker = _run(PaperFuturesBrokerV2(data_dir=str(tmp_path / "unused"), sink="null"))
+    m = broker.sink.metrics()
+
+    assert isinstance(broker.sink, NullSink)
+    assert m['bars'] == 300
+    assert m['last_equity'] == reference.equity_curve[-1][1]
+    assert m['closes'] == reference.sink.closes
+    closed = [r['pnl'] for r in reference.sink.trade_rows() if not r['action'].startswith("OPEN_")]
+    assert m['realized_pnl'] == pytest.approx(sum(closed))
+
+
+def test_parquet_sink_roundtrip(tmp_path):
+    pytest.importorskip("pyarrow")
+    pd = pytest.importorskip("pandas")
+    broker = _run(PaperFuturesBrokerV2(data_dir=str(tmp_path), sink="parquet", flush_every_bars=100))
+    broker.close()
+
+    df = pd.read_parquet(tmp_path / "equity_curve.parquet")
+    assert df.values.tolist() == broker.equity_curve
+
+
+def test_unknown_sink_rejected():
+    with pytest.raises(ValueError):
+        make_sink("sqlite")
@@ -0,0 +1,140 @@
+import asyncio
+import gzip
+import json
+import sqlite3
+
+import numpy as np
+import pytest
+from starlette.requests import Request
+
+import core.app_config
+from core import candle_codec
+from core import database as db_sqlite
+from core.candle_codec import MEDIA_TYPE, decode_candles, encode_candles, pick_encoding
+from routers.lab import get_run_candles
+from server.main import api_candles
+
+TS0 = 1_700_000_000_000
+
+
+def _rows(n, start=TS0, step=300_000):
+    rng = np.random.default_rng(n)
+    c = 30000 + np.cumsum(rng.normal(0, 40, n))
+    return [(start + k * step, float(c[k]), float(c[k]) + 12.5, float(c[k]) - 7.25, float(c[k]) + 1.0, float(k % 97))
+            for k in range(n)]
+
+
+def _request(accept="application/json", accept_encoding=""):
+    headers = [(b"accept", accept.encode()), (b"accept-encoding", accept_encoding.encode())]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers, "query_string": b""})
+
+
+def _decode(response):
+    body = response.body
+    if response.headers.get("content-encoding") == "gzip":
+        body = gzip.decompress(body)
+    return decode_candles(body)
+
+
+@pytest.mark.parametrize("n", [1, 2, 5000])
+def test_roundtrip(n):
+    rows = _rows(n)
+    out = decode_candles(encode_candles(rows))
+    assert out["ts"].tolist() == [r[0] for r in rows]
+    for k, name in enumerate(candle_codec.COLUMNS, start=1):
+        np.testing.assert_array_equal(out[name], np.array([r[k] for r in rows], dtype=np.float32))
+    assert len(encode_candles(rows)) == 24 + 24 * n
+
+
+def test_gaps_and_wide_deltas():
+    rows = _rows(4)
+    rows[2] = (rows[1][0] + 3 * 2**31,) + rows[2][1:]   # delta beyond int32
+    rows[3] = (rows[2][0] + 1,) + rows[3][1:]
+    payload = encode_candles(rows)
+    assert decode_candles(payload)["ts"].tolist() == [r[0] for r in rows]
+    assert len(payload) == 24 + 28 * 4
+
+
+def test_empty_and_bad_magic():
+    assert decode_candles(encode_candles([]))["ts"].size == 0
+    with pytest.raises(ValueError):
+        decode_candles(b"JSON" + encode_candles([])[4:])
+
+
+def test_encoding_negotiation():
+    assert pick_encoding("gzip, deflate") == "gzip"
+    assert pick_encoding("br;q=1.0, gzip;q=0.8") == ("br" if candle_codec.brotli else "gzip")
+    assert pick_encoding("identity") is None and pick_encoding(None) is None
+
+
+@pytest.fixture
+def api_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(core.app_config, "_PROVIDERS", {})
+    monkeypatch.chdir(tmp_path)
+    conn = sqlite3.connect("candles.db")
+    conn.execute("CREATE TABLE candles (ts INTEGER PRIMARY KEY, open REAL, high REAL, low REAL, close REAL, volume REAL)")
+    conn.executemany("INSERT INTO candles VALUES (?,?,?,?,?,?)", _rows(1200))
+    conn.commit()
+    conn.close()
+    (tmp_path / "config.yaml").write_text("symbol: BTCUSDT\ndb:\n  path: candles.db\n")
+    return tmp_path
+
+
+def test_api_candles_binary_matches_json(api_dir):
+    as_json = api_candles(limit=500, request=_request())
+    response = api_candles(limit=500, request=_request(f"{MEDIA_TYPE}, */*", "gzip"))
+    assert response.media_type == MEDIA_TYPE and response.headers["content-encoding"] == "gzip"
+    out = _decode(response)
+    assert out["ts"].tolist() == [c["ts"] for c in as_json["candles"]]
+    np.testing.assert_allclose(out["close"], [c["c"] for c in as_json["candles"]], rtol=1e-6)
+    assert response.headers["x-next-cursor"] == str(as_json["next_cursor"]) == str(out["ts"][0])
+
+
+def test_api_candles_cursor_pages_back_through_history(api_dir):
+    pages, before = [], None
+    while True:
+        page = api_candles(limit=500, before=before, request=_request(MEDIA_TYPE))
+        pages.append(_decode(page)["ts"])
+        if "x-next-cursor" not in page.headers:
+            break
+        before = int(page.headers["x-next-cursor"])
+    ts = np.concatenate(pages[::-1])
+    assert [len(p) for p in pages] == [500, 500, 200]
+    assert ts.tolist() == [r[0] for r in _rows(1200)]
+
+
+def test_lab_run_candles_paging(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = {"data": {"exchange": "bitget", "symbols": ["BTC/USDT:USDT"], "timeframe": "5m"}}
+    db_sqlite.create_run(db_sqlite.connect_lab(), "r1", "test", "backtest", config)
+    conn = db_sqlite.connect(db_sqlite.get_db_path("bitget", "BTC/USDT:USDT", "5m"))
+    db_sqlite.insert_candles_bulk(conn, "5m", _rows(300))
+    conn.commit()
+    conn.close()
+
+    full = asyncio.run(get_run_candles("r1"))
+    assert len(full["candles"]) == 300 and "next_cursor" not in full
+
+    page = asyncio.run(get_run_candles("r1", limit=100, request=_request()))
+    assert [c["time"] for c in page["candles"]] == [r[0] // 1000 for r in _rows(300)[200:]]
+    older = asyncio.run(get_run_candles("r1", before=page["next_cursor"], limit=100, request=_request(MEDIA_TYPE)))
+    assert older.headers["x-symbol"] == "BTC/USDT:USDT"
+    assert _decode(older)["ts"].tolist() == [r[0] for r in _rows(300)[100:200]]
+    assert json.loads(json.dumps(page))["next_cursor"] == _rows(300)[200][0]
+
+
+def test_lab_run_candles_mock_data_pages_end(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = {"data": {"exchange": "bitget", "symbols": ["BTC/USDT:USDT"], "timeframe": "5m"}}
+    db_sqlite.create_run(db_sqlite.connect_lab(), "r1", "test", "backtest", config)   # no candle DB: mock rows
+
+    pages, before = [], None
+    for _ in range(10):
+        page = asyncio.run(get_run_candles("r1", before=before, limit=40))
+        pages.append([c["time"] for c in page["candles"]])
+        before = page["next_cursor"]
+        if before is None:
+            break
+    assert [len(p) for p in pages] == [40, 40, 20]
+    times = [t for p in pages[::-1] for t in p]
+    assert times == sorted(set(times)) and len(times) == 100
@@ -0,0 +1,154 @@
+import sqlite3
+import threading
+import time
+
+from backend.agents.config import AgentConfig
+from backend.agents.schemas import Candle
+from backend.agents.tools.market import MarketDataTool
+from backend.agents.tools.persistence import CandlePersistenceWorker
+
+
+def _rows(start, n):
+    return [(start + k, 1.0, 2.0, 0.5, 1.5, 10.0) for k in range(n)]
+
+
+def _count(db_path, table="candles"):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_no_candles_lost_on_graceful_shutdown(tmp_path):
+    worker = CandlePersistenceWorker(flush_interval_secs=60)  # never flushes on its own during the test
+    db_a = str(tmp_path / "a" / "candles.db")
+    db_b = str(tmp_path / "b.db")
+
+    def producer(offset):
+        for k in range(50):
+            worker.submit(db_a, "candles", _rows(offset + k * 10, 10))
+            worker.submit(db_b, "candles_5min", _rows(offset + k * 10, 10))
+
+    threads = [threading.Thread(target=producer, args=(p * 100_000,)) for p in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    worker.close()
+
+    assert _count(db_a) == 4 * 500
+    assert _count(db_b, "candles_5min") == 4 * 500
+    stats = worker.metrics()
+    assert stats['rows_written'] == 2 * 4 * 500
+    assert stats['queue_depth'] == 0 and stats['pending_rows'] == 0
+    assert stats['flushes'] < stats['batches_submitted']  # writes were coalesced
+
+
+def test_flush_writes_queued_rows_and_reports_latency(tmp_path):
+    worker = CandlePersistenceWorker(flush_interval_secs=60)
+    db = str(tmp_path / "c.db")
+    worker.submit(db, "candles", _rows(0, 100))
+    worker.submit(db, "candles", _rows(50, 100))  # overlapping ts are ignored
+
+    assert worker.flush(timeout=5)
+    assert _count(db) == 150
+    assert worker.metrics()['last_flush_ms'] > 0
+    worker.close()
+
+
+def test_market_tool_resolves_config_once_and_persists_in_background(tmp_path, monkeypatch):
+    db = tmp_path / "db" / "candles.db"
+    (tmp_path / "config.yaml").write_text(f"db:\n  path: {db.as_posix()}\n")
+    monkeypatch.chdir(tmp_path)
+
+    class NoExchange:
+        has = {}
+
+        def load_markets(self):
+            return {}
+
+    tool = MarketDataTool(AgentConfig(runs_dir=tmp_path / "runs", logs_dir=tmp_path / "logs"), exchange=NoExchange())
+    (tmp_path / "config.yaml").unlink()  # later saves must not re-read the config
+
+    candles = [Candle(ts=k * 300_000, open=10, high=11, low=9, close=10.5, volume=1) for k in range(30)]
+    tool._save_candles_to_db("BTC/USDT:USDT", "5m", candles[:20])
+    tool._save_candles_to_db("BTC/USDT:USDT", "5m", candles[10:])
+    tool.close()
+
+    assert _count(str(db)) == 30
+    assert tool.get_persistence_stats()['errors'] == 0
+
+
+def test_flush_after_close_returns_immediately(tmp_path):
+    worker = CandlePersistenceWorker(flush_interval_secs=60)
+    worker.submit(str(tmp_path / "c.db"), "t", _rows(0, 10))
+    worker.close()
+    t0 = time.monotonic()
+    assert worker.flush(timeout=2) is True
+    assert time.monotonic() - t0 < 0.5
+
+
+def test_flushes_queued_with_stop_are_released(tmp_path):
+    worker = CandlePersistenceWorker(flush_interval_secs=60)
+    db = str(tmp_path / "c.db")
+    worker.submit(db, "t", _rows(0, 10))
+    # flush requests still queued when the stop is processed
+    events = [threading.Event() for _ in range(3)]
+    worker._queue.put(('__stop__', None))
+    for done in events:
+        worker._queue.put(('__flush__', done))
+    worker._closed = True
+    worker._thread.join(5)
+    assert not worker._thread.is_alive()
+    assert all(done.is_set() for done in events)
+    assert _count(db, "t") == 10
+
+
+class _LockedOnce:
+    """Connection whose first executemany fails like a locked database"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.closed = False
+
+    def execute(self, *args):
+        return self.conn.execute(*args)
+
+    def executemany(self, *args):
+        raise sqlite3.OperationalError("database is locked")
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.closed = True
+        self.conn.close()
+
+
+def test_failed_write_is_retried_not_lost(tmp_path):
+    worker = CandlePersistenceWorker(flush_interval_secs=60)
+    db = str(tmp_path / "c.db")
+    flaky = worker._conns[db] = _LockedOnce(sqlite3.connect(db))
+    worker.submit(db, "candles", _rows(0, 100))
+    worker.submit(str(tmp_path / "other.db"), "candles", _rows(0, 10))
+
+    assert worker.flush(timeout=5)
+    stats = worker.metrics()
+    assert stats['errors'] == 1 and stats['pending_rows'] == 100 and stats['rows_written'] == 10
+    assert flaky.closed and worker._conns.get(db) is not flaky
+
+    worker.submit(db, "candles", _rows(100, 50))
+    worker.close()
+    assert _count(db) == 150
+    assert worker.metrics()['rows_dropped'] == 0
+
+
+def test_failed_write_dropped_after_bounded_retries(tmp_path):
+    worker = CandlePersistenceWorker(flush_interval_secs=60, max_write_retries=2)
+    db = str(tmp_path / "c.db")
+    worker.submit(db, "candles", _rows(0, 10))
+    worker._connection = lambda path: _LockedOnce(sqlite3.connect(path))   # every write fails
+    worker.close()
+    stats = worker.metrics()
+    assert stats['errors'] == 3 and stats['rows_dropped'] == 10 and stats['pending_rows'] == 0
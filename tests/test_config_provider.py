@@ -0,0 +1,119 @@
+import os
+
+import pytest
+import yaml
+
+import core.app_config
+from backend.agents.config import AgentConfig
+from backend.agents.tools.market import MarketDataTool
+from core.app_config import ConfigProvider, app_config, freeze, invalidate, thaw
+
+
+def _write(path, text, bump=0):
+    path.write_text(text)
+    if bump:
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + bump * 1_000_000_000))
+
+
+def test_repeated_gets_do_not_reparse(tmp_path):
+    cfg = tmp_path / "config.yaml"
+    _write(cfg, "db:\n  path: a.db\n")
+    provider = ConfigProvider(str(cfg), poll_interval=60)
+    first = provider.get()
+    assert all(provider.get() is first for _ in range(100))
+    assert provider.stats["parses"] == 1 and provider.stats["stat_calls"] == 1
+
+
+def test_edit_picked_up_after_poll_interval(tmp_path):
+    cfg = tmp_path / "config.yaml"
+    _write(cfg, "db:\n  path: a.db\n")
+    provider = ConfigProvider(str(cfg), poll_interval=0.0)
+    assert provider.get()["db"]["path"] == "a.db"
+    _write(cfg, "db:\n  path: b.db\n", bump=1)
+    assert provider.get()["db"]["path"] == "b.db"
+    provider.get()
+    assert provider.stats["parses"] == 2   # unchanged file is only stat'ed
+
+
+def test_invalidate_forces_reload(tmp_path):
+    cfg = tmp_path / "config.yaml"
+    _write(cfg, "a: 1\n")
+    provider = ConfigProvider(str(cfg), poll_interval=60)
+    provider.get()
+    _write(cfg, "a: 2\n", bump=1)
+    assert provider.get()["a"] == 1
+    provider.invalidate()
+    assert provider.get()["a"] == 2
+
+
+def test_snapshot_is_immutable_and_thaws(tmp_path):
+    snap = freeze({"db": {"path": "x"}, "symbols": ["BTC", "ETH"]})
+    with pytest.raises(TypeError):
+        snap["db"]["path"] = "y"
+    assert snap["symbols"] == ("BTC", "ETH")
+    plain = thaw(snap)
+    plain["db"]["path"] = "y"
+    assert plain == {"db": {"path": "y"}, "symbols": ["BTC", "ETH"]} and snap["db"]["path"] == "x"
+
+
+def test_missing_or_broken_file(tmp_path):
+    cfg = tmp_path / "config.yaml"
+    provider = ConfigProvider(str(cfg), poll_interval=0.0)
+    with pytest.raises(FileNotFoundError):
+        provider.get()
+
+    _write(cfg, "a: 1\n")
+    good = provider.get()
+    _write(cfg, "a: [1\n", bump=1)   # editor mid-save
+    assert provider.get() is good and provider.stats["parse_errors"] == 1
+    cfg.unlink()
+    assert provider.get() is good
+
+    _write(cfg, "", bump=2)           # truncated
+    assert provider.get() is good
+    _write(cfg, "- a\n- b\n", bump=3)   # not a mapping
+    assert provider.get() is good and provider.stats["parse_errors"] == 3
+    _write(cfg, "a: 2\n", bump=4)
+    assert provider.get()["a"] == 2
+
+    empty = ConfigProvider(str(tmp_path / "empty.yaml"))
+    _write(tmp_path / "empty.yaml", "")
+    assert dict(empty.get()) == {}
+
+    broken = ConfigProvider(str(tmp_path / "broken.yaml"))
+    _write(tmp_path / "broken.yaml", "a: [1\n")
+    with pytest.raises(yaml.YAMLError):
+        broken.get()
+
+
+def test_providers_are_per_absolute_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(core.app_config, "_PROVIDERS", {})
+    for name in ("one", "two"):
+        (tmp_path / name).mkdir()
+        _write(tmp_path / name / "config.yaml", f"name: {name}\n")
+    monkeypatch.chdir(tmp_path / "one")
+    assert app_config()["name"] == "one"
+    monkeypatch.chdir(tmp_path / "two")
+    assert app_config()["name"] == "two"
+
+
+def test_market_tool_follows_db_path_edits(tmp_path, monkeypatch):
+    monkeypatch.setattr(core.app_config, "_PROVIDERS", {})
+    monkeypatch.chdir(tmp_path)
+    _write(tmp_path / "config.yaml", "db:\n  path: a.db\n")
+
+    class NoExchange:
+        has = {}
+
+        def load_markets(self):
+            return {}
+
+    tool = MarketDataTool(AgentConfig(runs_dir=tmp_path / "runs", logs_dir=tmp_path / "logs"), exchange=NoExchange())
+    try:
+        assert tool._db_path == "a.db"
+        _write(tmp_path / "config.yaml", "db:\n  path: b.db\n", bump=1)
+        invalidate()
+        assert tool._db_path == "b.db"
+    finally:
+        tool.close()
@@ -0,0 +1,193 @@
+import math
+
+import numpy as np
+import pytest
+
+from strategies import core
+from strategies.core import (
+    ConditionPlan,
+    EntryPlan,
+    evaluate_condition,
+    entry_masks,
+    evaluate_entry_logic,
+    should_enter,
+)
+
+OP_ALIASES = [
+    ">", "gt", "<", "lt", ">=", "gte", "<=", "lte", "==", "=", "!=", "between",
+    "crossesabove", "crosses_above", "crossabove", "Crosses Above", "crosses-above",
+    "crossbelow", "crossesbelow", "crosses_below", "CROSSES BELOW", "cross-below",
+    "unknown_op", "",
+]
+
+
+def _dataset(n=300, seed=3):
+    rng = np.random.default_rng(seed)
+    c = (30000 + np.cumsum(rng.normal(0, 40, n))).tolist()
+    o = [c[0]] + c[:-1]
+    h = [x + 20 for x in c]
+    l = [x - 20 for x in c]
+    ts = list(range(n))
+    rsi = rng.uniform(0, 100, n).tolist()
+    for k in rng.integers(0, n, 15):
+        rsi[k] = None
+    for k in rng.integers(0, n, 10):
+        rsi[k] = float("nan")
+    ema = [None] * 20 + [x + d for x, d in zip(c[20:], rng.normal(0, 30, n - 20))]
+    feats = {
+        "RSI14": rsi,
+        "ema20": ema,
+        "step": rng.choice([1, 2, 3], n).tolist(),
+        "short": rsi[: n // 2],
+        "regime": rng.choice(["UPTREND", "DOWNTREND"], n).tolist(),
+        "up55": [x + 10 for x in c],
+        "dn55": [x - 10 for x in c],
+        "rsi14": rsi,
+    }
+    return ts, o, h, l, c, feats
+
+
+CONDITIONS = [
+    {"indicator": "rsi14", "rhs": 50},
+    {"indicator": "RSI14", "rhs": "30"},
+    {"lhs": "close", "rhs_indicator": "ema20"},
+    {"field": "price", "rhs_field": "open"},
+    {"indicator": "ema20", "rhs_indicator": "close"},
+    {"indicator": "step", "rhs": 2},
+    {"indicator": "short", "rhs": 40},
+    {"indicator": "rsi14", "rhs_indicator": "short"},
+    {"indicator": "missing", "rhs": 1},
+    {"indicator": "rsi14", "rhs_indicator": "missing"},
+    {"indicator": "rsi14"},
+    {"indicator": "rsi14", "rhs": [30, 70]},
+    {"indicator": "rsi14", "rhs": (70, 30)},
+    {"indicator": "rsi14", "rhs": ["a", 2]},
+    {"indicator": "regime", "rhs": 1},
+    {"indicator": "high", "rhs_indicator": "low"},
+]
+
+
+def _reference(cond, data):
+    ts, o, h, l, c, feats = data
+    return np.array([bool(evaluate_condition(cond, i, ts, o, h, l, c, feats)) for i in range(len(c))])
+
+
+@pytest.mark.parametrize("op", OP_ALIASES)
+@pytest.mark.parametrize("base", CONDITIONS)
+def test_plan_matches_evaluate_condition(op, base):
+    data = _dataset()
+    ts, o, h, l, c, feats = data
+    cond = dict(base, op=op)
+    expected = _reference(cond, data)
+
+    bound = ConditionPlan(cond).bind(o, h, l, c, feats)
+    np.testing.assert_array_equal(bound.series(), expected)
+    np.testing.assert_array_equal([bool(bound.at(i)) for i in range(len(c))], expected)
+
+
+def test_operator_key_and_numpy_features():
+    ts, o, h, l, c, feats = _dataset()
+    feats = {k: np.asarray(v, dtype=float) for k, v in feats.items() if k not in ("regime", "short")}
+    data = (ts, o, h, l, c, feats)
+    for op in (">", "crosses_below", "!="):
+        cond = {"indicator": "rsi14", "operator": op, "rhs_indicator": "ema20"}
+        np.testing.assert_array_equal(ConditionPlan(cond).bind(o, h, l, c, feats).series(), _reference(cond, data))
+
+
+ENTRY_ALL = [{"indicator": "rsi14", "op": "<", "rhs": 70}, {"indicator": "close", "op": ">", "rhs_indicator": "ema20"}]
+ENTRY_ANY = [{"indicator": "rsi14", "op": "crosses_above", "rhs": 40}, "not a dict",
+             {"indicator": "rsi14", "op": "between", "rhs": [45, 55]}]
+
+
+@pytest.mark.parametrize("entry_all,entry_any", [
+    (ENTRY_ALL, ENTRY_ANY),
+    (ENTRY_ALL, None),
+    (None, ENTRY_ANY),
+    (None, None),
+    (ENTRY_ALL + ["bad"], []),
+])
+def test_entry_plan_matches_evaluate_entry_logic(entry_all, entry_any):
+    ts, o, h, l, c, feats = _dataset(seed=8)
+    expected = [evaluate_entry_logic(entry_all, entry_any, i, ts, o, h, l, c, feats) for i in range(len(c))]
+    plan = EntryPlan(entry_all, entry_any)
+    np.testing.assert_array_equal(plan.mask(o, h, l, c, feats), expected)
+    assert [plan.at(i, o, h, l, c, feats) for i in range(0, len(c), 7)] == expected[::7]
+
+
+def _legacy_should_enter(i, ts, o, h, l, c, feats, params, allow_shorts=True):
+    entry_cfg = params["entry"]
+    for side, name in (("long", "LONG"), ("short", "SHORT")):
+        cfg = entry_cfg.get(side, {})
+        ok = evaluate_entry_logic(cfg.get("entry_all") or cfg.get("all") or [],
+                                  cfg.get("entry_any") or cfg.get("any") or [], i, ts, o, h, l, c, feats)
+        if ok and (name == "LONG" or allow_shorts):
+            return name
+    return core.should_enter(i, ts, o, h, l, c, feats, {})
+
+
+@pytest.mark.parametrize("allow_shorts", [True, False])
+def test_should_enter_matches_per_bar(allow_shorts):
+    data = _dataset(n=400, seed=5)
+    params = {"entry": {
+        "long": {"entry_all": ENTRY_ALL},
+        "short": {"all": [{"indicator": "rsi14", "op": "crossesbelow", "rhs": 60}],
+                  "any": [{"indicator": "close", "op": "<", "rhs_indicator": "ema20"}]},
+    }}
+    ts, o, h, l, c, feats = data
+    masks = entry_masks(params, o, h, l, c, feats)
+    got = [should_enter(i, *data, params, allow_shorts, masks=masks) for i in range(len(c))]
+    expected = [_legacy_should_enter(i, *data, params, allow_shorts) for i in range(len(c))]
+    assert got == expected
+    assert [should_enter(i, *data, params, allow_shorts) for i in range(len(c))] == expected   # no masks: per bar
+    assert "LONG" in got and (("SHORT" in got) == allow_shorts)
+
+
+def test_entry_masks_only_for_declarative_entry():
+    ts, o, h, l, c, feats = _dataset(n=50)
+    assert entry_masks({}, o, h, l, c, feats) is None
+    assert entry_masks({"entry": "nope"}, o, h, l, c, feats) is None
+    long_mask, short_mask = entry_masks({"entry": {"long": {"entry_all": [{"indicator": "close", "op": ">", "rhs": 0}]}}},
+                                        o, h, l, c, feats)
+    assert long_mask.all() and short_mask.all()   # empty side: no conditions, as evaluate_entry_logic
+
+
+def test_masks_are_rebuilt_explicitly():
+    # masks are a snapshot; edits to the config or the columns take effect once they are rebuilt
+    data = _dataset(seed=1)
+    ts, o, h, l, c, feats = data
+    params = {"entry": {"long": {"entry_all": [{"indicator": "rsi14", "op": ">", "rhs": 101}]}, "short": {}}}
+    n = len(c)
+    masks = entry_masks(params, o, h, l, c, feats)
+    assert [should_enter(i, *data, params, False, masks=masks) for i in range(n)] == [None] * n
+
+    params["entry"]["long"]["entry_all"][0]["rhs"] = -1
+    assert [should_enter(i, *data, params, False) for i in range(n)] == [_legacy_should_enter(i, *data, params, False) for i in range(n)]
+    masks = entry_masks(params, o, h, l, c, feats)
+    expected = [_legacy_should_enter(i, *data, params, False) for i in range(n)]
+    assert [should_enter(i, *data, params, False, masks=masks) for i in range(n)] == expected
+    assert "LONG" in expected
+
+    feats["rsi14"] = [50.0] * n   # same length, new values
+    params["entry"]["long"]["entry_all"][0]["rhs"] = 60
+    masks = entry_masks(params, o, h, l, c, feats)
+    assert [should_enter(i, *data, params, False, masks=masks) for i in range(n)] == \
+        [_legacy_should_enter(i, *data, params, False) for i in range(n)]
+
+
+def test_should_enter_out_of_range_uses_per_bar_path():
+    ts, o, h, l, c, feats = _dataset(n=50)
+    params = {"entry": {"long": {"entry_all": [{"indicator": "close", "op": ">", "rhs": 0}]}}}
+    masks = entry_masks(params, o, h, l, c, feats)
+    assert should_enter(-1, ts, o, h, l, c, feats, params, masks=masks) == "LONG"
+    with pytest.raises(IndexError):
+        should_enter(len(c), ts, o, h, l, c, feats, params, masks=masks)
+
+
+def test_nan_semantics():
+    ts, o, h, l, c = [0, 1], [1.0, 1.0], [1.0, 1.0], [1.0, 1.0], [1.0, 1.0]
+    feats = {"x": [float("nan"), float("nan")]}
+    for op, want in (("==", False), ("!=", True), (">", False), ("between", False)):
+        cond = {"indicator": "x", "op": op, "rhs": [0, 2] if op == "between" else 1}
+        assert ConditionPlan(cond).bind(o, h, l, c, feats).series().tolist() == [want, want]
+        assert evaluate_condition(cond, 1, ts, o, h, l, c, feats) == want
+    assert math.isnan(feats["x"][0])
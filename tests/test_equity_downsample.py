@@ -0,0 +1,149 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from core import database as db_sqlite
+from core.downsample import downsample_indices, lttb_indices
+from lab.equity import EquityCache, downsample_series, equity_cache, read_equity_csv
+from routers.lab import compare_runs, get_run_equity
+
+T0 = 1_700_000_000
+
+
+def _curve(n=100_000, seed=0):
+    rng = np.random.default_rng(seed)
+    equity = 10_000 + np.cumsum(rng.normal(0, 5, n))
+    spike, crash = int(n * 0.31337), int(n * 0.77)
+    equity[spike] += 900               # one-bar spike
+    equity[crash:crash + 3] -= 1_500   # short crash
+    return equity
+
+
+def _write_equity(path, equity, t0=T0, step=300):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    peaks = np.maximum.accumulate(equity)
+    dd = (equity - peaks) / peaks * 100
+    with open(path, "w") as f:
+        f.write("timestamp,equity,drawdown\n")
+        for k, (e, d) in enumerate(zip(equity, dd)):
+            ts = datetime.fromtimestamp(t0 + k * step, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+            f.write(f"{ts},{e},{d}\n")
+
+
+def test_lttb_shape_and_endpoints():
+    x = np.arange(10_000, dtype=float)
+    y = np.sin(x / 300)
+    idx = lttb_indices(x, y, 500)
+    assert len(idx) == 500 and idx[0] == 0 and idx[-1] == 9_999
+    assert np.all(np.diff(idx) > 0)
+    assert lttb_indices(x[:100], y[:100], 500).tolist() == list(range(100))
+    assert lttb_indices(x, y, 2).tolist() == [0, 9_999]
+
+
+def test_lttb_keeps_isolated_spikes():
+    x = np.arange(50_000, dtype=float)
+    y = np.zeros(50_000)
+    y[12_345], y[40_001] = 10.0, -10.0
+    idx = lttb_indices(x, y, 300)
+    assert 12_345 in idx and 40_001 in idx
+
+
+def test_downsample_keeps_forced_indices():
+    x = np.arange(1000, dtype=float)
+    idx = downsample_indices(x, np.zeros(1000), 50, keep=[7, 500])
+    assert {7, 500} <= set(idx.tolist()) and np.all(np.diff(idx) > 0)
+
+
+@pytest.mark.parametrize("width", [200, 800, 2000])
+def test_peaks_troughs_and_max_drawdown_survive(width):
+    equity = _curve()
+    series = {"time": T0 + 300 * np.arange(len(equity)), "equity": equity, "drawdown": np.zeros(len(equity))}
+    small = downsample_series(series, width)
+    assert len(small["equity"]) <= width + 5
+    assert small["equity"].max() == equity.max()
+    assert small["equity"].min() == equity.min()
+    max_dd = np.min(equity - np.maximum.accumulate(equity))
+    assert np.min(small["equity"] - np.maximum.accumulate(small["equity"])) == max_dd
+    assert equity[31_337] in small["equity"]   # the spike is drawn
+
+
+@pytest.fixture
+def lab_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    equity_cache.clear()
+    conn = db_sqlite.connect_lab()
+    for k in range(3):
+        run_id = f"run{k}"
+        db_sqlite.create_run(conn, run_id, f"Run {k}", "backtest", {"data": {}})
+        _write_equity(os.path.join("artifacts", run_id, "1", "equity.csv"), _curve(20_000, seed=k))
+    conn.close()
+    yield tmp_path
+    equity_cache.clear()
+
+
+def test_equity_endpoint_width_and_full(lab_dir):
+    full = asyncio.run(get_run_equity("run0"))["equity"]
+    small = asyncio.run(get_run_equity("run0", width=400))["equity"]
+    assert len(full) == 20_000 and len(small) <= 405
+    assert small[0] == full[0] and small[-1] == full[-1]
+    assert min(p["drawdown"] for p in small) == min(p["drawdown"] for p in full)
+    assert full[1]["time"] - full[0]["time"] == 300 and full[0]["time"] == T0
+
+
+def test_compare_downsamples_and_caches(lab_dir):
+    first = asyncio.run(compare_runs(["run0", "run1", "run2", "missing"], width=500))
+    assert [r["run_id"] for r in first["runs"]] == ["run0", "run1", "run2"]
+    assert all(len(r["equity"]) <= 505 and set(r["equity"][0]) == {"time", "equity"} for r in first["runs"])
+    misses = equity_cache.misses
+    assert asyncio.run(compare_runs(["run0", "run1", "run2"], width=500)) == {"runs": first["runs"]}
+    assert equity_cache.misses == misses and equity_cache.hits >= 3
+
+
+def test_cache_invalidated_by_artifact_change(lab_dir):
+    before = asyncio.run(get_run_equity("run1", width=300))["equity"]
+    path = os.path.join("artifacts", "run1", "1", "equity.csv")
+    _write_equity(path, _curve(20_000, seed=9))
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000_000))
+    after = asyncio.run(get_run_equity("run1", width=300))["equity"]
+    assert after != before
+    assert max(p["equity"] for p in after) == read_equity_csv(path)["equity"].max()
+
+
+def test_cache_bounded_by_points(lab_dir):
+    cache = EquityCache(max_points=30_000)
+    cache.get("run0")
+    cache.get("run1", 1000)
+    cache.get("run2")   # 20k + 1k + 20k > 30k: run0 full resolution goes first
+    assert [key for key in cache._entries] == [("run1", 1000), ("run2", None)]
+
+
+def test_trades_fallback(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    equity_cache.clear()
+    os.makedirs(os.path.join("artifacts", "r", "1"))
+    with open(os.path.join("artifacts", "r", "1", "trades.csv"), "w") as f:
+        f.write("entry_time,exit_time,side,entry_price,exit_price,pnl,pnl_pct\n")
+        f.write("2024-01-02T08:00:00,2024-01-02T12:00:00,long,1,1,-50.0,0\n")
+        f.write("2024-01-01T10:00:00,2024-01-01T15:00:00,long,1,1,200.0,0\n")
+    points = asyncio.run(get_run_equity("r"))["equity"]
+    assert [p["equity"] for p in points] == [200.0, 150.0]
+    assert [p["drawdown"] for p in points] == [0.0, -25.0]
+    assert points[0]["time"] == int(datetime(2024, 1, 1, 15, tzinfo=timezone.utc).timestamp())
+    equity_cache.clear()
+
+
+def test_trades_fallback_broker_log(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    equity_cache.clear()
+    os.makedirs(os.path.join("artifacts", "r", "1"))
+    with open(os.path.join("artifacts", "r", "1", "trades.csv"), "w") as f:
+        f.write("ts_utc,action,side,qty,price,pnl,note\n")
+        f.write(f"{T0 * 1000},OPEN_LONG,LONG,1,100,0.0, trail=atr\n")
+        f.write(f"{(T0 + 300) * 1000},TP_PARTIAL,LONG,0.5,101,5.0,\n")
+        f.write(f"{(T0 + 600) * 1000},STOP,LONG,0.5,99,-20.0,\n")
+    points = asyncio.run(get_run_equity("r"))["equity"]
+    assert [(p["time"], p["equity"]) for p in points] == [(T0 + 600, -20.0)]
+    equity_cache.clear()
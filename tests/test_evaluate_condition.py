@@ -1,5 +1,5 @@
 import pytest
-from strategy import evaluate_condition
+from strategies.core import evaluate_condition
 
 # Minimal fake data
 TS = [0,1,2,3]
@@ -0,0 +1,113 @@
+import copy
+
+import numpy as np
+import pytest
+
+from backend.agents.exits import (
+    ExitPlanBatch,
+    build_exit_plan,
+    check_exits,
+    check_exits_batch,
+    exit_reason,
+    simulate_exits,
+)
+from broker.paper_v2 import PaperFuturesBrokerV2
+
+STYLES = ["structure_atr", "atr_trailing", "chandelier", "supertrend", "keltner"]
+REGIMES = [None, "trend", "range", "high_vol", "low_vol"]
+
+
+def _bars(seed=3, n=600):
+    rng = np.random.default_rng(seed)
+    c = 30000 + np.cumsum(rng.normal(0, 45, n))
+    h = c + rng.uniform(5, 60, n)
+    l = c - rng.uniform(5, 60, n)
+    atr = rng.uniform(40, 90, n)
+    st = c - rng.normal(0, 80, n)
+    return c, h, l, atr, st
+
+
+def _plans(c, atr, starts):
+    plans = []
+    for k, start in enumerate(starts):
+        style = STYLES[k % len(STYLES)]
+        regime = REGIMES[(k // len(STYLES)) % len(REGIMES)]
+        side = "LONG" if k % 2 == 0 else "SHORT"
+        params = {"sl_tp_style": style, "sl_atr_mult": 1.5, "time_stop_bars": 150, "breakeven_at_R": 0.8}
+        plans.append(build_exit_plan(side, c[start], atr[start], params, {"tick_size": 0.1}, regime))
+    return plans
+
+
+def test_round_trip_through_dataclasses():
+    c, h, l, atr, st = _bars()
+    plans = _plans(c, atr, range(0, 50))
+    plans[3].targets = plans[3].targets[:1]
+    plans[4].targets_hit = [0]
+    plans[5].trailing.breakeven_at_R = None
+    plans[6].time_stop_bars = None
+
+    back = ExitPlanBatch.from_plans(plans).to_plans()
+    assert back == plans
+
+
+@pytest.mark.parametrize("per_position", [False, True])
+def test_check_exits_batch_matches_scalar_on_one_bar(per_position):
+    c, h, l, atr, st = _bars()
+    plans = _plans(c, atr, [10] * 50)
+    for k, p in enumerate(plans):
+        p.bars_in_trade = k * 4
+    batch = ExitPlanBatch.from_plans(copy.deepcopy(plans))
+
+    bar = 40
+    inputs = (c[bar], h[bar], l[bar])
+    if per_position:
+        inputs = tuple(np.full(len(plans), x) for x in inputs)
+    kind, price, pct, target = check_exits_batch(batch, *inputs)
+    for i, p in enumerate(plans):
+        expected = check_exits(p, c[bar], h[bar], l[bar])
+        if expected is None:
+            assert kind[i] == 0
+            continue
+        reason, px, partial = expected
+        assert exit_reason(kind[i], target[i]) == reason
+        assert price[i] == px
+        assert (pct[i] if partial is not None else None) == partial
+    assert batch.to_plans() == plans  # targets_hit updated the same way
+
+
+def test_simulate_exits_matches_broker_per_position():
+    c, h, l, atr, st = _bars()
+    kel_lo, kel_up = c - 2 * atr, c + 2 * atr
+    starts = list(range(5, 400, 4))
+    plans = _plans(c, atr, starts)
+
+    batch = ExitPlanBatch.from_plans(copy.deepcopy(plans))
+    out = simulate_exits(batch, h, l, c, atr, starts, supertrend=st, keltner_lo=kel_lo, keltner_up=kel_up)
+
+    for p, plan in enumerate(plans):
+        broker = PaperFuturesBrokerV2(sink="memory")
+        broker.open_with_plan(starts[p], 1.0, c[starts[p]], 1.0, plan)
+        for i in range(starts[p] + 1, len(c)):
+            broker.on_candle(i, h[i], l[i], c[i], atr[i], st_line=st[i], kel_lo=kel_lo[i], kel_up=kel_up[i])
+            if broker.position is None:
+                break
+        rows = broker.sink.trade_rows()[1:]
+
+        assert out["pnl"][p] == pytest.approx(sum(r["pnl"] for r in rows), rel=1e-12)
+        assert out["fills"][p] == len(rows)
+        if broker.position is None:
+            assert out["exit_idx"][p] == rows[-1]["ts_utc"]
+            assert exit_reason(out["exit_kind"][p], out["exit_target"][p]) == rows[-1]["action"]
+        else:
+            assert out["exit_idx"][p] == -1
+
+
+def test_close_at_end_flattens_open_positions():
+    c, h, l, atr, st = _bars()
+    plan = build_exit_plan("LONG", c[0], atr[0], {"sl_tp_style": "structure_atr", "sl_atr_mult": 1e4,
+                                                  "time_stop_bars": None, "targets": []}, {"tick_size": 0.1})
+    plan.targets = []
+    plan.tp_primary = 1e12
+    out = simulate_exits(ExitPlanBatch.from_plans([plan]), h, l, c, atr, [0], close_at_end=True)
+    assert out["exit_idx"][0] == len(c) - 1
+    assert out["remaining"][0] == 0.0
@@ -0,0 +1,108 @@
+import copy
+
+import numpy as np
+import pytest
+
+from backend.agents.exits import build_exit_plan, check_exits, update_trailing_stop
+from broker.paper_v2 import PaperFuturesBrokerV2
+
+STYLES = ["structure_atr", "atr_trailing", "chandelier", "supertrend", "keltner"]
+REGIMES = [None, "trend", "range", "high_vol", "low_vol"]
+
+
+def _bars(seed, n=400):
+    rng = np.random.default_rng(seed)
+    c = 30000 + np.cumsum(rng.normal(0, 45, n))
+    h = c + rng.uniform(5, 60, n)
+    l = c - rng.uniform(5, 60, n)
+    atr = rng.uniform(40, 90, n)
+    st = c - rng.normal(0, 80, n)
+    return c, h, l, atr, st
+
+
+def _reference_fills(plan, c, h, l, atr, st, start, fill=None):
+    """The pre-engine broker loop: per-bar ctx dict + update_trailing_stop + check_exits"""
+    fills = []
+    highest = lowest = c[start] if fill is None else fill
+    qty = 1.0
+    for i in range(start + 1, len(c)):
+        highest = max(highest, h[i])
+        lowest = min(lowest, l[i])
+        plan.bars_in_trade += 1
+        ctx = {"tick_size": 0.1, "close": c[i], "high": h[i], "low": l[i],
+               "highest_since_entry": highest, "lowest_since_entry": lowest,
+               "supertrend": st[i], "keltner_lo": c[i] - 2 * atr[i], "keltner_up": c[i] + 2 * atr[i]}
+        update_trailing_stop(plan, ctx, ctx, atr[i])
+        result = check_exits(plan, c[i], h[i], l[i])
+        if result:
+            reason, price, pct = result
+            fills.append((i, reason, price))
+            if pct:
+                qty -= qty * pct
+                if qty > 0.0001:
+                    continue
+            break
+    return fills
+
+
+def _engine_fills(plan, c, h, l, atr, st, start, fill=None):
+    broker = PaperFuturesBrokerV2(sink="memory")
+    broker.open_with_plan(start, 1.0, c[start] if fill is None else fill, 1.0, plan)
+    for i in range(start + 1, len(c)):
+        broker.on_candle(i, h[i], l[i], c[i], atr[i], st_line=st[i],
+                         kel_lo=c[i] - 2 * atr[i], kel_up=c[i] + 2 * atr[i])
+        if broker.position is None:
+            break
+    return [(r['ts_utc'], r['action'], r['price']) for r in broker.sink.trade_rows()[1:]]
+
+
+@pytest.mark.parametrize("style", STYLES)
+@pytest.mark.parametrize("regime", REGIMES)
+@pytest.mark.parametrize("side", ["LONG", "SHORT"])
+def test_exit_prices_and_reasons_unchanged(style, regime, side):
+    for seed in range(4):
+        c, h, l, atr, st = _bars(seed)
+        start = 20
+        params = {"sl_tp_style": style, "sl_atr_mult": 1.5, "time_stop_bars": 200, "breakeven_at_R": 0.8}
+        plan = build_exit_plan(side, c[start], atr[start], params, {"tick_size": 0.1}, regime)
+
+        expected = _reference_fills(copy.deepcopy(plan), c, h, l, atr, st, start)
+        assert expected
+        assert _engine_fills(plan, c, h, l, atr, st, start) == expected
+
+
+@pytest.mark.parametrize("style", ["atr_trailing", "chandelier"])
+@pytest.mark.parametrize("side", ["LONG", "SHORT"])
+def test_extremes_start_from_fill_price(style, side):
+    # the plan is built off the signal close; the fill lands elsewhere (slippage, gaps)
+    for seed in range(4):
+        c, h, l, atr, st = _bars(seed)
+        start = 20
+        params = {"sl_tp_style": style, "sl_atr_mult": 1.5, "time_stop_bars": 200, "breakeven_at_R": 0.8}
+        plan = build_exit_plan(side, c[start], atr[start], params, {"tick_size": 0.1})
+        for fill in (c[start] + 150, c[start] - 150):
+            expected = _reference_fills(copy.deepcopy(plan), c, h, l, atr, st, start, fill)
+            assert _engine_fills(copy.deepcopy(plan), c, h, l, atr, st, start, fill) == expected
+
+
+def test_exit_plan_state_synced_from_engine():
+    c, h, l, atr, st = _bars(1)
+    plan = build_exit_plan("LONG", c[0], atr[0], {"sl_tp_style": "atr_trailing", "time_stop_bars": 10_000},
+                           {"tick_size": 0.1})
+    broker = PaperFuturesBrokerV2(sink="memory")
+    broker.open_with_plan(0, 1.0, c[0], 1.0, plan)
+    initial_sl = plan.sl
+    for i in range(1, 6):
+        px = c[0] + 20 * i
+        broker.on_candle(i, px + 5, px - 5, px, 10.0)
+
+    assert broker.exit_plan is plan
+    assert plan.bars_in_trade == 5
+    assert plan.sl > initial_sl
+    assert plan.targets_hit == []
+
+    broker.on_candle(6, plan.targets[0].price + 1, c[0], c[0] + 120, 10.0)
+    broker._close(7, c[0], "manual")
+    assert broker.exit_plan is None
+    assert plan.bars_in_trade == 6
+    assert plan.targets_hit == [0]
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from backend.agents.config import AgentConfig
+from backend.agents.schemas import Candle
+from backend.agents.tools.market import MarketDataTool, fill_gaps_arrays, gap_fill_plan
+
+TF_MS = 300_000
+
+
+def _legacy_fill(candles):
+    """Loop implementation previously in MarketDataTool._detect_and_fill_gaps"""
+    out = []
+    for i in range(len(candles)):
+        out.append(candles[i])
+        if i < len(candles) - 1:
+            expected = candles[i].ts + TF_MS
+            while expected < candles[i + 1].ts:
+                px = candles[i].close
+                out.append(Candle(ts=expected, open=px, high=px, low=px, close=px, volume=0.0))
+                expected += TF_MS
+    return out
+
+
+def _candles(idx):
+    return [Candle(ts=k * TF_MS, open=100 + k, high=101 + k, low=99 + k, close=100.5 + k, volume=1 + k) for k in idx]
+
+
+class _NoExchange:
+    has = {}
+
+    def load_markets(self):
+        return {}
+
+
+def _tool(tmp_path, policy="ffill"):
+    config = AgentConfig(gap_fill_policy=policy, runs_dir=tmp_path / "runs", logs_dir=tmp_path / "logs")
+    return MarketDataTool(config, exchange=_NoExchange())
+
+
+def test_matches_legacy_loop_on_sorted_input(tmp_path):
+    candles = _candles([0, 1, 2, 5, 6, 10, 11, 12, 20])
+    assert _tool(tmp_path)._detect_and_fill_gaps(candles, "5m") == _legacy_fill(candles)
+
+
+def test_unsorted_and_duplicate_input(tmp_path):
+    candles = _candles([3, 0, 1, 1, 6, 3, 2])
+    tool = _tool(tmp_path)
+    out = tool._detect_and_fill_gaps(candles, "5m", "BTC/USDT:USDT")
+
+    assert [c.ts // TF_MS for c in out] == [0, 1, 2, 3, 4, 5, 6]
+    assert out[4].close == out[3].close and out[4].volume == 0.0
+    stats = tool.get_gap_stats()["BTC/USDT:USDT:5m"]
+    assert stats['unsorted'] and stats['duplicates'] == 2
+    assert stats['missing_bars'] == 2 and stats['gaps'] == 1 and stats['max_gap_bars'] == 2
+
+
+def test_first_duplicate_wins():
+    ts = np.array([0, TF_MS, TF_MS, 2 * TF_MS])
+    out_ts, src, filled, _ = gap_fill_plan(ts, TF_MS)
+    assert src.tolist() == [0, 1, 3]
+    assert not filled.any()
+
+
+@pytest.mark.parametrize("policy", ["ffill", "nan", "drop"])
+def test_array_policies(policy):
+    idx = np.array([4, 0, 1, 7])
+    c = 100.0 + idx
+    out, stats = fill_gaps_arrays(idx * TF_MS, c, c + 1, c - 1, c, np.ones(4), TF_MS, policy)
+
+    if policy == "drop":
+        assert (out['ts'] // TF_MS).tolist() == [0, 1, 4, 7]
+        assert stats['missing_bars'] == 0
+        return
+    assert (out['ts'] // TF_MS).tolist() == list(range(8))
+    assert stats['missing_bars'] == 4 and stats['gaps'] == 2
+    assert out['volume'][[2, 3, 5, 6]].tolist() == [0.0] * 4
+    if policy == "ffill":
+        assert out['close'][[2, 3]].tolist() == [101.0, 101.0]
+        assert out['high'][5] == 104.0
+    else:
+        assert np.isnan(out['close'][[2, 3, 5, 6]]).all()
+    assert out['high'][7] == 108.0
+
+
+def test_nan_policy_on_candles(tmp_path):
+    out = _tool(tmp_path, "nan")._detect_and_fill_gaps(_candles([0, 3]), "5m")
+    assert len(out) == 4 and np.isnan(out[1].close) and out[3].close == 103.5
+
+
+def test_no_gaps_returns_input_unchanged(tmp_path):
+    candles = _candles(range(50))
+    assert _tool(tmp_path)._detect_and_fill_gaps(candles, "5m") is candles
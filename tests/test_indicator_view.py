@@ -0,0 +1,86 @@
+import math
+
+import numpy as np
+import pytest
+
+from core.sessions import compute_session_features
+from strategies.adapter import IndicatorView, build_indicator_dict
+from strategies.registry import ALL_STRATEGIES
+
+FEATURES = [
+    "ema20", "ema50", "ema200", "sma20", "supertrend", "supertrend_dir", "rsi14", "rsi5",
+    "stoch_k", "stoch_d", "macd", "macd_signal", "macd_hist", "cci20", "williams_r", "adx14",
+    "atr14", "atr1h_pct", "bb_up", "bb_mid", "bb_lo", "keltner_up", "keltner_mid", "keltner_lo",
+    "up55", "dn55", "vwap", "obv", "mfi14",
+]
+
+
+def _dataset(n=400, seed=11, as_arrays=False):
+    rng = np.random.default_rng(seed)
+    c = 30000 + np.cumsum(rng.normal(0, 40, n))
+    o = np.concatenate([[c[0]], c[:-1]])
+    h = np.maximum(o, c) + rng.uniform(1, 40, n)
+    l = np.minimum(o, c) - rng.uniform(1, 40, n)
+    ts = (np.arange(n) * 300_000 + 1_710_000_000_000).tolist()
+    feats = {}
+    for k, name in enumerate(FEATURES):
+        col = c * (1 + rng.normal(0, 0.01, n)) if name not in ("rsi14", "rsi5", "stoch_k", "stoch_d") \
+            else rng.uniform(0, 100, n)
+        col[: 5 + k] = np.nan  # warm-up gaps of different lengths
+        feats[name] = col if as_arrays else col.tolist()
+    feats["supertrend_dir"] = rng.choice([-1, 1], n).tolist()
+    feats["regime"] = rng.choice(["BULL", "BEAR"], n).tolist()
+    feats["bb_bw_pct"] = rng.uniform(1, 8, n).tolist()
+    feats["ema200"] = [None] * 200 + feats["ema200"][200:] if not as_arrays else feats["ema200"]
+    sessions = compute_session_features(ts, h, l, c)
+    feats.update(sessions if as_arrays else {k: col.tolist() for k, col in sessions.items()})
+    return ts, o.tolist(), h.tolist(), l.tolist(), c.tolist(), feats
+
+
+def _same(a, b):
+    return a == b or (isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b))
+
+
+@pytest.mark.parametrize("as_arrays", [False, True])
+def test_view_matches_build_indicator_dict(as_arrays):
+    ts, o, h, l, c, feats = _dataset(as_arrays=as_arrays)
+    view = IndicatorView(ts, o, h, l, c, feats)
+
+    for i in range(len(ts)):
+        expected = build_indicator_dict(i, ts, o, h, l, c, feats)
+        view.at(i)
+        assert list(view) == list(expected)
+        for key, value in expected.items():
+            assert _same(view[key], value), (i, key)
+            assert _same(view.get(key), value), (i, key)
+
+
+def test_view_with_missing_features():
+    ts, o, h, l, c, _ = _dataset(n=60)
+    view = IndicatorView(ts, o, h, l, c, {})
+    for i in range(len(ts)):
+        assert view.at(i).to_dict() == build_indicator_dict(i, ts, o, h, l, c, {})
+
+
+def test_view_dict_protocol():
+    ts, o, h, l, c, feats = _dataset(n=50)
+    view = IndicatorView(ts, o, h, l, c, feats).at(30)
+    assert "rsi14" in view and "nope" not in view
+    assert view.get("nope", 7) == 7
+    with pytest.raises(KeyError):
+        view["nope"]
+    assert dict(view) == view.to_dict()
+    assert view == build_indicator_dict(30, ts, o, h, l, c, feats)
+    assert len(view) == len(view.to_dict())
+
+
+def test_strategies_get_same_signals():
+    ts, o, h, l, c, feats = _dataset(n=300)
+    view = IndicatorView(ts, o, h, l, c, feats)
+    state = {"position": None, "cooldown_bars_left": 0}
+
+    for name, fn in ALL_STRATEGIES.items():
+        for i in range(1, len(ts), 3):
+            bar = {"open": o[i], "high": h[i], "low": l[i], "close": c[i]}
+            expected = fn(bar, build_indicator_dict(i, ts, o, h, l, c, feats), dict(state), {})
+            assert fn(bar, view.at(i), dict(state), {}) == expected, (name, i)
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from core import indicators as batch
+from core.indicators_streaming import (
+    StreamingADX,
+    StreamingATR,
+    StreamingBollinger,
+    StreamingDonchian,
+    StreamingEMA,
+    StreamingIndicatorEngine,
+    StreamingRSI,
+    StreamingSupertrend,
+    StreamingVWAP,
+)
+
+
+def _random_walk(n=600, seed=7):
+    rng = np.random.default_rng(seed)
+    c = 50000 + np.cumsum(rng.normal(0, 60, n))
+    o = np.concatenate([[c[0]], c[:-1]])
+    h = np.maximum(o, c) + rng.uniform(0, 40, n)
+    l = np.minimum(o, c) - rng.uniform(0, 40, n)
+    v = rng.uniform(1, 100, n)
+    ts = np.arange(n) * 300_000
+    return ts, o, h, l, c, v
+
+
+TS, O, H, L, C, V = _random_walk()
+
+
+def _stream(ind, *cols):
+    return np.array([ind.update(*vals) for vals in zip(*cols)])
+
+
+def test_ema_parity():
+    np.testing.assert_allclose(_stream(StreamingEMA(20), C), batch.ema(C, 20), rtol=1e-10)
+
+
+def test_rsi_parity():
+    np.testing.assert_allclose(_stream(StreamingRSI(14), C), batch.rsi(C, 14), rtol=1e-8, atol=1e-8)
+
+
+def test_atr_parity():
+    np.testing.assert_allclose(_stream(StreamingATR(14), H, L, C), batch.atr(H, L, C, 14), rtol=1e-10)
+
+
+def test_adx_parity():
+    np.testing.assert_allclose(_stream(StreamingADX(14), H, L, C), batch.adx(H, L, C, 14), rtol=1e-8, atol=1e-8)
+
+
+def test_bollinger_width_and_trailing_mid():
+    out = _stream(StreamingBollinger(20, 2.0), C)
+    _, lo, up = batch.bollinger(C, 20, 2.0)
+    np.testing.assert_allclose(out[:, 2] - out[:, 1], up - lo, rtol=1e-6, atol=1e-6)
+    trailing_mid = np.array([C[max(0, i - 19):i + 1].mean() for i in range(len(C))])
+    np.testing.assert_allclose(out[:, 0], trailing_mid, rtol=1e-10)
+
+
+def test_donchian_parity():
+    out = _stream(StreamingDonchian(55), H, L)
+    dn, up, mid = batch.donchian(H, L, 55)
+    np.testing.assert_array_equal(out[:, 0], dn)
+    np.testing.assert_array_equal(out[:, 1], up)
+
+
+def test_supertrend_parity():
+    out = _stream(StreamingSupertrend(10, 3.0), H, L, C)
+    st, trend = batch.supertrend(H, L, C, 10, 3.0)
+    np.testing.assert_allclose(out[:, 0], st, rtol=1e-10)
+    np.testing.assert_array_equal(out[:, 1], trend)
+
+
+def test_vwap_parity():
+    np.testing.assert_allclose(_stream(StreamingVWAP(), H, L, C, V), batch.vwap(H, L, C, V), rtol=1e-10)
+
+
+def test_engine_returns_strategy_indicator_dict():
+    engine = StreamingIndicatorEngine()
+    for row in zip(TS, O, H, L, C, V):
+        bar = dict(zip(('ts', 'open', 'high', 'low', 'close', 'volume'), row))
+        ind = engine.on_bar_close('BTC/USDT:USDT', bar)
+
+    assert ind['rsi14'] == pytest.approx(batch.rsi(C, 14)[-1])
+    assert ind['rsi14_prev'] == pytest.approx(batch.rsi(C, 14)[-2])
+    assert ind['adx14_5bars_ago'] == pytest.approx(batch.adx(H, L, C, 14)[-6])
+    assert ind['supertrend_bull'] == (batch.supertrend(H, L, C, 10, 3.0)[1][-1] == 1)
+    assert ind['donchian_high20'] == H[-55:].max()
+    assert ind['close'] == C[-1]
+    for key in ('ema20', 'ema50', 'ema200', 'atr', 'bb_upper', 'bb_lower', 'vwap', 'is_london_session'):
+        assert key in ind
+
+
+def test_engine_ignores_replayed_bars():
+    engine = StreamingIndicatorEngine()
+    bars = [dict(ts=int(t), open=o, high=h, low=l, close=c, volume=v) for t, o, h, l, c, v in zip(TS, O, H, L, C, V)]
+    engine.update_many('ETH', bars[:300])
+    engine.update_many('ETH', bars[:400])  # overlapping window, as fetched every tick
+    assert engine.last_ts('ETH') == bars[399]['ts']
+    assert engine.get('ETH')['ema20'] == pytest.approx(batch.ema(C[:400], 20)[-1])
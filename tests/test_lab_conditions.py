@@ -0,0 +1,197 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from broker.paper_v1 import PaperFuturesBroker
+from lab.adapter import StrategyLabBacktestEngine
+from lab.conditions import ConditionCompiler, compile_entry_masks, resolve_column
+from lab.schemas import (
+    Condition,
+    ConditionOperator,
+    DataSpec,
+    Objective,
+    RiskSpec,
+    StrategyConfig,
+    StrategySide,
+)
+
+
+def _frame(n=600, seed=5):
+    rng = np.random.default_rng(seed)
+    close = 30000 + np.cumsum(rng.normal(0, 40, n))
+    df = pd.DataFrame({
+        "ts": np.arange(n, dtype=np.int64) * 300_000,
+        "open": close + rng.normal(0, 5, n),
+        "high": close + rng.uniform(5, 50, n),
+        "low": close - rng.uniform(5, 50, n),
+        "close": close,
+        "volume": rng.uniform(1, 100, n),
+        "rsi_14": rng.uniform(0, 100, n),
+        "ema_20": close + rng.normal(0, 30, n),
+        "ema_50": close + rng.normal(0, 30, n),
+        "atr_14": rng.uniform(20, 80, n),
+        "adx_14": rng.uniform(5, 50, n),
+        "macd": rng.normal(0, 1, n),
+        "macd_signal": rng.normal(0, 1, n),
+        "supertrend_direction": rng.choice([-1.0, 1.0], n),
+    })
+    for col in ("rsi_14", "ema_20", "ema_50", "macd"):
+        df.loc[rng.integers(0, n, 25), col] = np.nan
+    df.loc[:19, "ema_50"] = np.nan
+    return df
+
+
+def _config(long=None, short=None, warmup=50):
+    return StrategyConfig(
+        name="test",
+        long=long or StrategySide(),
+        short=short or StrategySide(),
+        data=DataSpec(exchange="binance", symbols=["BTC/USDT:USDT"], timeframe="5m", since=0, until=1),
+        risk=RiskSpec(),
+        objective=Objective(expression="sharpe"),
+        warmup_bars=warmup,
+    )
+
+
+def _cond(indicator, op, rhs=None, rhs_indicator=None):
+    return Condition(indicator=indicator, timeframe="5m", op=op, rhs=rhs, rhs_indicator=rhs_indicator)
+
+
+# Reference: the engine's former per-bar evaluator (df.iloc rows, one condition at a time)
+
+def _compare(lhs, op, rhs, prev_lhs=None, prev_rhs=None):
+    if op == ConditionOperator.GT:
+        return lhs > rhs
+    if op == ConditionOperator.LT:
+        return lhs < rhs
+    if op == ConditionOperator.GTE:
+        return lhs >= rhs
+    if op == ConditionOperator.LTE:
+        return lhs <= rhs
+    if op == ConditionOperator.EQ:
+        return abs(lhs - rhs) < 1e-9
+    if op == ConditionOperator.NE:
+        return abs(lhs - rhs) >= 1e-9
+    if op in (ConditionOperator.CROSSES_ABOVE, ConditionOperator.CROSSES_BELOW):
+        if prev_lhs is None or prev_rhs is None or pd.isna(prev_lhs) or pd.isna(prev_rhs):
+            return False
+        if op == ConditionOperator.CROSSES_ABOVE:
+            return prev_lhs <= prev_rhs and lhs > rhs
+        return prev_lhs >= prev_rhs and lhs < rhs
+    return False   # BETWEEN is not implemented
+
+
+def _evaluate_condition(row, prev_row, cond):
+    col = resolve_column(cond.indicator)
+    if col not in row.index or pd.isna(row[col]):
+        return False
+    if cond.rhs is not None:
+        rhs = cond.rhs
+    elif cond.rhs_indicator:
+        rhs_col = resolve_column(cond.rhs_indicator)
+        if rhs_col not in row.index or pd.isna(row[rhs_col]):
+            return False
+        rhs = row[rhs_col]
+    else:
+        return False
+
+    prev_lhs = prev_rhs = None
+    if prev_row is not None and cond.op in (ConditionOperator.CROSSES_ABOVE, ConditionOperator.CROSSES_BELOW):
+        prev_lhs = prev_row[col]
+        if cond.rhs is not None:
+            prev_rhs = cond.rhs
+        elif resolve_column(cond.rhs_indicator) in prev_row.index:
+            prev_rhs = prev_row[resolve_column(cond.rhs_indicator)]
+    return _compare(row[col], cond.op, rhs, prev_lhs, prev_rhs)
+
+
+def _evaluate_side(df, idx, side):
+    """All entry_all conditions (non-empty) or any entry_any condition"""
+    row = df.iloc[idx]
+    prev_row = df.iloc[idx - 1] if idx > 0 else None
+    all_ok = bool(side.entry_all) and all(_evaluate_condition(row, prev_row, c) for c in side.entry_all)
+    any_ok = any(_evaluate_condition(row, prev_row, c) for c in side.entry_any or [])
+    return all_ok or any_ok
+
+
+def _reference_mask(df, side):
+    return np.array([_evaluate_side(df, i, side) for i in range(len(df))])
+
+
+CONDITIONS = [
+    ("rsi", 50.0, None),
+    ("ema_20", None, "ema_50"),
+    ("close", None, "ema"),
+    ("macd", 0.0, None),
+    ("macd", None, "macd_signal"),
+    ("supertrend_direction", 1.0, None),
+    ("missing_indicator", 1.0, None),
+    ("rsi", None, "missing_indicator"),
+    ("rsi", None, None),
+]
+
+
+@pytest.mark.parametrize("op", list(ConditionOperator))
+@pytest.mark.parametrize("indicator,rhs,rhs_indicator", CONDITIONS)
+def test_operator_parity(op, indicator, rhs, rhs_indicator):
+    df = _frame()
+    side = StrategySide(entry_all=[_cond(indicator, op, rhs, rhs_indicator)])
+
+    expected = _reference_mask(df, side)
+    got = ConditionCompiler(df).side(side)
+    np.testing.assert_array_equal(got, expected)
+
+
+def test_all_any_groups_parity():
+    df = _frame(seed=9)
+    long = StrategySide(
+        entry_all=[_cond("rsi", ConditionOperator.LT, 60.0), _cond("ema_20", ConditionOperator.GT, rhs_indicator="ema_50"),
+                   _cond("adx", ConditionOperator.GTE, 15.0)],
+        entry_any=[_cond("macd", ConditionOperator.CROSSES_ABOVE, rhs_indicator="macd_signal"),
+                   _cond("rsi", ConditionOperator.CROSSES_BELOW, 30.0)],
+    )
+    short = StrategySide(entry_any=[_cond("close", ConditionOperator.CROSSES_BELOW, rhs_indicator="ema_20")])
+    config = _config(long=long, short=short)
+
+    long_mask, short_mask = compile_entry_masks(config, df)
+    np.testing.assert_array_equal(long_mask, _reference_mask(df, long))
+    np.testing.assert_array_equal(short_mask, _reference_mask(df, short))
+    assert long_mask.any() and short_mask.any()
+
+
+class PerBarEngine(StrategyLabBacktestEngine):
+    """The pre-compilation loop: df.iloc rows + _evaluate_side per bar"""
+
+    def _simulate_trading(self, df, broker):
+        for i in range(self.config.warmup_bars, len(df)):
+            row = df.iloc[i]
+            atr = row.get('atr_14', row['close'] * 0.01)
+            broker.on_candle(ts=int(row['ts']), high=row['high'], low=row['low'], close=row['close'],
+                             atr5=atr, spread_bps=1.0, taker_bps=5.0, maker_bps=2.0)
+            if broker.position is None:
+                self.signals_evaluated += 1
+                should_long = _evaluate_side(df, i, self.config.long)
+                should_short = _evaluate_side(df, i, self.config.short)
+                self.long_signals += bool(should_long)
+                self.short_signals += bool(should_short)
+                if should_long != should_short:
+                    self._open_position(broker, int(row['ts']), row['close'], "LONG" if should_long else "SHORT", atr)
+                    self.trades_opened += 1
+
+
+def test_simulation_matches_per_bar_loop(tmp_path):
+    df = _frame(n=1500, seed=2)
+    config = _config(
+        long=StrategySide(entry_all=[_cond("rsi", ConditionOperator.CROSSES_ABOVE, 40.0)]),
+        short=StrategySide(entry_all=[_cond("rsi", ConditionOperator.CROSSES_BELOW, 60.0)]),
+    )
+    runs = []
+    for cls, sub in ((PerBarEngine, "ref"), (StrategyLabBacktestEngine, "new")):
+        engine = cls(config, str(tmp_path / sub))
+        broker = PaperFuturesBroker(equity=10000.0, data_dir=str(tmp_path / sub))
+        engine._simulate_trading(df, broker)
+        runs.append((engine.signals_evaluated, engine.long_signals, engine.short_signals,
+                     engine.trades_opened, broker.equity, broker.equity_curve))
+
+    assert runs[0] == runs[1]
+    assert runs[1][3] > 0
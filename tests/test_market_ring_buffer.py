@@ -0,0 +1,114 @@
+import time
+
+import numpy as np
+import pytest
+
+from backend.agents.config import AgentConfig
+from backend.agents.schemas import Candle
+from backend.agents.tools.market import CandleRingBuffer, MarketDataTool
+
+TF_MS = 300_000
+T0 = 1_700_000_000_000 // TF_MS * TF_MS
+
+
+class FakeExchange:
+    """Serves a deterministic 5m series up to the (patched) current time"""
+
+    has = {'fetchTickers': False}
+
+    def __init__(self):
+        self.requested_bars = 0
+
+    def load_markets(self):
+        return {}
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=100):
+        now = int(time.time() * 1000)
+        first = max(since, T0) // TF_MS * TF_MS
+        rows = []
+        ts = first
+        while ts <= now and len(rows) < limit:
+            k = (ts - T0) // TF_MS
+            px = 100.0 + k * 0.1
+            rows.append([ts, px, px + 1, px - 1, px + 0.05, 1.0 + k])
+            ts += TF_MS
+        self.requested_bars += len(rows)
+        return rows
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [T0 / 1000 + 2000 * 300]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def market(tmp_path):
+    config = AgentConfig(data_lookback_bars=500, runs_dir=tmp_path / "runs", logs_dir=tmp_path / "logs")
+    tool = MarketDataTool(config, exchange=FakeExchange())
+    tool._db_enabled = False
+    return tool
+
+
+def test_second_lookup_within_ttl_is_a_hit(market, clock):
+    first = market.get_recent_bars("BTC/USDT:USDT", "5m", 500)
+    fetched = market.exchange.requested_bars
+    again = market.get_recent_bars("BTC/USDT:USDT", "5m", 500)
+
+    assert again == first
+    assert market.exchange.requested_bars == fetched
+    assert market.get_cache_stats()['hits'] == 1
+
+
+def test_smaller_lookback_is_served_from_the_same_buffer(market, clock):
+    market.get_recent_bars("BTC/USDT:USDT", "5m", 500)
+    fetched = market.exchange.requested_bars
+    bars = market.get_recent_bars("BTC/USDT:USDT", "5m", 120)
+
+    assert len(bars) == 120
+    assert market.exchange.requested_bars == fetched
+
+
+def test_refresh_fetches_only_new_bars(market, clock):
+    market.get_recent_bars("BTC/USDT:USDT", "5m", 500)
+    full_tick = market.pop_tick_stats()
+
+    clock[0] += 3 * 300  # three new bars close
+    bars = market.get_recent_bars("BTC/USDT:USDT", "5m", 500)
+    delta_tick = market.pop_tick_stats()
+
+    assert delta_tick['bars_fetched_tick'] <= 4
+    assert delta_tick['bytes_fetched_tick'] < full_tick['bytes_fetched_tick'] / 50
+    assert market.get_cache_stats()['delta_refreshes'] == 1
+
+    # Same window a fresh tool would return
+    fresh = MarketDataTool(market.config, exchange=FakeExchange())
+    fresh._db_enabled = False
+    assert [c.ts for c in bars] == [c.ts for c in fresh.get_recent_bars("BTC/USDT:USDT", "5m", 500)]
+    assert bars[-1].ts == int(clock[0] * 1000) // TF_MS * TF_MS
+
+
+def test_views_are_zero_copy_and_match_candles(market, clock):
+    view = market.get_recent_arrays("BTC/USDT:USDT", "5m", 50)
+    bars = market.get_recent_bars("BTC/USDT:USDT", "5m", 50)
+
+    buf = next(iter(market.cache._buffers.values()))
+    assert np.shares_memory(view['close'], buf._ohlcv)
+    assert np.shares_memory(view['ts'], buf._ts)
+    np.testing.assert_array_equal(view['ts'], [c.ts for c in bars])
+    np.testing.assert_array_equal(view['close'], [c.close for c in bars])
+
+
+def test_ring_buffer_wraps_and_replaces_forming_bar():
+    buf = CandleRingBuffer(capacity=8)
+    candles = [Candle(ts=T0 + k * TF_MS, open=10 + k, high=11 + k, low=9 + k, close=10.5 + k, volume=1) for k in range(20)]
+    buf.extend(candles)
+    buf.extend([Candle(ts=candles[-1].ts, open=29, high=40, low=28, close=39, volume=5)])
+
+    assert len(buf) == 8
+    view = buf.view(8)
+    np.testing.assert_array_equal(view['ts'], [c.ts for c in candles[-8:]])
+    assert view['close'][-1] == 39
+    assert buf.candles(3)[-1].close == 39
+    assert buf.view(3)['close'].tolist() == [c.close for c in buf.candles(3)]
@@ -0,0 +1,153 @@
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pytest
+import torch
+from sklearn.preprocessing import StandardScaler
+
+from backend.agents.policies.ml_policy import MLPolicy
+from backend.agents.schemas import ActionIntent, Candle, Observation, OrderSide, PortfolioState, Position
+from core.features import compute_feature_rows
+from ml.bundle import BUNDLE_FILE, cached_bundle_predictions, export_bundle, load_bundle, load_or_export
+from ml.inference import build_feature_matrix, load_model, predict_proba
+from ml.model import MLP
+from ml.train import save_model
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _candles(n=1200, seed=5):
+    rng = np.random.default_rng(seed)
+    c = 30000 + np.cumsum(rng.normal(0, 40, n))
+    o = np.concatenate([[c[0]], c[:-1]])
+    ts = 1_700_000_000 + 300 * np.arange(n)
+    return ts.tolist(), o.tolist(), (np.maximum(o, c) + 10).tolist(), (np.minimum(o, c) - 10).tolist(), c.tolist()
+
+
+@pytest.fixture(scope="module")
+def X():
+    ts, o, h, l, c = _candles()
+    return build_feature_matrix(compute_feature_rows(ts, o, h, l, c), c)
+
+
+def _model_dir(path, X, hidden=128, seed=0):
+    torch.manual_seed(seed)
+    model = MLP(in_dim=12, hidden=hidden, dropout=0.1)
+    save_model(model, StandardScaler().fit(np.nan_to_num(X)), [f"f{k}" for k in range(12)], 12, hidden, str(path))
+    return str(path)
+
+
+@pytest.mark.parametrize("hidden", [64, 128, 256])
+def test_numpy_forward_matches_torch(tmp_path, X, hidden):
+    model_dir = _model_dir(tmp_path, X, hidden)
+    model, scaler, _, _ = load_model(model_dir)
+    model.to("cpu")
+    expected = predict_proba(model, scaler, X, "cpu")
+    bundle = load_bundle(model_dir)
+    for batch_size in (1, 97, 65536):
+        got = bundle.predict_proba(X, batch_size)
+        assert got.shape == expected.shape and got.dtype == np.float32
+        np.testing.assert_allclose(got, expected, rtol=0, atol=1e-6, equal_nan=True)
+    assert bundle.meta["hidden"] == hidden and bundle.in_dim == 12
+
+
+def test_extreme_logits_saturate(tmp_path, X):
+    sd = {k: v.clone() for k, v in MLP(in_dim=12, hidden=8).state_dict().items()}
+    sd["net.6.bias"] = torch.tensor([500.0, -500.0])
+    scaler = StandardScaler().fit(np.nan_to_num(X))
+    export_bundle(sd, scaler, {"feat_cols": [], "horizon": 12, "hidden": 8}, str(tmp_path))
+    with np.errstate(all="raise"):
+        probs = load_bundle(str(tmp_path)).predict_proba(np.nan_to_num(X[:5]))
+    assert (probs[:, 0] == 1.0).all() and (probs[:, 1] == 0.0).all()
+
+
+def test_load_or_export_refreshes_stale_bundle(tmp_path, X):
+    model_dir = _model_dir(tmp_path, X)
+    os.remove(os.path.join(model_dir, BUNDLE_FILE))
+    first = load_or_export(model_dir)
+
+    torch.manual_seed(1)
+    torch.save(MLP(in_dim=12).state_dict(), os.path.join(model_dir, "model.pt"))
+    later = time.time() + 5
+    os.utime(os.path.join(model_dir, "model.pt"), (later, later))
+    second = load_or_export(model_dir)
+    assert second.checksum != first.checksum
+    model, scaler, _, _ = load_model(model_dir)
+    np.testing.assert_allclose(second.predict_proba(X), predict_proba(model.to("cpu"), scaler, X), atol=1e-6, equal_nan=True)
+
+
+def test_bundle_prediction_cache(tmp_path, X):
+    model_dir = _model_dir(tmp_path / "m", X)
+    bundle = load_bundle(model_dir)
+    cache_dir = str(tmp_path / "cache")
+    first = cached_bundle_predictions(bundle, X, cache_dir=cache_dir)
+    bundle.predict_proba = None   # a hit must not run the forward pass
+    np.testing.assert_array_equal(cached_bundle_predictions(bundle, X, cache_dir=cache_dir), first)
+    assert len(os.listdir(cache_dir)) == 1
+
+
+def test_bundle_path_does_not_import_torch(tmp_path, X):
+    model_dir = _model_dir(tmp_path, X)
+    code = ("import sys, numpy as np; from ml.bundle import load_bundle; "
+            f"p = load_bundle({model_dir!r}).predict_proba(np.zeros((3, 12))); "
+            "assert p.shape == (3, 2); "
+            "print(sorted(m for m in ('torch', 'sklearn', 'joblib') if m in sys.modules))")
+    out = subprocess.check_output([sys.executable, "-c", code], cwd=ROOT, text=True)
+    assert out.strip().splitlines()[-1] == "[]"
+
+
+def _observation(positions=()):
+    ts, o, h, l, c = _candles(300)
+    candles = [Candle(ts=t * 1000, open=a, high=b, low=d, close=e, volume=1.0) for t, a, b, d, e in zip(ts, o, h, l, c)]
+    now = candles[-1].ts
+    portfolio = PortfolioState(cash=10000.0, equity=10000.0, timestamp=now, positions=[
+        Position(symbol=s, side="long", quantity=0.1, entry_price=30000.0, current_price=30000.0, unrealized_pnl=0.0, opened_at=now)
+        for s in positions])
+    return Observation(timestamp=now, candles={"BTC/USDT:USDT": candles}, portfolio=portfolio)
+
+
+@pytest.mark.parametrize("bias,positions,intent,side", [
+    ((50.0, -50.0), (), ActionIntent.OPEN_LONG, OrderSide.BUY),
+    ((-50.0, 50.0), ("BTC/USDT:USDT",), ActionIntent.CLOSE_LONG, OrderSide.SELL),
+    ((-50.0, 50.0), (), ActionIntent.HOLD, None),
+])
+def test_ml_policy_decisions(tmp_path, X, bias, positions, intent, side):
+    sd = {k: v.clone() for k, v in MLP(in_dim=12, hidden=8).state_dict().items()}
+    sd["net.6.weight"].zero_()
+    sd["net.6.bias"] = torch.tensor(bias)
+    export_bundle(sd, StandardScaler().fit(np.nan_to_num(X)), {"feat_cols": [], "horizon": 12, "hidden": 8}, str(tmp_path))
+
+    action = MLPolicy(model_dir=str(tmp_path), p_entry=0.6).decide(_observation(positions))
+    assert action.intent == intent
+    assert [o.side for o in action.orders] == ([side] if side else [])
+
+
+def test_ml_policy_needs_bundle(tmp_path):
+    with pytest.raises(FileNotFoundError, match="ml.bundle"):
+        MLPolicy(model_dir=str(tmp_path))
+
+
+def test_ml_policy_caches_feature_rows_per_bar(tmp_path, X, monkeypatch):
+    from backend.agents.policies import ml_policy
+
+    calls = []
+    real = ml_policy.compute_feature_rows
+    monkeypatch.setattr(ml_policy, "compute_feature_rows", lambda *a: calls.append(1) or real(*a))
+    policy = MLPolicy(model_dir=_model_dir(tmp_path, X, hidden=8))
+    observation = _observation()
+    first = policy.decide(observation)
+    for _ in range(5):
+        assert policy.decide(observation) == first
+    assert len(calls) == 1
+
+    candles = observation.candles["BTC/USDT:USDT"]
+    moved = candles[:-1] + [candles[-1].copy(update={"close": candles[-1].close + 25})]
+    expected = MLPolicy(model_dir=str(tmp_path)).probabilities(moved)
+    assert policy.probabilities(moved, "BTC/USDT:USDT") == expected
+    assert len(calls) == 3   # the forming bar's close changed: recomputed (plus the uncached reference)
+    policy.reset()
+    policy.probabilities(moved, "BTC/USDT:USDT")
+    assert len(calls) == 4
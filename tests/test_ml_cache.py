@@ -0,0 +1,135 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+import ml.data
+from core.database import connect, insert_candles
+from ml.backtest import backtest_inputs
+from ml.cache import ArrayCache, fingerprint
+from ml.data import build_dataset, dataset_features, dataset_labels
+
+
+def _candles(n=1500, seed=0):
+    rng = np.random.default_rng(seed)
+    c = 30000 + np.cumsum(rng.normal(0, 40, n))
+    o = np.concatenate([[c[0]], c[:-1]])
+    ts = 1_700_000_000 + 300 * np.arange(n)
+    return ts.tolist(), o.tolist(), (np.maximum(o, c) + 10).tolist(), (np.minimum(o, c) - 10).tolist(), c.tolist()
+
+
+@pytest.fixture
+def computes(monkeypatch):
+    calls = []
+    real = ml.data.feature_frame
+
+    def counting(*args):
+        calls.append(1)
+        return real(*args)
+    monkeypatch.setattr(ml.data, "feature_frame", counting)
+    return calls
+
+
+def test_features_hit_matches_miss(tmp_path, computes):
+    cache = ArrayCache(str(tmp_path))
+    bars = _candles()
+    fresh = dataset_features(*bars)
+    first = dataset_features(*bars, cache=cache)
+    second = dataset_features(*bars, cache=cache)
+    assert len(computes) == 2
+    for name in ("X", "close", "ts"):
+        np.testing.assert_array_equal(first[name], fresh[name])
+        np.testing.assert_array_equal(second[name], fresh[name])
+        assert second[name].dtype == fresh[name].dtype
+
+
+@pytest.mark.parametrize("change", ["close", "high", "ts", "length"])
+def test_features_invalidated_by_candles(tmp_path, computes, change):
+    cache = ArrayCache(str(tmp_path))
+    bars = _candles()
+    dataset_features(*bars, cache=cache)
+    ts, o, h, l, c = (list(x) for x in bars)
+    if change == "close":
+        c[700] += 0.01
+    elif change == "high":
+        h[-1] += 0.01
+    elif change == "ts":
+        ts = [t + 300 for t in ts]
+    else:
+        ts, o, h, l, c = ts[1:], o[1:], h[1:], l[1:], c[1:]
+    changed = dataset_features(ts, o, h, l, c, cache=cache)
+    assert len(computes) == 2
+    np.testing.assert_array_equal(changed["X"], dataset_features(ts, o, h, l, c)["X"])
+
+
+def test_features_invalidated_by_code_change(tmp_path, computes, monkeypatch):
+    cache = ArrayCache(str(tmp_path))
+    bars = _candles()
+    dataset_features(*bars, cache=cache)
+    monkeypatch.setattr(ml.data, "source_digest", lambda *modules: "edited")
+    dataset_features(*bars, cache=cache)
+    assert len(computes) == 2
+
+
+@pytest.mark.parametrize("horizon,fee_bps", [(12, 5.0), (24, 5.0), (12, 2.5)])
+def test_labels_keyed_by_horizon_and_fee(tmp_path, horizon, fee_bps):
+    cache = ArrayCache(str(tmp_path))
+    close = np.asarray(_candles()[4])
+    base = dataset_labels(close, 12, 5.0, cache)
+    got = dataset_labels(close, horizon, fee_bps, cache)
+    want = ml.data.make_labels(close, horizon, fee_bps)
+    np.testing.assert_array_equal(got[0], want[0])
+    np.testing.assert_array_equal(got[1], want[1])
+    assert len(cache.entries()) == (1 if (horizon, fee_bps) == (12, 5.0) else 2)
+    assert base[0].dtype == np.float32
+
+
+def test_build_dataset_cached(tmp_path, computes):
+    db = str(tmp_path / "candles.db")
+    n = 288 * 10
+    ts, o, h, l, c = _candles(n)
+    now = int(time.time()) // 300 * 300
+    insert_candles(connect(db), list(zip([now - 300 * (n - 1 - k) for k in range(n)], o, h, l, c, [1.0] * n)))
+    cache_dir = str(tmp_path / "cache")
+    plain = build_dataset(db, days=10, cache_dir=None)
+    cold = build_dataset(db, days=10, cache_dir=cache_dir)
+    warm = build_dataset(db, days=10, cache_dir=cache_dir)
+    assert len(computes) == 2
+    for key in ("X_train", "yL_train", "yS_train", "X_oos", "yL_oos", "yS_oos", "ts_oos"):
+        np.testing.assert_array_equal(cold[key], plain[key])
+        np.testing.assert_array_equal(warm[key], plain[key])
+
+
+def test_backtest_inputs_cached(tmp_path):
+    cache = ArrayCache(str(tmp_path))
+    bars = _candles()
+    plain = backtest_inputs(*bars)
+    backtest_inputs(*bars, cache=cache)
+    warm = backtest_inputs(*bars, cache=cache)
+    assert warm["atr14"] == plain["atr14"] and isinstance(warm["atr14"], list)
+    for name in ("st_line", "kel_lo", "kel_up", "X"):
+        np.testing.assert_array_equal(warm[name], plain[name])
+    assert warm["c"] is bars[4]
+
+
+def test_lru_eviction_by_size(tmp_path):
+    arr = np.zeros(1000, dtype=np.float64)
+    cache = ArrayCache(str(tmp_path))
+    for k, key in enumerate(("a", "b", "c")):
+        cache.put(key, {"v": arr})
+        cache.max_bytes = 3 * cache.entries()[0][1]   # room for three entries (.npy header included)
+        os.utime(os.path.join(cache.root, key), (k, k))
+    assert cache.get("a") is not None   # a becomes most recently used
+    cache.put("d", {"v": arr})
+    assert [key for key, _, _ in cache.entries()] == ["c", "a", "d"]
+    assert cache.get("b") is None
+    assert cache.size_bytes() <= cache.max_bytes
+
+
+def test_fingerprint_distinguishes_dtype_and_shape():
+    a = np.arange(6, dtype=np.float64)
+    assert fingerprint(a) != fingerprint(a.astype(np.float32))
+    assert fingerprint(a) != fingerprint(a.reshape(2, 3))
+    assert fingerprint(a, 12) != fingerprint(a, 13)
+    assert fingerprint(a.copy()) == fingerprint(a)
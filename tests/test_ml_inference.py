@@ -0,0 +1,122 @@
+import json
+import os
+
+import joblib
+import numpy as np
+import pytest
+import torch
+from sklearn.preprocessing import StandardScaler
+
+from core.features import compute_feature_rows
+from ml import inference
+from ml.inference import (
+    build_feature_matrix,
+    cached_predictions,
+    load_model,
+    model_checksum,
+    predict_proba,
+)
+from ml.model import MLP
+
+
+def _candles(n=1500, seed=4):
+    rng = np.random.default_rng(seed)
+    c = 30000 + np.cumsum(rng.normal(0, 40, n))
+    o = np.concatenate([[c[0]], c[:-1]])
+    h = np.maximum(o, c) + rng.uniform(1, 40, n)
+    l = np.minimum(o, c) - rng.uniform(1, 40, n)
+    ts = np.arange(n) * 300 + 1_700_000_000
+    return ts.tolist(), o.tolist(), h.tolist(), l.tolist(), c.tolist()
+
+
+def _per_bar_x(fr, close):
+    """The input vector ml/backtest.py used to build inside its loop"""
+    ema20, ema50, atr14, rsi5, rsi14, bb_lo, bb_up, regime, macro, atr1h_pct = \
+        fr[1], fr[2], fr[3], fr[4], fr[5], fr[8], fr[9], fr[12], fr[13], fr[14]
+    return [
+        (close - ema20) / close if close else 0.0,
+        (close - ema50) / close if close else 0.0,
+        rsi5 or 0.0, rsi14 or 0.0,
+        fr[6] or 0.0,
+        (close - bb_lo) / ((bb_up - bb_lo) + 1e-9) if close else 0.0,
+        atr14 / close * 100 if close else 0.0,
+        atr1h_pct or 0.0,
+        1.0 if regime == 'UPTREND' else 0.0,
+        1.0 if regime == 'DOWNTREND' else 0.0,
+        1.0 if regime == 'RANGE' else 0.0,
+        1.0 if macro == 'ABOVE' else (0.0 if macro == 'BELOW' else -1.0),
+    ]
+
+
+@pytest.fixture(scope="module")
+def data():
+    ts, o, h, l, c = _candles()
+    rows = compute_feature_rows(ts, o, h, l, c)
+    return rows, c
+
+
+@pytest.fixture
+def model_dir(tmp_path, data):
+    rows, c = data
+    torch.manual_seed(0)
+    model = MLP(in_dim=12, hidden=128, dropout=0.1)
+    X = np.nan_to_num(build_feature_matrix(rows, c))
+    torch.save(model.state_dict(), tmp_path / "model.pt")
+    joblib.dump(StandardScaler().fit(X), tmp_path / "scaler.pkl")
+    (tmp_path / "meta.json").write_text(json.dumps({"feat_cols": [f"f{k}" for k in range(12)], "horizon": 12}))
+    return str(tmp_path)
+
+
+def test_feature_matrix_matches_per_bar(data):
+    rows, c = data
+    X = build_feature_matrix(rows, c)
+    expected = np.array([_per_bar_x(fr, c[i]) for i, fr in enumerate(rows)])
+    np.testing.assert_allclose(X, expected, rtol=1e-12, atol=0, equal_nan=True)
+
+
+def test_feature_matrix_zero_close():
+    rows = [[0, 1.0, 2.0, 3.0, 0.0, 50.0, 20.0, 0, 1.0, 2.0, 0, 0, "RANGE", "N/A", 0.5]]
+    assert build_feature_matrix(rows, [0.0]).tolist() == [_per_bar_x(rows[0], 0.0)]
+
+
+@pytest.mark.parametrize("batch_size", [1, 97, 65536])
+def test_predictions_match_single_sample(data, model_dir, batch_size):
+    rows, c = data
+    model, scaler, _, device = load_model(model_dir)
+    model.to("cpu")
+
+    expected = []
+    for i, fr in enumerate(rows):
+        x = scaler.transform([_per_bar_x(fr, c[i])]).astype("float32")
+        with torch.no_grad():
+            expected.append(torch.sigmoid(model(torch.tensor(x))).numpy()[0])
+
+    got = predict_proba(model, scaler, build_feature_matrix(rows, c), "cpu", batch_size=batch_size)
+    assert got.shape == (len(rows), 2) and got.dtype == np.float32
+    np.testing.assert_allclose(got, np.array(expected), rtol=0, atol=1e-6, equal_nan=True)
+
+
+def test_prediction_cache(data, model_dir, tmp_path, monkeypatch):
+    rows, c = data
+    model, scaler, _, _ = load_model(model_dir)
+    model.to("cpu")
+    X = build_feature_matrix(rows, c)
+    cache_dir = str(tmp_path / "cache")
+
+    first = cached_predictions(model, scaler, X, model_dir, "cpu", cache_dir=cache_dir)
+    assert len(os.listdir(cache_dir)) == 1
+
+    def fail(*a, **k):
+        raise AssertionError("cache miss")
+
+    monkeypatch.setattr(inference, "predict_proba", fail)
+    np.testing.assert_array_equal(cached_predictions(model, scaler, X, model_dir, "cpu", cache_dir=cache_dir), first)
+    monkeypatch.undo()
+
+    # different data or a retrained model -> new entries
+    cached_predictions(model, scaler, X[:-10], model_dir, "cpu", cache_dir=cache_dir)
+    old = model_checksum(model_dir)
+    torch.save(MLP(in_dim=12).state_dict(), os.path.join(model_dir, "model.pt"))
+    assert model_checksum(model_dir) != old
+    cached_predictions(model, scaler, X, model_dir, "cpu", cache_dir=cache_dir)
+    assert len(os.listdir(cache_dir)) == 3
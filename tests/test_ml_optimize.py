@@ -0,0 +1,91 @@
+import time
+
+import numpy as np
+import optuna
+import pandas as pd
+import pytest
+
+from core.database import connect, insert_candles
+from ml.data import build_dataset, make_labels
+from ml.optimize import load_shared, make_objective, prepare_shared, run_study
+
+CFG = {"risk": {"sl_tp_style": "atr_fixed"}, "sizing": {"mode": "usd", "usd": 1000, "leverage": 3}}
+
+PARAMS = {
+    "horizon": 12, "hidden": 64, "dropout": 0.1, "lr": 1e-3, "epochs": 6, "batch": 1024, "p_entry": 0.55,
+    "sl_style": "atr_fixed", "sl_atr": 2.0, "tp_rr": 2.0, "breakeven_R": 1.0, "trail_atr": 2.0, "time_stop": 96,
+    "allow_shorts": 1, "size_mode": "usd", "usd_amt": 1000.0, "portfolio_pct": 1.0, "leverage": 3,
+}
+
+
+@pytest.fixture(scope="module")
+def db_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("db") / "candles.db")
+    n = 24 * 12 * 21
+    rng = np.random.default_rng(1)
+    c = 30000 + np.cumsum(rng.normal(0, 40, n))
+    o = np.concatenate([[c[0]], c[:-1]])
+    ts = int(time.time()) // 300 * 300 - 300 * np.arange(n)[::-1]
+    rows = [(int(t), float(a), float(max(a, b) + 10), float(min(a, b) - 10), float(b), 1.0)
+            for t, a, b in zip(ts, o, c)]
+    insert_candles(connect(path), rows)
+    return path
+
+
+@pytest.fixture(scope="module")
+def shared(db_path, tmp_path_factory):
+    return load_shared(prepare_shared(db_path, 21, str(tmp_path_factory.mktemp("shared")), cache_dir=None))
+
+
+def test_labels_match_legacy_formula():
+    c = pd.Series(30000 + np.cumsum(np.random.default_rng(0).normal(0, 40, 500)))
+    fwd = (c.shift(-12) - c) / c
+    thr = 5.0 / 10000.0 * 2.0
+    yL, yS = make_labels(c, 12, 5.0)
+    np.testing.assert_array_equal(yL, (fwd > thr).astype(int).fillna(0).values.astype("float32"))
+    np.testing.assert_array_equal(yS, (fwd < -thr).astype(int).fillna(0).values.astype("float32"))
+
+
+def test_shared_arrays_match_dataset(db_path, shared):
+    data = build_dataset(db_path, days=21, horizon=12, cache_dir=None)
+    n_tr = len(data["X_train"])
+    np.testing.assert_array_equal(shared["train_X"][:n_tr], data["X_train"])
+    np.testing.assert_array_equal(shared["train_X"][n_tr:], data["X_oos"])
+    assert isinstance(shared["train_X"], np.memmap) and not shared["train_X"].flags.writeable
+    # backtest window is the last third of the history
+    assert 0.3 < len(shared["bt_c"]) / len(shared["train_close"]) < 0.4
+    assert shared["bt_X"].shape == (len(shared["bt_c"]), 12)
+
+
+def test_in_process_objective(shared):
+    study = optuna.create_study(direction="maximize")
+    study.enqueue_trial(PARAMS)
+    study.optimize(make_objective(shared, CFG), n_trials=1)
+    trial = study.trials[0]
+    assert trial.state == optuna.trial.TrialState.COMPLETE
+    assert set(trial.user_attrs["metrics"]) >= {"sharpe_ann", "trades", "maxdd_pct"}
+    assert len(trial.intermediate_values) == PARAMS["epochs"]
+    assert all(v < 0 for v in trial.intermediate_values.values())
+
+
+class AlwaysPrune(optuna.pruners.BasePruner):
+    def prune(self, study, trial):
+        return True
+
+
+def test_pruned_after_first_epoch(shared):
+    study = optuna.create_study(direction="maximize", pruner=AlwaysPrune())
+    study.enqueue_trial(PARAMS)
+    study.optimize(make_objective(shared, CFG), n_trials=1)
+    trial = study.trials[0]
+    assert trial.state == optuna.trial.TrialState.PRUNED
+    assert list(trial.intermediate_values) == [0]
+    assert "metrics" not in trial.user_attrs
+
+
+def test_run_study_with_worker_processes(db_path, tmp_path):
+    url = f"sqlite:///{tmp_path / 'study.db'}"
+    study = run_study("t", url, db_path, 21, 2, CFG, workers=2, pruner=optuna.pruners.NopPruner(), cache_dir=None)
+    done = [t for t in study.trials if t.state == optuna.trial.TrialState.COMPLETE]
+    assert len(done) == 2
+    assert all("sharpe_ann" in t.user_attrs["metrics"] for t in done)
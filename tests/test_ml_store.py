@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+import torch
+from sklearn.preprocessing import StandardScaler
+
+from ml.data import FEATURE_COLUMNS, feature_frame, make_labels
+from ml.store import ChunkShuffleDataset, TrainingStore, write_symbol
+from ml.train import train_mlp_store
+
+SYMBOLS = {"BTC/USDT:USDT": 3000, "ETH/USDT:USDT": 2200}
+
+
+def _candles(n, seed):
+    rng = np.random.default_rng(seed)
+    c = 30000 + np.cumsum(rng.normal(0, 40, n))
+    o = np.concatenate([[c[0]], c[:-1]])
+    ts = 1_700_000_000 + 300 * np.arange(n)
+    return ts.tolist(), o.tolist(), (np.maximum(o, c) + 10).tolist(), (np.minimum(o, c) - 10).tolist(), c.tolist()
+
+
+@pytest.fixture(scope="module")
+def built(tmp_path_factory):
+    root = str(tmp_path_factory.mktemp("store"))
+    candles = {}
+    for k, (symbol, n) in enumerate(SYMBOLS.items()):
+        candles[symbol] = _candles(n, k)
+        write_symbol(root, symbol, *candles[symbol], horizon=12, chunk_rows=500)
+    return TrainingStore(root), candles
+
+
+def _scaler(mean, scale):
+    s = StandardScaler()
+    s.mean_, s.scale_ = np.asarray(mean, dtype=float), np.asarray(scale, dtype=float)
+    return s
+
+
+def test_store_matches_in_memory_dataset(built):
+    store, candles = built
+    assert list(store.symbols) == list(SYMBOLS)
+    for symbol, bars in candles.items():
+        df = feature_frame(*bars)
+        yL, yS = make_labels(df["c"], 12)
+        np.testing.assert_array_equal(store.features(symbol), df[FEATURE_COLUMNS].fillna(0.0).values.astype("float32"))
+        np.testing.assert_array_equal(store.column("y_long", symbol), yL)
+        np.testing.assert_array_equal(store.column("y_short", symbol), yS)
+        np.testing.assert_array_equal(store.column("rsi14", symbol), df["rsi14"].fillna(0.0).values.astype("float32"))
+        assert isinstance(store.features(symbol), np.memmap)
+    with pytest.raises(KeyError):
+        store.column("nope", "BTC/USDT:USDT")
+
+
+def test_chunks_cover_split_once(built):
+    store, _ = built
+    for split in ("train", "oos"):
+        chunks = store.chunks(split)
+        assert all(hi - lo <= store.chunk_rows for _, lo, hi in chunks)
+        assert store.rows(split) == sum(int(n * 0.7) if split == "train" else n - int(n * 0.7) for n in SYMBOLS.values())
+
+
+def test_stream_yields_every_train_row_once_per_epoch(built):
+    store, _ = built
+    ds = ChunkShuffleDataset(store, 256, _scaler(np.zeros(12), np.ones(12)), seed=3)
+    expected = np.concatenate([np.hstack(store.read(*ch)) for ch in store.chunks("train")])
+
+    epochs = []
+    for ep in range(2):
+        ds.set_epoch(ep)
+        got = np.concatenate([torch.cat(b, dim=1).numpy() for b in ds])
+        assert len(got) == len(expected)
+        np.testing.assert_array_equal(got[np.lexsort(got.T)], expected[np.lexsort(expected.T)])
+        epochs.append(got)
+    assert not np.array_equal(epochs[0], epochs[1])
+
+    ds.set_epoch(0)
+    np.testing.assert_array_equal(np.concatenate([torch.cat(b, dim=1).numpy() for b in ds]), epochs[0])
+
+
+def test_chunked_scaler_matches_full_fit(built):
+    store, _ = built
+    train = np.concatenate([store.read(*ch)[0] for ch in store.chunks("train")])
+    full = StandardScaler().fit(train)
+    chunked = store.fit_scaler()
+    np.testing.assert_allclose(chunked.mean_, full.mean_, rtol=1e-6)
+    np.testing.assert_allclose(chunked.scale_, full.scale_, rtol=1e-5)
+
+
+def test_store_rejects_different_spec(built, tmp_path):
+    store, candles = built
+    with pytest.raises(ValueError):
+        write_symbol(store.root, "SOL/USDT:USDT", *candles["ETH/USDT:USDT"], horizon=24)
+
+
+def test_train_from_store(built):
+    store, _ = built
+    losses = []
+    torch.manual_seed(0)
+    model, scaler = train_mlp_store(store, hidden=32, epochs=2, batch=256, on_epoch=lambda ep, v: losses.append(v))
+    assert len(losses) == 2 and all(np.isfinite(losses))
+    assert scaler.mean_.shape == (12,)
+    assert model(torch.zeros(1, 12)).shape == (1, 2)
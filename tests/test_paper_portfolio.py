@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from backend.agents.exits import build_exit_plan
+from broker.paper_portfolio import PaperPortfolioBroker, align_symbols
+from broker.paper_v2 import PaperFuturesBrokerV2
+
+PARAMS = {"sl_tp_style": "atr_trailing", "sl_atr_mult": 1.5, "time_stop_bars": 60}
+
+
+def _series(seed, n=500, step=300_000, offset=0):
+    rng = np.random.default_rng(seed)
+    c = 1000 * (seed + 1) + np.cumsum(rng.normal(0, 3, n))
+    return {
+        "ts": offset + np.arange(n) * step,
+        "high": c + rng.uniform(0.5, 4, n),
+        "low": c - rng.uniform(0.5, 4, n),
+        "close": c,
+        "atr": np.full(n, 4.0),
+    }
+
+
+def _single_symbol_run(bars, every=25, params=PARAMS, fill_offset=0.0):
+    """Reference: one PaperFuturesBrokerV2 per symbol"""
+    broker = PaperFuturesBrokerV2(sink="memory")
+    for i, ts in enumerate(bars["ts"]):
+        broker.on_candle(ts, bars["high"][i], bars["low"][i], bars["close"][i], bars["atr"][i])
+        if broker.position is None and i % every == 0:
+            side = "LONG" if (i // every) % 2 == 0 else "SHORT"
+            plan = build_exit_plan(side, bars["close"][i], bars["atr"][i], params, {"tick_size": 0.1})
+            broker.open_with_plan(ts, 1.0, bars["close"][i] + fill_offset, 5.0, plan)
+    return broker
+
+
+def _portfolio_run(data, every=25, params=PARAMS, fill_offset=0.0, **kwargs):
+    symbols, ts, cols = align_symbols(data, ("high", "low", "close", "atr"))
+    broker = PaperPortfolioBroker(symbols, **kwargs)
+    bar_idx = {s: {t: k for k, t in enumerate(data[s]["ts"])} for s in symbols}
+    for t_i, t in enumerate(ts):
+        h, l, c, a = cols["high"][t_i], cols["low"][t_i], cols["close"][t_i], cols["atr"][t_i]
+        broker.on_bar(t, h, l, c, a)
+        for j, sym in enumerate(symbols):
+            k = bar_idx[sym].get(t)
+            if k is None or k % every or broker.has_position(sym):
+                continue
+            side = "LONG" if (k // every) % 2 == 0 else "SHORT"
+            plan = build_exit_plan(side, c[j], a[j], params, {"tick_size": 0.1})
+            broker.open_with_plan(sym, t, 1.0, c[j] + fill_offset, 5.0, plan)
+    return broker
+
+
+def test_align_symbols_fills_missing_bars_with_nan():
+    data = {"A": _series(0, n=4), "B": _series(1, n=3, offset=300_000)}
+    symbols, ts, cols = align_symbols(data)
+    assert symbols == ["A", "B"]
+    assert ts.tolist() == [0, 300_000, 600_000, 900_000]
+    assert np.isnan(cols["close"][0, 1])
+    assert cols["close"][1, 1] == data["B"]["close"][0]
+
+
+def _assert_matches_independent_runs(data, portfolio, **kwargs):
+    rows = portfolio.sink.trade_rows()
+    total_pnl = 0.0
+    for sym, bars in data.items():
+        ref = _single_symbol_run(bars, **kwargs).sink.trade_rows()
+        got = [{k: v for k, v in r.items() if k != "symbol"} for r in rows if r["symbol"] == sym]
+        assert len(got) == len(ref) > 0
+        for a, b in zip(got, ref):
+            assert (a["ts_utc"], a["action"], a["side"]) == (b["ts_utc"], b["action"], b["side"])
+            assert a["price"] == pytest.approx(b["price"])
+            assert a["pnl"] == pytest.approx(b["pnl"])
+        total_pnl += sum(r["pnl"] for r in ref)
+    return total_pnl
+
+
+def test_portfolio_matches_independent_runs_when_margin_is_ample():
+    data = {f"SYM{k}": _series(k, offset=(k % 3) * 300_000) for k in range(5)}
+    portfolio = _portfolio_run(data, equity=1e9)
+    total_pnl = _assert_matches_independent_runs(data, portfolio)
+    assert portfolio.equity == pytest.approx(1e9 + total_pnl)
+
+
+@pytest.mark.parametrize("fill_offset", [3.0, -3.0])
+def test_trailing_extremes_start_from_fill_price(fill_offset):
+    # fills away from plan.entry (slippage): trails must track from the fill, as in PaperFuturesBrokerV2
+    params = dict(PARAMS, sl_tp_style="chandelier")
+    data = {f"SYM{k}": _series(k) for k in range(3)}
+    portfolio = _portfolio_run(data, params=params, fill_offset=fill_offset, equity=1e9)
+    _assert_matches_independent_runs(data, portfolio, params=params, fill_offset=fill_offset)
+
+
+def test_shared_margin_rejects_opens_when_exhausted():
+    broker = PaperPortfolioBroker(["A", "B", "C"], equity=1000.0)
+    assert broker.open("A", 0, "LONG", 1.0, 2000.0, 1900.0, 2200.0, leverage=4.0)  # 500 margin
+    assert broker.open("B", 0, "SHORT", 1.0, 1600.0, 1700.0, 1400.0, leverage=4.0)  # 400 margin
+    assert not broker.open("C", 0, "LONG", 1.0, 800.0, 700.0, 900.0, leverage=4.0)  # 200 > 100 free
+    assert broker.rejected == 1
+    assert broker.used_margin() == pytest.approx(900.0)
+
+    # A's stop is hit: margin is released and the loss is booked against the shared account
+    broker.on_bar(1, [1950.0, 1600.0, 800.0], [1890.0, 1590.0, 790.0], [1900.0, 1595.0, 795.0], [10.0] * 3)
+    assert not broker.has_position("A")
+    assert broker.equity < 1000.0
+    assert broker.used_margin() == pytest.approx(400.0)
+    assert broker.open("C", 1, "LONG", 1.0, 795.0, 700.0, 900.0, leverage=4.0)
+
+
+def test_close_all_uses_last_price_for_symbols_without_bar():
+    broker = PaperPortfolioBroker(["A", "B"], equity=1e6)
+    broker.open("A", 0, "LONG", 1.0, 100.0, 50.0, 200.0, leverage=1.0)
+    broker.on_bar(1, [111.0, np.nan], [109.0, np.nan], [110.0, np.nan], [1.0, np.nan])
+    broker.close_all(2, [np.nan, 5.0])
+    assert broker.positions() == {}
+    assert broker.sink.trade_rows()[-1]["price"] == 110.0
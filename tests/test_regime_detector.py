@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+
+from backend.agents.exits import (
+    RegimeDetector,
+    build_exit_plan,
+    detect_regime_series,
+    get_swing_levels,
+    swing_level_series,
+)
+from strategies import regime as regime_mod
+from strategies.regime import build_regime_exit_plan, detect_regime
+
+
+def _series(seed, n=600, nan_atr=True, with_ema=True):
+    rng = np.random.default_rng(seed)
+    close = 30000 + np.cumsum(rng.normal(0, 40, n))
+    adx = rng.uniform(5, 45, n)
+    atr = rng.uniform(20, 120, n).round(0)  # ties exercise the <= rank
+    if nan_atr:
+        atr[:14] = np.nan
+        atr[rng.integers(0, n, 10)] = np.nan
+    ema = close * (1 + rng.normal(0, 0.03, n)) if with_ema else None
+    return adx.tolist(), atr.tolist(), close.tolist(), None if ema is None else ema.tolist()
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("lookback", [20, 100])
+@pytest.mark.parametrize("with_ema", [True, False])
+def test_streaming_and_batch_match_detect(seed, lookback, with_ema):
+    adx, atr, close, ema = _series(seed, with_ema=with_ema)
+    ref_detector = RegimeDetector(lookback_bars=lookback)
+    stream = RegimeDetector(lookback_bars=lookback)
+    batch = detect_regime_series(adx, atr, close, ema, lookback)
+
+    for i in range(len(adx)):
+        expected = ref_detector.detect(adx, atr, close, ema, current_idx=i)
+        simple = ref_detector.detect_simple(
+            adx[i], atr[i], atr[max(0, i - lookback):i + 1], close[i], ema[i] if ema else None
+        )
+        assert simple == expected
+        assert stream.update(adx[i], atr[i], close[i], ema[i] if ema else None) == expected, i
+        assert batch[i] == expected, i
+
+
+def test_reset_clears_window():
+    adx, atr, close, ema = _series(3, nan_atr=False)
+    det = RegimeDetector(lookback_bars=30)
+    first = [det.update(adx[i], atr[i], close[i], ema[i]) for i in range(200)]
+    det.reset()
+    second = [det.update(adx[i], atr[i], close[i], ema[i]) for i in range(200)]
+    assert first == second
+
+
+def test_detect_regime_uses_series_and_matches_per_bar():
+    adx, atr, close, ema = _series(4)
+    feats = {"adx14": adx, "atr14": atr, "ema20": close, "ema200": ema}
+    detector = RegimeDetector(lookback_bars=100)
+
+    for i in range(len(adx)):
+        if i < 100:
+            expected = "range"
+        else:
+            expected = detector.detect_simple(adx[i], atr[i], atr[max(0, i - 100):i + 1], close[i], ema[i])
+        assert detect_regime(i, feats) == expected
+
+    assert any(entry[0][0] is atr for entry in regime_mod._SERIES_CACHE.values())
+
+
+def test_detect_regime_falls_back_on_none_values():
+    adx, atr, close, _ = _series(5, nan_atr=False)
+    ema = [None] * len(adx)
+    feats = {"adx14": adx, "atr14": atr, "ema20": close, "ema200": ema}
+    detector = RegimeDetector(lookback_bars=100)
+
+    for i in range(100, len(adx)):
+        expected = detector.detect_simple(adx[i], atr[i], atr[i - 100:i + 1], close[i], None)
+        assert detect_regime(i, feats) == expected
+
+
+def _plan_fixture(seed=6, n=800):
+    rng = np.random.default_rng(seed)
+    c = 30000 + np.cumsum(rng.normal(0, 40, n))
+    h = (c + rng.uniform(5, 60, n)).tolist()
+    l = (c - rng.uniform(5, 60, n)).tolist()
+    adx, atr, _, ema = _series(seed, n=n, nan_atr=False)
+    feats = {
+        "adx14": adx, "atr14": atr, "ema20": c.tolist(), "ema200": ema,
+        "supertrend": (c - 80).tolist(), "keltner_lo": (c - 120).tolist(), "keltner_up": (c + 120).tolist(),
+    }
+    return c.tolist(), h, l, atr, feats
+
+
+def test_swing_level_series_matches_get_swing_levels():
+    _, h, l, _, _ = _plan_fixture()
+    for lookback in (5, 20):
+        swing_low, swing_high = swing_level_series(h, l, lookback)
+        for i in range(len(h)):
+            expected = get_swing_levels(h, l, lookback=lookback, current_idx=i)
+            got = (None, None) if i < lookback else (swing_low[i], swing_high[i])
+            assert got == expected, i
+
+
+@pytest.mark.parametrize("style", ["structure_atr", "atr_trailing", "chandelier", "supertrend", "keltner"])
+def test_build_regime_exit_plan_unchanged(style):
+    c, h, l, atr, feats = _plan_fixture()
+    params = {"sl_tp_style": style}
+
+    for i in range(0, len(c), 7):
+        for side in ("LONG", "SHORT"):
+            swing_low, swing_high = get_swing_levels(h, l, lookback=20, current_idx=i)
+            ctx = {
+                "tick_size": 0.1, "swing_low": swing_low, "swing_high": swing_high,
+                "keltner_lo": feats["keltner_lo"][i], "keltner_up": feats["keltner_up"][i],
+                "supertrend": feats["supertrend"][i],
+            }
+            expected = build_exit_plan(side=side, entry=c[i], atr=atr[i], params=params, ctx=ctx,
+                                       regime_hint=detect_regime(i, feats))
+            assert build_regime_exit_plan(side, c[i], atr[i], i, h, l, feats, params) == expected
+
+    assert any(key[0] == "swing" and key[1] == id(h) for key in regime_mod._SERIES_CACHE)
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from broker.paper_v1 import PaperFuturesBroker
+from core import database as db_sqlite
+from core.metrics import trades_metrics
+from lab import summary
+from lab.summary import SUMMARY_WIDTH, backfill, compute_run_summary, summarize_run
+from routers.lab import compare_runs, list_runs
+
+T0 = 1_700_000_000
+
+
+def _write_run(run_id, n=5_000, seed=0, trades=True):
+    rng = np.random.default_rng(seed)
+    equity = 10_000 + np.cumsum(rng.normal(0, 5, n))
+    d = os.path.join("artifacts", run_id, "1")
+    os.makedirs(d, exist_ok=True)
+    with open(os.path.join(d, "equity.csv"), "w") as f:
+        f.write("timestamp,equity,drawdown\n")
+        for k, e in enumerate(equity):
+            ts = datetime.fromtimestamp(T0 + 300 * k, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+            f.write(f"{ts},{e},0\n")
+    if trades:   # the lab broker's log: one row per fill, opens and partials included
+        broker = PaperFuturesBroker(data_dir=d)
+        for k, pnl in enumerate((120.0, -40.0, 60.0, -20.0)):
+            side, ts = ("LONG" if k % 2 == 0 else "SHORT"), (T0 + 3600 * k) * 1000
+            broker._log(ts, "OPEN_" + side, side, 1.0, 100.0, 0.0, " trail=atr")
+            if k == 0:
+                broker._log(ts + 600_000, "TP_PARTIAL", side, 0.5, 101.0, 5.0, "")
+            broker._log(ts + 1_200_000, "STOP" if pnl < 0 else "TP_FULL", side, 1.0, 101.0, pnl, "")
+    return equity
+
+
+@pytest.fixture
+def lab(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    conn = db_sqlite.connect_lab()
+    yield conn
+    conn.close()
+
+
+def _completed_run(conn, run_id, score=1.5, **kwargs):
+    db_sqlite.create_run(conn, run_id, f"Run {run_id}", "backtest", {"data": {}})
+    db_sqlite.insert_trial(conn, run_id, 1, {"p": 1}, {"total_profit": 12.5, "sharpe": 1.1}, score)
+    db_sqlite.update_run_status(conn, run_id, "completed", completed_at=T0)
+    return _write_run(run_id, **kwargs)
+
+
+def test_summary_contents(lab):
+    equity = _completed_run(lab, "a")
+    s = compute_run_summary(lab, "a")
+    assert s["best_score"] == 1.5 and s["metrics"] == {"total_profit": 12.5, "sharpe": 1.1}
+    stats = s["equity_stats"]
+    assert stats["points"] == len(equity) and stats["source"] == "equity"
+    assert stats["final_equity"] == equity[-1] and stats["peak_equity"] == equity.max()
+    peaks = np.maximum.accumulate(equity)
+    assert stats["max_drawdown_pct"] == pytest.approx(((equity - peaks) / peaks * 100).min())
+    assert stats["return_pct"] == pytest.approx((equity[-1] / equity[0] - 1) * 100)
+    assert len(s["equity_curve"]["time"]) <= SUMMARY_WIDTH + 5 and max(s["equity_curve"]["equity"]) == equity.max()
+    assert s["trade_stats"] == {
+        "trades": 4, "wins": 2, "losses": 2, "longs": 2, "shorts": 2, "win_rate": 50.0,
+        "total_pnl": 120.0, "avg_pnl": 30.0, "best_trade": 120.0, "worst_trade": -40.0,
+        "gross_profit": 180.0, "gross_loss": 60.0, "profit_factor": 3.0,
+    }
+    tm = trades_metrics(os.path.join("artifacts", "a", "1", "trades.csv"))
+    assert s["trade_stats"]["trades"] == tm["trades"] and s["trade_stats"]["win_rate"] == tm["win_rate_pct"]
+
+
+def test_summary_without_artifacts_is_stored(lab):
+    db_sqlite.create_run(lab, "bare", "bare", "grid_search", {"data": {}})
+    assert summarize_run(lab, "bare")
+    row = db_sqlite.get_run_summaries(lab, ["bare"])[0]
+    assert row["equity_curve"] is None and row["trade_stats"]["trades"] == 0 and row["metrics"] == {}
+
+
+def test_backfill_only_missing_and_force(lab, monkeypatch):
+    for run_id in ("a", "b"):
+        _completed_run(lab, run_id, n=500)
+    db_sqlite.create_run(lab, "running", "r", "backtest", {"data": {}})
+    summarize_run(lab, "a")
+    assert backfill(lab) == {"runs": 1, "summarized": 1, "failed": 0}
+    assert backfill(lab) == {"runs": 0, "summarized": 0, "failed": 0}
+    assert backfill(lab, force=True)["runs"] == 2
+
+    monkeypatch.setattr(summary, "read_equity_csv", lambda path: 1 / 0)
+    assert backfill(lab, force=True) == {"runs": 2, "summarized": 0, "failed": 2}
+
+
+def test_listing_uses_summaries(lab):
+    equity = _completed_run(lab, "a", score=2.0)
+    db_sqlite.create_run(lab, "pending", "p", "optuna", {"data": {}})
+    db_sqlite.insert_trial(lab, "pending", 1, {}, {}, 0.7)
+    summarize_run(lab, "a")
+
+    runs = {r.run_id: r for r in asyncio.run(list_runs())}
+    assert runs["a"].best_score == 2.0 and runs["a"].name == "Run a"
+    assert runs["a"].final_equity == equity[-1] and runs["a"].total_trades == 4 and runs["a"].win_rate == 50.0
+    assert runs["pending"].best_score == 0.7 and runs["pending"].total_trades is None
+
+
+def test_listing_query_is_indexed(lab):
+    plan = lab.execute("EXPLAIN QUERY PLAN SELECT * FROM runs r LEFT JOIN run_summaries s ON s.run_id = r.id "
+                       "ORDER BY r.created_at DESC LIMIT 10").fetchall()
+    details = " ".join(str(row[-1]) for row in plan)
+    assert "idx_runs_created" in details and "sqlite_autoindex_run_summaries_1" in details
+
+
+def test_compare_served_from_summaries(lab, monkeypatch):
+    for k, run_id in enumerate(("a", "b", "c")):
+        _completed_run(lab, run_id, n=3_000, seed=k)
+    summarize_run(lab, "a")   # b and c are summarized lazily by the first compare
+    first = asyncio.run(compare_runs(["a", "b", "c", "nope"]))
+    assert [r["run_id"] for r in first["runs"]] == ["a", "b", "c"]
+    assert {row["id"] for row in db_sqlite.get_run_summaries(lab, ["a", "b", "c"])} == {"a", "b", "c"}
+
+    # later compares read no artifacts at all
+    monkeypatch.setattr("lab.equity.read_equity_csv", lambda path: 1 / 0)
+    monkeypatch.setattr("lab.summary.compute_run_summary", lambda *a: 1 / 0)
+    again = asyncio.run(compare_runs(["a", "b", "c"]))
+    assert again == first
+    run = again["runs"][0]
+    assert run["metrics"] == {"total_profit": 12.5, "sharpe": 1.1}
+    assert run["trade_stats"]["trades"] == 4 and set(run["equity"][0]) == {"time", "equity"}
+    assert run["equity"][0]["time"] == T0
+
+
+def test_runner_summarizes_on_completion(lab, monkeypatch):
+    from lab import runner
+    from lab.schemas import StrategyConfig
+
+    monkeypatch.setattr(runner, "log_run", lambda *a, **k: None)
+    db_sqlite.create_run(lab, "grid", "grid", "grid_search", {"data": {}})
+    config = StrategyConfig.model_validate(json.load(open(os.path.join(os.path.dirname(__file__), "..", "test_validate.json"))))
+    runner.execute_grid_search_task("grid", config)
+    row = db_sqlite.get_run_summaries(lab, ["grid"])[0]
+    assert row["status"] == "completed" and row["best_score"] is not None and row["metrics"]
@@ -0,0 +1,140 @@
+import time
+
+import pytest
+
+from backend.agents.config import AgentConfig
+from backend.agents.runner import AgentRunner
+from backend.agents.tools.market import MarketDataTool
+
+SYMBOLS = ["BTC/USDT:USDT", "ETH/USDT:USDT", "SOL/USDT:USDT", "XRP/USDT:USDT", "ADA/USDT:USDT"]
+
+
+class FakeExchange:
+    """ccxt-like exchange with per-symbol injected latency"""
+
+    def __init__(self, latency, batch_tickers=True):
+        self.latency = latency
+        self.has = {'fetchTickers': batch_tickers}
+        self.calls = {'fetch_ohlcv': 0, 'fetch_ticker': 0, 'fetch_tickers': 0}
+
+    def load_markets(self):
+        return {}
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=100):
+        self.calls['fetch_ohlcv'] += 1
+        time.sleep(self.latency.get(symbol, 0.0))
+        now = int(time.time() * 1000) // 300_000 * 300_000
+        return [[now - (limit - k) * 300_000, 100.0, 101.0, 99.0, 100.0 + k * 0.01, 10.0] for k in range(limit)]
+
+    def fetch_ticker(self, symbol):
+        self.calls['fetch_ticker'] += 1
+        time.sleep(self.latency.get(symbol, 0.0))
+        return {'symbol': symbol, 'last': 100.0}
+
+    def fetch_tickers(self, symbols=None):
+        self.calls['fetch_tickers'] += 1
+        time.sleep(max(self.latency.values()) if self.latency else 0.0)
+        return {s: {'symbol': s, 'last': 100.0} for s in symbols}
+
+
+def _runner(tmp_path, exchange, **overrides):
+    config = AgentConfig(**{
+        "symbols": SYMBOLS,
+        "data_lookback_bars": 100,
+        "runs_dir": tmp_path / "runs",
+        "logs_dir": tmp_path / "logs",
+        **overrides
+    })
+    market = MarketDataTool(config, exchange=exchange)
+    market._db_enabled = False
+    return AgentRunner(config, market=market)
+
+
+def test_observe_fans_out_across_symbols(tmp_path):
+    runner = _runner(tmp_path, FakeExchange({s: 0.2 for s in SYMBOLS}))
+    start = time.perf_counter()
+    obs = runner._observe()
+    elapsed = time.perf_counter() - start
+
+    assert set(obs.candles) == set(SYMBOLS)
+    assert elapsed < 0.2 * len(SYMBOLS) * 0.6  # well under the sequential cost
+
+
+def test_slow_symbol_times_out_with_skip_policy(tmp_path):
+    latency = {s: 0.0 for s in SYMBOLS}
+    latency["SOL/USDT:USDT"] = 1.5
+    runner = _runner(tmp_path, FakeExchange(latency), observe_timeout_secs=0.3, partial_result_policy="skip")
+
+    start = time.perf_counter()
+    obs = runner._observe()
+    assert time.perf_counter() - start < 1.0
+    assert "SOL/USDT:USDT" not in obs.candles
+    assert len(obs.candles) == len(SYMBOLS) - 1
+
+
+def test_stale_policy_reuses_last_good_candles(tmp_path):
+    exchange = FakeExchange({s: 0.0 for s in SYMBOLS})
+    runner = _runner(tmp_path, exchange, observe_timeout_secs=0.3, partial_result_policy="stale")
+    first = runner._observe()
+
+    runner.market.cache.clear()
+    exchange.latency["ETH/USDT:USDT"] = 1.5
+    second = runner._observe()
+    assert second.candles["ETH/USDT:USDT"] == first.candles["ETH/USDT:USDT"]
+
+
+def test_abort_policy_observes_nothing(tmp_path):
+    latency = {s: 0.0 for s in SYMBOLS}
+    latency["XRP/USDT:USDT"] = 1.5
+    runner = _runner(tmp_path, FakeExchange(latency), observe_timeout_secs=0.3, partial_result_policy="abort")
+    assert runner._observe().candles == {}
+
+
+@pytest.mark.parametrize("batch", [True, False])
+def test_prices_use_fetch_tickers_when_supported(tmp_path, batch):
+    exchange = FakeExchange({s: 0.1 for s in SYMBOLS}, batch_tickers=batch)
+    runner = _runner(tmp_path, exchange)
+    prices = runner._get_current_prices()
+
+    assert prices == {s: 100.0 for s in SYMBOLS}
+    if batch:
+        assert exchange.calls == {'fetch_ohlcv': 0, 'fetch_ticker': 0, 'fetch_tickers': 1}
+    else:
+        assert exchange.calls['fetch_ticker'] == len(SYMBOLS)
+
+
+def test_iteration_records_phase_timings(tmp_path, monkeypatch):
+    runner = _runner(tmp_path, FakeExchange({s: 0.0 for s in SYMBOLS}), loop_interval_secs=1)
+
+    def stop_after_first_sleep(_):
+        runner.running = False
+
+    monkeypatch.setattr(time, "sleep", stop_after_first_sleep)
+    runner.run()
+
+    assert set(runner.last_timings) >= {'observe_ms', 'decide_ms', 'risk_ms', 'execute_ms', 'total_ms'}
+    assert (runner.run_dir / "trajectory.jsonl").read_text().count('"kind": "timings"') == 1
+
+
+class GapExchange(FakeExchange):
+    """300 trending bars with the bar at index 150 missing"""
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=100):
+        now = int(time.time() * 1000) // 300_000 * 300_000
+        bars = [[now - (300 - k) * 300_000, 100.0 + k * 0.1, 101.0 + k * 0.1, 99.0 + k * 0.1,
+                 100.0 + k * 0.1 + (k % 7) * 0.05, 10.0 + k % 5] for k in range(300)]
+        return bars[:150] + bars[151:]
+
+
+def test_nan_gap_bars_do_not_reach_indicators(tmp_path):
+    observed = {}
+    for policy in ("nan", "drop"):
+        runner = _runner(tmp_path / policy, GapExchange({}), gap_fill_policy=policy, data_lookback_bars=300)
+        observed[policy] = runner._observe()
+
+    symbol = SYMBOLS[0]
+    nan_obs, drop_obs = observed["nan"], observed["drop"]
+    assert any(c.close != c.close for c in nan_obs.candles[symbol])   # the gap bar is still there
+    assert nan_obs.indicators[symbol] == drop_obs.indicators[symbol]
+    assert nan_obs.indicators[symbol]["rsi14"] != 50 and nan_obs.indicators[symbol]["adx14"] > 0
+    assert nan_obs.volatility[symbol] == nan_obs.volatility[symbol] > 0
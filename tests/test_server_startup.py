@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# imported on first use of their endpoints, never at server start
+HEAVY_MODULES = {
+    "pandas", "numpy", "ccxt", "optuna", "torch", "sklearn", "strategies",
+    "backend.agents.runner", "backend.agents.tools.market", "orchestrator.strategy_discovery", "lab.features",
+}
+# cumulative `python -X importtime` of server.main (about 0.6 s here, 1.9 s with eager imports)
+IMPORT_BUDGET_US = 1_500_000
+
+
+def _importtime():
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import server.main"], cwd=ROOT,
+                         capture_output=True, text=True, check=True)
+    times = {}
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_server_start_skips_heavy_modules():
+    loaded = set(_importtime())
+    assert "server.main" in loaded
+    assert not HEAVY_MODULES & loaded, f"imported at startup: {sorted(HEAVY_MODULES & loaded)}"
+
+
+def test_server_import_time_budget():
+    assert _importtime()["server.main"] < IMPORT_BUDGET_US
@@ -0,0 +1,126 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from core.sessions import (
+    SESSIONS,
+    compute_session_features,
+    days_from_civil,
+    utc_offset_minutes,
+    year_from_days,
+)
+
+zoneinfo = pytest.importorskip("zoneinfo")
+try:
+    ZONES = {
+        "asia": zoneinfo.ZoneInfo("Asia/Tokyo"),
+        "london": zoneinfo.ZoneInfo("Europe/London"),
+        "ny": zoneinfo.ZoneInfo("America/New_York"),
+    }
+except zoneinfo.ZoneInfoNotFoundError:  # pragma: no cover - no tz database
+    pytest.skip("tz database not available", allow_module_level=True)
+
+FIVE_MIN = 300_000
+
+
+def _ms(*args):
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+# Two weeks around every 2023-2025 transition (US and UK switch on different weekends in March/Oct-Nov)
+WINDOWS = [
+    (_ms(y, m, d), _ms(y, m, d) + 14 * 86_400_000)
+    for y in (2023, 2024, 2025)
+    for m, d in ((3, 5), (3, 20), (10, 22), (10, 30))
+]
+
+
+def _bars(start, stop, seed=0):
+    ts = np.arange(start, stop, FIVE_MIN, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    c = 30000 + np.cumsum(rng.normal(0, 20, len(ts)))
+    h = c + rng.uniform(1, 30, len(ts))
+    l = c - rng.uniform(1, 30, len(ts))
+    v = rng.uniform(1, 50, len(ts))
+    return ts, h, l, c, v
+
+
+def test_civil_day_roundtrip():
+    days = np.arange(-1000, 30000)
+    years = year_from_days(days)
+    for d, y in zip(days[::97], years[::97]):
+        assert datetime.fromtimestamp(int(d) * 86400, tz=timezone.utc).year == y
+    assert days_from_civil(2024, 2, 29) == (datetime(2024, 2, 29, tzinfo=timezone.utc).timestamp() // 86400)
+
+
+@pytest.mark.parametrize("name", ["london", "ny"])
+def test_utc_offset_matches_zoneinfo(name):
+    rule, std_offset, _, _ = SESSIONS[name]
+    ts = np.arange(_ms(2019, 1, 1), _ms(2026, 1, 1), 15 * 60_000, dtype=np.int64)
+    got = utc_offset_minutes(ts, rule, std_offset)
+    zone = ZONES[name]
+    expected = np.array([
+        datetime.fromtimestamp(t / 1000, tz=zone).utcoffset().total_seconds() // 60 for t in ts[::7]
+    ])
+    np.testing.assert_array_equal(got[::7], expected)
+
+
+@pytest.mark.parametrize("start,stop", WINDOWS)
+def test_sessions_match_zoneinfo_across_dst(start, stop):
+    ts, h, l, c, v = _bars(start, stop)
+    out = compute_session_features(ts, h, l, c, v)
+
+    for k in range(0, len(ts), 3):
+        utc = datetime.fromtimestamp(ts[k] / 1000, tz=timezone.utc)
+        assert out["hour_utc"][k] == utc.hour
+        assert out["day_of_week"][k] == utc.weekday()
+        for name, (_, _, open_min, close_min) in SESSIONS.items():
+            local = datetime.fromtimestamp(ts[k] / 1000, tz=ZONES[name])
+            minute = local.hour * 60 + local.minute
+            active = local.weekday() < 5 and open_min <= minute < close_min
+            assert out[f"is_{name}_session"][k] == active, (name, local)
+            if active:
+                assert out[f"minutes_since_{name}_open"][k] == minute - open_min
+            else:
+                assert np.isnan(out[f"minutes_since_{name}_open"][k])
+
+
+def test_session_ranges_match_loop():
+    ts, h, l, c, v = _bars(_ms(2024, 3, 4), _ms(2024, 4, 8), seed=3)
+    out = compute_session_features(ts, h, l, c, v, or_minutes=60)
+
+    for name in SESSIONS:
+        active = out[f"is_{name}_session"]
+        hi = lo = pv = vol = None
+        or_hi = or_lo = None
+        for k in range(len(ts)):
+            if not active[k]:
+                hi = None
+                assert np.isnan(out[f"{name}_high"][k])
+                continue
+            if hi is None or out[f"minutes_since_{name}_open"][k] == 0:
+                hi, lo, pv, vol = h[k], l[k], 0.0, 0.0
+                or_hi, or_lo = -np.inf, np.inf
+            hi, lo = max(hi, h[k]), min(lo, l[k])
+            pv += (h[k] + l[k] + c[k]) / 3 * v[k]
+            vol += v[k]
+            assert out[f"{name}_high"][k] == hi
+            assert out[f"{name}_low"][k] == lo
+            assert out[f"{name}_vwap"][k] == pytest.approx(pv / vol, rel=1e-12)
+
+            if name == "london":
+                since = out["minutes_since_london_open"][k]
+                if since < 60:
+                    or_hi, or_lo = max(or_hi, h[k]), min(or_lo, l[k])
+                    assert np.isnan(out["london_or_high"][k])
+                else:
+                    assert out["london_or_high"][k] == or_hi
+                    assert out["london_or_low"][k] == or_lo
+
+
+def test_no_sessions_on_weekends():
+    ts, h, l, c, v = _bars(_ms(2024, 6, 8), _ms(2024, 6, 10))  # Saturday + Sunday
+    out = compute_session_features(ts, h, l, c, v)
+    for name in SESSIONS:
+        assert not out[f"is_{name}_session"].any()
@@ -0,0 +1,70 @@
+"""
+Backtest wall time per broker sink.
+
+Drives PaperFuturesBrokerV2 over a synthetic random walk (legacy SL/TP mode,
+one trade roughly every 50 bars) with each sink, plus the old behaviour of
+opening equity_curve.csv / trades.csv once per row.
+
+Usage:
+ python tools/bench_broker_sinks.py --bars 100000
+"""
+import argparse
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from broker.paper_v2 import PaperFuturesBrokerV2
+
+ap = argparse.ArgumentParser()
+ap.add_argument('--bars', type=int, default=100_000)
+ap.add_argument('--flush-every', type=int, default=5000)
+args = ap.parse_args()
+
+rng = np.random.default_rng(0)
+c = (100 + np.cumsum(rng.normal(0, 0.2, args.bars))).tolist()
+
+
+class PerRowCSVBroker(PaperFuturesBrokerV2):
+ """Pre-sink behaviour: one open/append/close per equity point and per trade"""
+
+ def _log(self, ts, action, side, qty, price, pnl, note):
+  with open(self.trades_path, "a", newline="", encoding="utf-8") as f:
+   csv.writer(f).writerow([ts, action, side, qty, price, pnl, note])
+
+ def _write_equity(self, ts):
+  self.equity_curve.append([ts, self.equity])
+  with open(self.equity_path, "a", newline="", encoding="utf-8") as f:
+   csv.writer(f).writerow([ts, self.equity])
+
+
+def run(make_broker):
+ tmp = tempfile.mkdtemp(prefix='bench_sink_')
+ try:
+  t0 = time.perf_counter()
+  broker = make_broker(tmp)
+  for i, px in enumerate(c):
+   broker.on_candle(i * 300_000, px + 0.1, px - 0.1, px, 0.5)
+   if broker.position is None and i % 50 == 0:
+    broker.open(i * 300_000, "LONG", 1.0, px, px - 1.0, px + 1.0, 1.0, 1.0, time_stop_bars=30)
+  broker.close()
+  return round((time.perf_counter() - t0) * 1000, 1), broker.sink.trades
+ finally:
+  shutil.rmtree(tmp, ignore_errors=True)
+
+
+results = {'bars': args.bars}
+results['per_row_csv_ms'], _ = run(lambda d: PerRowCSVBroker(data_dir=d, sink='csv'))
+for sink in ('csv', 'parquet', 'memory', 'null'):
+ try:
+  results[f'{sink}_ms'], trades = run(lambda d: PaperFuturesBrokerV2(data_dir=d, sink=sink, flush_every_bars=args.flush_every))
+ except ImportError as e:
+  results[f'{sink}_ms'] = str(e)
+results['trades'] = trades
+print(results)
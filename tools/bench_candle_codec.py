@@ -0,0 +1,92 @@
+"""
+Candle payloads: JSON list of objects vs core.candle_codec binary.
+
+For each size, reports payload bytes (raw / gzip / br when available) and
+server encode time: "encode_ms" is rows -> response body only, "request_ms"
+is the whole /api/candles handler including the SQLite read (median of
+--repeat).
+
+Usage:
+ python tools/bench_candle_codec.py --sizes 5000 50000
+"""
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from starlette.requests import Request
+
+from core import candle_codec
+from server.main import api_candles
+
+
+def _request(accept, accept_encoding=""):
+ headers = [(b"accept", accept.encode()), (b"accept-encoding", accept_encoding.encode())]
+ return Request({"type": "http", "method": "GET", "path": "/", "headers": headers, "query_string": b""})
+
+
+def _timed(fn, repeat):
+ out, times = None, []
+ for _ in range(repeat):
+  t0 = time.perf_counter()
+  out = fn()
+  times.append(time.perf_counter() - t0)
+ return out, round(statistics.median(times) * 1000, 2)
+
+
+def json_body(rows):
+ """What the JSON handler + FastAPI serialisation produce for these rows"""
+ candles = [{"ts": r[0], "o": float(r[1]), "h": float(r[2]), "l": float(r[3]), "c": float(r[4]), "v": float(r[5])} for r in rows]
+ return JSONResponse(jsonable_encoder({"symbol": "BTCUSDT", "timeframe": "5m", "candles": candles})).body
+
+
+def make_db(path, n):
+ rng = np.random.default_rng(0)
+ c = 30000 + np.cumsum(rng.normal(0, 40, n))
+ rows = [(1_600_000_000_000 + 300_000 * k, round(c[k], 1), round(c[k] + 15, 1), round(c[k] - 15, 1), round(c[k] + 2, 1), round(abs(rng.normal(50, 20)), 3)) for k in range(n)]
+ conn = sqlite3.connect(path)
+ conn.execute("CREATE TABLE candles (ts INTEGER PRIMARY KEY, open REAL, high REAL, low REAL, close REAL, volume REAL)")
+ conn.executemany("INSERT INTO candles VALUES (?,?,?,?,?,?)", rows)
+ conn.commit()
+ conn.close()
+ return rows
+
+
+if __name__ == "__main__":
+ ap = argparse.ArgumentParser()
+ ap.add_argument('--sizes', type=int, nargs='+', default=[5000, 50000])
+ ap.add_argument('--repeat', type=int, default=7)
+ args = ap.parse_args()
+
+ os.chdir(tempfile.mkdtemp(prefix="bench_candles_"))
+ with open("config.yaml", "w") as f:
+  f.write("symbol: BTCUSDT\ndb:\n  path: candles.db\n")
+ rows = make_db("candles.db", max(args.sizes))
+
+ report = {"brotli": candle_codec.brotli is not None, "sizes": {}}
+ for n in args.sizes:
+  page = rows[-n:]
+  body, json_ms = _timed(lambda: json_body(page), args.repeat)
+  payload, bin_ms = _timed(lambda: candle_codec.encode_candles(page), args.repeat)
+  entry = {
+   "json": {"bytes": len(body), "gzip_bytes": len(candle_codec.compress(body, "gzip")), "encode_ms": json_ms},
+   "binary": {"bytes": len(payload), "gzip_bytes": len(candle_codec.compress(payload, "gzip")), "encode_ms": bin_ms},
+  }
+  _, entry["binary"]["gzip_encode_ms"] = _timed(lambda: candle_codec.compress(candle_codec.encode_candles(page), "gzip"), args.repeat)
+  if candle_codec.brotli is not None:
+   entry["binary"]["br_bytes"] = len(candle_codec.compress(payload, "br"))
+  _, entry["json"]["request_ms"] = _timed(lambda: JSONResponse(jsonable_encoder(api_candles(limit=n, request=_request("application/json")))).body, args.repeat)
+  _, entry["binary"]["request_ms"] = _timed(lambda: api_candles(limit=n, request=_request(candle_codec.MEDIA_TYPE)).body, args.repeat)
+  report["sizes"][n] = entry
+ print(json.dumps(report, indent=2))
@@ -0,0 +1,95 @@
+"""
+/api/candles config access: the previous handler parsed config.yaml on every
+request; it now reads the cached core.app_config snapshot.
+
+Runs both handlers in a temp directory holding a config.yaml and a small
+candle DB and reports per-request latency, files opened (audit hook) and
+read() syscalls (/proc/self/io syscr) per request.
+
+Usage:
+ python tools/bench_config_provider.py --requests 2000
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import yaml
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from core.app_config import get_provider
+from server.main import api_candles
+
+OPENS = {"config.yaml": 0, "other": 0}
+
+
+def _audit(event, args):
+ if event == "open" and isinstance(args[0], str):
+  OPENS["config.yaml" if args[0].endswith("config.yaml") else "other"] += 1
+
+
+def _syscr():
+ with open("/proc/self/io") as f:
+  return next(int(line.split()[1]) for line in f if line.startswith("syscr"))
+
+
+def legacy_candles(limit=500, timeframe="5m"):
+ """The pre-cache handler body: parse config.yaml per request"""
+ cfg = yaml.safe_load(open("config.yaml", "r", encoding="utf-8"))
+ dbp = cfg.get("db", {}).get("path")
+ conn = sqlite3.connect(dbp)
+ rows = conn.execute("SELECT ts, open, high, low, close, volume FROM candles ORDER BY ts DESC LIMIT ?", (int(limit),)).fetchall()
+ conn.close()
+ rows = rows[::-1]
+ return {"candles": [{"ts": r[0], "o": float(r[1]), "h": float(r[2]), "l": float(r[3]), "c": float(r[4]), "v": float(r[5])} for r in rows]}
+
+
+def run(handler, n, limit):
+ handler(limit=limit)  # warm up
+ for k in OPENS:
+  OPENS[k] = 0
+ io0 = _syscr()
+ t0 = time.perf_counter()
+ for _ in range(n):
+  handler(limit=limit)
+ dt = time.perf_counter() - t0
+ syscr = _syscr() - io0 - 1  # the second /proc/self/io read
+ return {
+  "us_per_request": round(dt / n * 1e6, 1),
+  "config_opens_per_request": round(OPENS["config.yaml"] / n, 3),
+  "read_syscalls_per_request": round(syscr / n, 1),
+ }
+
+
+if __name__ == "__main__":
+ ap = argparse.ArgumentParser()
+ ap.add_argument('--requests', type=int, default=2000)
+ ap.add_argument('--limit', type=int, default=50)
+ args = ap.parse_args()
+
+ work = tempfile.mkdtemp(prefix="bench_cfg_")
+ os.chdir(work)
+ db = os.path.join(work, "candles.db")
+ conn = sqlite3.connect(db)
+ conn.execute("CREATE TABLE candles (ts INTEGER PRIMARY KEY, open REAL, high REAL, low REAL, close REAL, volume REAL)")
+ conn.executemany("INSERT INTO candles VALUES (?,?,?,?,?,?)", [(k * 300, 1.0, 2.0, 0.5, 1.5, 10.0) for k in range(1000)])
+ conn.commit()
+ conn.close()
+ # a realistic config.yaml: the repo's own plus the bench DB path
+ with open(os.path.join(ROOT, "config.yaml"), "r", encoding="utf-8") as f:
+  cfg = yaml.safe_load(f) or {}
+ cfg.setdefault("db", {})["path"] = db
+ with open("config.yaml", "w", encoding="utf-8") as f:
+  yaml.safe_dump(cfg, f)
+
+ sys.addaudithook(_audit)
+ legacy = run(legacy_candles, args.requests, args.limit)
+ cached = run(api_candles, args.requests, args.limit)
+ provider = get_provider()
+ cached["provider"] = dict(provider.stats)
+ print(json.dumps({"requests": args.requests, "config_bytes": os.path.getsize("config.yaml"), "legacy": legacy, "cached": cached}, indent=2))
@@ -0,0 +1,98 @@
+"""
+Per-bar cost of declarative entry logic in strategies.core.should_enter.
+
+Builds a synthetic dataset with the feature columns declarative configs use
+and times should_enter() over every bar twice: through the per-bar
+evaluate_entry_logic() path (op normalisation, name lookup and float
+parsing on every call) and through entry_masks() (built once per dataset,
+as the backtest loop does, then an index per bar). Checks both produce the
+same signals.
+
+Usage:
+ python tools/bench_core_conditions.py --bars 50000 --repeat 3
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from strategies.core import entry_masks, evaluate_entry_logic, should_enter
+
+ap = argparse.ArgumentParser()
+ap.add_argument('--bars', type=int, default=50_000)
+ap.add_argument('--repeat', type=int, default=3)
+args = ap.parse_args()
+
+rng = np.random.default_rng(0)
+n = args.bars
+c_arr = 30_000 + np.cumsum(rng.normal(0, 40, n))
+c = c_arr.tolist()
+o = [c[0]] + c[:-1]
+h = (c_arr + rng.uniform(1, 40, n)).tolist()
+l = (c_arr - rng.uniform(1, 40, n)).tolist()
+ts = list(range(n))
+feats = {
+ "rsi14": rng.uniform(0, 100, n).tolist(),
+ "ema20": [None] * 20 + (c_arr[20:] + rng.normal(0, 30, n - 20)).tolist(),
+ "ema50": [None] * 50 + (c_arr[50:] + rng.normal(0, 60, n - 50)).tolist(),
+ "adx14": rng.uniform(5, 50, n).tolist(),
+ "macd": rng.normal(0, 1, n).tolist(),
+ "macd_signal": rng.normal(0, 1, n).tolist(),
+}
+params = {"entry": {
+ "long": {
+  "entry_all": [{"indicator": "rsi14", "op": "lt", "rhs": 65}, {"indicator": "ema20", "op": ">", "rhs_indicator": "ema50"},
+                {"indicator": "adx14", "op": "gte", "rhs": "18"}],
+  "entry_any": [{"indicator": "macd", "op": "Crosses Above", "rhs_indicator": "macd_signal"},
+                {"indicator": "rsi14", "op": "crosses_above", "rhs": 35}],
+ },
+ "short": {
+  "entry_all": [{"indicator": "rsi14", "op": ">", "rhs": 35}, {"indicator": "close", "op": "<", "rhs_indicator": "ema50"}],
+  "entry_any": [{"indicator": "macd", "op": "crossesbelow", "rhs_indicator": "macd_signal"},
+                {"indicator": "rsi14", "op": "between", "rhs": [60, 70]}],
+ },
+}}
+
+
+def per_bar(i):
+ """should_enter()'s declarative branch before plans"""
+ entry = params["entry"]
+ for side, name in (("long", "LONG"), ("short", "SHORT")):
+  cfg = entry[side]
+  if evaluate_entry_logic(cfg.get("entry_all") or [], cfg.get("entry_any") or [], i, ts, o, h, l, c, feats):
+   return name
+ return None
+
+
+def best_of(fn):
+ best, out = float("inf"), None
+ for _ in range(args.repeat):
+  t0 = time.perf_counter()
+  out = [fn(i) for i in range(n)]
+  best = min(best, time.perf_counter() - t0)
+ return best, out
+
+
+t_old, old = best_of(per_bar)
+# Parsing + whole-series masks, paid once per backtest
+t0 = time.perf_counter()
+masks = entry_masks(params, o, h, l, c, feats)
+t_build = time.perf_counter() - t0
+t_new, new = best_of(lambda i: should_enter(i, ts, o, h, l, c, feats, params, masks=masks))
+
+print({
+ "bars": n,
+ "identical": old == new,
+ "signals": sum(s is not None for s in new),
+ "per_bar_s": round(t_old, 3),
+ "plan_s": round(t_new, 3),
+ "plan_build_ms": round(t_build * 1e3, 2),
+ "us_per_bar_old": round(t_old / n * 1e6, 2),
+ "us_per_bar_plan": round(t_new / n * 1e6, 2),
+ "speedup": round(t_old / t_new, 1),
+})
@@ -0,0 +1,83 @@
+"""
+Per-bar cost of ExitPlan processing in PaperFuturesBrokerV2.
+
+Replays one long-lived position (ATR trailing, no time stop) through the
+broker twice: with the pre-engine path (function-level import, ctx dict and
+update_trailing_stop/check_exits every bar) and with ExitEngine.step().
+Both runs use the metrics-only sink so only exit handling is timed.
+
+Usage:
+ python tools/bench_exit_engine.py --bars 200000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.agents.exits import build_exit_plan
+from broker.paper_v2 import PaperFuturesBrokerV2
+
+ap = argparse.ArgumentParser()
+ap.add_argument('--bars', type=int, default=200_000)
+ap.add_argument('--style', default='atr_trailing')
+args = ap.parse_args()
+
+rng = np.random.default_rng(0)
+c = (50_000 + np.cumsum(rng.normal(0, 1.0, args.bars))).tolist()
+h = [x + 2.0 for x in c]
+l = [x - 2.0 for x in c]
+
+
+class PerBarPlanBroker(PaperFuturesBrokerV2):
+ """Pre-engine ExitPlan path"""
+
+ def _process_exit_plan(self, ts, high, low, close, atr, st_line, kel_lo, kel_up):
+  from backend.agents.exits import update_trailing_stop, check_exits
+  plan = self._exit_plan
+  plan.bars_in_trade += 1
+  ctx = {"tick_size": 0.1, "close": close, "high": high, "low": low,
+         "highest_since_entry": self.highest_since_entry, "lowest_since_entry": self.lowest_since_entry}
+  if st_line is not None:
+   ctx["supertrend"] = st_line
+  if kel_lo is not None:
+   ctx["keltner_lo"] = kel_lo
+  if kel_up is not None:
+   ctx["keltner_up"] = kel_up
+  update_trailing_stop(plan, ctx, ctx, atr)
+  exit_result = check_exits(plan, close, high, low)
+  if exit_result:
+   reason, price, partial_pct = exit_result
+   if partial_pct:
+    self._partial_exit(ts, price, reason, partial_pct)
+   else:
+    self._close(ts, price, reason)
+
+
+def run(cls):
+ # Wide stop/targets and far trailing levels keep the position open for the whole run
+ plan = build_exit_plan("LONG", c[0], 1e6, {"sl_tp_style": args.style, "time_stop_bars": None,
+                                             "breakeven_at_R": 1e9}, {"tick_size": 0.1})
+ broker = cls(sink="null")
+ broker.open_with_plan(0, 1.0, c[0], 1.0, plan)
+ t0 = time.perf_counter()
+ for i in range(1, args.bars):
+  broker.on_candle(i, h[i], l[i], c[i], 1e4, st_line=c[i] - 5e3, kel_lo=c[i] - 5e3, kel_up=c[i] + 5e3)
+ elapsed = time.perf_counter() - t0
+ assert broker.position is not None
+ return elapsed * 1e9 / (args.bars - 1), broker
+
+
+before_ns, before = run(PerBarPlanBroker)
+after_ns, after = run(PaperFuturesBrokerV2)
+print({
+ 'bars': args.bars,
+ 'style': args.style,
+ 'per_bar_ns_before': round(before_ns),
+ 'per_bar_ns_after': round(after_ns),
+ 'speedup': round(before_ns / after_ns, 2),
+ 'final_sl_match': before._exit_plan.sl == after._exit_engine.sl,
+})
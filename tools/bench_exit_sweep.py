@@ -0,0 +1,79 @@
+"""
+Exit-parameter sweep: per-position broker replay vs simulate_exits().
+
+Builds a grid of exit parameters (sl_atr_mult x trail_atr_mult x style x
+breakeven) for a fixed set of entries on a synthetic series, then evaluates
+every (params, entry) pair either through PaperFuturesBrokerV2 one position
+at a time or as one ExitPlanBatch.
+
+Usage:
+ python tools/bench_exit_sweep.py --bars 5000 --entries 40
+"""
+import argparse
+import copy
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.agents.exits import ExitPlanBatch, build_exit_plan, simulate_exits
+from broker.paper_v2 import PaperFuturesBrokerV2
+
+ap = argparse.ArgumentParser()
+ap.add_argument('--bars', type=int, default=5000)
+ap.add_argument('--entries', type=int, default=40)
+args = ap.parse_args()
+
+rng = np.random.default_rng(0)
+c = 30000 + np.cumsum(rng.normal(0, 40, args.bars))
+h = c + rng.uniform(5, 50, args.bars)
+l = c - rng.uniform(5, 50, args.bars)
+atr = np.full(args.bars, 60.0)
+st = c - 120.0
+
+grid = list(itertools.product([1.2, 1.6, 2.0, 2.4, 2.8], [1.0, 1.5, 2.0, 2.5, 3.0],
+                              ["atr_trailing", "chandelier", "supertrend", "structure_atr"], [0.5, 1.0, 1.5]))
+entries = np.linspace(10, args.bars - 300, args.entries).astype(int)
+
+plans, starts = [], []
+for sl_mult, trail_mult, style, be in grid:
+ params = {"sl_tp_style": style, "sl_atr_mult": sl_mult, "trail_atr_mult": trail_mult,
+           "breakeven_at_R": be, "time_stop_bars": 200}
+ for k, e in enumerate(entries):
+  side = "LONG" if k % 2 == 0 else "SHORT"
+  plans.append(build_exit_plan(side, c[e], atr[e], params, {"tick_size": 0.1}))
+  starts.append(int(e))
+
+fresh = copy.deepcopy(plans)  # the broker mutates plans in place
+H, L, C, A, ST = h.tolist(), l.tolist(), c.tolist(), atr.tolist(), st.tolist()
+t0 = time.perf_counter()
+scalar_pnl = []
+for plan, e in zip(plans, starts):
+ broker = PaperFuturesBrokerV2(sink="null")
+ broker.open_with_plan(e, 1.0, C[e], 1.0, plan)
+ for i in range(e + 1, len(C)):
+  broker.on_candle(i, H[i], L[i], C[i], A[i], st_line=ST[i])
+  if broker.position is None:
+   break
+ scalar_pnl.append(broker.equity - broker.start_equity)
+scalar_s = time.perf_counter() - t0
+
+t0 = time.perf_counter()
+batch = ExitPlanBatch.from_plans(fresh)
+pack_s = time.perf_counter() - t0
+out = simulate_exits(batch, h, l, c, atr, starts, supertrend=st)
+batch_s = time.perf_counter() - t0
+
+print({
+ 'candidates': len(plans),
+ 'param_sets': len(grid),
+ 'scalar_s': round(scalar_s, 2),
+ 'batch_s': round(batch_s, 2),
+ 'pack_s': round(pack_s, 3),
+ 'speedup': round(scalar_s / batch_s, 1),
+ 'max_pnl_diff': float(np.max(np.abs(out['pnl'] - np.array(scalar_pnl)))),
+})
@@ -0,0 +1,122 @@
+"""
+Per-bar overhead of indicator construction in run_single_strategy_backtest.
+
+Runs backtesting/run_all.run_single_strategy_backtest on synthetic candles
+twice per strategy: with the old eager build_indicator_dict() per bar and
+with the shared IndicatorView. Reports wall time, per-bar cost and checks
+that trade counts and final equity are identical. Also times the indicator
+step alone (build + the keys a strategy reads).
+
+Runs inside a temp directory (run_all writes result folders under data/).
+
+Usage:
+ python tools/bench_indicator_view.py --bars 20000 --strategies 6
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from backtesting import run_all
+from core.features import compute_feature_rows
+from strategies.adapter import IndicatorView, build_indicator_dict
+from strategies.registry import ALL_STRATEGIES
+
+ap = argparse.ArgumentParser()
+ap.add_argument('--bars', type=int, default=20_000)
+ap.add_argument('--strategies', type=int, default=6)
+args = ap.parse_args()
+
+rng = np.random.default_rng(0)
+n = args.bars
+c_arr = 30_000 + np.cumsum(rng.normal(0, 40, n))
+o_arr = np.concatenate([[c_arr[0]], c_arr[:-1]])
+ts = (np.arange(n) * 300_000 + 1_700_000_000_000).tolist()
+o = o_arr.tolist()
+h = (np.maximum(o_arr, c_arr) + rng.uniform(1, 40, n)).tolist()
+l = (np.minimum(o_arr, c_arr) - rng.uniform(1, 40, n)).tolist()
+c = c_arr.tolist()
+v = rng.uniform(1, 100, n).tolist()
+
+COLUMNS = ["ema20", "ema50", "atr14", "rsi5", "rsi14", "adx14", "bb_mid", "bb_lo", "bb_up", "dn55", "up55",
+           "regime", "macro", "atr1h_pct", "macd", "macd_signal", "macd_hist", "stoch_k", "stoch_d", "cci20",
+           "williams_r", "supertrend", "supertrend_dir", "mfi14", "vwap", "obv", "keltner_mid", "keltner_lo",
+           "keltner_up"]
+rows = compute_feature_rows(ts, o, h, l, c, v)
+feats = {name: [r[k + 1] for r in rows] for k, name in enumerate(COLUMNS)}
+cfg = {"account": {"starting_equity_usd": 100000}, "risk": {}, "fees": {"spread_bps": 1.0, "taker_fee_bps": 5.0,
+       "maker_fee_bps": 2.0}, "sizing": {}}
+
+
+class EagerView:
+ """Pre-view behaviour: a fresh build_indicator_dict() every bar"""
+
+ def __init__(self, ts, o, h, l, c, feats):
+  self.args = (ts, o, h, l, c, feats)
+
+ def at(self, i):
+  return build_indicator_dict(i, *self.args)
+
+
+def run(name, view_cls):
+ run_all.IndicatorView = view_cls
+ with contextlib.redirect_stdout(io.StringIO()):
+  t0 = time.perf_counter()
+  res = run_all.run_single_strategy_backtest(name, ts, o, h, l, c, v, feats, cfg, days=0)
+  elapsed = time.perf_counter() - t0
+ run_all.IndicatorView = IndicatorView
+ return elapsed, res
+
+
+names = list(ALL_STRATEGIES)[:args.strategies]
+results = {"bars": n, "strategies": len(names), "identical": True}
+eager_total = view_total = 0.0
+cwd = os.getcwd()
+with tempfile.TemporaryDirectory() as tmp:
+ os.chdir(tmp)
+ try:
+  for name in names:
+   t_eager, r_eager = run(name, EagerView)
+   t_view, r_view = run(name, IndicatorView)
+   eager_total += t_eager
+   view_total += t_view
+   same = (r_eager["trades"], r_eager["final_equity"]) == (r_view["trades"], r_view["final_equity"])
+   results["identical"] &= same
+   results.setdefault("trades", []).append(r_view["trades"])
+ finally:
+  os.chdir(cwd)
+
+bars_run = n * len(names)
+results["backtest_eager_s"] = round(eager_total, 3)
+results["backtest_view_s"] = round(view_total, 3)
+results["backtest_us_per_bar_eager"] = round(eager_total / bars_run * 1e6, 2)
+results["backtest_us_per_bar_view"] = round(view_total / bars_run * 1e6, 2)
+results["backtest_speedup"] = round(eager_total / view_total, 2)
+
+# Indicator step alone: build + five typical reads
+KEYS = ("ema20", "ema50", "rsi14", "atr", "supertrend_bull")
+t0 = time.perf_counter()
+for i in range(n):
+ ind = build_indicator_dict(i, ts, o, h, l, c, feats)
+ for k in KEYS:
+  ind[k]
+t_dict = time.perf_counter() - t0
+view = IndicatorView(ts, o, h, l, c, feats)
+t0 = time.perf_counter()
+for i in range(n):
+ ind = view.at(i)
+ for k in KEYS:
+  ind[k]
+t_view = time.perf_counter() - t0
+results["indicator_us_per_bar_dict"] = round(t_dict / n * 1e6, 2)
+results["indicator_us_per_bar_view"] = round(t_view / n * 1e6, 2)
+results["indicator_speedup"] = round(t_dict / t_view, 1)
+print(results)
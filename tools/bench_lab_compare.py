@@ -0,0 +1,105 @@
+"""
+/api/lab/compare latency and payload for N runs with M-bar equity curves.
+
+Compares the previous handler body (re-parse every equity.csv with csv +
+datetime and ship every point) against the current one: a cold call that
+parses and LTTB-downsamples to --width, and a warm call served from the
+(run, width) cache. Times are medians of --repeat; JSON serialisation of
+the response is included.
+
+Usage:
+ python tools/bench_lab_compare.py --runs 10 --bars 100000 --width 1000
+"""
+import argparse
+import asyncio
+import csv
+import glob
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from core import database as db_sqlite
+from lab.equity import equity_cache
+from routers.lab import compare_runs
+
+
+def legacy_compare(run_ids):
+ """The pre-downsampling handler body (equity.csv branch)"""
+ comparison_data = []
+ conn_lab = db_sqlite.connect_lab()
+ for run_id in run_ids:
+  run = db_sqlite.get_run(conn_lab, run_id)
+  equity_path = glob.glob(os.path.join("artifacts", run_id, "*", "equity.csv"))[0]
+  equity_data = []
+  with open(equity_path, 'r') as f:
+   for row in csv.DictReader(f):
+    timestamp = int(datetime.fromisoformat(row['timestamp']).timestamp())
+    equity_data.append({'time': timestamp, 'equity': float(row['equity'])})
+  trials = db_sqlite.get_run_trials(conn_lab, run_id, limit=1)
+  comparison_data.append({'run_id': run_id, 'name': run['name'], 'equity': equity_data,
+                          'metrics': trials[0]['metrics_json'] if trials else {}, 'status': run['status']})
+ conn_lab.close()
+ return {'runs': comparison_data}
+
+
+def make_lab(runs, bars):
+ conn = db_sqlite.connect_lab()
+ rng = np.random.default_rng(0)
+ stamps = [datetime.fromtimestamp(1_600_000_000 + 300 * k, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S") for k in range(bars)]
+ run_ids = []
+ for r in range(runs):
+  run_id = f"bench-{r}"
+  db_sqlite.create_run(conn, run_id, run_id, "backtest", {"data": {}})
+  equity = 10_000 + np.cumsum(rng.normal(0, 5, bars))
+  dd = (equity / np.maximum.accumulate(equity) - 1) * 100
+  os.makedirs(os.path.join("artifacts", run_id, "1"))
+  with open(os.path.join("artifacts", run_id, "1", "equity.csv"), "w") as f:
+   f.write("timestamp,equity,drawdown\n")
+   f.writelines(f"{s},{e},{d}\n" for s, e, d in zip(stamps, equity, dd))
+  run_ids.append(run_id)
+ conn.close()
+ return run_ids
+
+
+def _timed(fn, repeat):
+ times, body = [], b""
+ for _ in range(repeat):
+  t0 = time.perf_counter()
+  body = json.dumps(fn()).encode()
+  times.append(time.perf_counter() - t0)
+ return round(statistics.median(times) * 1000, 1), len(body)
+
+
+if __name__ == "__main__":
+ ap = argparse.ArgumentParser()
+ ap.add_argument('--runs', type=int, default=10)
+ ap.add_argument('--bars', type=int, default=100_000)
+ ap.add_argument('--width', type=int, default=1000)
+ ap.add_argument('--repeat', type=int, default=3)
+ args = ap.parse_args()
+
+ os.chdir(tempfile.mkdtemp(prefix="bench_compare_"))
+ run_ids = make_lab(args.runs, args.bars)
+
+ legacy_ms, legacy_bytes = _timed(lambda: legacy_compare(run_ids), args.repeat)
+
+ def cold():
+  equity_cache.clear()
+  return asyncio.run(compare_runs(run_ids, width=args.width))
+ cold_ms, new_bytes = _timed(cold, args.repeat)
+ warm_ms, _ = _timed(lambda: asyncio.run(compare_runs(run_ids, width=args.width)), args.repeat)
+ print(json.dumps({
+  "runs": args.runs, "bars": args.bars, "width": args.width,
+  "legacy": {"ms": legacy_ms, "bytes": legacy_bytes},
+  "downsampled_cold": {"ms": cold_ms, "bytes": new_bytes},
+  "downsampled_warm": {"ms": warm_ms, "bytes": new_bytes},
+ }, indent=2))
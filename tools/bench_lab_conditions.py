@@ -0,0 +1,118 @@
+"""
+Strategy Lab entry evaluation: per-bar conditions vs compiled masks.
+
+Evaluates a 10-condition config (6 entry_all + 4 entry_any across both
+sides, with crossovers and indicator-vs-indicator comparisons) over a
+synthetic feature frame. The per-bar path is the engine's former
+evaluator (reproduced below: df.iloc rows, one condition at a time); the
+compiled path is lab.conditions.compile_entry_masks(). Masks must match.
+
+Usage:
+ python tools/bench_lab_conditions.py --bars 20000
+"""
+import argparse
+import operator
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from lab.conditions import compile_entry_masks, resolve_column
+from lab.schemas import Condition, ConditionOperator as Op, DataSpec, Objective, RiskSpec, StrategyConfig, StrategySide
+
+ap = argparse.ArgumentParser()
+ap.add_argument('--bars', type=int, default=20_000)
+args = ap.parse_args()
+
+rng = np.random.default_rng(0)
+n = args.bars
+close = 30_000 + np.cumsum(rng.normal(0, 40, n))
+df = pd.DataFrame({
+ "ts": np.arange(n, dtype=np.int64) * 300_000, "close": close,
+ "high": close + 20, "low": close - 20, "rsi_14": rng.uniform(0, 100, n),
+ "ema_20": close + rng.normal(0, 30, n), "ema_50": close + rng.normal(0, 30, n),
+ "adx_14": rng.uniform(5, 50, n), "macd": rng.normal(0, 1, n), "macd_signal": rng.normal(0, 1, n),
+ "atr_14": rng.uniform(20, 80, n), "stoch_k": rng.uniform(0, 100, n),
+})
+
+
+CMP = {
+ Op.GT: operator.gt, Op.LT: operator.lt, Op.GTE: operator.ge, Op.LTE: operator.le,
+ Op.EQ: lambda a, b: abs(a - b) < 1e-9, Op.NE: lambda a, b: abs(a - b) >= 1e-9,
+}
+
+
+def per_bar_condition(row, prev_row, cd):
+ """One condition on one bar, as the engine evaluated it before compilation"""
+ col = resolve_column(cd.indicator)
+ if col not in row.index or pd.isna(row[col]):
+  return False
+ if cd.rhs is not None:
+  rhs = cd.rhs
+ elif cd.rhs_indicator and resolve_column(cd.rhs_indicator) in row.index and not pd.isna(row[resolve_column(cd.rhs_indicator)]):
+  rhs = row[resolve_column(cd.rhs_indicator)]
+ else:
+  return False
+ lhs = row[col]
+ if cd.op in CMP:
+  return CMP[cd.op](lhs, rhs)
+ if cd.op not in (Op.CROSSES_ABOVE, Op.CROSSES_BELOW) or prev_row is None:
+  return False
+ prev_lhs = prev_row[col]
+ prev_rhs = cd.rhs if cd.rhs is not None else prev_row[resolve_column(cd.rhs_indicator)]
+ if pd.isna(prev_lhs) or pd.isna(prev_rhs):
+  return False
+ if cd.op == Op.CROSSES_ABOVE:
+  return prev_lhs <= prev_rhs and lhs > rhs
+ return prev_lhs >= prev_rhs and lhs < rhs
+
+
+def per_bar_side(i, side):
+ row = df.iloc[i]
+ prev_row = df.iloc[i - 1] if i > 0 else None
+ all_ok = bool(side.entry_all) and all(per_bar_condition(row, prev_row, cd) for cd in side.entry_all)
+ return all_ok or any(per_bar_condition(row, prev_row, cd) for cd in side.entry_any or [])
+
+
+def cond(indicator, op, rhs=None, rhs_indicator=None):
+ return Condition(indicator=indicator, timeframe="5m", op=op, rhs=rhs, rhs_indicator=rhs_indicator)
+
+
+config = StrategyConfig(
+ name="bench",
+ long=StrategySide(
+  entry_all=[cond("rsi", "<", 70.0), cond("ema_20", ">", rhs_indicator="ema_50"), cond("adx", ">=", 12.0)],
+  entry_any=[cond("macd", "crosses_above", rhs_indicator="macd_signal"), cond("stoch_k", "crosses_above", 20.0)],
+ ),
+ short=StrategySide(
+  entry_all=[cond("rsi", ">", 30.0), cond("ema_20", "<", rhs_indicator="ema_50"), cond("adx", ">=", 12.0)],
+  entry_any=[cond("macd", "crosses_below", rhs_indicator="macd_signal"), cond("stoch_k", "crosses_below", 80.0)],
+ ),
+ data=DataSpec(exchange="binance", symbols=["BTC/USDT:USDT"], timeframe="5m", since=0, until=1),
+ risk=RiskSpec(), objective=Objective(expression="sharpe"), warmup_bars=0,
+)
+
+t0 = time.perf_counter()
+ref_long = np.array([per_bar_side(i, config.long) for i in range(n)])
+ref_short = np.array([per_bar_side(i, config.short) for i in range(n)])
+t_bar = time.perf_counter() - t0
+
+t0 = time.perf_counter()
+long_mask, short_mask = compile_entry_masks(config, df)
+t_vec = time.perf_counter() - t0
+
+print({
+ "bars": n,
+ "conditions": 10,
+ "per_bar_s": round(t_bar, 3),
+ "per_bar_us": round(t_bar / n * 1e6, 1),
+ "compiled_s": round(t_vec, 5),
+ "speedup": round(t_bar / t_vec),
+ "match": bool((long_mask == ref_long).all() and (short_mask == ref_short).all()),
+ "long_signals": int(long_mask.sum()),
+ "short_signals": int(short_mask.sum()),
+})
@@ -0,0 +1,92 @@
+"""
+ML inference engines: torch checkpoint vs numpy bundle.
+
+Saves a random MLP (--hidden) with ml.train.save_model() into a temp dir,
+then, in a fresh process per engine, measures:
+- startup: imports + model load, from interpreter start of the measured block
+- rss: peak RSS after load and one prediction (VmHWM; ru_maxrss would
+  carry over the parent's peak across fork+exec)
+- per-bar latency: predict on one feature row, median of --repeat calls
+  (torch: ml.inference.predict_proba(); numpy: MLPBundle.predict_proba())
+- series: one call over --rows rows
+
+Usage:
+ python tools/bench_ml_bundle.py --hidden 128 --rows 105120
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+
+def peak_rss_mb():
+ try:
+  with open("/proc/self/status") as f:
+   return next(int(line.split()[1]) for line in f if line.startswith("VmHWM")) / 1024
+ except (OSError, StopIteration):
+  return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def phase(engine, model_dir, args):
+ t0 = time.perf_counter()
+ import numpy as np
+ if engine == "torch":
+  from ml.inference import load_model, predict_proba
+  model, scaler, meta, device = load_model(model_dir)
+  predict = lambda X: predict_proba(model, scaler, X, device)
+ else:
+  from ml.bundle import load_bundle
+  bundle = load_bundle(model_dir)
+  predict = bundle.predict_proba
+ startup = time.perf_counter() - t0
+ X = np.random.default_rng(0).normal(size=(args.rows, 12))
+ predict(X[:1])
+ rss = peak_rss_mb()
+ lat = []
+ for k in range(args.repeat):
+  t = time.perf_counter()
+  predict(X[k % len(X):k % len(X) + 1])
+  lat.append(time.perf_counter() - t)
+ t = time.perf_counter()
+ predict(X)
+ series = time.perf_counter() - t
+ print(json.dumps({"startup_s": round(startup, 3), "rss_mb": round(rss), "per_bar_us": round(float(np.median(lat)) * 1e6, 1),
+                   "series_ms": round(series * 1000, 1), "torch_loaded": "torch" in sys.modules}))
+
+
+if __name__ == "__main__":
+ ap = argparse.ArgumentParser()
+ ap.add_argument('--hidden', type=int, default=128)
+ ap.add_argument('--rows', type=int, default=105120)
+ ap.add_argument('--repeat', type=int, default=2000)
+ ap.add_argument('--phase', type=str, default=None)
+ ap.add_argument('--model-dir', type=str, default=None)
+ args = ap.parse_args()
+
+ if args.phase:
+  phase(args.phase, args.model_dir, args)
+  sys.exit(0)
+
+ import numpy as np
+ import torch
+ from sklearn.preprocessing import StandardScaler
+ from ml.model import MLP
+ from ml.train import save_model
+
+ res = {"hidden": args.hidden, "rows": args.rows}
+ with tempfile.TemporaryDirectory() as d:
+  torch.manual_seed(0)
+  X = np.random.default_rng(1).normal(size=(10000, 12))
+  save_model(MLP(in_dim=12, hidden=args.hidden), StandardScaler().fit(X), [f"f{k}" for k in range(12)], 12, args.hidden, d)
+  for engine in ("torch", "numpy"):
+   out = subprocess.check_output([sys.executable, __file__, "--phase", engine, "--model-dir", d, "--hidden", str(args.hidden),
+                                  "--rows", str(args.rows), "--repeat", str(args.repeat)], text=True)
+   res[engine] = json.loads(out.strip().splitlines()[-1])
+ print(json.dumps(res))
@@ -0,0 +1,67 @@
+"""
+ML dataset build: recompute vs content-addressed cache hit.
+
+Writes --days of synthetic 5m candles into a temp DB and times, with a
+fresh cache directory:
+- build_dataset(): uncached, first cached call (miss + write), second
+  cached call (hit: candle load + fingerprint + .npy reads)
+- backtest_inputs(): the same three ways
+- a second horizon on the warm cache (features hit, labels miss)
+
+Usage:
+ python tools/bench_ml_cache.py --days 365
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from core.database import connect, insert_candles
+from ml.backtest import backtest_inputs
+from ml.cache import ArrayCache
+from ml.data import build_dataset, load_candles
+
+
+def timed(fn):
+ t0 = time.perf_counter()
+ fn()
+ return round(time.perf_counter() - t0, 3)
+
+
+if __name__ == "__main__":
+ ap = argparse.ArgumentParser()
+ ap.add_argument('--days', type=int, default=365)
+ args = ap.parse_args()
+
+ with tempfile.TemporaryDirectory() as ws:
+  n = args.days * 288
+  rng = np.random.default_rng(0)
+  c = 30000 + np.cumsum(rng.normal(0, 40, n))
+  o = np.concatenate([[c[0]], c[:-1]])
+  ts = int(time.time()) // 300 * 300 - 300 * np.arange(n)[::-1]
+  db = os.path.join(ws, "candles.db")
+  insert_candles(connect(db), [(int(t), float(a), float(max(a, b) + 10), float(min(a, b) - 10), float(b), 1.0)
+                               for t, a, b in zip(ts, o, c)])
+  cache_dir = os.path.join(ws, "cache")
+  days = args.days + 1
+  bars = load_candles(db, days)
+
+  res = {"bars": n}
+  res["dataset_uncached_s"] = timed(lambda: build_dataset(db, days, cache_dir=None))
+  res["dataset_miss_s"] = timed(lambda: build_dataset(db, days, cache_dir=cache_dir))
+  res["dataset_hit_s"] = timed(lambda: build_dataset(db, days, cache_dir=cache_dir))
+  res["dataset_new_horizon_s"] = timed(lambda: build_dataset(db, days, horizon=24, cache_dir=cache_dir))
+  res["candle_load_s"] = timed(lambda: load_candles(db, days))
+  res["backtest_uncached_s"] = timed(lambda: backtest_inputs(*bars))
+  res["backtest_miss_s"] = timed(lambda: backtest_inputs(*bars, cache=ArrayCache(cache_dir)))
+  res["backtest_hit_s"] = timed(lambda: backtest_inputs(*bars, cache=ArrayCache(cache_dir)))
+  res["cache_mb"] = round(ArrayCache(cache_dir).size_bytes() / 1e6, 1)
+  res["dataset_speedup"] = round(res["dataset_uncached_s"] / res["dataset_hit_s"], 1)
+ print(json.dumps(res))
@@ -0,0 +1,108 @@
+"""
+ML backtest inference throughput on CPU (bars/sec).
+
+Builds synthetic candles + feature rows, a randomly initialised MLP and a
+fitted StandardScaler, then times producing [p_long, p_short] for every bar:
+- per_bar: the old loop (python feature vector, scaler.transform([x]),
+  single-sample forward under no_grad)
+- batched: build_feature_matrix() + predict_proba() over the whole series
+- cached:  cached_predictions() on a warm cache (checksum + fingerprint + load)
+
+Usage:
+ python tools/bench_ml_inference.py --bars 100000 --batch-size 65536
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import torch
+from sklearn.preprocessing import StandardScaler
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from core.features import compute_feature_rows
+from ml.inference import build_feature_matrix, cached_predictions, predict_proba
+from ml.model import MLP
+
+ap = argparse.ArgumentParser()
+ap.add_argument('--bars', type=int, default=100_000)
+ap.add_argument('--batch-size', type=int, default=65536)
+ap.add_argument('--per-bar-limit', type=int, default=20_000, help='bars timed on the slow path (rate is extrapolated)')
+args = ap.parse_args()
+
+rng = np.random.default_rng(0)
+n = args.bars
+c_arr = 30_000 + np.cumsum(rng.normal(0, 40, n))
+o_arr = np.concatenate([[c_arr[0]], c_arr[:-1]])
+ts = (np.arange(n) * 300 + 1_700_000_000).tolist()
+o = o_arr.tolist()
+h = (np.maximum(o_arr, c_arr) + rng.uniform(1, 40, n)).tolist()
+l = (np.minimum(o_arr, c_arr) - rng.uniform(1, 40, n)).tolist()
+c = c_arr.tolist()
+rows = compute_feature_rows(ts, o, h, l, c)
+
+torch.manual_seed(0)
+model = MLP(in_dim=12, hidden=128, dropout=0.1).eval()
+scaler = StandardScaler().fit(np.nan_to_num(build_feature_matrix(rows, c)))
+
+
+def per_bar(limit):
+ out = []
+ for i, fr in enumerate(rows[:limit]):
+  ema20, ema50, atr14, rsi5, rsi14, bb_lo, bb_up, regime, macro, atr1h_pct = \
+   fr[1], fr[2], fr[3], fr[4], fr[5], fr[8], fr[9], fr[12], fr[13], fr[14]
+  close = c[i]
+  x = [
+   (close - ema20) / close if close else 0.0,
+   (close - ema50) / close if close else 0.0,
+   rsi5 or 0.0, rsi14 or 0.0,
+   fr[6] or 0.0,
+   (close - bb_lo) / ((bb_up - bb_lo) + 1e-9) if close else 0.0,
+   atr14 / close * 100 if close else 0.0,
+   atr1h_pct or 0.0,
+   1.0 if regime == 'UPTREND' else 0.0,
+   1.0 if regime == 'DOWNTREND' else 0.0,
+   1.0 if regime == 'RANGE' else 0.0,
+   1.0 if macro == 'ABOVE' else (0.0 if macro == 'BELOW' else -1.0),
+  ]
+  x = scaler.transform([x]).astype("float32")
+  with torch.no_grad():
+   out.append(torch.sigmoid(model(torch.tensor(x))).numpy()[0])
+ return np.array(out)
+
+
+limit = min(n, args.per_bar_limit)
+t0 = time.perf_counter()
+ref = per_bar(limit)
+t_bar = time.perf_counter() - t0
+
+t0 = time.perf_counter()
+probs = predict_proba(model, scaler, build_feature_matrix(rows, c), "cpu", args.batch_size)
+t_batch = time.perf_counter() - t0
+
+with tempfile.TemporaryDirectory() as tmp:
+ torch.save(model.state_dict(), os.path.join(tmp, "model.pt"))
+ joblib.dump(scaler, os.path.join(tmp, "scaler.pkl"))
+ with open(os.path.join(tmp, "meta.json"), "w") as f:
+  json.dump({"feat_cols": list(range(12))}, f)
+ X = build_feature_matrix(rows, c)
+ cached_predictions(model, scaler, X, tmp, "cpu", args.batch_size, cache_dir=os.path.join(tmp, "cache"))
+ t0 = time.perf_counter()
+ cached_predictions(model, scaler, build_feature_matrix(rows, c), tmp, "cpu", args.batch_size, cache_dir=os.path.join(tmp, "cache"))
+ t_cached = time.perf_counter() - t0
+
+print({
+ "bars": n,
+ "threads": torch.get_num_threads(),
+ "max_abs_diff": float(np.nanmax(np.abs(probs[:limit] - ref))),
+ "per_bar_bars_per_s": round(limit / t_bar),
+ "batched_bars_per_s": round(n / t_batch),
+ "cached_bars_per_s": round(n / t_cached),
+ "batched_speedup": round((n / t_batch) / (limit / t_bar), 1),
+})
@@ -0,0 +1,123 @@
+"""
+ML Optuna throughput: subprocess-per-trial vs in-process objective (trials/hour).
+
+Writes a synthetic candle DB + config.yaml into a temp workspace and draws
+--trials parameter sets from the study's search space (seeded), then runs
+the same sets two ways with --workers in parallel:
+- subprocess: what the old objective did per trial, `python -m ml.train`
+  followed by `python -m ml.backtest --days days//3` (torch import, dataset
+  and feature rebuild in every process), from a thread pool
+- in-process: prepare_shared() once, then spawned workers that mmap the
+  shared arrays and run make_objective() with cpu_count // workers torch
+  threads (optuna.trial.FixedTrial, so pruning never fires)
+
+Usage:
+ python tools/bench_ml_optuna.py --days 60 --trials 8 --workers 4
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import optuna
+import yaml
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from core.database import connect, insert_candles
+from ml.optimize import load_shared, make_objective, prepare_shared, suggest_params
+
+CFG = {"risk": {"sl_tp_style": "atr_fixed"}, "sizing": {"mode": "usd", "usd": 1000, "leverage": 3}}
+
+
+def legacy_trial(params, days, workspace, env):
+ p = params
+ subprocess.check_call([sys.executable, "-m", "ml.train", "--days", str(days), "--horizon", str(p["horizon"]), "--hidden", str(p["hidden"]),
+                        "--dropout", str(p["dropout"]), "--lr", str(p["lr"]), "--epochs", str(p["epochs"]), "--batch", str(p["batch"]),
+                        "--device", "cpu", "--no-data-cache", "--db", os.path.join(workspace, "candles.db")],
+                       cwd=workspace, env=env, stdout=subprocess.DEVNULL)
+ out = subprocess.check_output([sys.executable, "-m", "ml.backtest", "--days", str(days // 3), "--no-pred-cache", "--no-data-cache", "--p-entry", str(p["p_entry"]),
+                                "--allow-shorts", str(p["allow_shorts"]), "--sl-style", p["sl_style"], "--sl-atr", str(p["sl_atr"]),
+                                "--tp-rr", str(p["tp_rr"]), "--breakeven-R", str(p["breakeven_R"]), "--trail-atr", str(p["trail_atr"]),
+                                "--time-stop", str(p["time_stop"]), "--size-mode", p["size_mode"], "--usd", str(p["usd_amt"]),
+                                "--portfolio-pct", str(p["portfolio_pct"]), "--leverage", str(p["leverage"])],
+                               cwd=workspace, env=env, text=True)
+ return out
+
+
+_objective = None
+
+
+def _init_worker(shared_dir, threads):
+ global _objective
+ import torch
+ torch.set_num_threads(threads)
+ _objective = make_objective(load_shared(shared_dir), CFG)
+
+
+def _run_fixed(trial_params):
+ return _objective(optuna.trial.FixedTrial(trial_params))
+
+
+if __name__ == "__main__":
+ ap = argparse.ArgumentParser()
+ ap.add_argument('--days', type=int, default=60)
+ ap.add_argument('--trials', type=int, default=8)
+ ap.add_argument('--workers', type=int, default=4)
+ args = ap.parse_args()
+
+ optuna.logging.set_verbosity(optuna.logging.WARNING)
+ sampler_study = optuna.create_study(direction="maximize", sampler=optuna.samplers.RandomSampler(seed=0))
+ param_sets = []
+ for _ in range(args.trials):
+  t = sampler_study.ask()
+  suggest_params(t)
+  param_sets.append(dict(t.params))
+  sampler_study.tell(t, 0.0)
+
+ with tempfile.TemporaryDirectory() as ws:
+  n = args.days * 288
+  rng = np.random.default_rng(0)
+  c = 30000 + np.cumsum(rng.normal(0, 40, n))
+  o = np.concatenate([[c[0]], c[:-1]])
+  ts = int(time.time()) // 300 * 300 - 300 * np.arange(n)[::-1]
+  db = os.path.join(ws, "candles.db")
+  insert_candles(connect(db), [(int(t), float(a), float(max(a, b) + 10), float(min(a, b) - 10), float(b), 1.0)
+                               for t, a, b in zip(ts, o, c)])
+  with open(os.path.join(ws, "config.yaml"), "w") as f:
+   yaml.safe_dump(dict(CFG, db={"path": db}), f)
+  env = dict(os.environ, PYTHONPATH=ROOT)
+
+  t0 = time.perf_counter()
+  with ThreadPoolExecutor(args.workers) as pool:
+   list(pool.map(lambda p: legacy_trial(p, args.days, ws, env), param_sets))
+  t_legacy = time.perf_counter() - t0
+
+  t0 = time.perf_counter()
+  shared_dir = prepare_shared(db, args.days, os.path.join(ws, "shared"), cache_dir=None)
+  t_prepare = time.perf_counter() - t0
+  threads = max(1, (os.cpu_count() or 1) // args.workers)
+  with ProcessPoolExecutor(args.workers, mp_context=mp.get_context("spawn"), initializer=_init_worker,
+                           initargs=(shared_dir, threads)) as pool:
+   values = list(pool.map(_run_fixed, param_sets))
+  t_new = time.perf_counter() - t0
+
+ print(json.dumps({
+  "bars": n,
+  "trials": args.trials,
+  "workers": args.workers,
+  "cpus": os.cpu_count(),
+  "subprocess_s": round(t_legacy, 1),
+  "in_process_s": round(t_new, 1),
+  "shared_prepare_s": round(t_prepare, 1),
+  "subprocess_trials_per_hour": round(args.trials / t_legacy * 3600),
+  "in_process_trials_per_hour": round(args.trials / t_new * 3600),
+  "speedup": round(t_legacy / t_new, 2),
+ }))
@@ -0,0 +1,95 @@
+"""
+Peak RSS of ML training: in-memory dataset vs memory-mapped store.
+
+Writes --symbols synthetic 5m candle DBs covering --days each, then runs
+every phase in a fresh subprocess and reports its peak RSS (ru_maxrss):
+- inmem: build_dataset()-style arrays per symbol, concatenated, then
+  train_mlp() (TensorDataset over everything) for --epochs
+- build: ml.store.build_store() over the same DBs (one symbol at a time)
+- store: train_mlp_store() streaming from the built store for --epochs
+
+Usage:
+ python tools/bench_ml_store.py --symbols 10 --days 730 --epochs 1
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+
+def peak_rss_mb():
+ return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def phase(name, ws, args):
+ import torch
+ torch.manual_seed(0)
+ dbs = {f"SYM{k}/USDT:USDT": os.path.join(ws, f"sym{k}.db") for k in range(args.symbols)}
+ t0 = time.perf_counter()
+ if name == "inmem":
+  from ml.data import FEATURE_COLUMNS, feature_frame, load_candles, make_labels, split_dataset
+  from ml.train import train_mlp
+  parts = {"X_train": [], "yL_train": [], "yS_train": [], "X_oos": [], "yL_oos": [], "yS_oos": []}
+  for db in dbs.values():
+   df = feature_frame(*load_candles(db, args.days))
+   yL, yS = make_labels(df["c"], 12)
+   d = split_dataset(df[FEATURE_COLUMNS].fillna(0.0).values.astype("float32"), yL, yS, df["ts"].values)
+   for k in parts:
+    parts[k].append(d[k])
+   del df, d
+  data = {k: np.concatenate(v) for k, v in parts.items()}
+  del parts
+  train_mlp(data, epochs=args.epochs, batch=args.batch)
+ elif name == "build":
+  from ml.store import build_store
+  build_store(os.path.join(ws, "store"), dbs, args.days, 12)
+ else:
+  from ml.store import TrainingStore
+  from ml.train import train_mlp_store
+  store = TrainingStore(os.path.join(ws, "store"))
+  train_mlp_store(store, epochs=args.epochs, batch=args.batch)
+ print(json.dumps({"peak_rss_mb": round(peak_rss_mb()), "seconds": round(time.perf_counter() - t0, 1)}))
+
+
+if __name__ == "__main__":
+ ap = argparse.ArgumentParser()
+ ap.add_argument('--symbols', type=int, default=10)
+ ap.add_argument('--days', type=int, default=730)
+ ap.add_argument('--epochs', type=int, default=1)
+ ap.add_argument('--batch', type=int, default=512)
+ ap.add_argument('--phase', type=str, default=None)
+ ap.add_argument('--workspace', type=str, default=None)
+ args = ap.parse_args()
+
+ if args.phase:
+  phase(args.phase, args.workspace, args)
+  sys.exit(0)
+
+ from core.database import connect, insert_candles
+ results = {"symbols": args.symbols, "days": args.days, "epochs": args.epochs}
+ with tempfile.TemporaryDirectory() as ws:
+  n = args.days * 288
+  end = int(time.time()) // 300 * 300
+  for k in range(args.symbols):
+   rng = np.random.default_rng(k)
+   c = 100 * (k + 1) + np.cumsum(rng.normal(0, 0.2 * (k + 1), n)) + 50 * (k + 1)
+   o = np.concatenate([[c[0]], c[:-1]])
+   ts = end - 300 * np.arange(n)[::-1]
+   insert_candles(connect(os.path.join(ws, f"sym{k}.db")),
+                  list(zip(ts.tolist(), o.tolist(), (np.maximum(o, c) + 0.1).tolist(), (np.minimum(o, c) - 0.1).tolist(),
+                           c.tolist(), [1.0] * n)))
+  results["rows"] = n * args.symbols
+  for name in ("inmem", "build", "store"):
+   out = subprocess.check_output([sys.executable, __file__, "--phase", name, "--workspace", ws, "--symbols", str(args.symbols),
+                                  "--days", str(args.days), "--epochs", str(args.epochs), "--batch", str(args.batch)], text=True)
+   results[name] = json.loads(out.strip().splitlines()[-1])
+ print(json.dumps(results))
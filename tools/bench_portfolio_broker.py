@@ -0,0 +1,102 @@
+"""
+20 symbols in one PaperPortfolioBroker pass vs 20 separate PaperFuturesBrokerV2 runs.
+
+Both sides load (synthesize) bars, compute ATR and an EMA-cross entry signal
+per symbol, and trade with the same regime exit plan. The separate runs then
+merge their equity curves afterwards (what optimization/portfolio.py relies
+on); the portfolio run produces the combined curve directly and can reject
+entries when shared margin is exhausted.
+
+Usage:
+ python tools/bench_portfolio_broker.py --symbols 20 --bars 50000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.agents.exits import build_exit_plan
+from broker.paper_portfolio import PaperPortfolioBroker, align_symbols
+from broker.paper_v2 import PaperFuturesBrokerV2
+from core.indicators import atr as calc_atr, ema
+
+ap = argparse.ArgumentParser()
+ap.add_argument('--symbols', type=int, default=20)
+ap.add_argument('--bars', type=int, default=50_000)
+ap.add_argument('--sink', default='memory')
+args = ap.parse_args()
+
+PARAMS = {"sl_tp_style": "atr_trailing", "time_stop_bars": 96}
+CTX = {"tick_size": 0.1}
+EQUITY_PER_SYMBOL = 10_000.0
+
+
+def load(k):
+ rng = np.random.default_rng(k)
+ c = 100 * (k + 1) + np.cumsum(rng.normal(0, 0.2 * (k + 1), args.bars))
+ h = c + rng.uniform(0, 0.3 * (k + 1), args.bars)
+ l = c - rng.uniform(0, 0.3 * (k + 1), args.bars)
+ fast, slow = ema(c, 20), ema(c, 50)
+ cross = np.zeros(args.bars, dtype=np.int8)
+ cross[1:][(fast[1:] > slow[1:]) & (fast[:-1] <= slow[:-1])] = 1
+ cross[1:][(fast[1:] < slow[1:]) & (fast[:-1] >= slow[:-1])] = -1
+ return {"ts": np.arange(args.bars) * 300_000, "high": h, "low": l, "close": c,
+         "atr": calc_atr(h, l, c, 14), "signal": cross.astype(float)}
+
+
+def separate_runs():
+ curves = []
+ trades = 0
+ for k in range(args.symbols):
+  d = load(k)
+  ts, h, l, c, a, sig = (d[key].tolist() for key in ("ts", "high", "low", "close", "atr", "signal"))
+  broker = PaperFuturesBrokerV2(equity=EQUITY_PER_SYMBOL, sink=args.sink, data_dir=f"data/bench_portfolio/{k}")
+  for i in range(len(ts)):
+   broker.on_candle(ts[i], h[i], l[i], c[i], a[i])
+   if sig[i] and broker.position is None:
+    side = "LONG" if sig[i] > 0 else "SHORT"
+    broker.open_with_plan(ts[i], 1.0, c[i], 5.0, build_exit_plan(side, c[i], a[i], PARAMS, CTX))
+  broker.close()
+  trades += broker.sink.trades
+  curves.append(np.array([e for _, e in broker.equity_curve]))
+ combined = np.sum(curves, axis=0)  # post-hoc merge
+ return combined, trades
+
+
+def single_pass():
+ symbols, ts, cols = align_symbols({f"S{k}": load(k) for k in range(args.symbols)},
+                                   ("high", "low", "close", "atr", "signal"))
+ broker = PaperPortfolioBroker(symbols, equity=EQUITY_PER_SYMBOL * args.symbols, sink=args.sink,
+                               data_dir="data/bench_portfolio/all")
+ H, L, C, A, SIG = (cols[key].tolist() for key in ("high", "low", "close", "atr", "signal"))
+ for t in range(len(ts)):
+  c = C[t]
+  broker.on_bar(int(ts[t]), H[t], L[t], c, A[t])
+  for j, s in enumerate(SIG[t]):
+   if s and broker.side[j] == 0:
+    side = "LONG" if s > 0 else "SHORT"
+    broker.open_with_plan(symbols[j], int(ts[t]), 1.0, c[j], 5.0, build_exit_plan(side, c[j], A[t][j], PARAMS, CTX))
+ broker.close()
+ return np.array([e for _, e in broker.equity_curve]), broker.sink.trades, broker.rejected
+
+
+t0 = time.perf_counter(); sep_curve, sep_trades = separate_runs(); sep_s = time.perf_counter() - t0
+t0 = time.perf_counter(); one_curve, one_trades, rejected = single_pass(); one_s = time.perf_counter() - t0
+
+print({
+ 'symbols': args.symbols,
+ 'bars': args.bars,
+ 'sink': args.sink,
+ 'separate_runs_s': round(sep_s, 2),
+ 'single_pass_s': round(one_s, 2),
+ 'speedup': round(sep_s / one_s, 2),
+ 'trades_separate': sep_trades,
+ 'trades_single_pass': one_trades,
+ 'rejected_for_margin': rejected,
+ 'final_equity_separate': round(float(sep_curve[-1]), 2),
+ 'final_equity_single_pass': round(float(one_curve[-1]), 2),
+})
@@ -0,0 +1,78 @@
+"""
+Regime detection cost over a full backtest series.
+
+Compares the per-bar path (new RegimeDetector + sorted ATR window on every
+call), the streaming RegimeDetector.update() and the vectorized
+detect_regime_series(), and checks that all three agree.
+
+Usage:
+ python tools/bench_regime_detector.py --bars 100000 --lookback 100
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.agents.exits import RegimeDetector, detect_regime_series
+from strategies.regime import detect_regime
+
+ap = argparse.ArgumentParser()
+ap.add_argument('--bars', type=int, default=100_000)
+ap.add_argument('--lookback', type=int, default=100)
+args = ap.parse_args()
+
+rng = np.random.default_rng(0)
+n = args.bars
+close = (30_000 + np.cumsum(rng.normal(0, 40, n))).tolist()
+adx = rng.uniform(5, 45, n).tolist()
+atr = rng.uniform(20, 120, n).tolist()
+ema = (np.array(close) * (1 + rng.normal(0, 0.03, n))).tolist()
+feats = {"adx14": adx, "atr14": atr, "ema20": close, "ema200": ema}
+lb = args.lookback
+
+
+def per_bar():
+ det = RegimeDetector(lookback_bars=lb)
+ out = []
+ for i in range(n):
+  out.append("range" if i < lb else det.detect_simple(adx[i], atr[i], atr[max(0, i - lb):i + 1], close[i], ema[i]))
+ return out
+
+
+def streaming():
+ det = RegimeDetector(lookback_bars=lb)
+ out = []
+ for i in range(n):
+  r = det.update(adx[i], atr[i], close[i], ema[i])
+  out.append("range" if i < lb else r)
+ return out
+
+
+def batch():
+ out = detect_regime_series(adx, atr, close, ema, lb)
+ out[:lb] = "range"
+ return out.tolist()
+
+
+def via_strategy():
+ return [detect_regime(i, feats, lb) for i in range(n)]
+
+
+results = {}
+outputs = {}
+for name, fn in (("per_bar", per_bar), ("streaming", streaming), ("batch", batch), ("detect_regime", via_strategy)):
+ t0 = time.perf_counter()
+ outputs[name] = fn()
+ results[name + "_s"] = round(time.perf_counter() - t0, 3)
+
+results["bars"] = n
+results["lookback"] = lb
+results["match"] = all(outputs[k] == outputs["per_bar"] for k in outputs)
+results["speedup_streaming"] = round(results["per_bar_s"] / results["streaming_s"], 1)
+results["speedup_batch"] = round(results["per_bar_s"] / max(results["batch_s"], 1e-9), 1)
+results["speedup_detect_regime"] = round(results["per_bar_s"] / results["detect_regime_s"], 1)
+print(results)
@@ -0,0 +1,108 @@
+"""
+Run summaries: /api/lab/compare and /api/lab/runs latency with and without
+the precomputed run_summaries records.
+
+- compare: N runs x M-bar equity curves. "artifacts" is the previous
+  handler (re-parse every CSV, ship every point), "cold_parse" re-reads the
+  artifacts through lab.equity (cache cleared), "summaries" serves the
+  stored records (one query, no file I/O). JSON serialisation included.
+- listing: --list-runs runs; per-run trial lookups vs one joined query.
+- summarize: time to compute and store one summary (paid once per run, at
+  completion or by `python -m lab.summary --backfill`).
+
+Usage:
+ python tools/bench_run_summary.py --runs 10 --bars 100000
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from bench_lab_compare import legacy_compare, make_lab
+from core import database as db_sqlite
+from lab.equity import equity_cache
+from lab.schemas import RunStatus
+from lab.summary import backfill
+from routers.lab import compare_runs, list_runs
+
+
+def legacy_list(limit):
+ """The previous /runs body: one trials query (and metrics parse) per run"""
+ conn = db_sqlite.connect_lab()
+ out = []
+ for run in db_sqlite.get_all_runs(conn, limit):
+  config = json.loads(run.get('config_json', '{}'))
+  starting_equity = config.get('risk', {}).get('starting_equity', 10000.0)
+  trials = db_sqlite.get_run_trials(conn, run['id'], limit=1)
+  if run['status'] == 'completed' and trials:
+   starting_equity * (1 + json.loads(trials[0]['metrics_json']).get('total_profit', 0) / 100)
+  out.append(RunStatus(run_id=run["id"], status=run["status"], progress=1.0 if run["status"] == "completed" else 0.0,
+                       best_score=trials[0]['score'] if trials else None,
+                       started_at=run.get("started_at"), completed_at=run.get("completed_at")))
+ conn.close()
+ return out
+
+
+def _timed(fn, repeat):
+ times = []
+ for _ in range(repeat):
+  t0 = time.perf_counter()
+  json.dumps(fn(), default=lambda o: o.model_dump())
+  times.append(time.perf_counter() - t0)
+ return round(statistics.median(times) * 1000, 1)
+
+
+if __name__ == "__main__":
+ ap = argparse.ArgumentParser()
+ ap.add_argument('--runs', type=int, default=10)
+ ap.add_argument('--bars', type=int, default=100_000)
+ ap.add_argument('--list-runs', type=int, default=500)
+ ap.add_argument('--trials', type=int, default=50)
+ ap.add_argument('--repeat', type=int, default=3)
+ args = ap.parse_args()
+
+ os.chdir(tempfile.mkdtemp(prefix="bench_summary_"))
+ run_ids = make_lab(args.runs, args.bars)
+ conn = db_sqlite.connect_lab()
+
+ def add_runs(ids, create):
+  for run_id in ids:
+   if create:
+    db_sqlite.create_run(conn, run_id, run_id, "optuna", {"data": {}, "risk": {"starting_equity": 10000.0}})
+   for t in range(args.trials):
+    db_sqlite.insert_trial(conn, run_id, t, {"p": t}, {"total_profit": t * 0.1, "sharpe": 1.0}, float(t))
+   db_sqlite.update_run_status(conn, run_id, "completed", completed_at=int(time.time()))
+
+ add_runs(run_ids, create=False)
+ t0 = time.perf_counter()
+ backfill(conn)
+ summarize_ms = round((time.perf_counter() - t0) / len(run_ids) * 1000, 1)
+ add_runs([f"list-{k}" for k in range(args.list_runs - len(run_ids))], create=True)
+ backfill(conn)
+ conn.close()
+
+ def cold_parse():
+  equity_cache.clear()
+  return asyncio.run(compare_runs(run_ids, width=999))   # not the stored width: reads artifacts
+
+ print(json.dumps({
+  "runs": args.runs, "bars": args.bars,
+  "compare_ms": {
+   "artifacts": _timed(lambda: legacy_compare(run_ids), args.repeat),
+   "cold_parse": _timed(cold_parse, args.repeat),
+   "summaries": _timed(lambda: asyncio.run(compare_runs(run_ids)), args.repeat),
+  },
+  "list_runs": args.list_runs,
+  "list_ms": {
+   "per_run_queries": _timed(lambda: legacy_list(args.list_runs), args.repeat),
+   "summaries": _timed(lambda: asyncio.run(list_runs(args.list_runs)), args.repeat),
+  },
+  "summarize_ms_per_run": summarize_ms,
+ }, indent=2))
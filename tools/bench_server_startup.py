@@ -0,0 +1,49 @@
+"""
+API cold start: wall time and peak RSS of `import server.main` in a fresh
+interpreter (median of --runs), plus which heavy modules were loaded.
+
+Point --root at another checkout to compare (e.g. a `git worktree` of the
+previous commit).
+
+Usage:
+ python tools/bench_server_startup.py --runs 5
+ python tools/bench_server_startup.py --runs 5 --root /tmp/baseline
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+PROBE = """
+import sys, time
+t0 = time.perf_counter()
+import server.main
+dt = time.perf_counter() - t0
+with open("/proc/self/status") as f:
+    hwm = next(int(line.split()[1]) for line in f if line.startswith("VmHWM"))
+heavy = [m for m in ("pandas", "numpy", "ccxt", "optuna", "torch", "sklearn", "strategies") if m in sys.modules]
+print("RESULT", dt, hwm / 1024, ",".join(heavy))
+"""
+
+
+if __name__ == "__main__":
+ ap = argparse.ArgumentParser()
+ ap.add_argument('--runs', type=int, default=5)
+ ap.add_argument('--root', type=str, default=ROOT)
+ args = ap.parse_args()
+
+ times, rss, heavy = [], [], ""
+ for _ in range(args.runs):
+  out = subprocess.run([sys.executable, "-c", PROBE], cwd=args.root, capture_output=True, text=True, check=True).stdout
+  _, dt, hwm, *rest = next(line for line in out.splitlines() if line.startswith("RESULT")).split(" ")
+  times.append(float(dt)); rss.append(float(hwm)); heavy = rest[0] if rest else ""
+ print(json.dumps({
+  "root": args.root,
+  "import_s": round(statistics.median(times), 3),
+  "peak_rss_mb": round(statistics.median(rss)),
+  "heavy_modules": heavy.split(",") if heavy else [],
+ }))
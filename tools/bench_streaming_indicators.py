@@ -0,0 +1,77 @@
+"""
+Per-tick latency: streaming indicator engine vs batch recompute.
+
+Simulates the agent loop with N symbols: every tick each symbol closes one new
+bar. The batch path recomputes EMA/RSI/ATR/ADX/Bollinger/Donchian/SuperTrend/VWAP
+over the whole lookback window (what a policy does today); the streaming path
+feeds the new bar to StreamingIndicatorEngine.
+
+Usage:
+ python tools/bench_streaming_indicators.py --symbols 50 --lookback 1000 --ticks 50
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core import indicators as batch
+from core.indicators_streaming import StreamingIndicatorEngine
+
+ap = argparse.ArgumentParser()
+ap.add_argument('--symbols', type=int, default=50)
+ap.add_argument('--lookback', type=int, default=1000)
+ap.add_argument('--ticks', type=int, default=50)
+args = ap.parse_args()
+
+n = args.lookback + args.ticks
+rng = np.random.default_rng(0)
+data = {}
+for s in range(args.symbols):
+ c = 100 + np.cumsum(rng.normal(0, 0.5, n))
+ o = np.concatenate([[c[0]], c[:-1]])
+ h = np.maximum(o, c) + rng.uniform(0, 0.3, n)
+ l = np.minimum(o, c) - rng.uniform(0, 0.3, n)
+ v = rng.uniform(1, 100, n)
+ ts = np.arange(n) * 300_000
+ data[f'SYM{s}'] = (ts, o, h, l, c, v)
+
+
+def batch_tick(end):
+ for ts, o, h, l, c, v in data.values():
+  w = slice(end - args.lookback, end)
+  batch.ema(c[w], 20); batch.ema(c[w], 50); batch.ema(c[w], 200)
+  batch.rsi(c[w], 14); batch.atr(h[w], l[w], c[w], 14); batch.adx(h[w], l[w], c[w], 14)
+  batch.bollinger(c[w], 20, 2.0); batch.donchian(h[w], l[w], 55)
+  batch.supertrend(h[w], l[w], c[w], 10, 3.0); batch.vwap(h[w], l[w], c[w], v[w])
+
+
+engine = StreamingIndicatorEngine()
+for sym, (ts, o, h, l, c, v) in data.items():
+ for i in range(args.lookback):
+  engine.on_bar_close(sym, {'ts': int(ts[i]), 'open': o[i], 'high': h[i], 'low': l[i], 'close': c[i], 'volume': v[i]})
+
+
+def stream_tick(i):
+ for sym, (ts, o, h, l, c, v) in data.items():
+  engine.on_bar_close(sym, {'ts': int(ts[i]), 'open': o[i], 'high': h[i], 'low': l[i], 'close': c[i], 'volume': v[i]})
+
+
+batch_ms = []
+stream_ms = []
+for k in range(args.ticks):
+ i = args.lookback + k
+ t0 = time.perf_counter(); batch_tick(i + 1); batch_ms.append((time.perf_counter() - t0) * 1000)
+ t0 = time.perf_counter(); stream_tick(i); stream_ms.append((time.perf_counter() - t0) * 1000)
+
+print({
+ 'symbols': args.symbols,
+ 'lookback': args.lookback,
+ 'batch_tick_ms_p50': round(float(np.median(batch_ms)), 3),
+ 'stream_tick_ms_p50': round(float(np.median(stream_ms)), 3),
+ 'stream_tick_ms_p99': round(float(np.percentile(stream_ms, 99)), 3),
+ 'speedup': round(float(np.median(batch_ms) / max(np.median(stream_ms), 1e-9)), 1),
+})
@@ -0,0 +1,94 @@
+"""
+Exit-plan construction cost for high-trade-count strategies.
+
+Builds an exit plan at every `--every`-th bar (both sides) with the
+per-entry path (get_swing_levels window scan + per-call regime detection)
+and with build_regime_exit_plan(), which looks swing levels and regimes up
+from series precomputed once per dataset. Plans must be identical.
+
+Usage:
+ python tools/bench_swing_levels.py --bars 200000 --every 5
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.agents.exits import RegimeDetector, build_exit_plan, get_swing_levels, swing_level_series
+from strategies.regime import build_regime_exit_plan
+
+ap = argparse.ArgumentParser()
+ap.add_argument('--bars', type=int, default=200_000)
+ap.add_argument('--every', type=int, default=5, help='entry every N bars')
+args = ap.parse_args()
+
+rng = np.random.default_rng(0)
+n = args.bars
+c_arr = 30_000 + np.cumsum(rng.normal(0, 40, n))
+c = c_arr.tolist()
+h = (c_arr + rng.uniform(5, 60, n)).tolist()
+l = (c_arr - rng.uniform(5, 60, n)).tolist()
+atr = rng.uniform(20, 120, n).tolist()
+feats = {
+ "adx14": rng.uniform(5, 45, n).tolist(), "atr14": atr, "ema20": c,
+ "ema200": (c_arr * (1 + rng.normal(0, 0.03, n))).tolist(),
+ "supertrend": (c_arr - 80).tolist(), "keltner_lo": (c_arr - 120).tolist(), "keltner_up": (c_arr + 120).tolist(),
+}
+params = {"sl_tp_style": "structure_atr"}
+entries = range(100, n, args.every)
+
+
+def per_entry():
+ plans = []
+ for i in entries:
+  det = RegimeDetector(lookback_bars=100)
+  regime = det.detect_simple(feats['adx14'][i], atr[i], atr[max(0, i - 100):i + 1], c[i], feats['ema200'][i])
+  swing_low, swing_high = get_swing_levels(h, l, lookback=20, current_idx=i)
+  for side in ("LONG", "SHORT"):
+   ctx = {"tick_size": 0.1, "swing_low": swing_low, "swing_high": swing_high,
+          "keltner_lo": feats['keltner_lo'][i], "keltner_up": feats['keltner_up'][i],
+          "supertrend": feats['supertrend'][i]}
+   plans.append(build_exit_plan(side=side, entry=c[i], atr=atr[i], params=params, ctx=ctx, regime_hint=regime))
+ return plans
+
+
+def precomputed():
+ plans = []
+ for i in entries:
+  for side in ("LONG", "SHORT"):
+   plans.append(build_regime_exit_plan(side, c[i], atr[i], i, h, l, feats, params))
+ return plans
+
+
+def swing_scan():
+ t0 = time.perf_counter()
+ out = [get_swing_levels(h, l, lookback=20, current_idx=i) for i in entries]
+ return time.perf_counter() - t0, out
+
+
+def swing_lookup():
+ t0 = time.perf_counter()
+ lo, hi = swing_level_series(h, l, 20)
+ out = [(float(lo[i]), float(hi[i])) for i in entries]
+ return time.perf_counter() - t0, out
+
+
+results = {"bars": n, "plans": 2 * len(entries)}
+t0 = time.perf_counter()
+ref = per_entry()
+results["per_entry_s"] = round(time.perf_counter() - t0, 3)
+t0 = time.perf_counter()
+new = precomputed()
+results["precomputed_s"] = round(time.perf_counter() - t0, 3)
+scan_s, scan = swing_scan()
+lookup_s, lookup = swing_lookup()
+results["swing_scan_s"] = round(scan_s, 3)
+results["swing_precomputed_s"] = round(lookup_s, 3)
+results["swing_speedup"] = round(scan_s / lookup_s, 1)
+results["identical"] = ref == new and scan == lookup
+results["speedup"] = round(results["per_entry_s"] / results["precomputed_s"], 2)
+print(results)
@@ -155,7 +155,7 @@ disabled={selectedRuns.length < 2 || compareMutation.isPending}
     <tbody>
        {comparisonData.map((run, idx) => {
              const colors = ['text-blue-500', 'text-green-500', 'text-orange-500', 'text-purple-500', 'text-pink-500'];
-   const metrics = JSON.parse(run.metrics as any);
+   const metrics = run.metrics || {};
      
    return (
             <tr key={run.run_id} className="border-b hover:bg-muted/50">
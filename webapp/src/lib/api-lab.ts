@@ -9,6 +9,7 @@ import type {
   StrategyDefinition,
   BacktestMetrics
 } from '@/domain/strategy';
+import { CANDLE_MEDIA_TYPE, decodeCandles } from './candle-codec';
 
 // ============================================================================
 // BASE CLIENT
@@ -280,6 +281,41 @@ export async function getRunCandles(runId: string): Promise<CandlesResponse> {
   }
 }
 
+export interface CandlesPage {
+  symbol: string;
+  timeframe: string;
+  candles: CandleData[];
+  nextCursor: number | null; // pass as `before` to load the preceding page
+}
+
+export async function getRunCandlesPage(runId: string, before?: number, limit = 2000): Promise<CandlesPage> {
+  try {
+    const response = await api.get<ArrayBuffer>(`/run/${runId}/candles`, {
+      params: { before, limit },
+      headers: { Accept: CANDLE_MEDIA_TYPE },
+      responseType: 'arraybuffer'
+    });
+    const cols = decodeCandles(response.data);
+    const candles: CandleData[] = Array.from(cols.ts, (ts, k) => ({
+      time: Math.floor(ts / 1000),
+      open: cols.open[k],
+      high: cols.high[k],
+      low: cols.low[k],
+      close: cols.close[k],
+      volume: cols.volume[k]
+    }));
+    const cursor = response.headers['x-next-cursor'];
+    return {
+      symbol: response.headers['x-symbol'],
+      timeframe: response.headers['x-timeframe'],
+      candles,
+      nextCursor: cursor ? Number(cursor) : null
+    };
+  } catch (error) {
+    return handleError(error);
+  }
+}
+
 export interface EquityPoint {
   time: number;
   equity: number;
@@ -290,9 +326,10 @@ export interface EquityResponse {
   equity: EquityPoint[];
 }
 
-export async function getRunEquity(runId: string): Promise<EquityResponse> {
+export async function getRunEquity(runId: string, width?: number): Promise<EquityResponse> {
   try {
-    const { data } = await api.get<EquityResponse>(`/run/${runId}/equity`);
+    // width: chart width in px; the server downsamples to about that many points
+    const { data } = await api.get<EquityResponse>(`/run/${runId}/equity`, { params: { width } });
     return data;
 } catch (error) {
     return handleError(error);
@@ -0,0 +1,42 @@
+/**
+ * Binary candle payloads (see core/candle_codec.py)
+ *
+ * Columnar little-endian layout: 24-byte header, delta-encoded timestamps
+ * (int32, or int64 when flags & 1), then float32 open/high/low/close/volume.
+ * The browser undoes any gzip/br Content-Encoding before we see the bytes.
+ */
+
+export const CANDLE_MEDIA_TYPE = 'application/vnd.smarttrade.candles';
+
+const HEADER_BYTES = 24;
+const FLAG_TS64 = 1;
+
+export interface CandleColumns {
+  ts: Float64Array; // epoch ms
+  open: Float32Array;
+  high: Float32Array;
+  low: Float32Array;
+  close: Float32Array;
+  volume: Float32Array;
+}
+
+export function decodeCandles(buffer: ArrayBuffer): CandleColumns {
+  const view = new DataView(buffer);
+  const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+  if (magic !== 'CNDL' || view.getUint16(4, true) !== 1) {
+    throw new Error('Not a v1 candle payload');
+  }
+  const flags = view.getUint16(6, true);
+  const n = view.getUint32(8, true);
+  const ts = new Float64Array(n);
+  let t = Number(view.getBigInt64(16, true));
+  let offset = HEADER_BYTES;
+  const wide = (flags & FLAG_TS64) !== 0;
+  for (let k = 0; k < n; k++) {
+    t += wide ? Number(view.getBigInt64(offset + 8 * k, true)) : view.getInt32(offset + 4 * k, true);
+    ts[k] = t;
+  }
+  offset += n * (wide ? 8 : 4);
+  const column = (j: number) => new Float32Array(buffer, offset + 4 * n * j, n);
+  return { ts, open: column(0), high: column(1), low: column(2), close: column(3), volume: column(4) };
+}